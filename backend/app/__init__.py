@@ -1,4 +1,5 @@
 import os
+import json
 from flask import Flask
 from dotenv import load_dotenv
 from flask_cors import CORS  # Import CORS
@@ -10,6 +11,10 @@ def create_app(test_config=None):
     """Create and configure the Flask application."""
     app = Flask(__name__, instance_relative_config=True)
     
+    # Use orjson for API responses when it is installed
+    from app.utils.json_codec import FastJSONProvider
+    app.json = FastJSONProvider(app)
+    
     # Enable CORS for all routes to allow React frontend to access the API
     CORS(app, resources={r"/api/*": {"origins": "*"}})
     
@@ -18,7 +23,63 @@ def create_app(test_config=None):
         SECRET_KEY=os.environ.get('SECRET_KEY', 'dev'),
         DATABASE_URI=os.environ.get('DATABASE_URI', 'sqlite:///data/bluesky_data.db'),
         BLUESKY_USERNAME=os.environ.get('BLUESKY_USERNAME', ''),
-        BLUESKY_PASSWORD=os.environ.get('BLUESKY_PASSWORD', '')
+        BLUESKY_PASSWORD=os.environ.get('BLUESKY_PASSWORD', ''),
+        DEDUP_ENABLED=os.environ.get('DEDUP_ENABLED', 'true').lower() == 'true',
+        DEDUP_THRESHOLD=float(os.environ.get('DEDUP_THRESHOLD', 0.8)),
+        DEDUP_MODE=os.environ.get('DEDUP_MODE', 'drop'),
+        STORAGE_BACKEND=os.environ.get('STORAGE_BACKEND', 'sqlite'),  # 'sqlite' or 'files'
+        DATABASE_IMPORT_FILES=os.environ.get('DATABASE_IMPORT_FILES', 'true').lower() == 'true',
+        SUMMARY_LOADER_WORKERS=int(os.environ.get('SUMMARY_LOADER_WORKERS', 4)),
+        SUMMARY_LOADER_PROCESSES=os.environ.get('SUMMARY_LOADER_PROCESSES', 'false').lower() == 'true',
+        STORAGE_FORMAT=os.environ.get('STORAGE_FORMAT', 'json'),  # 'json', 'jsonl', 'parquet' or 'arrow'
+        PARTITIONED_LAYOUT=os.environ.get('PARTITIONED_LAYOUT', 'true').lower() == 'true',
+        PARTITION_MAX_LAG_HOURS=float(os.environ.get('PARTITION_MAX_LAG_HOURS', 168)),
+        COMPACTION_SMALL_FILE_BYTES=int(os.environ.get('COMPACTION_SMALL_FILE_BYTES', 8 * 1024 * 1024)),
+        COMPACTION_MIN_FILES=int(os.environ.get('COMPACTION_MIN_FILES', 2)),
+        COMPACTION_MIN_AGE=float(os.environ.get('COMPACTION_MIN_AGE', 3600)),
+        COMPACTION_GRACE_PERIOD=float(os.environ.get('COMPACTION_GRACE_PERIOD', 300)),
+        SEEN_INDEX_ENABLED=os.environ.get('SEEN_INDEX_ENABLED', 'true').lower() == 'true',
+        SEEN_INDEX_PATH=os.environ.get('SEEN_INDEX_PATH', ''),
+        SEEN_INDEX_CAPACITY=int(os.environ.get('SEEN_INDEX_CAPACITY', 1000000)),
+        SEEN_INDEX_ERROR_RATE=float(os.environ.get('SEEN_INDEX_ERROR_RATE', 0.01)),
+        WEIGHT_LIKES=float(os.environ.get('WEIGHT_LIKES', 1.0)),
+        WEIGHT_REPOSTS=float(os.environ.get('WEIGHT_REPOSTS', 2.0)),
+        WEIGHT_REPLIES=float(os.environ.get('WEIGHT_REPLIES', 1.0)),
+        WEIGHT_FOLLOWERS=float(os.environ.get('WEIGHT_FOLLOWERS', 0.0)),
+        WEIGHT_TRANSFORM=os.environ.get('WEIGHT_TRANSFORM', 'log'),  # 'log' or 'linear'
+        WEIGHT_CAP=float(os.environ['WEIGHT_CAP']) if os.environ.get('WEIGHT_CAP') else None,
+        PRICE_PROVIDER=os.environ.get('PRICE_PROVIDER', 'local'),
+        PRICE_DATA_DIR=os.environ.get('PRICE_DATA_DIR', 'data/prices'),
+        HTTP_CACHE_CONTROL=os.environ.get('HTTP_CACHE_CONTROL', 'no-cache'),
+        COMPRESS_MIN_SIZE=int(os.environ.get('COMPRESS_MIN_SIZE', 500)),
+        RESPONSE_CACHE_ENTRIES=int(os.environ.get('RESPONSE_CACHE_ENTRIES', 256)),
+        RESPONSE_CACHE_MAX_BYTES=int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 32 * 1024 * 1024)),
+        MANIFEST_REFRESH_INTERVAL=float(os.environ.get('MANIFEST_REFRESH_INTERVAL', 2.0)),
+        ADMISSION_CONTROL=os.environ.get('ADMISSION_CONTROL', 'true').lower() == 'true',
+        ADMISSION_LIMITS=json.loads(os.environ['ADMISSION_LIMITS']) if os.environ.get('ADMISSION_LIMITS') else None,
+        JOB_WORKERS=int(os.environ.get('JOB_WORKERS', 2)),
+        JOB_QUEUE_SIZE=int(os.environ.get('JOB_QUEUE_SIZE', 20)),
+        JOB_STORE_PATH=os.environ.get('JOB_STORE_PATH', ''),
+        ASYNC_JOB_QUEUE_SIZE=int(os.environ.get('ASYNC_JOB_QUEUE_SIZE', 500)),
+        ASYNC_EXECUTOR_WORKERS=int(os.environ.get('ASYNC_EXECUTOR_WORKERS', 4)),
+        FETCH_CONCURRENCY=int(os.environ.get('FETCH_CONCURRENCY', 4)),
+        BLUESKY_RATE_LIMIT=float(os.environ.get('BLUESKY_RATE_LIMIT', 4.0)),
+        BLUESKY_RATE_BURST=int(os.environ.get('BLUESKY_RATE_BURST', 4)),
+        ENGAGEMENT_REFRESH_MAX_AGE_HOURS=float(os.environ.get('ENGAGEMENT_REFRESH_MAX_AGE_HOURS', 48)),
+        ENGAGEMENT_REFRESH_MAX_POSTS=int(os.environ.get('ENGAGEMENT_REFRESH_MAX_POSTS', 2500)),
+        ENGAGEMENT_REFRESH_SETTLE_SECONDS=float(os.environ.get('ENGAGEMENT_REFRESH_SETTLE_SECONDS', 300)),
+        PIPELINE_QUEUE_SIZE=int(os.environ.get('PIPELINE_QUEUE_SIZE', 100)),
+        SSE_HEARTBEAT_SECONDS=float(os.environ.get('SSE_HEARTBEAT_SECONDS', 15)),
+        ANOMALY_DETECTION=os.environ.get('ANOMALY_DETECTION', 'true').lower() == 'true',
+        ANOMALY_BUCKET_SECONDS=float(os.environ.get('ANOMALY_BUCKET_SECONDS', 3600)),
+        ANOMALY_ALPHA=float(os.environ.get('ANOMALY_ALPHA', 0.1)),
+        ANOMALY_Z_THRESHOLD=float(os.environ.get('ANOMALY_Z_THRESHOLD', 3.0)),
+        ANOMALY_MIN_BUCKETS=int(os.environ.get('ANOMALY_MIN_BUCKETS', 5)),
+        ANOMALY_MIN_POSTS=int(os.environ.get('ANOMALY_MIN_POSTS', 5)),
+        ANOMALY_MAX_EVENTS=int(os.environ.get('ANOMALY_MAX_EVENTS', 500)),
+        ANOMALY_LATENESS_SECONDS=float(os.environ.get('ANOMALY_LATENESS_SECONDS', 3600)),
+        USE_TRANSFORMERS=os.environ.get('USE_TRANSFORMERS', 'true').lower() == 'true',
+        PRELOAD_MODELS=os.environ.get('PRELOAD_MODELS', 'true').lower() == 'true'
     )
     
     if test_config is None:
@@ -42,6 +103,18 @@ def create_app(test_config=None):
     from app.api.routes import api_bp
     app.register_blueprint(api_bp, url_prefix='/api')
     
+    # Backfill a new database from the stored files in a background job
+    from app.api.tasks import queue_file_import
+    app.before_request(queue_file_import)
+    
+    # Register command line commands
+    from app.commands import register_commands
+    register_commands(app)
+    
+    # Watch newly scored posts for volume spikes and sentiment shifts
+    from app.utils.anomalies import get_anomaly_detector
+    get_anomaly_detector(app)
+    
     # Initialize NLTK
     import nltk
     try:
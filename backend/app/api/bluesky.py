@@ -1,21 +1,84 @@
 import os
 import time
 import logging
-from atproto import Client
+import asyncio
+from contextlib import asynccontextmanager
+from atproto import Client, AsyncClient
 from datetime import datetime, timedelta
 
+# Maximum number of URIs per getPosts request
+GET_POSTS_BATCH_SIZE = 25
+
+# Maximum number of actors per getProfiles request
+GET_PROFILES_BATCH_SIZE = 25
+
+
+def extract_engagement(post):
+    """Get the engagement counts of a post view."""
+    return {
+        'likes': getattr(post, 'likeCount', 0) or 0,
+        'replies': getattr(post, 'replyCount', 0) or 0,
+        'reposts': getattr(post, 'repostCount', 0) or 0
+    }
+
+
+def extract_follower_counts(response):
+    """Get the follower counts of the profiles of a getProfiles response, by handle."""
+    return {
+        profile.handle: getattr(profile, 'followersCount', None)
+        for profile in getattr(response, 'profiles', [])
+    }
+
+
+def extract_posts(search_results, keyword, days_back):
+    """Extract the posts of a search response that fall in the time range.
+    
+    Args:
+        search_results: Response of a searchPosts call
+        keyword (str): Keyword that was searched for
+        days_back (int): Number of days to look back
+        
+    Returns:
+        list: Post dictionaries
+    """
+    posts = []
+    
+    if hasattr(search_results, 'posts'):
+        for post in search_results.posts:
+            # Check if post is within the time range
+            created_at = datetime.fromisoformat(post.indexedAt.replace('Z', '+00:00'))
+            if created_at > datetime.now(created_at.tzinfo) - timedelta(days=days_back):
+                # Extract relevant information
+                posts.append({
+                    'id': post.uri,
+                    'text': post.record.text if hasattr(post.record, 'text') else '',
+                    'author': post.author.handle,
+                    'created_at': post.indexedAt,
+                    **extract_engagement(post),
+                    'keyword': keyword
+                })
+    
+    return posts
+
+
 class BlueskyAPI:
     """Class to interact with the Bluesky API."""
     
-    def __init__(self, username=None, password=None):
+    def __init__(self, username=None, password=None, rate_limiter=None, fetch_followers=False):
         """Initialize the Bluesky API client.
         
         Args:
             username (str): Bluesky username or email
             password (str): Bluesky password
+            rate_limiter (RateLimiter): Request budget shared with other
+                clients, or None to pause one second after each request
+            fetch_followers (bool): Look up the follower count of each post's
+                author ('author_followers'); search results do not include it
         """
         self.username = username or os.environ.get('BLUESKY_USERNAME')
         self.password = password or os.environ.get('BLUESKY_PASSWORD')
+        self.rate_limiter = rate_limiter
+        self.fetch_followers = fetch_followers
         self.client = None
         self.logger = logging.getLogger(__name__)
         
@@ -46,15 +109,32 @@ class BlueskyAPI:
         Returns:
             list: List of posts matching the keywords
         """
+        return list(self.iter_posts(keywords, limit, days_back))
+    
+    def iter_posts(self, keywords, limit=100, days_back=7):
+        """Fetch posts from Bluesky, yielding them as each search returns.
+        
+        Args:
+            keywords (list): List of keywords to search for
+            limit (int): Maximum number of posts to fetch
+            days_back (int): Number of days to look back
+            
+        Yields:
+            dict: Posts matching the keywords
+        """
         if not self.connect():
             raise Exception("Failed to connect to Bluesky API")
         
-        results = []
+        count = 0
+        followers = {}
         
         for keyword in keywords:
             self.logger.info(f"Searching for posts with keyword: {keyword}")
             
             try:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.wait()
+                
                 # Search for posts with the keyword
                 search_results = self.client.app.bsky.feed.searchPosts({
                     'q': keyword.strip(),
@@ -62,33 +142,59 @@ class BlueskyAPI:
                 })
                 
                 # Process search results
-                if hasattr(search_results, 'posts'):
-                    for post in search_results.posts:
-                        # Check if post is within the time range
-                        created_at = datetime.fromisoformat(post.indexedAt.replace('Z', '+00:00'))
-                        if created_at > datetime.now(created_at.tzinfo) - timedelta(days=days_back):
-                            # Extract relevant information
-                            post_data = {
-                                'id': post.uri,
-                                'text': post.record.text if hasattr(post.record, 'text') else '',
-                                'author': post.author.handle,
-                                'created_at': post.indexedAt,
-                                'likes': getattr(post, 'likeCount', 0),
-                                'replies': getattr(post, 'replyCount', 0),
-                                'reposts': getattr(post, 'repostCount', 0),
-                                'keyword': keyword
-                            }
-                            
-                            results.append(post_data)
+                posts = extract_posts(search_results, keyword, days_back)
+                if self.fetch_followers:
+                    self._add_follower_counts(posts, followers)
+                count += len(posts)
+                yield from posts
                 
-                # Respect rate limits
-                time.sleep(1)
+                if self.rate_limiter is None:
+                    # Respect rate limits
+                    time.sleep(1)
                 
             except Exception as e:
                 self.logger.error(f"Error fetching posts for keyword '{keyword}': {str(e)}")
         
-        self.logger.info(f"Fetched {len(results)} posts in total")
-        return results
+        self.logger.info(f"Fetched {count} posts in total")
+    
+    def get_follower_counts(self, handles):
+        """Get the follower counts of users, GET_PROFILES_BATCH_SIZE per request.
+        
+        Args:
+            handles (list): User handles
+            
+        Returns:
+            dict: Follower count per handle (users in failed requests are missing)
+        """
+        handles = list(handles)
+        counts = {}
+        
+        for start in range(0, len(handles), GET_PROFILES_BATCH_SIZE):
+            batch = handles[start:start + GET_PROFILES_BATCH_SIZE]
+            try:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.wait()
+                response = self.client.app.bsky.actor.getProfiles({'actors': batch})
+                counts.update(extract_follower_counts(response))
+                
+                if self.rate_limiter is None:
+                    # Respect rate limits
+                    time.sleep(1)
+            
+            except Exception as e:
+                self.logger.error(f"Error fetching profiles of {len(batch)} users: {str(e)}")
+        
+        return counts
+    
+    def _add_follower_counts(self, posts, followers):
+        """Set 'author_followers' on posts, looking up authors not in the followers cache."""
+        missing = sorted({post['author'] for post in posts} - followers.keys())
+        if missing:
+            counts = self.get_follower_counts(missing)
+            followers.update({handle: counts.get(handle) for handle in missing})
+        
+        for post in posts:
+            post['author_followers'] = followers.get(post['author'])
     
     def get_user_info(self, username):
         """Get information about a Bluesky user.
@@ -103,6 +209,8 @@ class BlueskyAPI:
             raise Exception("Failed to connect to Bluesky API")
         
         try:
+            if self.rate_limiter is not None:
+                self.rate_limiter.wait()
             response = self.client.app.bsky.actor.getProfile({'actor': username})
             
             user_info = {
@@ -139,4 +247,198 @@ class BlueskyAPI:
             
         except Exception as e:
             self.logger.error(f"Error fetching trending topics: {str(e)}")
-            return [] 
\ No newline at end of file
+            return []
+
+
+class AsyncBlueskyAPI:
+    """Non-blocking client for the Bluesky API.
+    
+    Searches run on an asyncio event loop, so many fetches can wait on the
+    network at the same time without holding a thread each.
+    """
+    
+    def __init__(self, username=None, password=None, concurrency=4, rate_limiter=None, fetch_followers=False):
+        """Initialize the client.
+        
+        Args:
+            username (str): Bluesky username or email
+            password (str): Bluesky password
+            concurrency (int): Maximum number of requests in flight per client
+            rate_limiter (RateLimiter): Request budget shared with other clients;
+                without one, each request slot pauses for a second after use
+            fetch_followers (bool): Look up the follower count of each post's
+                author ('author_followers'); search results do not include it
+        """
+        self.username = username or os.environ.get('BLUESKY_USERNAME')
+        self.password = password or os.environ.get('BLUESKY_PASSWORD')
+        self.concurrency = concurrency
+        self.rate_limiter = rate_limiter
+        self.fetch_followers = fetch_followers
+        self.client = None
+        self.logger = logging.getLogger(__name__)
+    
+    async def connect(self):
+        """Connect to the Bluesky API."""
+        if not self.client:
+            try:
+                client = AsyncClient()
+                await client.login(self.username, self.password)
+                self.client = client
+                self.logger.info("Successfully connected to Bluesky API")
+                return True
+            except Exception as e:
+                self.logger.error(f"Failed to connect to Bluesky API: {str(e)}")
+                return False
+        return True
+    
+    async def search(self, keyword, limit=100, days_back=7):
+        """Search for posts with one keyword.
+        
+        Args:
+            keyword (str): Keyword to search for
+            limit (int): Maximum number of posts to fetch
+            days_back (int): Number of days to look back
+            
+        Returns:
+            list: Posts matching the keyword (empty if the search failed)
+        """
+        self.logger.info(f"Searching for posts with keyword: {keyword}")
+        
+        try:
+            search_results = await self.client.app.bsky.feed.searchPosts({
+                'q': keyword.strip(),
+                'limit': limit
+            })
+            return extract_posts(search_results, keyword, days_back)
+        
+        except Exception as e:
+            self.logger.error(f"Error fetching posts for keyword '{keyword}': {str(e)}")
+            return []
+    
+    async def fetch_posts(self, keywords, limit=100, days_back=7, on_posts=None):
+        """Fetch posts for several keywords concurrently.
+        
+        Args:
+            keywords (list): List of keywords to search for
+            limit (int): Maximum number of posts to fetch per keyword
+            days_back (int): Number of days to look back
+            on_posts (callable): Called with each keyword's posts as they arrive
+            
+        Returns:
+            list: Posts matching the keywords, in keyword order
+        """
+        if not await self.connect():
+            raise Exception("Failed to connect to Bluesky API")
+        
+        semaphore = asyncio.Semaphore(self.concurrency)
+        
+        async def search(keyword):
+            async with self._request_slot(semaphore):
+                posts = await self.search(keyword, limit, days_back)
+                if on_posts is not None:
+                    on_posts(posts)
+                return posts
+        
+        results = await asyncio.gather(*(search(keyword) for keyword in keywords))
+        posts = [post for keyword_posts in results for post in keyword_posts]
+        
+        if self.fetch_followers and posts:
+            followers = await self.fetch_follower_counts(sorted({post['author'] for post in posts}))
+            for post in posts:
+                post['author_followers'] = followers.get(post['author'])
+        
+        self.logger.info(f"Fetched {len(posts)} posts in total")
+        return posts
+    
+    async def fetch_follower_counts(self, handles):
+        """Get the follower counts of users, GET_PROFILES_BATCH_SIZE per request.
+        
+        Args:
+            handles (list): User handles
+            
+        Returns:
+            dict: Follower count per handle (users in failed requests are missing)
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        
+        async def fetch(batch):
+            async with self._request_slot(semaphore):
+                try:
+                    response = await self.client.app.bsky.actor.getProfiles({'actors': batch})
+                    return extract_follower_counts(response)
+                except Exception as e:
+                    self.logger.error(f"Error fetching profiles of {len(batch)} users: {str(e)}")
+                    return {}
+        
+        batches = [handles[start:start + GET_PROFILES_BATCH_SIZE]
+                   for start in range(0, len(handles), GET_PROFILES_BATCH_SIZE)]
+        counts = {}
+        for batch_counts in await asyncio.gather(*(fetch(batch) for batch in batches)):
+            counts.update(batch_counts)
+        return counts
+    
+    @asynccontextmanager
+    async def _request_slot(self, semaphore):
+        """Hold one of the client's request slots while respecting rate limits."""
+        async with semaphore:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+            
+            yield
+            
+            if self.rate_limiter is None:
+                # Respect rate limits
+                await asyncio.sleep(1)
+    
+    async def get_engagement(self, uris):
+        """Get the current engagement counts of up to GET_POSTS_BATCH_SIZE posts.
+        
+        Args:
+            uris (list): Post URIs
+            
+        Returns:
+            dict: Likes, replies and reposts per URI; deleted posts are missing
+        """
+        response = await self.client.app.bsky.feed.getPosts({'uris': list(uris)})
+        return {post.uri: extract_engagement(post) for post in getattr(response, 'posts', [])}
+    
+    async def fetch_engagement(self, uris, on_batch=None):
+        """Get the current engagement counts of many posts.
+        
+        URIs are requested GET_POSTS_BATCH_SIZE at a time, several batches
+        concurrently. Batches are started in order, so the URIs listed first
+        are refreshed first when the rate budget is tight.
+        
+        Args:
+            uris (list): Post URIs, most important first
+            on_batch (callable): Called with each batch of URIs and its counts
+            
+        Returns:
+            dict: Likes, replies and reposts per URI (failed batches are missing)
+        """
+        if not await self.connect():
+            raise Exception("Failed to connect to Bluesky API")
+        
+        semaphore = asyncio.Semaphore(self.concurrency)
+        
+        async def fetch(batch):
+            async with self._request_slot(semaphore):
+                try:
+                    counts = await self.get_engagement(batch)
+                except Exception as e:
+                    self.logger.error(f"Error fetching engagement for {len(batch)} posts: {str(e)}")
+                    counts = {}
+                if on_batch is not None:
+                    on_batch(batch, counts)
+                return counts
+        
+        batches = [uris[start:start + GET_POSTS_BATCH_SIZE] for start in range(0, len(uris), GET_POSTS_BATCH_SIZE)]
+        results = await asyncio.gather(*(fetch(batch) for batch in batches))
+        
+        counts = {}
+        for batch_counts in results:
+            counts.update(batch_counts)
+        
+        self.logger.info(f"Fetched engagement for {len(counts)} of {len(uris)} posts")
+        return counts
+
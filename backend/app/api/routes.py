@@ -1,18 +1,143 @@
 """API routes for the Bluesky Stock Analyzer."""
 
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context, url_for
 import os
 import json
-from datetime import datetime
+import itertools
+import numpy as np
+from datetime import datetime, timezone
 import traceback
 
 from app.api.bluesky import BlueskyAPI
-from app.models.sentiment import SentimentAnalyzer
-from app.utils.data_processor import DataProcessor
+from app.models.database import get_database
+from app.models.prices import get_price_store
+from app.utils import storage
+from app.utils import file_query
+from app.utils import json_codec
+from app.utils import http_cache
+from app.utils.file_loader import get_sentiment_loader, summarize_rows
+from app.utils import timeseries
+from app.utils import weighting
+from app.utils import correlation
+from app.utils import partitions
+from app.utils.response_cache import cached_json, local_data_version
+from app.utils.admission import admission_control, get_limiters, overloaded
+from app.utils.manifest import get_manifest
+from app.utils.jobs import get_job_queue, QueueFullError
+from app.utils.events import get_broker, format_sse
+from app.utils.rate_limit import get_rate_limiter
+from app.utils.anomalies import get_anomaly_detector
+from app.api.tasks import fetch_task, analyze_task, pipeline_task, compact_task, refresh_engagement_task
 
 # Create a blueprint for the API routes
 api_bp = Blueprint('api', __name__)
 
+# Query parameters that switch /file-data to paginated or streamed output
+FILE_DATA_ARGS = ('cursor', 'offset', 'limit', 'fields', 'keyword', 'symbol', 'label', 'stream')
+MAX_PAGE_SIZE = 1000
+
+# Written files change rarely, so clients may reuse them briefly without revalidating
+FILE_CACHE_CONTROL = 'public, max-age=60'
+
+# Seconds clients are asked to wait before resubmitting when the job queue is full
+QUEUE_FULL_RETRY_AFTER = 5
+
+# Compress JSON responses for clients that accept it
+api_bp.after_request(http_cache.compress_response)
+
+def parse_time_arg(name):
+    """Parse a time query parameter given as ISO 8601 or Unix seconds.
+    
+    Args:
+        name (str): Query parameter name
+        
+    Returns:
+        float: Unix timestamp, or None if the parameter is missing
+        
+    Raises:
+        ValueError: If the parameter cannot be parsed
+    """
+    value = request.args.get(name)
+    if not value:
+        return None
+    
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    
+    dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def sentiment_files_in_range(since=None, until=None):
+    """List the sentiment files that may hold posts created in a time range.
+    
+    Partitions outside the range are skipped without being listed.
+    
+    Returns:
+        list: Paths of the sentiment files
+    """
+    names = partitions.list_files('data', since, until, partitions.lag_seconds(current_app.config))
+    return [f"data/{name}" for name in names if storage.is_sentiment_file(name)]
+
+
+def sentiment_data_version(database=None):
+    """Get a version of the stored sentiment results for validating cached aggregates.
+    
+    With the database this is its shared write counter. With files it
+    combines the writes of this process with the sentiment file changes the
+    manifest saw, so other processes' writes are picked up within
+    MANIFEST_REFRESH_INTERVAL without listing and stating files per request.
+    
+    Args:
+        database (Database): The database, or None when files are used
+        
+    Returns:
+        object: Hashable version
+    """
+    if database is not None:
+        return database.data_version()
+    
+    app = current_app._get_current_object()
+    return (local_data_version(app), get_manifest(app).sentiment_version())
+
+
+def list_files(kind):
+    """List data or sentiment files from the manifest using the query parameters.
+    
+    Query parameters:
+        keyword, symbol: Only files containing matching posts
+        since, until: Only files with posts in this time range
+        sort: 'name' (default), 'mtime', 'size', 'records', 'start' or 'end'
+        order: 'asc' (default) or 'desc'
+        offset, limit: Page of files to return
+    
+    Args:
+        kind (str): 'data' or 'sentiment'
+        
+    Returns:
+        tuple: (list of manifest entries, total number of matching files)
+        
+    Raises:
+        ValueError: If a parameter is invalid
+    """
+    limit = request.args.get('limit', type=int)
+    
+    return get_manifest(current_app._get_current_object()).query(
+        kind=kind,
+        keyword=request.args.get('keyword'),
+        symbol=request.args.get('symbol'),
+        since=parse_time_arg('since'),
+        until=parse_time_arg('until'),
+        sort=request.args.get('sort', 'name'),
+        descending=request.args.get('order', 'asc') == 'desc',
+        offset=max(request.args.get('offset', 0, type=int), 0),
+        limit=max(limit, 0) if limit is not None else None
+    )
+
 
 @api_bp.route('/health', methods=['GET'])
 def health_check():
@@ -23,42 +148,59 @@ def health_check():
     })
 
 
+@api_bp.route('/admission', methods=['GET'])
+def get_admission():
+    """Get the concurrency limits and current occupancy of each endpoint class."""
+    limiters = get_limiters(current_app._get_current_object())
+    
+    return jsonify({
+        'status': 'success',
+        'limits': {name: limiter.stats() for name, limiter in limiters.items()}
+    })
+
+
+def job_accepted(job):
+    """Build the 202 response for a queued job."""
+    status_url = url_for('api.get_job', job_id=job.id)
+    response = jsonify({
+        'status': 'accepted',
+        'job_id': job.id,
+        'status_url': status_url
+    })
+    response.status_code = 202
+    response.headers['Location'] = status_url
+    return response
+
+
 @api_bp.route('/fetch-data', methods=['POST'])
+@admission_control('jobs')
 def fetch_data():
-    """Fetch data from Bluesky API."""
+    """Queue a job fetching data from Bluesky API.
+    
+    With "analyze": true the posts are also scored in the same streaming
+    pipeline, without a separate /analyze-sentiment request.
+    
+    Returns 202 with the job id; the result is reported by /api/jobs/<job_id>.
+    """
     try:
         # Get JSON data
         data = request.get_json()
         keywords = data.get('keywords', '').split(',')
         limit = int(data.get('limit', 100))
         
-        # Initialize Bluesky API
-        bluesky_api = BlueskyAPI(
-            username=current_app.config['BLUESKY_USERNAME'],
-            password=current_app.config['BLUESKY_PASSWORD']
-        )
-        
-        # Fetch data
-        posts = bluesky_api.fetch_posts(keywords, limit)
-        
-        # Process data
-        processor = DataProcessor()
-        processed_data = processor.preprocess(posts)
+        queue = get_job_queue(current_app._get_current_object())
+        if data.get('analyze'):
+            job = queue.submit('pipeline', pipeline_task, 'posts_scored', keywords=keywords, limit=limit)
+        else:
+            job = queue.submit(
+                'fetch', fetch_task, 'posts_fetched',
+                total=limit * len(keywords), keywords=keywords, limit=limit
+            )
         
-        # Save data to file
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"data/bluesky_data_{timestamp}.json"
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
-        
-        with open(filename, 'w') as f:
-            json.dump(processed_data, f)
-        
-        return jsonify({
-            'status': 'success',
-            'message': f'Successfully fetched and processed {len(posts)} posts',
-            'data_file': filename,
-            'post_count': len(posts)
-        })
+        return job_accepted(job)
+    
+    except QueueFullError as e:
+        return overloaded(str(e), 503, QUEUE_FULL_RETRY_AFTER)
     
     except Exception as e:
         traceback.print_exc()
@@ -69,56 +211,151 @@ def fetch_data():
 
 
 @api_bp.route('/analyze-sentiment', methods=['POST'])
+@admission_control('jobs')
 def analyze_sentiment():
-    """Analyze sentiment of fetched data."""
+    """Queue a job analyzing sentiment of fetched data.
+    
+    Returns 202 with the job id; the result is reported by /api/jobs/<job_id>.
+    """
     try:
         # Get JSON data
         data = request.get_json()
         data_file = data.get('data_file')
         
-        # Load data
-        with open(data_file, 'r') as f:
-            posts = json.load(f)
+        if not data_file or not os.path.isfile(data_file):
+            return jsonify({
+                'status': 'error',
+                'message': f'Data file not found: {data_file}'
+            }), 400
         
-        # Initialize sentiment analyzer
-        analyzer = SentimentAnalyzer()
+        if partitions.is_compacted(data_file):
+            return jsonify({
+                'status': 'error',
+                'message': f'Compacted data files already have merged sentiment results: {data_file}'
+            }), 400
         
-        # Analyze sentiment
-        results = analyzer.analyze_batch(posts)
+        job = get_job_queue(current_app._get_current_object()).submit(
+            'analyze', analyze_task, 'posts_scored',
+            data_file=data_file, rescore=bool(data.get('rescore', False))
+        )
         
-        # Save results
-        output_file = data_file.replace('.json', '_sentiment.json')
-        with open(output_file, 'w') as f:
-            json.dump(results, f)
+        return job_accepted(job)
+    
+    except QueueFullError as e:
+        return overloaded(str(e), 503, QUEUE_FULL_RETRY_AFTER)
+    
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({
+            'status': 'error',
+            'message': f'Error analyzing sentiment: {str(e)}'
+        }), 500
+
+
+@api_bp.route('/compact', methods=['POST'])
+@admission_control('jobs')
+def compact():
+    """Queue a job merging the small files of finished partitions.
+    
+    Returns 202 with the job id; the result is reported by /api/jobs/<job_id>.
+    """
+    try:
+        job = get_job_queue(current_app._get_current_object()).submit(
+            'compact', compact_task, 'partitions_processed'
+        )
         
+        return job_accepted(job)
+    
+    except QueueFullError as e:
+        return overloaded(str(e), 503, QUEUE_FULL_RETRY_AFTER)
+    
+    except Exception as e:
+        traceback.print_exc()
         return jsonify({
-            'status': 'success',
-            'message': f'Successfully analyzed sentiment for {len(results)} posts',
-            'sentiment_file': output_file,
-            'result_count': len(results)
-        })
+            'status': 'error',
+            'message': f'Error compacting data files: {str(e)}'
+        }), 500
+
+
+@api_bp.route('/refresh-engagement', methods=['POST'])
+@admission_control('jobs')
+def refresh_engagement():
+    """Queue a job refreshing the engagement counts of recent posts.
+    
+    Returns 202 with the job id; the result is reported by /api/jobs/<job_id>.
+    """
+    try:
+        job = get_job_queue(current_app._get_current_object()).submit(
+            'refresh_engagement', refresh_engagement_task, 'posts_checked'
+        )
+        
+        return job_accepted(job)
+    
+    except QueueFullError as e:
+        return overloaded(str(e), 503, QUEUE_FULL_RETRY_AFTER)
     
     except Exception as e:
         traceback.print_exc()
         return jsonify({
             'status': 'error',
-            'message': f'Error analyzing sentiment: {str(e)}'
+            'message': f'Error refreshing engagement: {str(e)}'
         }), 500
 
 
+@api_bp.route('/jobs', methods=['GET'])
+def list_jobs():
+    """List recent background jobs, newest first."""
+    jobs = get_job_queue(current_app._get_current_object()).statuses()
+    
+    return jsonify({
+        'status': 'success',
+        'jobs': jobs
+    })
+
+
+@api_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get the status, progress, throughput and ETA of a background job."""
+    job = get_job_queue(current_app._get_current_object()).status(job_id)
+    if job is None:
+        return jsonify({
+            'status': 'error',
+            'message': f'Unknown job: {job_id}'
+        }), 404
+    
+    return jsonify({
+        'status': 'success',
+        'job': job
+    })
+
+
 @api_bp.route('/data-files', methods=['GET'])
 def get_data_files():
-    """Get a list of available data files."""
+    """Get a list of available data files with their metadata.
+    
+    See list_files for the sorting, filtering and pagination parameters.
+    """
     try:
-        data_files = []
-        for file in os.listdir('data'):
-            if file.endswith('.json') and not file.endswith('_sentiment.json'):
-                data_files.append(file)
+        try:
+            files, total = list_files('data')
+        except ValueError as e:
+            return jsonify({
+                'status': 'error',
+                'message': f'Invalid parameter: {str(e)}'
+            }), 400
         
-        return jsonify({
+        etag = http_cache.make_etag('data-files', request.query_string, files, total)
+        cached = http_cache.not_modified(etag)
+        if cached is not None:
+            return cached
+        
+        response = jsonify({
             'status': 'success',
-            'data_files': data_files
+            'data_files': [file['name'] for file in files],
+            'files': files,
+            'total': total
         })
+        return http_cache.cache_response(response, etag)
     
     except Exception as e:
         return jsonify({
@@ -129,17 +366,31 @@ def get_data_files():
 
 @api_bp.route('/sentiment-files', methods=['GET'])
 def get_sentiment_files():
-    """Get a list of available sentiment files."""
+    """Get a list of available sentiment files with their metadata.
+    
+    See list_files for the sorting, filtering and pagination parameters.
+    """
     try:
-        sentiment_files = []
-        for file in os.listdir('data'):
-            if file.endswith('_sentiment.json'):
-                sentiment_files.append(file)
+        try:
+            files, total = list_files('sentiment')
+        except ValueError as e:
+            return jsonify({
+                'status': 'error',
+                'message': f'Invalid parameter: {str(e)}'
+            }), 400
         
-        return jsonify({
+        etag = http_cache.make_etag('sentiment-files', request.query_string, files, total)
+        cached = http_cache.not_modified(etag)
+        if cached is not None:
+            return cached
+        
+        response = jsonify({
             'status': 'success',
-            'sentiment_files': sentiment_files
+            'sentiment_files': [file['name'] for file in files],
+            'files': files,
+            'total': total
         })
+        return http_cache.cache_response(response, etag)
     
     except Exception as e:
         return jsonify({
@@ -148,17 +399,76 @@ def get_sentiment_files():
         }), 500
 
 
-@api_bp.route('/file-data/<filename>', methods=['GET'])
+@api_bp.route('/file-data/<path:filename>', methods=['GET'])
 def get_file_data(filename):
-    """Get data from a specific file."""
+    """Get data from a specific file.
+    
+    Query parameters:
+        cursor / offset: Position of the first matching record (default 0)
+        limit: Page size (default 100, at most 1000)
+        fields: Comma-separated fields to return (e.g. 'id,sentiment.vader.compound')
+        keyword, symbol, label: Only return matching records
+        stream: If 1, stream all matching records as JSON Lines
+    
+    Without any of these parameters the whole file is returned. Arrow IPC
+    files are filtered and sliced in the memory-mapped file. Files in
+    partitions are named by their path relative to the data directory.
+    """
     try:
-        with open(f"data/{filename}", 'r') as f:
-            data = json.load(f)
+        try:
+            path = partitions.resolve(filename)
+        except ValueError as e:
+            return jsonify({
+                'status': 'error',
+                'message': str(e)
+            }), 400
         
-        return jsonify({
+        # The file version identifies the content; the URL identifies the query
+        etag = http_cache.make_etag('file-data', filename, http_cache.file_version(path))
+        cached = http_cache.not_modified(etag, FILE_CACHE_CONTROL)
+        if cached is not None:
+            return cached
+        
+        if not any(arg in request.args for arg in FILE_DATA_ARGS):
+            data = storage.load_records(path)
+            
+            response = jsonify({
+                'status': 'success',
+                'data': data
+            })
+            return http_cache.cache_response(response, etag, FILE_CACHE_CONTROL)
+        
+        fields = file_query.parse_fields(request.args.get('fields'))
+        filters = {
+            'keyword': request.args.get('keyword'),
+            'symbol': request.args.get('symbol'),
+            'label': request.args.get('label')
+        }
+        offset = max(request.args.get('cursor', request.args.get('offset', 0, type=int), type=int), 0)
+        
+        if request.args.get('stream') == '1':
+            records = file_query.iter_matching(path, fields, **filters)
+            limit = request.args.get('limit', type=int)
+            stop = offset + max(limit, 0) if limit is not None else None
+            
+            def generate():
+                for record in itertools.islice(records, offset, stop):
+                    yield json_codec.dumps(record) + b'\n'
+            
+            response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+            return http_cache.cache_response(response, etag, FILE_CACHE_CONTROL)
+        
+        limit = min(max(request.args.get('limit', 100, type=int), 0), MAX_PAGE_SIZE)
+        page = file_query.query_file(path, offset, limit, fields, **filters)
+        
+        response = jsonify({
             'status': 'success',
-            'data': data
+            'data': page['data'],
+            'offset': offset,
+            'next_cursor': page['next_cursor'],
+            'total': page['total']
         })
+        return http_cache.cache_response(response, etag, FILE_CACHE_CONTROL)
     
     except Exception as e:
         return jsonify({
@@ -174,7 +484,8 @@ def get_trending_topics():
         # Initialize Bluesky API
         bluesky_api = BlueskyAPI(
             username=current_app.config['BLUESKY_USERNAME'],
-            password=current_app.config['BLUESKY_PASSWORD']
+            password=current_app.config['BLUESKY_PASSWORD'],
+            rate_limiter=get_rate_limiter(current_app._get_current_object())
         )
         
         # Get trending topics
@@ -202,67 +513,390 @@ def get_trending_topics():
 
 
 @api_bp.route('/stock-summary', methods=['GET'])
+@admission_control('aggregates')
 def get_stock_summary():
-    """Get summary of sentiment for specific stocks."""
+    """Get summary of sentiment for specific stocks.
+    
+    Optional 'since' and 'until' parameters (ISO 8601 or Unix seconds)
+    restrict the summary to a time range. With 'weighted=1' the response
+    also holds 'weighted_data', the same summary with posts weighted by
+    their engagement (see app.utils.weighting). Responses are cached per
+    symbol set, time range and weighting until new data is written.
+    """
     try:
-        # Get query parameters
-        stocks = request.args.get('stocks', '').split(',')
+        # Get query parameters; the symbol order does not change the result
+        stocks = sorted({s.strip() for s in request.args.get('stocks', '').split(',') if s.strip()})
         
-        if not stocks or stocks[0] == '':
+        if not stocks:
             return jsonify({
                 'status': 'error',
                 'message': 'No stocks specified'
             }), 400
         
-        # Get all sentiment files
-        sentiment_files = []
-        for file in os.listdir('data'):
-            if file.endswith('_sentiment.json'):
-                sentiment_files.append(file)
-        
-        # Load all sentiment data
-        all_sentiment_data = []
-        for file in sentiment_files:
-            with open(f"data/{file}", 'r') as f:
-                all_sentiment_data.extend(json.load(f))
-        
-        # Filter by stocks
-        stock_data = {}
-        for stock in stocks:
-            stock_data[stock] = {
-                'positive': 0,
-                'neutral': 0,
-                'negative': 0,
-                'total': 0,
-                'avg_sentiment': 0
+        try:
+            since = parse_time_arg('since')
+            until = parse_time_arg('until')
+        except ValueError as e:
+            return jsonify({
+                'status': 'error',
+                'message': f'Invalid time range: {str(e)}'
+            }), 400
+        
+        weighted = request.args.get('weighted') == '1'
+        params = weighting.weight_params(current_app.config) if weighted else None
+        
+        database = get_database()
+        version = sentiment_data_version(database)
+        
+        key = ('stock-summary', tuple(stocks), since, until, tuple(sorted(params.items())) if weighted else None)
+        etag = http_cache.make_etag(key, version)
+        cached = http_cache.not_modified(etag)
+        if cached is not None:
+            return cached
+        
+        def build():
+            if database is not None:
+                # Merge the precomputed rollups when the database is used
+                stock_data = database.stock_summary(stocks, since, until)
+                if weighted:
+                    weighted_data = weighting.weighted_summary(
+                        database.scored_posts(stocks, since, until), stocks, params
+                    )
+            else:
+                # Load the files in parallel; unchanged files come from the cache
+                loader = get_sentiment_loader(current_app._get_current_object())
+                rows = loader.load(sentiment_files_in_range(since, until))
+                stock_data = summarize_rows(rows, stocks, since, until)
+                if weighted:
+                    weighted_data = weighting.weighted_summary(
+                        weighting.rows_to_arrays(rows), stocks, params, since, until
+                    )
+            
+            result = {
+                'status': 'success',
+                'stock_data': stock_data
+            }
+            if weighted:
+                result['weighted_data'] = weighted_data
+            return result
+        
+        return http_cache.cache_response(cached_json(key, version, build), etag)
+    
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({
+            'status': 'error',
+            'message': f'Error getting stock summary: {str(e)}'
+        }), 500 
+
+
+@api_bp.route('/sentiment-timeseries', methods=['GET'])
+@admission_control('aggregates')
+def get_sentiment_timeseries():
+    """Get bucketed and smoothed sentiment over time per symbol.
+    
+    Query parameters:
+        symbols: Comma-separated stock symbols (required)
+        bucket: Bucket width: 1h, 3h, 6h, 12h, 1d (default) or 1w
+        window: Smoothing window in buckets (default 7)
+        since, until: Time range (ISO 8601 or Unix seconds)
+    
+    Returns per-symbol volume, label counts, mean compound score, a rolling
+    mean weighted by scored posts, and an EWMA of the mean. Responses are
+    cached until new data is written.
+    """
+    try:
+        symbols = sorted({s.strip().upper() for s in request.args.get('symbols', '').split(',') if s.strip()})
+        if not symbols:
+            return jsonify({
+                'status': 'error',
+                'message': 'No symbols specified'
+            }), 400
+        
+        bucket = request.args.get('bucket', '1d')
+        window = request.args.get('window', 7, type=int)
+        try:
+            since = parse_time_arg('since')
+            until = parse_time_arg('until')
+            if bucket not in timeseries.BUCKETS:
+                raise ValueError(f"Unsupported bucket: {bucket}")
+            if window < 1:
+                raise ValueError("window must be at least 1")
+        except ValueError as e:
+            return jsonify({
+                'status': 'error',
+                'message': f'Invalid parameter: {str(e)}'
+            }), 400
+        
+        database = get_database()
+        version = sentiment_data_version(database)
+        
+        key = ('sentiment-timeseries', tuple(symbols), bucket, window, since, until)
+        etag = http_cache.make_etag(key, version)
+        cached = http_cache.not_modified(etag)
+        if cached is not None:
+            return cached
+        
+        def build():
+            if database is not None:
+                frame = database.rollup_frame(symbols, since, until)
+            else:
+                loader = get_sentiment_loader(current_app._get_current_object())
+                frame = timeseries.rows_to_frame(loader.load(sentiment_files_in_range(since, until)))
+            
+            result = timeseries.compute_timeseries(
+                frame, symbols, timeseries.BUCKETS[bucket], window, since, until
+            )
+            return {
+                'status': 'success',
+                'bucket': bucket,
+                'window': window,
+                'timestamps': result['timestamps'],
+                'series': result['series']
             }
         
-        # Process sentiment data
-        for item in all_sentiment_data:
-            if 'stock_symbols' in item and 'sentiment' in item:
-                for stock in item['stock_symbols']:
-                    if stock in stock_data:
-                        sentiment = item['sentiment']['consensus']
-                        stock_data[stock][sentiment] += 1
-                        stock_data[stock]['total'] += 1
-                        
-                        # Add compound sentiment score (from VADER)
-                        if 'vader' in item['sentiment'] and 'compound' in item['sentiment']['vader']:
-                            stock_data[stock]['avg_sentiment'] += item['sentiment']['vader']['compound']
-        
-        # Calculate average sentiment
-        for stock in stock_data:
-            if stock_data[stock]['total'] > 0:
-                stock_data[stock]['avg_sentiment'] /= stock_data[stock]['total']
+        try:
+            response = cached_json(key, version, build)
+        except ValueError as e:
+            return jsonify({
+                'status': 'error',
+                'message': str(e)
+            }), 400
+        
+        return http_cache.cache_response(response, etag)
+    
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({
+            'status': 'error',
+            'message': f'Error getting sentiment time series: {str(e)}'
+        }), 500
+
+
+# Upper bound on the lag of the sentiment/price correlation, in buckets
+MAX_CORRELATION_LAG = 30
+
+
+@api_bp.route('/sentiment-price-correlation', methods=['GET'])
+@admission_control('aggregates')
+def get_sentiment_price_correlation():
+    """Get lagged correlations between sentiment and price returns per symbol.
+    
+    Query parameters:
+        symbols: Comma-separated stock symbols (required)
+        bucket: Bucket width: 1h, 3h, 6h, 12h, 1d (default) or 1w
+        max_lag: Largest lag in buckets, in both directions (default 5)
+        since, until: Time range (ISO 8601 or Unix seconds)
+    
+    Mean compound scores per bucket are paired with the returns of the
+    bucket max_lag before to max_lag after them (see app.utils.correlation);
+    positive lags mean sentiment leads the price. Prices come from the
+    configured price provider. Responses are cached until new posts or
+    prices arrive.
+    """
+    try:
+        symbols = sorted({s.strip().upper() for s in request.args.get('symbols', '').split(',') if s.strip()})
+        if not symbols:
+            return jsonify({
+                'status': 'error',
+                'message': 'No symbols specified'
+            }), 400
+        
+        bucket = request.args.get('bucket', '1d')
+        max_lag = request.args.get('max_lag', 5, type=int)
+        try:
+            since = parse_time_arg('since')
+            until = parse_time_arg('until')
+            if bucket not in timeseries.BUCKETS:
+                raise ValueError(f"Unsupported bucket: {bucket}")
+            if not 0 <= max_lag <= MAX_CORRELATION_LAG:
+                raise ValueError(f"max_lag must be between 0 and {MAX_CORRELATION_LAG}")
+        except ValueError as e:
+            return jsonify({
+                'status': 'error',
+                'message': f'Invalid parameter: {str(e)}'
+            }), 400
+        
+        price_store = get_price_store(current_app._get_current_object())
+        database = get_database()
+        version = (sentiment_data_version(database), price_store.version())
+        
+        key = ('sentiment-price-correlation', tuple(symbols), bucket, max_lag, since, until)
+        etag = http_cache.make_etag(key, version)
+        cached = http_cache.not_modified(etag)
+        if cached is not None:
+            return cached
+        
+        def build():
+            if database is not None:
+                frame = database.rollup_frame(symbols, since, until)
+            else:
+                loader = get_sentiment_loader(current_app._get_current_object())
+                frame = timeseries.rows_to_frame(loader.load(sentiment_files_in_range(since, until)))
+            
+            bucket_seconds = timeseries.BUCKETS[bucket]
+            series = timeseries.compute_timeseries(frame, symbols, bucket_seconds, 1, since, until)
+            buckets = np.asarray(series['timestamps'], dtype=float)
+            sentiment = np.array(
+                [series['series'][symbol]['mean_compound'] for symbol in symbols], dtype=float
+            ).T.reshape(len(buckets), len(symbols))
+            
+            prices = price_store.closes(symbols)
+            returns = correlation.bucket_returns([prices[symbol] for symbol in symbols], buckets, bucket_seconds)
+            result = correlation.lagged_correlations(sentiment, returns, max_lag)
+            
+            return {
+                'status': 'success',
+                'bucket': bucket,
+                'lags': result['lags'].tolist(),
+                'symbols': correlation.lead_lag_summary(result, symbols)
+            }
+        
+        try:
+            response = cached_json(key, version, build)
+        except ValueError as e:
+            return jsonify({
+                'status': 'error',
+                'message': str(e)
+            }), 400
+        
+        return http_cache.cache_response(response, etag)
+    
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({
+            'status': 'error',
+            'message': f'Error correlating sentiment and prices: {str(e)}'
+        }), 500
+
+
+@api_bp.route('/posts', methods=['GET'])
+@admission_control('aggregates')
+def get_posts():
+    """Query stored posts by symbol, keyword and creation time."""
+    try:
+        database = get_database()
+        if database is None:
+            return jsonify({
+                'status': 'error',
+                'message': 'Post queries require the sqlite storage backend'
+            }), 400
+        
+        posts = database.query_posts(
+            symbol=request.args.get('symbol'),
+            keyword=request.args.get('keyword'),
+            since=request.args.get('since'),
+            until=request.args.get('until'),
+            limit=min(max(request.args.get('limit', 100, type=int), 0), 1000),
+            offset=max(request.args.get('offset', 0, type=int), 0)
+        )
         
         return jsonify({
             'status': 'success',
-            'stock_data': stock_data
+            'posts': posts
         })
     
     except Exception as e:
         traceback.print_exc()
         return jsonify({
             'status': 'error',
-            'message': f'Error getting stock summary: {str(e)}'
-        }), 500 
\ No newline at end of file
+            'message': f'Error querying posts: {str(e)}'
+        }), 500
+
+
+@api_bp.route('/anomalies', methods=['GET'])
+def get_anomalies():
+    """Get recent volume spikes and sentiment shifts of symbols.
+    
+    Query parameters:
+        since_id: Only events with a larger id (poll with the last id seen)
+        symbols: Comma-separated symbols (default: all)
+        limit: Maximum number of events (default 100)
+    
+    Events come from the online detector that watches newly scored posts
+    (see app.utils.anomalies); only posts scored in this process are seen.
+    """
+    try:
+        detector = get_anomaly_detector(current_app._get_current_object())
+        if detector is None:
+            return jsonify({
+                'status': 'error',
+                'message': 'Anomaly detection is disabled'
+            }), 400
+    
+        symbols = [s.strip().upper() for s in request.args.get('symbols', '').split(',') if s.strip()]
+        since_id = request.args.get('since_id', 0, type=int)
+        limit = max(0, min(request.args.get('limit', 100, type=int), 1000))
+        anomalies = detector.recent(since_id, symbols, limit)
+    
+        response = jsonify({
+            'status': 'success',
+            'anomalies': anomalies,
+            'last_id': anomalies[-1]['id'] if anomalies else since_id,
+            'detector': detector.stats()
+        })
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({
+            'status': 'error',
+            'message': f'Error getting anomalies: {str(e)}'
+        }), 500
+
+
+@api_bp.route('/stream/sentiment', methods=['GET'])
+def stream_sentiment():
+    """Stream newly scored posts and per-symbol aggregates as Server-Sent Events.
+    
+    Query parameters:
+        symbols: Comma-separated symbols to follow (default: all)
+        labels: Comma-separated consensus labels of posts to send (default: all)
+    
+    Sends 'posts' events (new posts, plus the number dropped because the
+    client fell behind) and 'aggregates' events (changes per symbol since the
+    previous event). Updates are coalesced while the client is busy.
+    
+    Each subscriber holds a request thread until it disconnects, so their
+    number is capped by the 'streams' admission class (503 with Retry-After).
+    """
+    symbols = [s.strip().upper() for s in request.args.get('symbols', '').split(',') if s.strip()]
+    labels = [l.strip() for l in request.args.get('labels', '').split(',') if l.strip()]
+    heartbeat = float(current_app.config.get('SSE_HEARTBEAT_SECONDS', 15))
+    
+    # The slot is held until the stream is closed, not until this view returns
+    limiter = get_limiters(current_app._get_current_object()).get('streams')
+    if limiter is not None and not limiter.acquire():
+        return overloaded("Too many live feed subscribers; try again later", limiter.status, limiter.retry_after())
+    
+    broker = get_broker(current_app._get_current_object())
+    subscriber = broker.subscribe(symbols, labels)
+    
+    def close():
+        broker.unsubscribe(subscriber)
+        if limiter is not None:
+            limiter.release()
+    
+    def generate():
+        event_id = 0
+        # Ask browsers to reconnect after 5 seconds if the connection drops
+        yield b'retry: 5000\n\n'
+        
+        while True:
+            update = subscriber.get(timeout=heartbeat)
+            if update is None:
+                yield b': keepalive\n\n'
+                continue
+            
+            if update['posts'] or update['dropped']:
+                event_id += 1
+                yield format_sse('posts', {'posts': update['posts'], 'dropped': update['dropped']}, event_id)
+            if update['aggregates']:
+                event_id += 1
+                yield format_sse('aggregates', update['aggregates'], event_id)
+    
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    response.call_on_close(close)
+    return response
@@ -0,0 +1,354 @@
+"""Background tasks for fetching and analyzing posts.
+
+Each task is called by the job queue as task(job, **kwargs) inside the
+application context, reports progress on the job and returns its result.
+Coroutine tasks run on the job queue's event loop and hand blocking work
+to its thread pool.
+"""
+
+import os
+import threading
+from datetime import datetime
+from flask import current_app
+
+from app.api.bluesky import BlueskyAPI, AsyncBlueskyAPI
+from app.models.sentiment import SentimentAnalyzer
+from app.models.database import get_database
+from app.utils.data_processor import DataProcessor
+from app.utils.dedup import build_dedup_filter
+from app.utils.manifest import get_manifest
+from app.utils.pipeline import Pipeline
+from app.utils.events import get_broker
+from app.utils.async_runner import get_async_runner
+from app.utils.seen_index import get_seen_index, collect_ids
+from app.utils.rate_limit import get_rate_limiter
+from app.utils.engagement import build_refresher
+from app.utils import storage
+from app.utils import partitions
+from app.utils.compaction import build_compactor
+from app.utils.response_cache import bump_data_version
+from app.utils.jobs import get_job_queue, QueueFullError
+
+
+async def fetch_task(job, keywords, limit):
+    """Fetch, preprocess and save posts.
+    
+    Searches run concurrently without holding a thread while they wait on
+    the network; preprocessing and saving run in the runner's thread pool.
+    Posts that were already stored by an earlier fetch are not saved again.
+    
+    Args:
+        job (Job): Job to report progress on
+        keywords (list): Keywords to search for
+        limit (int): Maximum number of posts per keyword
+        
+    Returns:
+        dict: Data file and numbers of fetched and new posts
+    """
+    app = current_app._get_current_object()
+    runner = get_async_runner(app)
+    seen_index = get_seen_index(app)
+    bluesky_api = AsyncBlueskyAPI(
+        username=app.config['BLUESKY_USERNAME'],
+        password=app.config['BLUESKY_PASSWORD'],
+        concurrency=int(app.config.get('FETCH_CONCURRENCY', 4)),
+        rate_limiter=get_rate_limiter(app),
+        fetch_followers=bool(app.config.get('WEIGHT_FOLLOWERS'))
+    )
+    
+    # Count posts as each search returns them
+    posts = await bluesky_api.fetch_posts(
+        keywords, limit, on_posts=lambda found: job.advance('posts_fetched', len(found))
+    )
+    
+    processor = DataProcessor(dedup_filter=build_dedup_filter(app.config))
+    
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    filename = storage.data_filename(
+        timestamp, app.config['STORAGE_FORMAT'], partition=partitions.write_partition(app.config)
+    )
+    database = get_database()
+    
+    def save():
+        new_posts = seen_index.filter_new(posts, 'stored') if seen_index is not None else posts
+        processed_data = list(job.track(processor.iter_preprocess(new_posts), 'posts_processed'))
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        storage.save_records(processed_data, filename)
+        
+        if database is not None:
+            database.insert_posts(processed_data, filename)
+        
+        if seen_index is not None:
+            seen_index.mark((item['id'] for item in processed_data if item.get('id') is not None), 'stored')
+        
+        return len(processed_data)
+    
+    new_count = await runner.run_blocking(save)
+    
+    return {
+        'message': f'Successfully fetched {len(posts)} posts and processed {new_count} new posts',
+        'data_file': filename,
+        'post_count': len(posts),
+        'new_post_count': new_count
+    }
+
+
+def analyze_task(job, data_file, rescore=False):
+    """Analyze the sentiment of a data file.
+    
+    Posts that were already scored are skipped unless rescore is set; their
+    results stay in the sentiment file.
+    
+    Args:
+        job (Job): Job to report progress on
+        data_file (str): Path of the data file
+        rescore (bool): Score all posts of the file again
+        
+    Returns:
+        dict: Sentiment file and number of results
+    """
+    # The manifest knows the record count, which gives the job an ETA
+    entry = get_manifest(current_app._get_current_object()).get(data_file)
+    if entry is not None and entry.get('records') is not None:
+        job.set_total(entry['records'])
+    
+    analyzer = SentimentAnalyzer(use_transformers=current_app.config['USE_TRANSFORMERS'])
+    
+    output_file = storage.sentiment_filename(data_file)
+    posts = job.track(storage.iter_records(data_file), 'posts_read')
+    seen_index = get_seen_index(current_app._get_current_object())
+    if seen_index is not None and not rescore:
+        posts = seen_index.filter_new(posts, 'scored')
+    results = job.track(analyzer.iter_analyze(posts), 'posts_scored')
+    
+    # Push results to live feed subscribers as they are scored
+    results = get_broker(current_app._get_current_object()).tee(results)
+    
+    database = get_database()
+    if database is not None:
+        results = database.tee_sentiment(results, output_file)
+    scored_ids = []
+    results = collect_ids(results, scored_ids)
+    
+    try:
+        if seen_index is not None and not rescore and os.path.exists(output_file):
+            # Only new posts were scored; keep the earlier results of the file
+            result_count = storage.merge_records(results, output_file)
+        else:
+            result_count = storage.write_records(results, output_file)
+    finally:
+        # Cached aggregates of this process are stale once results are written
+        bump_data_version(current_app._get_current_object())
+    
+    # Only posts whose results were written count as scored
+    if seen_index is not None:
+        seen_index.mark(scored_ids, 'scored')
+    
+    return {
+        'message': f'Successfully analyzed sentiment for {result_count} posts',
+        'sentiment_file': output_file,
+        'result_count': result_count
+    }
+
+
+def pipeline_task(job, keywords, limit):
+    """Fetch, preprocess, save and analyze posts in one streaming pipeline.
+    
+    Fetching, cleaning and symbol extraction, saving and sentiment scoring
+    run concurrently, connected by bounded queues. Posts are scored while
+    later searches are still running, and the data file is never read back.
+    Posts that were already stored are dropped before preprocessing, so
+    only new posts are saved and scored.
+    
+    Args:
+        job (Job): Job to report progress on
+        keywords (list): Keywords to search for
+        limit (int): Maximum number of posts per keyword
+        
+    Returns:
+        dict: Data and sentiment files and item counts
+    """
+    bluesky_api = BlueskyAPI(
+        username=current_app.config['BLUESKY_USERNAME'],
+        password=current_app.config['BLUESKY_PASSWORD'],
+        rate_limiter=get_rate_limiter(current_app._get_current_object()),
+        fetch_followers=bool(current_app.config.get('WEIGHT_FOLLOWERS'))
+    )
+    processor = DataProcessor(dedup_filter=build_dedup_filter(current_app.config))
+    analyzer = SentimentAnalyzer(use_transformers=current_app.config['USE_TRANSFORMERS'])
+    database = get_database()
+    broker = get_broker(current_app._get_current_object())
+    seen_index = get_seen_index(current_app._get_current_object())
+    
+    # The partition is picked at the start; posts created after its hour
+    # ended are covered by partitions.WRITE_SLACK
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    data_file = storage.data_filename(
+        timestamp, current_app.config['STORAGE_FORMAT'], partition=partitions.write_partition(current_app.config)
+    )
+    sentiment_file = storage.sentiment_filename(data_file)
+    os.makedirs(os.path.dirname(data_file), exist_ok=True)
+    
+    def preprocess(posts):
+        if seen_index is not None:
+            posts = seen_index.filter_new(posts, 'stored')
+        return processor.iter_preprocess(posts)
+    
+    # Posts are marked once the pipeline finished and both files are written
+    stored_ids = []
+    scored_ids = []
+    
+    def save_posts(posts):
+        posts = storage.tee_records(posts, data_file)
+        if database is not None:
+            posts = database.tee_posts(posts, data_file)
+        return collect_ids(posts, stored_ids)
+    
+    def save_results(results):
+        results = storage.tee_records(broker.tee(results), sentiment_file)
+        if database is not None:
+            results = database.tee_sentiment(results, sentiment_file)
+        return collect_ids(results, scored_ids)
+    
+    pipeline = Pipeline(
+        bluesky_api.iter_posts(keywords, limit),
+        [
+            ('fetch', lambda posts: job.track(posts, 'posts_fetched')),
+            ('preprocess', preprocess),
+            ('save_posts', save_posts),
+            ('analyze', analyzer.iter_analyze),
+            ('save_results', save_results)
+        ],
+        queue_size=int(current_app.config.get('PIPELINE_QUEUE_SIZE', 100))
+    )
+    
+    try:
+        result_count = sum(1 for _ in job.track(pipeline, 'posts_scored'))
+    finally:
+        bump_data_version(current_app._get_current_object())
+    
+    if seen_index is not None:
+        seen_index.mark(stored_ids, 'stored')
+        seen_index.mark(scored_ids, 'scored')
+    
+    return {
+        'message': f'Successfully fetched and analyzed {result_count} posts',
+        'data_file': data_file,
+        'sentiment_file': sentiment_file,
+        'post_count': pipeline.counts['fetch'],
+        'result_count': result_count
+    }
+
+
+def compact_task(job):
+    """Compact the small files of finished partitions.
+    
+    Readers keep working while it runs; each compaction becomes visible
+    atomically.
+    
+    Args:
+        job (Job): Job to report progress on
+        
+    Returns:
+        dict: Compaction counts
+    """
+    compactor = build_compactor(current_app.config)
+    result = compactor.run(on_partition=lambda name: job.advance('partitions_processed'))
+    bump_data_version(current_app._get_current_object())
+    
+    result['message'] = f"Merged {result['files_merged']} files into {result['files_written']}"
+    return result
+
+
+
+def import_files_task(job, data_dir='data'):
+    """Import the stored data and sentiment files into the database.
+    
+    Each file is written in its own transactions, so requests see its rows
+    as soon as it is imported.
+    
+    Args:
+        job (Job): Job to report progress on
+        data_dir (str): Data directory
+        
+    Returns:
+        dict: Import counts
+    """
+    counts = get_database().import_files(data_dir, on_file=lambda name: job.advance('files_imported'))
+    
+    counts['message'] = f"Imported {counts['posts']} posts and {counts['results']} results from {counts['files']} files"
+    return counts
+
+
+_import_lock = threading.Lock()
+
+
+def queue_file_import():
+    """Queue a backfill of a new, empty database from the stored files.
+    
+    Runs before the requests of each server process and does the check
+    once. Requests are served from the database while the import job adds
+    rows. A process skips it while another one's import is unfinished;
+    importing a file twice only updates its rows.
+    """
+    app = current_app._get_current_object()
+    with _import_lock:
+        if app.extensions.get('file_import_checked'):
+            return
+        app.extensions['file_import_checked'] = True
+    
+    if not app.config.get('DATABASE_IMPORT_FILES', True):
+        return
+    
+    database = get_database()
+    if database is None or not database.is_empty():
+        return
+    
+    names = partitions.list_files('data')
+    if not names:
+        return
+    
+    queue = get_job_queue(app)
+    if any(status['type'] == 'import' and status['status'] in ('queued', 'running')
+           for status in queue.statuses()):
+        return
+    
+    try:
+        queue.submit('import', import_files_task, 'files_imported', total=len(names))
+    except QueueFullError:
+        app.logger.warning("Job queue is full; run `flask import-files` to import the stored files")
+
+
+async def refresh_engagement_task(job):
+    """Refresh the likes, replies and reposts of recent posts.
+    
+    Counts are requested in batches, youngest posts first, under the rate
+    budget shared with fetch jobs; reading and rewriting files run in the
+    runner's thread pool.
+    
+    Args:
+        job (Job): Job to report progress on
+        
+    Returns:
+        dict: Refresh counts
+    """
+    app = current_app._get_current_object()
+    runner = get_async_runner(app)
+    bluesky_api = AsyncBlueskyAPI(
+        username=app.config['BLUESKY_USERNAME'],
+        password=app.config['BLUESKY_PASSWORD'],
+        concurrency=int(app.config.get('FETCH_CONCURRENCY', 4)),
+        rate_limiter=get_rate_limiter(app)
+    )
+    refresher = build_refresher(app.config, database=get_database())
+    
+    result = await refresher.run(
+        bluesky_api,
+        run_blocking=runner.run_blocking,
+        on_collected=job.set_total,
+        on_batch=lambda batch, counts: job.advance('posts_checked', len(batch))
+    )
+    bump_data_version(app)
+    
+    result['message'] = f"Updated engagement of {result['posts_updated']} of {result['posts_checked']} posts"
+    return result
@@ -0,0 +1,100 @@
+"""Command line commands, run with `flask --app run <command>`."""
+
+import asyncio
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from app.utils.compaction import build_compactor
+from app.utils.seen_index import get_seen_index
+from app.utils.engagement import build_refresher
+from app.utils.rate_limit import get_rate_limiter
+from app.api.bluesky import AsyncBlueskyAPI
+from app.models.database import get_database
+
+
+@click.command('compact')
+@click.option('--data-dir', default='data', show_default=True, help='Data directory.')
+@click.option('--min-files', type=int, default=None, help='Minimum number of small files worth merging.')
+@click.option('--min-age', type=float, default=None,
+              help='Seconds after the end of a partition before it is compacted.')
+@click.option('--grace-period', type=float, default=None,
+              help='Seconds compacted inputs are kept before they are deleted.')
+@with_appcontext
+def compact_command(data_dir, min_files, min_age, grace_period):
+    """Merge the small files of finished partitions into larger files."""
+    compactor = build_compactor(current_app.config, data_dir)
+    if min_files is not None:
+        compactor.min_files = min_files
+    if min_age is not None:
+        compactor.min_age = min_age
+    if grace_period is not None:
+        compactor.grace_period = grace_period
+
+    result = compactor.run(on_partition=lambda name: click.echo(f"Processed {name}"))
+
+    click.echo(
+        f"Compacted {result['partitions']} partitions: merged {result['files_merged']} files "
+        f"into {result['files_written']} ({result['records']} records), "
+        f"deleted {result['files_deleted']} compacted inputs"
+    )
+
+
+@click.command('rebuild-seen-index')
+@click.option('--data-dir', default='data', show_default=True, help='Data directory.')
+@with_appcontext
+def rebuild_seen_index_command(data_dir):
+    """Rebuild the index of stored and scored posts from the data files."""
+    seen_index = get_seen_index(current_app._get_current_object())
+    if seen_index is None:
+        raise click.ClickException('The seen-post index is disabled (SEEN_INDEX_ENABLED)')
+
+    counts = seen_index.rebuild(data_dir)
+    click.echo(f"Indexed {counts['stored']} stored and {counts['scored']} scored posts")
+
+
+@click.command('refresh-engagement')
+@click.option('--data-dir', default='data', show_default=True, help='Data directory.')
+@click.option('--max-posts', type=int, default=None, help='Maximum number of posts to refresh.')
+@with_appcontext
+def refresh_engagement_command(data_dir, max_posts):
+    """Refresh the likes, replies and reposts of recent posts."""
+    app = current_app._get_current_object()
+    refresher = build_refresher(app.config, data_dir, database=get_database())
+    if max_posts is not None:
+        refresher.max_posts = max_posts
+
+    bluesky_api = AsyncBlueskyAPI(
+        username=app.config['BLUESKY_USERNAME'],
+        password=app.config['BLUESKY_PASSWORD'],
+        concurrency=int(app.config.get('FETCH_CONCURRENCY', 4)),
+        rate_limiter=get_rate_limiter(app)
+    )
+
+    result = asyncio.run(refresher.run(bluesky_api))
+
+    click.echo(
+        f"Checked {result['posts_checked']} posts: updated {result['posts_updated']}, "
+        f"rewrote {result['files_rewritten']} files"
+    )
+
+
+@click.command('import-files')
+@click.option('--data-dir', default='data', show_default=True, help='Data directory.')
+@with_appcontext
+def import_files_command(data_dir):
+    """Import the stored data and sentiment files into the database."""
+    database = get_database()
+    if database is None:
+        raise click.ClickException('The database is not used (STORAGE_BACKEND is not sqlite)')
+
+    counts = database.import_files(data_dir, on_file=lambda name: click.echo(f"Imported {name}"))
+    click.echo(f"Imported {counts['posts']} posts and {counts['results']} results from {counts['files']} files")
+
+
+def register_commands(app):
+    """Register the command line commands of the application."""
+    app.cli.add_command(compact_command)
+    app.cli.add_command(rebuild_seen_index_command)
+    app.cli.add_command(refresh_engagement_command)
+    app.cli.add_command(import_files_command)
@@ -1,4 +1,5 @@
 import os
+import json
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -17,13 +18,133 @@ class Config:
     # Database settings
     DATABASE_URI = os.environ.get('DATABASE_URI', 'sqlite:///data/bluesky_data.db')
     
+    # 'sqlite' indexes posts and results in DATABASE_URI; 'files' only writes data files
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'sqlite')
+    
+    # Import the existing data and sentiment files in a background job when the
+    # first request finds the database empty (see also `flask import-files`)
+    DATABASE_IMPORT_FILES = os.environ.get('DATABASE_IMPORT_FILES', 'true').lower() == 'true'
+    
+    # Parallel loading of sentiment files for the stock summary ('files' backend)
+    SUMMARY_LOADER_WORKERS = int(os.environ.get('SUMMARY_LOADER_WORKERS', 4))
+    SUMMARY_LOADER_PROCESSES = os.environ.get('SUMMARY_LOADER_PROCESSES', 'false').lower() == 'true'
+    
     # Data storage paths
     DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
     
+    # Seconds between checks of the data directory for new, removed and rewritten files
+    MANIFEST_REFRESH_INTERVAL = float(os.environ.get('MANIFEST_REFRESH_INTERVAL', 2.0))
+    
+    # Format of new data and sentiment files ('json', 'jsonl', 'parquet' or 'arrow')
+    STORAGE_FORMAT = os.environ.get('STORAGE_FORMAT', 'json')
+    
+    # Write new files to data/date=YYYY-MM-DD/hour=HH/ partitions; posts are
+    # at most PARTITION_MAX_LAG_HOURS old when written (the fetch look-back)
+    PARTITIONED_LAYOUT = os.environ.get('PARTITIONED_LAYOUT', 'true').lower() == 'true'
+    PARTITION_MAX_LAG_HOURS = float(os.environ.get('PARTITION_MAX_LAG_HOURS', 168))
+    
+    # Compaction of small files in finished partitions (flask compact, POST /api/compact)
+    COMPACTION_SMALL_FILE_BYTES = int(os.environ.get('COMPACTION_SMALL_FILE_BYTES', 8 * 1024 * 1024))
+    COMPACTION_MIN_FILES = int(os.environ.get('COMPACTION_MIN_FILES', 2))
+    COMPACTION_MIN_AGE = float(os.environ.get('COMPACTION_MIN_AGE', 3600))
+    COMPACTION_GRACE_PERIOD = float(os.environ.get('COMPACTION_GRACE_PERIOD', 300))
+    
+    # Index of already stored and scored posts, so repeats are not saved or
+    # scored again (flask rebuild-seen-index). The index lives in the SQLite
+    # database, or in SEEN_INDEX_PATH when set or with the files backend.
+    SEEN_INDEX_ENABLED = os.environ.get('SEEN_INDEX_ENABLED', 'true').lower() == 'true'
+    SEEN_INDEX_PATH = os.environ.get('SEEN_INDEX_PATH', '')
+    SEEN_INDEX_CAPACITY = int(os.environ.get('SEEN_INDEX_CAPACITY', 1000000))
+    SEEN_INDEX_ERROR_RATE = float(os.environ.get('SEEN_INDEX_ERROR_RATE', 0.01))
+    
+    # Post weights of the weighted stock summary (/api/stock-summary?weighted=1):
+    # 1 + transform(likes, reposts, replies and author followers times their
+    # coefficients), with transform 'log' (log1p) or 'linear', capped at WEIGHT_CAP
+    # A non-zero WEIGHT_FOLLOWERS also looks up the authors' follower counts when fetching
+    WEIGHT_LIKES = float(os.environ.get('WEIGHT_LIKES', 1.0))
+    WEIGHT_REPOSTS = float(os.environ.get('WEIGHT_REPOSTS', 2.0))
+    WEIGHT_REPLIES = float(os.environ.get('WEIGHT_REPLIES', 1.0))
+    WEIGHT_FOLLOWERS = float(os.environ.get('WEIGHT_FOLLOWERS', 0.0))
+    WEIGHT_TRANSFORM = os.environ.get('WEIGHT_TRANSFORM', 'log')
+    WEIGHT_CAP = float(os.environ['WEIGHT_CAP']) if os.environ.get('WEIGHT_CAP') else None
+    
+    # HTTP caching and compression of API responses
+    HTTP_CACHE_CONTROL = os.environ.get('HTTP_CACHE_CONTROL', 'no-cache')
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 500))
+    GZIP_LEVEL = 6
+    BROTLI_QUALITY = 5
+    
+    # In-memory cache of aggregate responses, invalidated by the data version
+    RESPONSE_CACHE_ENTRIES = int(os.environ.get('RESPONSE_CACHE_ENTRIES', 256))
+    RESPONSE_CACHE_MAX_BYTES = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    
+    # Per-endpoint-class concurrency limits; requests beyond them get 429/503
+    # with Retry-After (see app/utils/admission.py for the defaults).
+    # ADMISSION_LIMITS overrides them as JSON, e.g. '{"jobs": {"max_concurrent": 4}}'
+    ADMISSION_CONTROL = os.environ.get('ADMISSION_CONTROL', 'true').lower() == 'true'
+    ADMISSION_LIMITS = json.loads(os.environ['ADMISSION_LIMITS']) if os.environ.get('ADMISSION_LIMITS') else None
+    
+    # Background jobs for fetching and sentiment analysis
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+    JOB_QUEUE_SIZE = int(os.environ.get('JOB_QUEUE_SIZE', 20))
+    JOB_HISTORY = 100
+    
+    # Job status shared by the server processes: in the SQLite database, or in
+    # JOB_STORE_PATH when set or with the files backend (default data/jobs.db)
+    JOB_STORE_PATH = os.environ.get('JOB_STORE_PATH', '')
+    
+    # Fetch jobs run on an event loop; blocking steps use a small thread pool
+    ASYNC_JOB_QUEUE_SIZE = int(os.environ.get('ASYNC_JOB_QUEUE_SIZE', 500))
+    ASYNC_EXECUTOR_WORKERS = int(os.environ.get('ASYNC_EXECUTOR_WORKERS', 4))
+    FETCH_CONCURRENCY = int(os.environ.get('FETCH_CONCURRENCY', 4))
+    
+    # Bluesky requests per second (and burst) shared by fetch and refresh jobs
+    BLUESKY_RATE_LIMIT = float(os.environ.get('BLUESKY_RATE_LIMIT', 4.0))
+    BLUESKY_RATE_BURST = int(os.environ.get('BLUESKY_RATE_BURST', 4))
+    
+    # Engagement refresh of recent posts (flask refresh-engagement, POST /api/refresh-engagement)
+    ENGAGEMENT_REFRESH_MAX_AGE_HOURS = float(os.environ.get('ENGAGEMENT_REFRESH_MAX_AGE_HOURS', 48))
+    ENGAGEMENT_REFRESH_MAX_POSTS = int(os.environ.get('ENGAGEMENT_REFRESH_MAX_POSTS', 2500))
+    ENGAGEMENT_REFRESH_SETTLE_SECONDS = float(os.environ.get('ENGAGEMENT_REFRESH_SETTLE_SECONDS', 300))
+    
+    # Capacity of the queues between stages of the fetch-and-analyze pipeline
+    PIPELINE_QUEUE_SIZE = int(os.environ.get('PIPELINE_QUEUE_SIZE', 100))
+    
+    # Live sentiment feed (Server-Sent Events)
+    SSE_HEARTBEAT_SECONDS = float(os.environ.get('SSE_HEARTBEAT_SECONDS', 15))
+    SSE_MAX_BUFFERED_POSTS = 100
+    
+    # Online anomaly detection on newly scored posts: per-symbol moving
+    # baselines over creation-time buckets of ANOMALY_BUCKET_SECONDS, events
+    # above the z-score; buckets close ANOMALY_LATENESS_SECONDS after the
+    # newest post has passed their end
+    ANOMALY_DETECTION = os.environ.get('ANOMALY_DETECTION', 'true').lower() == 'true'
+    ANOMALY_BUCKET_SECONDS = float(os.environ.get('ANOMALY_BUCKET_SECONDS', 3600))
+    ANOMALY_ALPHA = float(os.environ.get('ANOMALY_ALPHA', 0.1))
+    ANOMALY_Z_THRESHOLD = float(os.environ.get('ANOMALY_Z_THRESHOLD', 3.0))
+    ANOMALY_MIN_BUCKETS = int(os.environ.get('ANOMALY_MIN_BUCKETS', 5))
+    ANOMALY_MIN_POSTS = int(os.environ.get('ANOMALY_MIN_POSTS', 5))
+    ANOMALY_MAX_EVENTS = int(os.environ.get('ANOMALY_MAX_EVENTS', 500))
+    ANOMALY_LATENESS_SECONDS = float(os.environ.get('ANOMALY_LATENESS_SECONDS', 3600))
+    
     # Sentiment analysis settings
-    USE_TRANSFORMERS = True
+    USE_TRANSFORMERS = os.environ.get('USE_TRANSFORMERS', 'true').lower() == 'true'
+    
+    # Load the models in the server master before forking workers (wsgi.py)
+    PRELOAD_MODELS = os.environ.get('PRELOAD_MODELS', 'true').lower() == 'true'
+    
+    # Near-duplicate filtering settings
+    DEDUP_ENABLED = os.environ.get('DEDUP_ENABLED', 'true').lower() == 'true'
+    DEDUP_THRESHOLD = float(os.environ.get('DEDUP_THRESHOLD', 0.8))
+    DEDUP_MODE = os.environ.get('DEDUP_MODE', 'drop')  # 'drop' or 'collapse'
+    DEDUP_NUM_PERM = 128
+    DEDUP_MAX_ENTRIES = 100000
     
-    # Stock market API settings (for future use)
+    # Price data for the sentiment/price correlation: PRICE_PROVIDER names an
+    # entry of app.models.prices.PROVIDERS ('local' reads CSV and Parquet
+    # files from PRICE_DATA_DIR); STOCK_API_KEY is for remote providers
+    PRICE_PROVIDER = os.environ.get('PRICE_PROVIDER', 'local')
+    PRICE_DATA_DIR = os.environ.get('PRICE_DATA_DIR', 'data/prices')
     STOCK_API_KEY = os.environ.get('STOCK_API_KEY', '')
     
     # Logging settings
@@ -0,0 +1,588 @@
+import os
+import logging
+import sqlite3
+import threading
+import time
+import numpy as np
+from flask import current_app
+
+from app.utils import json_codec
+from app.utils import storage
+from app.utils import partitions
+from app.models import rollups
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    uri TEXT PRIMARY KEY,
+    author TEXT,
+    keyword TEXT,
+    created_at TEXT,
+    timestamp REAL,
+    likes INTEGER,
+    replies INTEGER,
+    reposts INTEGER,
+    data_file TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS post_symbols (
+    uri TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    PRIMARY KEY (uri, symbol)
+);
+CREATE TABLE IF NOT EXISTS sentiment (
+    uri TEXT PRIMARY KEY,
+    label TEXT,
+    confidence REAL,
+    compound REAL,
+    sentiment_file TEXT,
+    analyzed_at REAL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_posts_keyword ON posts (keyword);
+CREATE INDEX IF NOT EXISTS idx_posts_created_at ON posts (created_at);
+CREATE INDEX IF NOT EXISTS idx_post_symbols_symbol ON post_symbols (symbol, uri);
+CREATE INDEX IF NOT EXISTS idx_sentiment_label ON sentiment (label);
+CREATE TABLE IF NOT EXISTS data_version (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    version INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO data_version (id, version) VALUES (0, 0);
+"""
+
+BUMP_VERSION = "UPDATE data_version SET version = version + 1 WHERE id = 0"
+
+INSERT_POST = """
+INSERT INTO posts (uri, author, keyword, created_at, timestamp, likes, replies, reposts, data_file, data)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (uri) DO UPDATE SET
+    likes = excluded.likes,
+    replies = excluded.replies,
+    reposts = excluded.reposts,
+    data_file = COALESCE(excluded.data_file, posts.data_file),
+    data = excluded.data
+"""
+
+UPDATE_ENGAGEMENT = "UPDATE posts SET likes = ?, replies = ?, reposts = ?, data = ? WHERE uri = ?"
+
+INSERT_SYMBOL = "INSERT OR IGNORE INTO post_symbols (uri, symbol) VALUES (?, ?)"
+
+INSERT_SENTIMENT = """
+INSERT INTO sentiment (uri, label, confidence, compound, sentiment_file, analyzed_at, data)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (uri) DO UPDATE SET
+    label = excluded.label,
+    confidence = excluded.confidence,
+    compound = excluded.compound,
+    sentiment_file = excluded.sentiment_file,
+    analyzed_at = excluded.analyzed_at,
+    data = excluded.data
+"""
+
+
+def parse_database_uri(database_uri):
+    """Get the SQLite database path from a 'sqlite:///<path>' URI.
+
+    Args:
+        database_uri (str): Database URI
+
+    Returns:
+        str: Path of the database file, or ':memory:'
+    """
+    prefix = 'sqlite:///'
+    if not database_uri.startswith(prefix):
+        raise ValueError(f"Unsupported database URI: {database_uri}")
+
+    return database_uri[len(prefix):] or ':memory:'
+
+
+def consensus_label(sentiment):
+    """Get the consensus label from sentiment results.
+
+    The consensus is stored as {'label': ..., 'confidence': ...}; older
+    results store the label directly.
+    """
+    consensus = sentiment.get('consensus')
+    if isinstance(consensus, dict):
+        return consensus.get('label')
+    return consensus
+
+
+class Database:
+    """Class for storing posts and sentiment results in SQLite."""
+
+    # Number of rows written per transaction
+    BATCH_SIZE = 500
+
+    def __init__(self, database_uri):
+        """Open (and if needed create) the database.
+
+        Args:
+            database_uri (str): Database URI, e.g. 'sqlite:///data/bluesky_data.db'
+        """
+        self.logger = logging.getLogger(__name__)
+        self.path = parse_database_uri(database_uri)
+
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        # A single connection is shared by the threads of a process
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+
+        with self.lock:
+            # WAL lets readers in other processes proceed while we write
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('PRAGMA synchronous=NORMAL')
+            self.conn.executescript(SCHEMA)
+            self.conn.executescript(rollups.SCHEMA)
+        
+        self._ensure_rollups()
+
+    def close(self):
+        """Close the database connection."""
+        with self.lock:
+            self.conn.close()
+
+    def _write_batches(self, items, write_batch, bump=True):
+        """Write items in batched transactions.
+
+        Args:
+            items (iterable): Items to write
+            write_batch (callable): Function writing a list of items with a cursor
+            bump (bool): Change the data version with every transaction
+
+        Returns:
+            int: Number of items written
+        """
+        count = 0
+        batch = []
+
+        for item in items:
+            batch.append(item)
+            if len(batch) >= self.BATCH_SIZE:
+                count += self._write_batch(batch, write_batch, bump)
+                batch = []
+
+        if batch:
+            count += self._write_batch(batch, write_batch, bump)
+
+        return count
+
+    def _write_batch(self, batch, write_batch, bump=True):
+        """Write one batch of items in a single transaction."""
+        with self.lock:
+            with self.conn:
+                cursor = self.conn.cursor()
+                write_batch(cursor, batch)
+                if bump:
+                    cursor.execute(BUMP_VERSION)
+        return len(batch)
+
+    def data_version(self):
+        """Get a counter that changes whenever results or engagement counts are written.
+
+        Posts alone do not change the aggregates, so writing them leaves the
+        counter alone. The counter is stored in the database, so writes by
+        other processes sharing the file are seen as well.
+
+        Returns:
+            int: Current data version
+        """
+        with self.lock:
+            return self.conn.execute("SELECT version FROM data_version WHERE id = 0").fetchone()[0]
+
+    def insert_posts(self, posts, data_file=None):
+        """Insert or update posts.
+
+        Args:
+            posts (iterable): Preprocessed data items
+            data_file (str): File the posts were saved to
+
+        Returns:
+            int: Number of posts written
+        """
+        def write_batch(cursor, batch):
+            cursor.executemany(INSERT_POST, [self._post_row(item, data_file) for item in batch])
+            cursor.executemany(INSERT_SYMBOL, self._symbol_rows(batch))
+
+        return self._write_batches(self._with_uri(posts), write_batch, bump=False)
+
+    def insert_sentiment(self, results, sentiment_file=None):
+        """Insert or update sentiment results (and the posts they belong to).
+
+        Args:
+            results (iterable): Data items with sentiment results
+            sentiment_file (str): File the results were saved to
+
+        Returns:
+            int: Number of results written
+        """
+        analyzed_at = time.time()
+
+        def write_batch(cursor, batch):
+            cursor.executemany(INSERT_POST, [self._post_row(item, None) for item in batch])
+            cursor.executemany(INSERT_SYMBOL, self._symbol_rows(batch))
+            rows = [self._sentiment_row(item, sentiment_file, analyzed_at) for item in batch]
+            cursor.executemany(INSERT_SENTIMENT, rows)
+            rollups.apply_contributions(cursor, {
+                item['id']: rollups.contribution(item, row[1], row[3], analyzed_at)
+                for item, row in zip(batch, rows)
+            })
+
+        return self._write_batches(self._with_uri(results), write_batch)
+
+    def update_engagement(self, counts):
+        """Update the engagement counts of stored posts and their rollups.
+
+        Args:
+            counts (dict): Likes, replies and reposts per post URI; posts that
+                are not stored are ignored
+
+        Returns:
+            int: Number of counts processed
+        """
+        def write_batch(cursor, batch):
+            by_uri = dict(batch)
+            placeholders = ', '.join('?' for _ in by_uri)
+
+            updates = []
+            for row in cursor.execute(f"SELECT uri, data FROM posts WHERE uri IN ({placeholders})", list(by_uri)).fetchall():
+                update = by_uri[row['uri']]
+                post = json_codec.loads(row['data'])
+                post.update(update)
+                updates.append((
+                    update['likes'], update['replies'], update['reposts'],
+                    json_codec.dumps(post).decode('utf-8'), row['uri']
+                ))
+            cursor.executemany(UPDATE_ENGAGEMENT, updates)
+
+            # Replace the engagement part of what scored posts contribute
+            contributions = cursor.execute(
+                f"SELECT uri, data FROM rollup_contributions WHERE uri IN ({placeholders})", list(by_uri)
+            ).fetchall()
+            rollups.apply_contributions(cursor, {
+                row['uri']: dict(json_codec.loads(row['data']), **by_uri[row['uri']])
+                for row in contributions
+            })
+
+        return self._write_batches(counts.items(), write_batch)
+
+    def _ensure_rollups(self):
+        """Build the rollups if the database has results but no rollups yet."""
+        with self.lock:
+            scored = self.conn.execute("SELECT COUNT(*) FROM sentiment").fetchone()[0]
+            rolled_up = self.conn.execute("SELECT COUNT(*) FROM rollup_contributions").fetchone()[0]
+
+        if scored and not rolled_up:
+            self.rebuild_rollups()
+
+    def is_empty(self):
+        """Check whether no posts or results were stored yet."""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT NOT EXISTS (SELECT 1 FROM posts) AND NOT EXISTS (SELECT 1 FROM sentiment)"
+            ).fetchone()[0] == 1
+
+    def import_files(self, data_dir='data', on_file=None):
+        """Import the posts and results of the stored data and sentiment files.
+
+        Data files are imported before sentiment files, so posts keep the
+        file they were saved to. Importing a file again updates its rows.
+
+        Args:
+            data_dir (str): Data directory
+            on_file (callable): Called with each file name once it is imported
+
+        Returns:
+            dict: Numbers of files, posts and results imported
+        """
+        names = partitions.list_files(data_dir)
+        data_files = [name for name in names if storage.is_data_file(name)]
+        sentiment_files = [name for name in names if storage.is_sentiment_file(name)]
+        counts = {'files': 0, 'posts': 0, 'results': 0}
+
+        for names, key, insert in ((data_files, 'posts', self.insert_posts),
+                                   (sentiment_files, 'results', self.insert_sentiment)):
+            for name in names:
+                path = f"{data_dir}/{name}"
+                try:
+                    counts[key] += insert(storage.iter_records(path), path)
+                    counts['files'] += 1
+                except Exception as e:
+                    self.logger.error(f"Error importing {path}: {str(e)}")
+                if on_file is not None:
+                    on_file(name)
+
+        return counts
+
+    def rebuild_rollups(self):
+        """Recompute all rollups from the stored posts and sentiment results."""
+        self.logger.info("Rebuilding sentiment rollups")
+
+        with self.lock:
+            with self.conn:
+                cursor = self.conn.cursor()
+                cursor.execute("DELETE FROM rollups")
+                cursor.execute("DELETE FROM rollup_contributions")
+                cursor.execute(BUMP_VERSION)
+
+                rows = cursor.execute("""
+                    SELECT p.uri, p.data, s.label, s.compound, s.analyzed_at
+                    FROM sentiment s JOIN posts p ON p.uri = s.uri
+                """)
+                while True:
+                    batch = rows.fetchmany(self.BATCH_SIZE)
+                    if not batch:
+                        break
+                    rollups.apply_contributions(self.conn.cursor(), {
+                        row['uri']: rollups.contribution(
+                            json_codec.loads(row['data']), row['label'], row['compound'],
+                            row['analyzed_at']
+                        )
+                        for row in batch
+                    })
+
+    def tee_posts(self, posts, data_file=None):
+        """Insert posts while passing them through.
+
+        Args:
+            posts (iterable): Preprocessed data items
+            data_file (str): File the posts are saved to
+
+        Yields:
+            dict: The same data items
+        """
+        batch = []
+        for item in posts:
+            batch.append(item)
+            if len(batch) >= self.BATCH_SIZE:
+                self.insert_posts(batch, data_file)
+                batch = []
+            yield item
+
+        if batch:
+            self.insert_posts(batch, data_file)
+
+    def tee_sentiment(self, results, sentiment_file=None):
+        """Insert sentiment results while passing them through.
+
+        Results are written in batches as they are consumed, so this can sit
+        between a streaming analyzer and a streaming file writer.
+
+        Args:
+            results (iterable): Data items with sentiment results
+            sentiment_file (str): File the results are saved to
+
+        Yields:
+            dict: The same data items
+        """
+        batch = []
+        for item in results:
+            batch.append(item)
+            if len(batch) >= self.BATCH_SIZE:
+                self.insert_sentiment(batch, sentiment_file)
+                batch = []
+            yield item
+
+        if batch:
+            self.insert_sentiment(batch, sentiment_file)
+
+    def _with_uri(self, items):
+        """Skip items without a post URI."""
+        for item in items:
+            if item.get('id'):
+                yield item
+            else:
+                self.logger.warning("Skipping item without a post URI")
+
+    @staticmethod
+    def _post_row(item, data_file):
+        """Build the posts row for a data item."""
+        post = {key: value for key, value in item.items() if key != 'sentiment'}
+        return (
+            item['id'],
+            item.get('author'),
+            item.get('keyword'),
+            item.get('created_at'),
+            item.get('timestamp'),
+            item.get('likes', 0),
+            item.get('replies', 0),
+            item.get('reposts', 0),
+            data_file,
+            json_codec.dumps(post).decode('utf-8')
+        )
+
+    @staticmethod
+    def _symbol_rows(batch):
+        """Build the post_symbols rows for a batch of data items."""
+        return [
+            (item['id'], symbol)
+            for item in batch
+            for symbol in item.get('stock_symbols') or []
+        ]
+
+    @staticmethod
+    def _sentiment_row(item, sentiment_file, analyzed_at):
+        """Build the sentiment row for a scored data item."""
+        sentiment = item.get('sentiment', {})
+        consensus = sentiment.get('consensus')
+        confidence = consensus.get('confidence') if isinstance(consensus, dict) else None
+
+        return (
+            item['id'],
+            consensus_label(sentiment),
+            confidence,
+            sentiment.get('vader', {}).get('compound'),
+            sentiment_file,
+            analyzed_at,
+            json_codec.dumps(sentiment).decode('utf-8')
+        )
+
+    def stock_summary(self, symbols, since=None, until=None):
+        """Summarize sentiment per symbol from the precomputed hourly rollups.
+
+        Args:
+            symbols (list): Stock symbols
+            since (float): Only posts from this Unix timestamp on (hour granularity)
+            until (float): Only posts before this Unix timestamp (hour granularity)
+
+        Returns:
+            dict: Label counts, average and standard deviation of the compound
+                score, and engagement totals per symbol
+        """
+        with self.lock:
+            return rollups.summarize(self.conn, symbols, since, until)
+
+    def rollup_frame(self, symbols, since=None, until=None):
+        """Load the hourly rollups of some symbols as a DataFrame.
+
+        Args:
+            symbols (list): Stock symbols
+            since (float): Only posts from this Unix timestamp on (hour granularity)
+            until (float): Only posts before this Unix timestamp (hour granularity)
+
+        Returns:
+            DataFrame: symbol, bucket_start and the rollup value columns
+        """
+        with self.lock:
+            return rollups.load_frame(self.conn, symbols, since, until)
+
+    def scored_posts(self, symbols, since=None, until=None):
+        """Load the scored posts of some symbols as columnar arrays.
+
+        Args:
+            symbols (list): Stock symbols
+            since (float): Only posts from this Unix timestamp on
+            until (float): Only posts before this Unix timestamp
+
+        Returns:
+            dict: Arrays with one entry per (post, symbol) pair: 'symbol',
+                'label', 'compound' and 'followers' (NaN when missing),
+                'timestamp', 'likes', 'replies' and 'reposts'
+        """
+        placeholders = ', '.join('?' for _ in symbols)
+        query = f"""
+            SELECT ps.symbol, s.label, s.compound, COALESCE(p.timestamp, s.analyzed_at) AS timestamp,
+                   COALESCE(p.likes, 0), COALESCE(p.replies, 0), COALESCE(p.reposts, 0),
+                   json_extract(p.data, '$.author_followers')
+            FROM post_symbols ps
+            JOIN sentiment s ON s.uri = ps.uri
+            JOIN posts p ON p.uri = ps.uri
+            WHERE ps.symbol IN ({placeholders})
+        """
+        params = list(symbols)
+
+        if since is not None:
+            query += " AND COALESCE(p.timestamp, s.analyzed_at) >= ?"
+            params.append(since)
+        if until is not None:
+            query += " AND COALESCE(p.timestamp, s.analyzed_at) < ?"
+            params.append(until)
+
+        with self.lock:
+            rows = self.conn.execute(query, params).fetchall()
+
+        columns = list(zip(*rows)) if rows else [()] * 8
+        names = ('symbol', 'label', 'compound', 'timestamp', 'likes', 'replies', 'reposts', 'followers')
+        posts = {name: np.array(values, dtype=object) for name, values in zip(names[:2], columns[:2])}
+        for name, values in zip(names[2:], columns[2:]):
+            posts[name] = np.array([np.nan if value is None else value for value in values], dtype=float)
+        return posts
+
+    def query_posts(self, symbol=None, keyword=None, since=None, until=None,
+                    limit=100, offset=0):
+        """Query stored posts (with sentiment, if analyzed), newest first.
+
+        Args:
+            symbol (str): Only posts mentioning this stock symbol
+            keyword (str): Only posts fetched for this keyword
+            since (str): Only posts created at or after this ISO timestamp
+            until (str): Only posts created before this ISO timestamp
+            limit (int): Maximum number of posts
+            offset (int): Number of posts to skip
+
+        Returns:
+            list: List of data items
+        """
+        query = "SELECT p.data AS data, s.data AS sentiment FROM posts p"
+        conditions = []
+        params = []
+
+        if symbol:
+            query += " JOIN post_symbols ps ON ps.uri = p.uri AND ps.symbol = ?"
+            params.append(symbol)
+
+        query += " LEFT JOIN sentiment s ON s.uri = p.uri"
+
+        if keyword:
+            conditions.append("p.keyword = ?")
+            params.append(keyword)
+        if since:
+            conditions.append("p.created_at >= ?")
+            params.append(since)
+        if until:
+            conditions.append("p.created_at < ?")
+            params.append(until)
+
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+
+        query += " ORDER BY p.created_at DESC LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+
+        with self.lock:
+            rows = self.conn.execute(query, params).fetchall()
+
+        posts = []
+        for row in rows:
+            post = json_codec.loads(row['data'])
+            if row['sentiment']:
+                post['sentiment'] = json_codec.loads(row['sentiment'])
+            posts.append(post)
+
+        return posts
+
+
+_database_lock = threading.Lock()
+
+
+def get_database():
+    """Get the database of the current application, opening it on first use.
+
+    A new database is not backfilled here; see app.api.tasks.queue_file_import
+    and `flask import-files`.
+
+    Returns:
+        Database: The database, or None if the 'files' storage backend is used
+    """
+    if current_app.config.get('STORAGE_BACKEND', 'sqlite') != 'sqlite':
+        return None
+
+    with _database_lock:
+        database = current_app.extensions.get('database')
+        if database is None:
+            database = Database(current_app.config['DATABASE_URI'])
+            current_app.extensions['database'] = database
+
+    return database
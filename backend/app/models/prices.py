@@ -0,0 +1,268 @@
+"""Price data (OHLCV bars) for the stock symbols.
+
+Prices come from a provider. The local provider reads CSV and Parquet files
+from a directory: either one file per symbol named after it (AAPL.csv) or
+files with a 'symbol' column. Columns are matched case-insensitively; bars
+need a 'timestamp' (Unix seconds), 'datetime' or 'date' column and a
+'close' (or 'adj_close') column. Bars with only a date are stamped at the
+end of that day, when their close is known.
+
+The price store keeps the bars of each symbol as sorted numpy arrays, so
+as-of lookups are binary searches, and reloads them when the provider's
+data changes. Other sources (e.g. a remote API using STOCK_API_KEY) can be
+added as PriceProvider subclasses registered in PROVIDERS.
+"""
+
+import os
+import logging
+import threading
+import numpy as np
+import pandas as pd
+
+# Supported price file extensions
+PRICE_EXTENSIONS = ('.csv', '.parquet')
+
+BAR_COLUMNS = ('symbol', 'timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+
+class PriceProvider:
+    """Interface of price data sources."""
+
+    def version(self):
+        """Get a value that changes whenever the provider's data changes.
+
+        Returns:
+            Hashable version, or None if the data cannot be cached
+        """
+        return None
+
+    def load(self, symbols):
+        """Load the bars of some symbols.
+
+        Args:
+            symbols (list): Stock symbols
+
+        Returns:
+            DataFrame: BAR_COLUMNS, timestamps in Unix seconds
+        """
+        raise NotImplementedError
+
+
+def _seconds(values):
+    """Convert date/time values to Unix seconds (NaN when unparseable)."""
+    times = pd.to_datetime(values, utc=True, errors='coerce')
+    return (times - pd.Timestamp(0, tz='UTC')).dt.total_seconds()
+
+
+def normalize_bars(frame, symbol=None):
+    """Bring a frame of bars into the BAR_COLUMNS layout.
+
+    Args:
+        frame (DataFrame): Bars as read from a file
+        symbol (str): Symbol of all bars, when the frame has no symbol column
+
+    Returns:
+        DataFrame: Normalized bars
+
+    Raises:
+        ValueError: If the time or close column is missing
+    """
+    frame = frame.rename(columns=lambda name: str(name).strip().lower().replace(' ', '_'))
+
+    if 'symbol' in frame.columns:
+        symbols = frame['symbol'].astype(str).str.strip().str.upper()
+    elif symbol is not None:
+        symbols = pd.Series(symbol.upper(), index=frame.index)
+    else:
+        raise ValueError("Price data has no symbol column")
+
+    if 'timestamp' in frame.columns:
+        timestamps = pd.to_numeric(frame['timestamp'], errors='coerce')
+    elif 'datetime' in frame.columns:
+        timestamps = _seconds(frame['datetime'])
+    elif 'date' in frame.columns:
+        # A daily close is only known once the day is over
+        timestamps = _seconds(frame['date']) + 86400
+    else:
+        raise ValueError("Price data has no timestamp, datetime or date column")
+
+    close_column = 'adj_close' if 'adj_close' in frame.columns else 'close'
+    if close_column not in frame.columns:
+        raise ValueError("Price data has no close column")
+
+    bars = pd.DataFrame({'symbol': symbols, 'timestamp': timestamps})
+    for column in ('open', 'high', 'low', 'volume'):
+        bars[column] = pd.to_numeric(frame[column], errors='coerce') if column in frame.columns else np.nan
+    bars['close'] = pd.to_numeric(frame[close_column], errors='coerce')
+
+    return bars[list(BAR_COLUMNS)].dropna(subset=['timestamp', 'close'])
+
+
+class LocalPriceProvider(PriceProvider):
+    """Provider reading CSV and Parquet files from a directory.
+
+    Parsed files are cached and reused while their modification time and
+    size are unchanged.
+    """
+
+    def __init__(self, price_dir='data/prices'):
+        """Initialize the provider.
+
+        Args:
+            price_dir (str): Directory of the price files
+        """
+        self.logger = logging.getLogger(__name__)
+        self.price_dir = price_dir
+        self.cache = {}
+        self.lock = threading.Lock()
+
+    def _files(self):
+        """Get the price files with their modification time and size."""
+        try:
+            names = sorted(os.listdir(self.price_dir))
+        except OSError:
+            return {}
+
+        files = {}
+        for name in names:
+            if os.path.splitext(name)[1].lower() not in PRICE_EXTENSIONS:
+                continue
+            path = os.path.join(self.price_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files[path] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    def version(self):
+        """Get the names, modification times and sizes of the price files."""
+        return tuple(sorted(self._files().items()))
+
+    def _read(self, path):
+        """Read and normalize one price file."""
+        root, ext = os.path.splitext(os.path.basename(path))
+        if ext.lower() == '.parquet':
+            frame = pd.read_parquet(path)
+        else:
+            frame = pd.read_csv(path)
+        return normalize_bars(frame, symbol=root)
+
+    def load(self, symbols):
+        """Load the bars of some symbols from the price files.
+
+        Args:
+            symbols (list): Stock symbols
+
+        Returns:
+            DataFrame: BAR_COLUMNS, timestamps in Unix seconds
+        """
+        files = self._files()
+        frames = []
+
+        with self.lock:
+            for path in list(self.cache):
+                if path not in files:
+                    del self.cache[path]
+
+            for path, version in files.items():
+                cached = self.cache.get(path)
+                if cached is None or cached[0] != version:
+                    try:
+                        cached = (version, self._read(path))
+                    except Exception as e:
+                        self.logger.error(f"Error reading price file {path}: {str(e)}")
+                        cached = (version, None)
+                    self.cache[path] = cached
+                if cached[1] is not None:
+                    frames.append(cached[1])
+
+        if not frames:
+            return pd.DataFrame({column: pd.Series(dtype='float64') for column in BAR_COLUMNS})
+
+        bars = pd.concat(frames, ignore_index=True)
+        return bars[bars['symbol'].isin([symbol.upper() for symbol in symbols])]
+
+
+# Price providers by name (PRICE_PROVIDER setting)
+PROVIDERS = {
+    'local': lambda config: LocalPriceProvider(config.get('PRICE_DATA_DIR', 'data/prices'))
+}
+
+
+class PriceStore:
+    """Class for serving per-symbol price arrays from a provider.
+
+    The close prices of each symbol are kept as arrays sorted by time
+    (duplicate timestamps keep the last bar) and dropped when the
+    provider's version changes.
+    """
+
+    def __init__(self, provider):
+        """Initialize the store.
+
+        Args:
+            provider (PriceProvider): Source of the bars
+        """
+        self.provider = provider
+        self.series = {}
+        self.cached_version = None
+        self.lock = threading.Lock()
+
+    def version(self):
+        """Get the version of the provider's data."""
+        return self.provider.version()
+
+    def closes(self, symbols):
+        """Get the close prices of some symbols.
+
+        Args:
+            symbols (list): Stock symbols
+
+        Returns:
+            dict: (timestamps, closes) arrays per symbol; symbols without
+                prices have empty arrays
+        """
+        version = self.provider.version()
+
+        with self.lock:
+            if version is None or version != self.cached_version:
+                self.series = {}
+                self.cached_version = version
+
+            missing = [symbol for symbol in symbols if symbol not in self.series]
+            if missing:
+                bars = self.provider.load(missing)
+                empty = (np.array([], dtype=float), np.array([], dtype=float))
+                for symbol in missing:
+                    self.series[symbol] = empty
+
+                for symbol, group in bars.groupby('symbol'):
+                    group = group.sort_values('timestamp', kind='stable').drop_duplicates('timestamp', keep='last')
+                    self.series[symbol] = (
+                        group['timestamp'].to_numpy(dtype=float),
+                        group['close'].to_numpy(dtype=float)
+                    )
+
+            return {symbol: self.series[symbol] for symbol in symbols}
+
+
+_store_lock = threading.Lock()
+
+
+def get_price_store(app):
+    """Get the price store of an application, creating it on first use.
+
+    Raises:
+        ValueError: If PRICE_PROVIDER names an unknown provider
+    """
+    with _store_lock:
+        store = app.extensions.get('price_store')
+        if store is None:
+            name = app.config.get('PRICE_PROVIDER', 'local')
+            if name not in PROVIDERS:
+                raise ValueError(f"Unknown price provider: {name}")
+            store = PriceStore(PROVIDERS[name](app.config))
+            app.extensions['price_store'] = store
+
+    return store
@@ -0,0 +1,241 @@
+from datetime import datetime
+import pandas as pd
+
+from app.utils import json_codec
+
+# Width of a rollup bucket in seconds (hourly)
+BUCKET_SECONDS = 3600
+
+LABELS = ('positive', 'neutral', 'negative')
+
+# Aggregated values per (symbol, bucket), in the order used by delta vectors
+VALUE_COLUMNS = (
+    'positive', 'neutral', 'negative', 'total',
+    'compound_sum', 'compound_sq_sum', 'compound_count',
+    'likes', 'replies', 'reposts'
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollups (
+    symbol TEXT NOT NULL,
+    bucket_start INTEGER NOT NULL,
+    positive INTEGER NOT NULL DEFAULT 0,
+    neutral INTEGER NOT NULL DEFAULT 0,
+    negative INTEGER NOT NULL DEFAULT 0,
+    total INTEGER NOT NULL DEFAULT 0,
+    compound_sum REAL NOT NULL DEFAULT 0,
+    compound_sq_sum REAL NOT NULL DEFAULT 0,
+    compound_count INTEGER NOT NULL DEFAULT 0,
+    likes INTEGER NOT NULL DEFAULT 0,
+    replies INTEGER NOT NULL DEFAULT 0,
+    reposts INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (symbol, bucket_start)
+);
+CREATE TABLE IF NOT EXISTS rollup_contributions (
+    uri TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+UPSERT_ROLLUP = """
+INSERT INTO rollups (symbol, bucket_start, {columns})
+VALUES (?, ?, {placeholders})
+ON CONFLICT (symbol, bucket_start) DO UPDATE SET {updates}
+""".format(
+    columns=', '.join(VALUE_COLUMNS),
+    placeholders=', '.join('?' for _ in VALUE_COLUMNS),
+    updates=', '.join(f"{column} = {column} + excluded.{column}" for column in VALUE_COLUMNS)
+)
+
+UPSERT_CONTRIBUTION = """
+INSERT INTO rollup_contributions (uri, data) VALUES (?, ?)
+ON CONFLICT (uri) DO UPDATE SET data = excluded.data
+"""
+
+
+def bucket_start(timestamp):
+    """Get the start of the rollup bucket containing a timestamp."""
+    return int(timestamp // BUCKET_SECONDS) * BUCKET_SECONDS
+
+
+def item_timestamp(item, default):
+    """Get the creation time of a data item as a Unix timestamp."""
+    if item.get('timestamp') is not None:
+        return float(item['timestamp'])
+
+    try:
+        return datetime.fromisoformat(item['created_at'].replace('Z', '+00:00')).timestamp()
+    except (KeyError, AttributeError, ValueError):
+        return default
+
+
+def contribution(item, label, compound, default_timestamp):
+    """Describe what a scored item adds to the rollups.
+
+    Args:
+        item (dict): Scored data item
+        label (str): Consensus label
+        compound (float): VADER compound score, or None
+        default_timestamp (float): Timestamp used when the item has none
+
+    Returns:
+        dict: Contribution with symbols, bucket and values
+    """
+    return {
+        'symbols': list(item.get('stock_symbols') or []),
+        'bucket': bucket_start(item_timestamp(item, default_timestamp)),
+        'label': label,
+        'compound': compound,
+        'likes': item.get('likes') or 0,
+        'replies': item.get('replies') or 0,
+        'reposts': item.get('reposts') or 0
+    }
+
+
+def _values(contrib, sign):
+    """Build the value vector a contribution adds (sign=1) or removes (sign=-1)."""
+    compound = contrib['compound']
+    has_compound = compound is not None
+    compound = compound if has_compound else 0.0
+
+    values = [sign if contrib['label'] == label else 0 for label in LABELS]
+    values += [
+        sign,
+        sign * compound,
+        sign * compound * compound,
+        sign if has_compound else 0,
+        sign * contrib['likes'],
+        sign * contrib['replies'],
+        sign * contrib['reposts']
+    ]
+    return values
+
+
+def apply_contributions(cursor, contributions):
+    """Add contributions to the rollups, replacing earlier ones for the same posts.
+
+    Re-scoring or refreshing a post first subtracts what it contributed
+    before, so rollups never double count.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor inside the current transaction
+        contributions (dict): New contributions keyed by post URI
+    """
+    if not contributions:
+        return
+
+    uris = list(contributions)
+    placeholders = ', '.join('?' for _ in uris)
+    previous = cursor.execute(
+        f"SELECT uri, data FROM rollup_contributions WHERE uri IN ({placeholders})", uris
+    ).fetchall()
+
+    deltas = {}
+
+    def add(contrib, sign):
+        values = _values(contrib, sign)
+        for symbol in contrib['symbols']:
+            key = (symbol, contrib['bucket'])
+            if key in deltas:
+                deltas[key] = [a + b for a, b in zip(deltas[key], values)]
+            else:
+                deltas[key] = values
+
+    for row in previous:
+        add(json_codec.loads(row[1]), -1)
+
+    for contrib in contributions.values():
+        add(contrib, 1)
+
+    cursor.executemany(
+        UPSERT_ROLLUP,
+        [(symbol, bucket, *values) for (symbol, bucket), values in deltas.items()]
+    )
+    cursor.executemany(
+        UPSERT_CONTRIBUTION,
+        [(uri, json_codec.dumps(contrib).decode('utf-8')) for uri, contrib in contributions.items()]
+    )
+
+
+def summarize(conn, symbols, since=None, until=None):
+    """Merge rollup rows into a per-symbol summary.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        symbols (list): Stock symbols
+        since (float): Only buckets containing times at or after this Unix timestamp
+        until (float): Only buckets starting before this Unix timestamp
+
+    Returns:
+        dict: Summary per symbol
+    """
+    stock_data = {}
+    for symbol in symbols:
+        stock_data[symbol] = {label: 0 for label in LABELS}
+        stock_data[symbol].update({
+            'total': 0, 'avg_sentiment': 0, 'compound_std': 0,
+            'likes': 0, 'replies': 0, 'reposts': 0
+        })
+
+    placeholders = ', '.join('?' for _ in symbols)
+    query = f"""
+        SELECT symbol, {', '.join(f'SUM({column}) AS {column}' for column in VALUE_COLUMNS)}
+        FROM rollups
+        WHERE symbol IN ({placeholders})
+    """
+    params = list(symbols)
+
+    if since is not None:
+        query += " AND bucket_start >= ?"
+        params.append(bucket_start(since))
+    if until is not None:
+        query += " AND bucket_start < ?"
+        params.append(until)
+
+    query += " GROUP BY symbol"
+
+    for row in conn.execute(query, params).fetchall():
+        summary = stock_data[row['symbol']]
+        for key in LABELS + ('total', 'likes', 'replies', 'reposts'):
+            summary[key] = row[key]
+
+        if row['total'] > 0:
+            summary['avg_sentiment'] = row['compound_sum'] / row['total']
+
+        count = row['compound_count']
+        if count > 1:
+            mean = row['compound_sum'] / count
+            variance = max(row['compound_sq_sum'] / count - mean * mean, 0.0)
+            summary['compound_std'] = variance ** 0.5
+
+    return stock_data
+
+
+def load_frame(conn, symbols, since=None, until=None):
+    """Load rollup rows into a DataFrame.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        symbols (list): Stock symbols
+        since (float): Only buckets containing times at or after this Unix timestamp
+        until (float): Only buckets starting before this Unix timestamp
+
+    Returns:
+        DataFrame: symbol, bucket_start and the value columns
+    """
+    placeholders = ', '.join('?' for _ in symbols)
+    query = f"""
+        SELECT symbol, bucket_start, {', '.join(VALUE_COLUMNS)}
+        FROM rollups
+        WHERE symbol IN ({placeholders})
+    """
+    params = list(symbols)
+
+    if since is not None:
+        query += " AND bucket_start >= ?"
+        params.append(bucket_start(since))
+    if until is not None:
+        query += " AND bucket_start < ?"
+        params.append(until)
+
+    return pd.read_sql_query(query, conn, params=params)
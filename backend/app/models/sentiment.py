@@ -6,6 +6,60 @@ from transformers import pipeline, AutoModelForSequenceClassification, AutoToken
 import torch
 import numpy as np
 
+MODEL_NAME = "finiteautomata/bertweet-base-sentiment-analysis"
+
+# Models loaded once by preload_models() and shared by every analyzer
+_shared_models = {}
+
+
+def preload_models(use_transformers=True):
+    """Load the sentiment models once so that every SentimentAnalyzer shares them.
+    
+    Call this in a pre-fork server's master process: forked workers then
+    share the model weights copy-on-write instead of each loading a copy.
+    No inference is run here, so no torch thread pools exist before forking.
+    
+    Args:
+        use_transformers (bool): Whether to load the transformers model too
+    """
+    logger = logging.getLogger(__name__)
+    
+    for resource, package in (('sentiment/vader_lexicon.zip', 'vader_lexicon'),
+                              ('tokenizers/punkt', 'punkt'),
+                              ('corpora/stopwords', 'stopwords')):
+        try:
+            nltk.data.find(resource)
+        except LookupError:
+            nltk.download(package)
+    
+    _shared_models['vader'] = SentimentIntensityAnalyzer()
+    
+    if use_transformers:
+        try:
+            _shared_models['transformer'] = pipeline(
+                "sentiment-analysis",
+                model=MODEL_NAME,
+                tokenizer=MODEL_NAME,
+                return_all_scores=True
+            )
+        except Exception as e:
+            logger.error(f"Error preloading transformer model: {str(e)}")
+    
+    logger.info(f"Preloaded sentiment models: {', '.join(_shared_models)}")
+
+
+def set_thread_limits(num_threads):
+    """Limit the threads torch uses for inference in this process.
+    
+    With one process per core, letting every worker use all cores for each
+    inference oversubscribes the CPU.
+    
+    Args:
+        num_threads (int): Number of intra-op threads
+    """
+    torch.set_num_threads(num_threads)
+
+
 class SentimentAnalyzer:
     """Class for analyzing sentiment of text data."""
     
@@ -18,9 +72,9 @@ class SentimentAnalyzer:
         self.logger = logging.getLogger(__name__)
         self.methods = ['vader', 'textblob']
         
-        # Initialize VADER
+        # Initialize VADER (shared if the models were preloaded)
         try:
-            self.vader = SentimentIntensityAnalyzer()
+            self.vader = _shared_models.get('vader') or SentimentIntensityAnalyzer()
         except Exception as e:
             self.logger.error(f"Error initializing VADER: {str(e)}")
             self.vader = None
@@ -29,11 +83,10 @@ class SentimentAnalyzer:
         self.transformer = None
         if use_transformers:
             try:
-                model_name = "finiteautomata/bertweet-base-sentiment-analysis"
-                self.transformer = pipeline(
+                self.transformer = _shared_models.get('transformer') or pipeline(
                     "sentiment-analysis",
-                    model=model_name,
-                    tokenizer=model_name,
+                    model=MODEL_NAME,
+                    tokenizer=MODEL_NAME,
                     return_all_scores=True
                 )
                 self.methods.append('transformer')
@@ -156,9 +209,18 @@ class SentimentAnalyzer:
         Returns:
             list: List of dictionaries with sentiment analysis results
         """
-        results = []
+        return list(self.iter_analyze(data_list))
+    
+    def iter_analyze(self, data_items):
+        """Analyze sentiment for a stream of texts.
         
-        for item in data_list:
+        Args:
+            data_items (iterable): Dictionaries containing text data
+            
+        Yields:
+            dict: Dictionaries with sentiment analysis results
+        """
+        for item in data_items:
             # Extract text from the item
             text = item.get('text', '')
             
@@ -172,6 +234,4 @@ class SentimentAnalyzer:
             result_item = item.copy()
             result_item['sentiment'] = sentiment_results['sentiment']
             
-            results.append(result_item)
-        
-        return results 
\ No newline at end of file
+            yield result_item 
\ No newline at end of file
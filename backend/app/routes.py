@@ -3,8 +3,18 @@ import os
 import json
 from datetime import datetime
 from app.api.bluesky import BlueskyAPI
+from app.api.routes import list_files
 from app.models.sentiment import SentimentAnalyzer
+from app.models.database import get_database
 from app.utils.data_processor import DataProcessor
+from app.utils.dedup import build_dedup_filter
+from app.utils import storage
+from app.utils import partitions
+from app.utils.events import get_broker
+from app.utils.rate_limit import get_rate_limiter
+from app.utils.admission import admission_control
+from app.utils.seen_index import get_seen_index
+from app.utils.response_cache import bump_data_version
 
 # Create a blueprint for the main routes
 main_bp = Blueprint('main', __name__)
@@ -20,6 +30,7 @@ def dashboard():
     return render_template('dashboard.html')
 
 @main_bp.route('/fetch-data', methods=['POST'])
+@admission_control('jobs')
 def fetch_data():
     """Fetch data from Bluesky API."""
     try:
@@ -30,25 +41,39 @@ def fetch_data():
         # Initialize Bluesky API
         bluesky_api = BlueskyAPI(
             username=current_app.config['BLUESKY_USERNAME'],
-            password=current_app.config['BLUESKY_PASSWORD']
+            password=current_app.config['BLUESKY_PASSWORD'],
+            rate_limiter=get_rate_limiter(current_app._get_current_object()),
+            fetch_followers=bool(current_app.config.get('WEIGHT_FOLLOWERS'))
         )
         
         # Fetch data
         data = bluesky_api.fetch_posts(keywords, limit)
         
-        # Process data
-        processor = DataProcessor()
-        processed_data = processor.preprocess(data)
+        # Process the posts that were not stored before
+        seen_index = get_seen_index(current_app._get_current_object())
+        new_posts = list(seen_index.filter_new(data, 'stored')) if seen_index is not None else data
+        processor = DataProcessor(dedup_filter=build_dedup_filter(current_app.config))
+        processed_data = processor.preprocess(new_posts)
         
         # Save data to file
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"data/bluesky_data_{timestamp}.json"
+        filename = storage.data_filename(
+            timestamp, current_app.config['STORAGE_FORMAT'],
+            partition=partitions.write_partition(current_app.config)
+        )
         os.makedirs(os.path.dirname(filename), exist_ok=True)
         
-        with open(filename, 'w') as f:
-            json.dump(processed_data, f)
+        storage.save_records(processed_data, filename)
+        
+        # Index the posts in the database
+        database = get_database()
+        if database is not None:
+            database.insert_posts(processed_data, filename)
         
-        flash(f"Successfully fetched and processed {len(data)} posts.", "success")
+        if seen_index is not None:
+            seen_index.mark((item['id'] for item in processed_data if item.get('id') is not None), 'stored')
+        
+        flash(f"Successfully fetched {len(data)} posts and processed {len(processed_data)} new posts.", "success")
         return redirect(url_for('main.dashboard'))
     
     except Exception as e:
@@ -56,26 +81,47 @@ def fetch_data():
         return redirect(url_for('main.index'))
 
 @main_bp.route('/analyze-sentiment', methods=['POST'])
+@admission_control('jobs')
 def analyze_sentiment():
     """Analyze sentiment of fetched data."""
     try:
         # Get the data file
         data_file = request.form.get('data_file')
+        if partitions.is_compacted(data_file):
+            flash("Compacted data files already have merged sentiment results.", "error")
+            return redirect(url_for('main.dashboard'))
         
-        # Load data
-        with open(data_file, 'r') as f:
-            data = json.load(f)
+        # Load the posts that were not scored before
+        data = storage.load_records(data_file)
+        seen_index = get_seen_index(current_app._get_current_object())
+        if seen_index is not None:
+            data = list(seen_index.filter_new(data, 'scored'))
         
         # Initialize sentiment analyzer
-        analyzer = SentimentAnalyzer()
+        analyzer = SentimentAnalyzer(use_transformers=current_app.config['USE_TRANSFORMERS'])
         
         # Analyze sentiment
         results = analyzer.analyze_batch(data)
         
         # Save results
-        output_file = data_file.replace('.json', '_sentiment.json')
-        with open(output_file, 'w') as f:
-            json.dump(results, f)
+        output_file = storage.sentiment_filename(data_file)
+        if seen_index is not None and os.path.exists(output_file):
+            # Keep the results of the posts scored before
+            storage.merge_records(results, output_file)
+        else:
+            storage.save_records(results, output_file)
+        
+        # Store the results in the database
+        database = get_database()
+        if database is not None:
+            database.insert_sentiment(results, output_file)
+        bump_data_version(current_app._get_current_object())
+        
+        if seen_index is not None:
+            seen_index.mark((item['id'] for item in results if item.get('id') is not None), 'scored')
+        
+        # Push the results to live feed subscribers
+        get_broker(current_app._get_current_object()).publish(results)
         
         flash(f"Successfully analyzed sentiment for {len(results)} posts.", "success")
         return redirect(url_for('main.dashboard'))
@@ -86,39 +132,41 @@ def analyze_sentiment():
 
 @main_bp.route('/get-data-files')
 def get_data_files():
-    """Get a list of available data files."""
+    """Get a list of available data files with their metadata."""
     try:
-        data_files = []
-        for file in os.listdir('data'):
-            if file.endswith('.json') and not file.endswith('_sentiment.json'):
-                data_files.append(file)
+        files, total = list_files('data')
         
-        return jsonify({'data_files': data_files})
+        return jsonify({
+            'data_files': [file['name'] for file in files],
+            'files': files,
+            'total': total
+        })
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @main_bp.route('/get-sentiment-files')
 def get_sentiment_files():
-    """Get a list of available sentiment files."""
+    """Get a list of available sentiment files with their metadata."""
     try:
-        sentiment_files = []
-        for file in os.listdir('data'):
-            if file.endswith('_sentiment.json'):
-                sentiment_files.append(file)
+        files, total = list_files('sentiment')
         
-        return jsonify({'sentiment_files': sentiment_files})
+        return jsonify({
+            'sentiment_files': [file['name'] for file in files],
+            'files': files,
+            'total': total
+        })
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @main_bp.route('/visualize/<file_type>/<filename>')
+@main_bp.route('/visualize/<file_type>/<path:filename>')
 def visualize(file_type, filename):
     """Visualize data or sentiment results."""
     try:
         # Load data
-        with open(f"data/{filename}", 'r') as f:
-            data = json.load(f)
+        data = storage.load_records(partitions.resolve(filename))
         
         # Render visualization page
         return render_template('visualization.html', data=data, file_type=file_type)
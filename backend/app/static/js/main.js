@@ -257,4 +257,37 @@ function loadAndVisualizeData(url) {
             document.getElementById('visualization-placeholder').style.display = 'block';
             document.getElementById('visualization-container').style.display = 'none';
         });
-} 
\ No newline at end of file
+} 
+/**
+ * Subscribe to the live sentiment feed
+ * 
+ * @param {Object} options - Filters: {symbols: ['AAPL'], labels: ['positive']}
+ * @param {Object} handlers - Callbacks: onPosts(posts, dropped), onAggregates(aggregates)
+ * @returns {EventSource} The open connection; call close() to unsubscribe
+ */
+function subscribeSentimentFeed(options, handlers) {
+    const params = new URLSearchParams();
+    if (options.symbols && options.symbols.length) {
+        params.set('symbols', options.symbols.join(','));
+    }
+    if (options.labels && options.labels.length) {
+        params.set('labels', options.labels.join(','));
+    }
+    
+    const source = new EventSource(`/api/stream/sentiment?${params.toString()}`);
+    
+    source.addEventListener('posts', function(event) {
+        const data = JSON.parse(event.data);
+        if (handlers.onPosts) {
+            handlers.onPosts(data.posts, data.dropped);
+        }
+    });
+    
+    source.addEventListener('aggregates', function(event) {
+        if (handlers.onAggregates) {
+            handlers.onAggregates(JSON.parse(event.data));
+        }
+    });
+    
+    return source;
+}
@@ -0,0 +1,190 @@
+import math
+import time
+import functools
+import threading
+from flask import current_app, jsonify
+
+# Default endpoint classes. Cheap reads (health, file listings, file data)
+# have no class and are never queued behind heavy work.
+DEFAULT_LIMITS = {
+    # Submitting or running fetch and analysis work
+    'jobs': {'max_concurrent': 2, 'max_waiting': 4, 'wait_timeout': 2.0, 'status': 429},
+    # Aggregations over all stored results
+    'aggregates': {'max_concurrent': 8, 'max_waiting': 32, 'wait_timeout': 5.0, 'status': 503},
+    # Live feed subscribers, each holding a request thread while connected
+    'streams': {'max_concurrent': 2, 'max_waiting': 0, 'wait_timeout': 0.0, 'status': 503}
+}
+
+
+def overloaded(message, status=503, retry_after=1):
+    """Build the response for a request rejected because the server is busy.
+
+    Args:
+        message (str): Error message
+        status (int): 429 or 503
+        retry_after (int): Seconds after which the client may retry
+
+    Returns:
+        Response: JSON error response with a Retry-After header
+    """
+    response = jsonify({
+        'status': 'error',
+        'message': message
+    })
+    response.status_code = status
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+
+class AdmissionLimiter:
+    """Class for bounding the number of concurrent requests of one endpoint class.
+
+    At most max_concurrent requests run at once and at most max_waiting wait
+    for a slot, each for at most wait_timeout seconds. Requests beyond that
+    are rejected immediately, so a burst of expensive requests cannot tie up
+    the server's threads and slow down the endpoints outside the class.
+    """
+
+    def __init__(self, name, max_concurrent=4, max_waiting=8, wait_timeout=2.0, status=503):
+        """Initialize the limiter.
+
+        Args:
+            name (str): Endpoint class name
+            max_concurrent (int): Requests allowed to run at the same time
+            max_waiting (int): Requests allowed to wait for a slot
+            wait_timeout (float): Maximum number of seconds a request waits
+            status (int): Status code of rejected requests (429 or 503)
+        """
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self.status = status
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.avg_seconds = None
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        """Wait for a slot.
+
+        Returns:
+            bool: True if the request was admitted, False if it was rejected
+        """
+        with self.condition:
+            if self.active < self.max_concurrent:
+                self.active += 1
+                self.admitted += 1
+                return True
+
+            if self.waiting >= self.max_waiting:
+                self.rejected += 1
+                return False
+
+            self.waiting += 1
+            try:
+                deadline = time.monotonic() + self.wait_timeout
+                while self.active >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected += 1
+                        return False
+                    self.condition.wait(remaining)
+
+                self.active += 1
+                self.admitted += 1
+                return True
+            finally:
+                self.waiting -= 1
+
+    def release(self, seconds=None):
+        """Free a slot.
+
+        Args:
+            seconds (float): How long the request held the slot
+        """
+        with self.condition:
+            self.active -= 1
+            if seconds is not None:
+                # Exponentially weighted average of the service time
+                self.avg_seconds = seconds if self.avg_seconds is None else 0.8 * self.avg_seconds + 0.2 * seconds
+            self.condition.notify()
+
+    def retry_after(self):
+        """Estimate the number of seconds until the queued requests have been served."""
+        with self.condition:
+            avg_seconds = self.avg_seconds or 1.0
+            backlog = self.active + self.waiting
+            return max(1, math.ceil(avg_seconds * backlog / self.max_concurrent))
+
+    def stats(self):
+        """Describe the limits and current occupancy."""
+        with self.condition:
+            return {
+                'max_concurrent': self.max_concurrent,
+                'max_waiting': self.max_waiting,
+                'wait_timeout': self.wait_timeout,
+                'active': self.active,
+                'waiting': self.waiting,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'avg_seconds': self.avg_seconds
+            }
+
+
+_limiters_lock = threading.Lock()
+
+
+def get_limiters(app):
+    """Get the admission limiters of an application, creating them on first use.
+
+    ADMISSION_LIMITS overrides the settings of DEFAULT_LIMITS per endpoint
+    class; settings it leaves out keep their defaults.
+
+    Returns:
+        dict: Limiter per endpoint class (empty if admission control is disabled)
+    """
+    with _limiters_lock:
+        limiters = app.extensions.get('admission_limiters')
+        if limiters is None:
+            limiters = {}
+            if app.config.get('ADMISSION_CONTROL', True):
+                overrides = app.config.get('ADMISSION_LIMITS') or {}
+                for name in {**DEFAULT_LIMITS, **overrides}:
+                    limits = dict(DEFAULT_LIMITS.get(name, {}), **overrides.get(name, {}))
+                    limiters[name] = AdmissionLimiter(name, **limits)
+            app.extensions['admission_limiters'] = limiters
+
+    return limiters
+
+
+def admission_control(name):
+    """Decorate a view so that it only runs when its endpoint class has a free slot.
+
+    Args:
+        name (str): Endpoint class name
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            limiter = get_limiters(current_app._get_current_object()).get(name)
+            if limiter is None:
+                return view(*args, **kwargs)
+
+            if not limiter.acquire():
+                return overloaded(
+                    f"Too many concurrent '{name}' requests; try again later",
+                    limiter.status, limiter.retry_after()
+                )
+
+            started = time.monotonic()
+            try:
+                return view(*args, **kwargs)
+            finally:
+                limiter.release(time.monotonic() - started)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,307 @@
+"""Online detection of volume spikes and sentiment shifts per symbol.
+
+Scored posts are observed as they are published (see SentimentBroker) and
+counted in buckets of their creation time. Each symbol keeps a few numbers:
+the post count and compound sums of its open buckets, and exponentially
+weighted means and variances of the bucket volume and of the compound
+score. Every post costs O(1) and every symbol O(1) memory, however long the
+history.
+
+Posts arrive out of order (searches return the newest posts first, and
+results are published in batches), so a bucket stays open until the
+watermark, the newest creation time seen minus `lateness`, has passed its
+end. It is then folded into the baselines, together with zeros for buckets
+without posts. Posts older than the watermark (e.g. a backfill of old
+files) arrive too late to be counted and are only tallied.
+
+While a bucket is open, its volume and mean compound are compared with the
+baselines built from the closed buckets:
+
+    volume z   = (count - volume mean) / sqrt(max(volume variance, volume mean, 1))
+    compound z = (bucket mean - compound mean) / sqrt(max(compound variance, 0.01) / count)
+
+The volume variance is floored at the mean (the variance of a Poisson
+count), so a quiet symbol needs more than a handful of posts to spike. An
+event is emitted the first time a z-score passes the threshold in a bucket
+('volume_spike', 'sentiment_drop' or 'sentiment_rise').
+"""
+
+import math
+import time
+import threading
+from collections import deque
+
+from app.models.rollups import item_timestamp
+
+# Empty buckets folded in at most; the weights are negligible after that
+MAX_GAP_BUCKETS = 200
+
+# Floor of the compound score variance
+MIN_COMPOUND_VARIANCE = 0.01
+
+
+class OpenBucket:
+    """Counts of a bucket that is still receiving posts."""
+
+    __slots__ = ('count', 'compound_sum', 'compound_sq_sum', 'compound_count', 'spike_emitted', 'shift_emitted')
+
+    def __init__(self):
+        self.count = 0
+        self.compound_sum = 0.0
+        self.compound_sq_sum = 0.0
+        self.compound_count = 0
+        self.spike_emitted = False
+        self.shift_emitted = False
+
+
+class SymbolState:
+    """Detector state of one symbol."""
+
+    __slots__ = (
+        'open', 'folded', 'buckets', 'volume_mean', 'volume_var', 'compound_mean', 'compound_var'
+    )
+
+    def __init__(self):
+        self.open = {}
+        self.folded = None
+        self.buckets = 0
+        self.volume_mean = 0.0
+        self.volume_var = 0.0
+        self.compound_mean = None
+        self.compound_var = 0.0
+
+
+class AnomalyDetector:
+    """Class for detecting per-symbol volume spikes and sentiment shifts."""
+
+    def __init__(self, bucket_seconds=3600, alpha=0.1, z_threshold=3.0, min_buckets=5,
+                 min_posts=5, max_events=500, lateness=3600):
+        """Initialize the detector.
+
+        Args:
+            bucket_seconds (float): Width of a creation-time bucket
+            alpha (float): Weight of the newest bucket in the moving baselines
+            z_threshold (float): z-score at which an event is emitted
+            min_buckets (int): Buckets a symbol needs before it is checked
+            min_posts (int): Posts a bucket needs before it is checked
+            max_events (int): Number of recent events kept
+            lateness (float): Seconds a bucket stays open after the newest
+                creation time seen has passed its end
+        """
+        self.bucket_seconds = bucket_seconds
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.min_buckets = min_buckets
+        self.min_posts = min_posts
+        self.lateness = lateness
+        self.states = {}
+        self.events = deque(maxlen=max_events)
+        self.next_id = 1
+        self.observed = 0
+        self.late = 0
+        self.newest = None
+        self.lock = threading.Lock()
+
+    def observe(self, events, now=None):
+        """Update the symbols mentioned by newly scored posts.
+
+        Args:
+            events (list): Compact posts (see app.utils.events.post_event)
+            now (float): Current Unix time (default: the system clock); posts
+                without a creation time, or created after it, count as created now
+
+        Returns:
+            list: Anomaly events emitted for these posts
+        """
+        now = time.time() if now is None else now
+        emitted = []
+
+        with self.lock:
+            for event in events:
+                self.observed += 1
+                symbols = event.get('stock_symbols') or []
+                if not symbols:
+                    continue
+
+                created = item_timestamp(event, now)
+                if created > now:
+                    created = now
+                if self.newest is None or created > self.newest:
+                    self.newest = created
+
+                # Buckets before first_open are closed
+                first_open = math.floor((self.newest - self.lateness) / self.bucket_seconds)
+                bucket = math.floor(created / self.bucket_seconds)
+                if bucket < first_open:
+                    self.late += 1
+                    continue
+
+                compound = event.get('compound')
+                for symbol in symbols:
+                    state = self.states.get(symbol)
+                    if state is None:
+                        state = self.states[symbol] = SymbolState()
+                    self._advance(state, first_open)
+
+                    counts = state.open.get(bucket)
+                    if counts is None:
+                        counts = state.open[bucket] = OpenBucket()
+                    counts.count += 1
+                    if compound is not None:
+                        counts.compound_sum += compound
+                        counts.compound_sq_sum += compound * compound
+                        counts.compound_count += 1
+
+                    emitted.extend(self._check(symbol, state, bucket, counts, now))
+
+        return emitted
+
+    def _advance(self, state, first_open):
+        """Fold the closed buckets of a symbol (and empty buckets between them) into its baselines."""
+        for bucket in sorted(b for b in state.open if b < first_open):
+            self._fold_empty(state, bucket)
+            self._fold(state, state.open.pop(bucket))
+            state.folded = bucket
+        if state.folded is not None:
+            self._fold_empty(state, first_open)
+
+    def _fold_empty(self, state, bucket):
+        """Fold zero-volume buckets from after the last folded bucket up to (excluding) bucket."""
+        if state.folded is None or bucket <= state.folded + 1:
+            return
+        for _ in range(min(bucket - state.folded - 1, MAX_GAP_BUCKETS)):
+            self._fold(state, None)
+        state.folded = bucket - 1
+
+    def _fold(self, state, counts):
+        """Fold one closed bucket (None for a bucket without posts) into the baselines."""
+        alpha = self.alpha
+
+        # Volume: one observation per bucket
+        count = counts.count if counts is not None else 0
+        if state.buckets == 0:
+            state.volume_mean = float(count)
+        else:
+            deviation = count - state.volume_mean
+            state.volume_mean += alpha * deviation
+            state.volume_var = (1 - alpha) * (state.volume_var + alpha * deviation * deviation)
+        state.buckets += 1
+
+        # Compound: the bucket's posts weigh as much as that many single updates
+        n = counts.compound_count if counts is not None else 0
+        if n:
+            mean = counts.compound_sum / n
+            within = max(counts.compound_sq_sum / n - mean * mean, 0.0)
+            if state.compound_mean is None:
+                state.compound_mean, state.compound_var = mean, within
+            else:
+                weight = 1 - (1 - alpha) ** n
+                deviation = mean - state.compound_mean
+                state.compound_mean += weight * deviation
+                state.compound_var = (1 - weight) * (state.compound_var + weight * deviation * deviation) + weight * within
+
+    def _check(self, symbol, state, bucket, counts, now):
+        """Emit events for an open bucket of a symbol if it is anomalous."""
+        if state.buckets < self.min_buckets or counts.count < self.min_posts:
+            return []
+
+        emitted = []
+        if not counts.spike_emitted:
+            scale = math.sqrt(max(state.volume_var, state.volume_mean, 1.0))
+            z = (counts.count - state.volume_mean) / scale
+            if z >= self.z_threshold:
+                counts.spike_emitted = True
+                emitted.append(self._emit(symbol, 'volume_spike', z, counts.count, state.volume_mean, bucket, now))
+
+        if (not counts.shift_emitted and state.compound_mean is not None
+                and counts.compound_count >= self.min_posts):
+            mean = counts.compound_sum / counts.compound_count
+            scale = math.sqrt(max(state.compound_var, MIN_COMPOUND_VARIANCE) / counts.compound_count)
+            z = (mean - state.compound_mean) / scale
+            if abs(z) >= self.z_threshold:
+                counts.shift_emitted = True
+                kind = 'sentiment_drop' if z < 0 else 'sentiment_rise'
+                emitted.append(self._emit(symbol, kind, z, mean, state.compound_mean, bucket, now))
+
+        return emitted
+
+    def _emit(self, symbol, kind, z, value, baseline, bucket, now):
+        """Record an anomaly event."""
+        event = {
+            'id': self.next_id,
+            'symbol': symbol,
+            'kind': kind,
+            'z_score': z,
+            'value': value,
+            'baseline': baseline,
+            'bucket_start': bucket * self.bucket_seconds,
+            'detected_at': now
+        }
+        self.next_id += 1
+        self.events.append(event)
+        return event
+
+    def recent(self, after_id=0, symbols=None, limit=100):
+        """Get recent anomaly events, oldest first.
+
+        Args:
+            after_id (int): Only events with a larger id
+            symbols (list): Only events of these symbols (all if empty)
+            limit (int): Maximum number of events
+
+        Returns:
+            list: Anomaly events
+        """
+        symbols = set(symbols) if symbols else None
+        with self.lock:
+            events = [
+                event for event in self.events
+                if event['id'] > after_id and (symbols is None or event['symbol'] in symbols)
+            ]
+        return events[-limit:] if limit else []
+
+    def stats(self):
+        """Get the numbers of tracked symbols, observed and late posts and emitted events."""
+        with self.lock:
+            return {
+                'symbols': len(self.states),
+                'posts_observed': self.observed,
+                'posts_late': self.late,
+                'events': self.next_id - 1,
+                'watermark': self.newest - self.lateness if self.newest is not None else None
+            }
+
+
+_detector_lock = threading.Lock()
+
+
+def get_anomaly_detector(app):
+    """Get the anomaly detector of an application, creating it on first use.
+
+    A new detector starts observing the posts published by the application's
+    sentiment broker.
+
+    Returns:
+        AnomalyDetector: The detector, or None if detection is disabled
+    """
+    if not app.config.get('ANOMALY_DETECTION', True):
+        return None
+
+    from app.utils.events import get_broker
+
+    with _detector_lock:
+        detector = app.extensions.get('anomaly_detector')
+        if detector is None:
+            detector = AnomalyDetector(
+                bucket_seconds=float(app.config.get('ANOMALY_BUCKET_SECONDS', 3600)),
+                alpha=float(app.config.get('ANOMALY_ALPHA', 0.1)),
+                z_threshold=float(app.config.get('ANOMALY_Z_THRESHOLD', 3.0)),
+                min_buckets=int(app.config.get('ANOMALY_MIN_BUCKETS', 5)),
+                min_posts=int(app.config.get('ANOMALY_MIN_POSTS', 5)),
+                max_events=int(app.config.get('ANOMALY_MAX_EVENTS', 500)),
+                lateness=float(app.config.get('ANOMALY_LATENESS_SECONDS', 3600))
+            )
+            app.extensions['anomaly_detector'] = detector
+            get_broker(app).add_listener(detector.observe)
+
+    return detector
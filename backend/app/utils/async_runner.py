@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AsyncRunner:
+    """Class for running coroutines on a shared background event loop.
+
+    Coroutines waiting on the network share one thread, so hundreds of slow
+    fetches can be in flight at once. Blocking or CPU-heavy steps are handed
+    to a small thread pool with run_blocking so they do not stall the loop.
+    """
+
+    def __init__(self, max_workers=4):
+        """Initialize the runner.
+
+        Args:
+            max_workers (int): Threads available for blocking and CPU-heavy work
+        """
+        self.logger = logging.getLogger(__name__)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='async-work')
+        self.loop = None
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        """Start the event loop thread if it is not running yet."""
+        with self.lock:
+            if self.loop is not None:
+                return
+
+            self.loop = asyncio.new_event_loop()
+            self.loop.set_default_executor(self.executor)
+            self.thread = threading.Thread(target=self.loop.run_forever, name='async-loop', daemon=True)
+            self.thread.start()
+
+    def submit(self, coro):
+        """Schedule a coroutine on the event loop.
+
+        Args:
+            coro: Coroutine object
+
+        Returns:
+            concurrent.futures.Future: Future of the coroutine's result
+        """
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    async def run_blocking(self, func, *args):
+        """Run a blocking function in the thread pool without blocking the loop.
+
+        The function runs outside the caller's context, so it must not rely on
+        current_app or other context-local state.
+
+        Args:
+            func (callable): Function to run
+            *args: Arguments for func
+
+        Returns:
+            The function's return value
+        """
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    def shutdown(self, wait=True):
+        """Stop the event loop and the thread pool."""
+        with self.lock:
+            loop, thread = self.loop, self.thread
+            self.loop = self.thread = None
+
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            if wait:
+                thread.join()
+        self.executor.shutdown(wait=wait)
+
+
+_runner_lock = threading.Lock()
+
+
+def get_async_runner(app):
+    """Get the async runner of an application, creating it on first use."""
+    with _runner_lock:
+        runner = app.extensions.get('async_runner')
+        if runner is None:
+            runner = AsyncRunner(max_workers=int(app.config.get('ASYNC_EXECUTOR_WORKERS', 4)))
+            app.extensions['async_runner'] = runner
+
+    return runner
@@ -0,0 +1,313 @@
+import os
+import threading
+from collections import OrderedDict
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Nested sentiment results are flattened into dotted column names,
+# e.g. sentiment['vader']['compound'] -> 'sentiment.vader.compound'
+NESTED_FIELDS = ('sentiment',)
+SEPARATOR = '.'
+
+# Columns stored as list<string>
+LIST_COLUMNS = ('tokens', 'stock_symbols')
+
+# Memory-mapped Arrow IPC tables, keyed by path: (mtime_ns, size, table), least
+# recently used first
+_mapped_tables = OrderedDict()
+_mapped_tables_lock = threading.Lock()
+
+# Maximum number of mapped tables kept open
+MAX_MAPPED_TABLES = 64
+
+
+def flatten_record(item):
+    """Flatten the nested fields of a data item into dotted column names.
+
+    Args:
+        item (dict): Data item
+
+    Returns:
+        dict: Flat data item
+    """
+    flat = {}
+
+    for key, value in item.items():
+        if key in NESTED_FIELDS and isinstance(value, dict):
+            _flatten_into(flat, key, value)
+        else:
+            flat[key] = value
+
+    return flat
+
+
+def _flatten_into(flat, prefix, value):
+    """Recursively flatten a nested dict into a flat dict."""
+    for key, child in value.items():
+        name = f"{prefix}{SEPARATOR}{key}"
+        if isinstance(child, dict):
+            _flatten_into(flat, name, child)
+        else:
+            flat[name] = child
+
+
+def unflatten_record(row):
+    """Rebuild a nested data item from a flat row.
+
+    Missing (null) values are dropped so round-tripped items have the same
+    keys as the original.
+
+    Args:
+        row (dict): Flat row
+
+    Returns:
+        dict: Nested data item
+    """
+    item = {}
+
+    for name, value in row.items():
+        if value is None:
+            continue
+
+        parts = name.split(SEPARATOR)
+        if parts[0] not in NESTED_FIELDS or len(parts) == 1:
+            item[name] = value
+            continue
+
+        target = item
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+        target[parts[-1]] = value
+
+    return item
+
+
+def records_to_table(records):
+    """Convert data items to a typed Arrow table.
+
+    Args:
+        records (list): List of data items
+
+    Returns:
+        pyarrow.Table: Table with one column per (flattened) field
+    """
+    rows = [flatten_record(item) for item in records]
+
+    # Collect the union of columns, keeping first-seen order
+    names = {}
+    for row in rows:
+        for name in row:
+            names.setdefault(name, None)
+
+    arrays = []
+    for name in names:
+        values = [row.get(name) for row in rows]
+        if name in LIST_COLUMNS:
+            arrays.append(pa.array(values, type=pa.list_(pa.string())))
+        else:
+            arrays.append(pa.array(values))
+
+    return pa.Table.from_arrays(arrays, names=list(names))
+
+
+def table_to_records(table):
+    """Convert an Arrow table back to nested data items.
+
+    Args:
+        table (pyarrow.Table): Table to convert
+
+    Returns:
+        list: List of data items
+    """
+    return [unflatten_record(row) for row in table.to_pylist()]
+
+
+def available_columns(columns, schema_names):
+    """Select the requested columns that exist in a schema.
+
+    A requested nested field (e.g. 'sentiment.vader') selects all of its
+    flattened columns.
+
+    Args:
+        columns (list): Requested column names
+        schema_names (list): Column names in the file
+
+    Returns:
+        list: Column names to read
+    """
+    selected = []
+
+    for name in schema_names:
+        for column in columns:
+            if name == column or name.startswith(column + SEPARATOR):
+                selected.append(name)
+                break
+
+    return selected
+
+
+def write_parquet(records, filename, compression='zstd'):
+    """Write data items to a Parquet file.
+
+    Args:
+        records (list): List of data items
+        filename (str): Output filename
+        compression (str): Parquet compression codec
+    """
+    pq.write_table(records_to_table(records), filename, compression=compression)
+
+
+def read_parquet_table(filename, columns=None):
+    """Read a Parquet file as an Arrow table.
+
+    Only the requested column chunks are decoded.
+
+    Args:
+        filename (str): Input filename
+        columns (list): Column names to read, or None for all columns
+
+    Returns:
+        pyarrow.Table: The table
+    """
+    if columns is not None:
+        columns = available_columns(columns, pq.read_schema(filename).names)
+
+    return pq.read_table(filename, columns=columns)
+
+
+def iter_parquet(filename, columns=None, batch_size=1000):
+    """Stream data items from a Parquet file one record batch at a time.
+
+    Args:
+        filename (str): Input filename
+        columns (list): Column names to read, or None for all columns
+        batch_size (int): Maximum number of rows per batch
+
+    Yields:
+        dict: Data items
+    """
+    parquet_file = pq.ParquetFile(filename)
+    if columns is not None:
+        columns = available_columns(columns, parquet_file.schema_arrow.names)
+
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        for row in batch.to_pylist():
+            yield unflatten_record(row)
+
+
+def read_parquet(filename, columns=None):
+    """Read data items from a Parquet file.
+
+    Args:
+        filename (str): Input filename
+        columns (list): Column names to read, or None for all columns
+
+    Returns:
+        list: List of data items
+    """
+    return table_to_records(read_parquet_table(filename, columns))
+
+
+def write_arrow_ipc(records, filename):
+    """Write data items to an (uncompressed) Arrow IPC file.
+
+    Uncompressed IPC files can be memory-mapped and read without copying.
+
+    Args:
+        records (list): List of data items
+        filename (str): Output filename
+    """
+    table = records_to_table(records)
+
+    with pa.OSFile(filename, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def open_arrow_ipc(filename):
+    """Open an Arrow IPC file as a memory-mapped table.
+
+    The table references the mapped pages directly, so slicing it does not
+    decode the rest of the file and all processes share the page cache.
+    Tables are reused until the file changes. At most MAX_MAPPED_TABLES are
+    kept, and tables of files that were replaced or deleted (e.g. by
+    compaction) are dropped, so their mappings are released once no reader
+    holds them any more.
+
+    Args:
+        filename (str): Input filename
+
+    Returns:
+        pyarrow.Table: The memory-mapped table
+    """
+    stat = os.stat(filename)
+    key = os.path.abspath(filename)
+
+    with _mapped_tables_lock:
+        cached = _mapped_tables.get(key)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            _mapped_tables.move_to_end(key)
+            return cached[2]
+
+        source = pa.memory_map(filename, 'r')
+        table = pa.ipc.open_file(source).read_all()
+        _mapped_tables[key] = (stat.st_mtime_ns, stat.st_size, table)
+        _mapped_tables.move_to_end(key)
+        _evict_mapped_tables()
+
+    return table
+
+
+def _evict_mapped_tables():
+    """Drop the tables of changed or deleted files and the least recently used ones."""
+    for path, (mtime_ns, size, _) in list(_mapped_tables.items()):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            stat = None
+        if stat is None or stat.st_mtime_ns != mtime_ns or stat.st_size != size:
+            del _mapped_tables[path]
+
+    while len(_mapped_tables) > MAX_MAPPED_TABLES:
+        _mapped_tables.popitem(last=False)
+
+
+def iter_arrow_ipc(filename, columns=None, batch_size=1000):
+    """Stream data items from a memory-mapped Arrow IPC file.
+
+    Args:
+        filename (str): Input filename
+        columns (list): Column names to read, or None for all columns
+        batch_size (int): Maximum number of rows converted at a time
+
+    Yields:
+        dict: Data items
+    """
+    table = open_arrow_ipc(filename)
+
+    if columns is not None:
+        table = table.select(available_columns(columns, table.column_names))
+
+    for batch in table.to_batches(max_chunksize=batch_size):
+        for row in batch.to_pylist():
+            yield unflatten_record(row)
+
+
+def read_arrow_ipc(filename, columns=None, offset=0, limit=None):
+    """Read data items from a memory-mapped Arrow IPC file.
+
+    Args:
+        filename (str): Input filename
+        columns (list): Column names to read, or None for all columns
+        offset (int): Index of the first row to read
+        limit (int): Maximum number of rows to read, or None for all rows
+
+    Returns:
+        list: List of data items
+    """
+    table = open_arrow_ipc(filename)
+
+    if columns is not None:
+        table = table.select(available_columns(columns, table.column_names))
+
+    return table_to_records(table.slice(offset, limit))
@@ -0,0 +1,278 @@
+"""Compaction of small files in the time-partitioned data layout.
+
+Small files of a finished hour are merged into one data file and one
+sentiment file in the hour partition; small files of a finished day are
+merged into files directly in the date directory. Data files are only
+merged once they have a sentiment file, since compacted files are not
+analyzed. Records are deduplicated
+by post URI (the most recently written copy wins) and sorted by creation
+time.
+
+A compaction is committed by atomically replacing the date directory's
+compaction log, which readers consult (see app.utils.partitions): until
+then they only see the inputs, afterwards only the compacted files. The
+inputs are deleted by a later run once the grace period has passed, so
+readers that listed them just before the commit can still open them.
+"""
+
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from datetime import datetime, timezone
+
+from app.utils import storage
+from app.utils import partitions
+from app.models.rollups import item_timestamp
+
+# Runs in this process are serialized; the log is replaced atomically either way
+_run_lock = threading.Lock()
+
+
+def merge_files(filenames, output_file):
+    """Merge files into one, deduplicated by post URI and sorted by creation time.
+
+    Args:
+        filenames (list): Input files, oldest first; later copies of a post win
+        output_file (str): Output file (its extension selects the format)
+
+    Returns:
+        int: Number of records written
+    """
+    by_id = {}
+    without_id = []
+    for filename in filenames:
+        for item in storage.iter_records(filename):
+            if item.get('id') is None:
+                without_id.append(item)
+            else:
+                by_id[item['id']] = item
+
+    records = list(by_id.values()) + without_id
+    records.sort(key=lambda item: (item_timestamp(item, 0.0), str(item.get('id'))))
+    storage.save_records(records, output_file)
+    return len(records)
+
+
+def _write_log(day_dir, log):
+    """Atomically replace the compaction log of a date directory."""
+    path = os.path.join(day_dir, partitions.COMPACTION_LOG)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+
+    with open(tmp_path, 'w') as f:
+        json.dump(log, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class Compactor:
+    """Class for compacting the small files of finished partitions."""
+
+    def __init__(self, data_dir='data', storage_format='json', small_file_bytes=8 * 1024 * 1024,
+                 min_files=2, min_age=3600, grace_period=300):
+        """Initialize the compactor.
+
+        Args:
+            data_dir (str): Data directory
+            storage_format (str): Format of the compacted files
+            small_file_bytes (int): Files at least this large are left alone
+            min_files (int): Minimum number of small files worth merging
+            min_age (float): Seconds after the end of a partition before it is
+                compacted, so files still being written are left alone
+            grace_period (float): Seconds compacted inputs are kept for readers
+                that listed them before the commit
+        """
+        self.logger = logging.getLogger(__name__)
+        self.data_dir = data_dir
+        self.extension = storage.FORMAT_EXTENSIONS[storage_format]
+        self.small_file_bytes = small_file_bytes
+        self.min_files = min_files
+        self.min_age = min_age
+        self.grace_period = grace_period
+
+    def run(self, now=None, on_partition=None):
+        """Compact all finished partitions.
+
+        Args:
+            now (float): Current Unix time (default: the system clock)
+            on_partition (callable): Called with each date directory name when
+                it has been processed
+
+        Returns:
+            dict: Numbers of partitions compacted, files merged, files written,
+                records written and inputs deleted
+        """
+        now = time.time() if now is None else now
+        totals = {'partitions': 0, 'files_merged': 0, 'files_written': 0, 'records': 0, 'files_deleted': 0}
+
+        with _run_lock:
+            for name in sorted(os.listdir(self.data_dir)):
+                day = partitions.parse_date(name)
+                day_dir = os.path.join(self.data_dir, name)
+                if day is None or not os.path.isdir(day_dir):
+                    continue
+
+                result = self.compact_day(day_dir, day, now)
+                for key, value in result.items():
+                    totals[key] += value
+                if on_partition is not None:
+                    on_partition(name)
+
+        return totals
+
+    def compact_day(self, day_dir, day, now):
+        """Compact the finished partitions of one date directory.
+
+        A finished day is merged as a whole; otherwise each finished hour is
+        merged separately.
+
+        Args:
+            day_dir (str): Date directory
+            day (float): Start of the day (Unix timestamp)
+            now (float): Current Unix time
+
+        Returns:
+            dict: Counts as in run()
+        """
+        log = partitions.read_compaction_log(day_dir)
+        result = {'partitions': 0, 'files_merged': 0, 'files_written': 0, 'records': 0,
+                  'files_deleted': self._delete_inputs(day_dir, log, now)}
+
+        visible = partitions.visibility(log)
+        groups = {}
+        for name in sorted(os.listdir(day_dir)):
+            hour = partitions.parse_hour(name)
+            path = os.path.join(day_dir, name)
+            if hour is not None and os.path.isdir(path):
+                files = [f"{name}/{file_name}" for file_name in sorted(os.listdir(path))]
+                groups[name] = (day + (hour + 1) * 3600, [f for f in files if visible(f)])
+            elif visible(name):
+                groups.setdefault('', (day + 86400, []))[1].append(name)
+
+        if day + 86400 <= now - self.min_age:
+            # The whole day is finished: merge everything into day files
+            files = [f for _, group_files in groups.values() for f in group_files]
+            groups = {'': (day + 86400, files)}
+
+        for target, (end, files) in sorted(groups.items()):
+            if end > now - self.min_age:
+                continue
+
+            small = [f for f in files if os.path.getsize(os.path.join(day_dir, f)) < self.small_file_bytes]
+            merged = self._compact_group(day_dir, log, target, small, now)
+            if merged:
+                result['partitions'] += 1
+                for key in ('files_merged', 'files_written', 'records'):
+                    result[key] += merged[key]
+
+        return result
+
+    def _compact_group(self, day_dir, log, target, files, now):
+        """Merge the data files and the sentiment files of a group and commit.
+
+        Args:
+            day_dir (str): Date directory
+            log (dict): Compaction log of the date directory (updated in place)
+            target (str): Hour directory to write to, or '' for the date directory
+            files (list): Candidate files relative to the date directory
+            now (float): Current Unix time
+
+        Returns:
+            dict: Counts, or None if there was not enough to merge
+        """
+        # Compacted data files cannot be analyzed, so files whose posts were
+        # not scored yet are left alone until they have a sentiment file
+        data_files = [
+            f for f in files if storage.is_data_file(f) and (
+                partitions.is_compacted(f)
+                or os.path.exists(os.path.join(day_dir, storage.sentiment_filename(f)))
+            )
+        ]
+        sentiment_files = [f for f in files if storage.is_sentiment_file(f)]
+
+        # Previously compacted files hold the oldest copies of their posts
+        def oldest_first(names):
+            return sorted(names, key=lambda f: (not f.rsplit('/', 1)[-1].startswith(partitions.COMPACTED_PREFIX), f))
+
+        timestamp = datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')
+        name = f"{partitions.COMPACTED_PREFIX}{timestamp}_{uuid.uuid4().hex[:8]}{self.extension}"
+        data_output = f"{target}/{name}" if target else name
+        outputs = []
+        if len(data_files) >= self.min_files:
+            outputs.append((data_output, oldest_first(data_files)))
+        if len(sentiment_files) >= self.min_files:
+            outputs.append((storage.sentiment_filename(data_output), oldest_first(sentiment_files)))
+        if not outputs:
+            return None
+
+        # Write the compacted files; readers ignore them until the log lists them
+        counts = {'files_merged': 0, 'files_written': 0, 'records': 0}
+        entries = {}
+        for output, inputs in outputs:
+            records = merge_files([os.path.join(day_dir, f) for f in inputs], os.path.join(day_dir, output))
+
+            # Inputs of merged compacted files that were not deleted yet stay hidden
+            hidden = list(inputs)
+            originals = []
+            for f in inputs:
+                previous = log['compacted'].get(f)
+                if previous is None:
+                    originals.append(f)
+                else:
+                    hidden.extend(previous['inputs'])
+                    originals.extend(previous['originals'])
+
+            entries[output] = {
+                'inputs': hidden,
+                'originals': originals,
+                'records': records,
+                'compacted_at': now
+            }
+            counts['files_merged'] += len(inputs)
+            counts['files_written'] += 1
+            counts['records'] += records
+
+        # Commit: compacted inputs replace their own entries
+        for output, entry in entries.items():
+            for f in entry['inputs']:
+                log['compacted'].pop(f, None)
+            log['compacted'][output] = entry
+        _write_log(day_dir, log)
+
+        self.logger.info(f"Compacted {counts['files_merged']} files in {day_dir}/{target} into {counts['files_written']}")
+        return counts
+
+    def _delete_inputs(self, day_dir, log, now):
+        """Delete the inputs of committed compactions older than the grace period.
+
+        Returns:
+            int: Number of files deleted
+        """
+        deleted = 0
+        for entry in log['compacted'].values():
+            if entry['compacted_at'] > now - self.grace_period:
+                continue
+
+            for f in entry['inputs']:
+                try:
+                    os.remove(os.path.join(day_dir, f))
+                    deleted += 1
+                except FileNotFoundError:
+                    pass
+
+        return deleted
+
+
+def build_compactor(config, data_dir='data'):
+    """Create a compactor from the application config."""
+    return Compactor(
+        data_dir=data_dir,
+        storage_format=config.get('STORAGE_FORMAT', 'json'),
+        small_file_bytes=int(config.get('COMPACTION_SMALL_FILE_BYTES', 8 * 1024 * 1024)),
+        min_files=int(config.get('COMPACTION_MIN_FILES', 2)),
+        min_age=float(config.get('COMPACTION_MIN_AGE', 3600)),
+        grace_period=float(config.get('COMPACTION_GRACE_PERIOD', 300))
+    )
@@ -0,0 +1,137 @@
+"""Lagged correlation between sentiment and price returns.
+
+Sentiment and prices are aligned on a shared bucket axis. The price of a
+bucket is the last close at or before the bucket's end (an as-of join, so
+no price from the future is used) and the bucket's return is the change
+from the previous bucket's price. Buckets in which no new bar arrived (e.g.
+weekends with daily bars) have no return rather than a zero return.
+
+For a lag L, the mean compound score of bucket k is paired with the return
+of bucket k + L: positive lags measure sentiment leading the price, negative
+lags the price leading sentiment. Each lag is one vectorized pass over the
+(bucket x symbol) matrices, so hundreds of symbols cost about as much as one.
+"""
+
+import numpy as np
+
+
+def asof_prices(timestamps, closes, bucket_ends):
+    """Get the last close at or before each bucket end.
+
+    Args:
+        timestamps (ndarray): Sorted bar timestamps of one symbol
+        closes (ndarray): Close prices of the bars
+        bucket_ends (ndarray): Bucket end times
+
+    Returns:
+        tuple: (prices, bar indices); NaN and -1 before the first bar
+    """
+    index = np.searchsorted(timestamps, bucket_ends, side='right') - 1
+    prices = np.where(index >= 0, closes[np.maximum(index, 0)] if len(closes) else np.nan, np.nan)
+    return prices, index
+
+
+def bucket_returns(price_series, bucket_starts, bucket_seconds):
+    """Build the (bucket x symbol) matrix of returns.
+
+    Args:
+        price_series (list): (timestamps, closes) arrays per symbol
+        bucket_starts (ndarray): Bucket start times
+        bucket_seconds (int): Bucket width in seconds
+
+    Returns:
+        ndarray: Return of each bucket per symbol (NaN when unknown)
+    """
+    bucket_ends = np.asarray(bucket_starts, dtype=float) + bucket_seconds
+    returns = np.full((len(bucket_ends), len(price_series)), np.nan)
+
+    for column, (timestamps, closes) in enumerate(price_series):
+        prices, index = asof_prices(timestamps, closes, bucket_ends)
+        if len(prices) < 2:
+            continue
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            change = prices[1:] / prices[:-1] - 1.0
+        # A return needs a new bar in the bucket and a known previous price
+        fresh = (index[1:] != index[:-1]) & (index[:-1] >= 0) & np.isfinite(change)
+        returns[1:, column] = np.where(fresh, change, np.nan)
+
+    return returns
+
+
+def lagged_correlations(sentiment, returns, max_lag, min_observations=3):
+    """Compute the Pearson correlation of sentiment and returns at each lag.
+
+    Args:
+        sentiment (ndarray): (bucket x symbol) mean compound scores, NaN when empty
+        returns (ndarray): (bucket x symbol) returns, NaN when unknown
+        max_lag (int): Largest lag in buckets, in both directions
+        min_observations (int): Fewest bucket pairs a correlation is computed from
+
+    Returns:
+        dict: 'lags' (array), 'correlation' and 'observations' ((lag x symbol) arrays;
+            correlations are NaN when there are too few pairs or no variation)
+    """
+    count, width = sentiment.shape
+    lags = np.arange(-max_lag, max_lag + 1)
+    correlation = np.full((len(lags), width), np.nan)
+    observations = np.zeros((len(lags), width), dtype=np.int64)
+
+    for row, lag in enumerate(lags):
+        if abs(lag) >= count:
+            continue
+        if lag >= 0:
+            s, r = sentiment[:count - lag], returns[lag:]
+        else:
+            s, r = sentiment[-lag:], returns[:count + lag]
+
+        valid = ~np.isnan(s) & ~np.isnan(r)
+        n = valid.sum(axis=0)
+        observations[row] = n
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            s_mean = np.where(valid, s, 0.0).sum(axis=0) / n
+            r_mean = np.where(valid, r, 0.0).sum(axis=0) / n
+            s_dev = np.where(valid, s - s_mean, 0.0)
+            r_dev = np.where(valid, r - r_mean, 0.0)
+            covariance = (s_dev * r_dev).sum(axis=0)
+            variance = (s_dev * s_dev).sum(axis=0) * (r_dev * r_dev).sum(axis=0)
+            correlation[row] = np.where(
+                (n >= min_observations) & (variance > 0), covariance / np.sqrt(variance), np.nan
+            )
+
+    return {'lags': lags, 'correlation': correlation, 'observations': observations}
+
+
+def lead_lag_summary(result, symbols):
+    """Describe the lagged correlations of each symbol.
+
+    Args:
+        result (dict): Output of lagged_correlations()
+        symbols (list): Symbols in column order
+
+    Returns:
+        dict: Per symbol the correlations and observation counts by lag, the
+            contemporaneous correlation, and the lag with the strongest
+            correlation (None when no lag has one)
+    """
+    lags = result['lags']
+    correlation = result['correlation']
+    zero = int(np.flatnonzero(lags == 0)[0])
+
+    summary = {}
+    for column, symbol in enumerate(symbols):
+        values = correlation[:, column]
+        strength = np.where(np.isnan(values), -1.0, np.abs(values))
+        best = int(np.argmax(strength))
+        has_best = strength[best] >= 0
+
+        summary[symbol] = {
+            'correlation': np.where(np.isnan(values), None, values).tolist(),
+            'observations': result['observations'][:, column].tolist(),
+            'contemporaneous': None if np.isnan(values[zero]) else float(values[zero]),
+            'best_lag': int(lags[best]) if has_best else None,
+            'best_correlation': float(values[best]) if has_best else None
+        }
+
+    return summary
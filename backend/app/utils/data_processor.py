@@ -7,11 +7,20 @@ import pandas as pd
 import json
 from datetime import datetime
 
+from app.utils.dedup import NearDuplicateFilter
+from app.utils import columnar
+from app.utils import storage
+
 class DataProcessor:
     """Class for processing and cleaning text data from Bluesky."""
     
-    def __init__(self):
-        """Initialize the data processor."""
+    def __init__(self, dedup_filter=None):
+        """Initialize the data processor.
+        
+        Args:
+            dedup_filter (NearDuplicateFilter): Optional near-duplicate filter
+                applied to preprocessed items
+        """
         self.logger = logging.getLogger(__name__)
         
         # Ensure NLTK resources are available
@@ -26,6 +35,7 @@ class DataProcessor:
             nltk.download('stopwords')
         
         self.stop_words = set(stopwords.words('english'))
+        self.dedup_filter = dedup_filter
     
     def preprocess(self, data_list):
         """Preprocess a list of data items.
@@ -36,9 +46,31 @@ class DataProcessor:
         Returns:
             list: List of preprocessed data items
         """
-        processed_data = []
+        return list(self.iter_preprocess(data_list))
+    
+    def iter_preprocess(self, data_items):
+        """Preprocess a stream of data items.
         
-        for item in data_list:
+        Near-duplicates are removed (or collapsed) if the processor was created
+        with a dedup_filter. Collapsed items are only yielded once their
+        duplicate counts are final (see NearDuplicateFilter).
+        
+        Args:
+            data_items (iterable): Dictionaries containing text data
+            
+        Returns:
+            iterator: Preprocessed data items
+        """
+        processed_items = self._iter_clean(data_items)
+        
+        if self.dedup_filter is not None:
+            processed_items = self.dedup_filter.filter(processed_items)
+        
+        return processed_items
+    
+    def _iter_clean(self, data_items):
+        """Clean and tokenize a stream of data items."""
+        for item in data_items:
             # Skip items without text
             if 'text' not in item or not item['text']:
                 continue
@@ -55,6 +87,7 @@ class DataProcessor:
             processed_item['original_text'] = item['text']
             processed_item['text'] = cleaned_text
             processed_item['tokens'] = self.tokenize(cleaned_text)
+            processed_item['stock_symbols'] = self.extract_stock_symbols(item['text'])
             
             # Add timestamp for easier sorting
             if 'created_at' in processed_item:
@@ -64,9 +97,42 @@ class DataProcessor:
                 except Exception as e:
                     self.logger.error(f"Error parsing date: {str(e)}")
             
-            processed_data.append(processed_item)
+            yield processed_item
+    
+    def deduplicate(self, data_list, threshold=0.8, mode='drop'):
+        """Remove near-duplicate items from preprocessed data.
+        
+        Args:
+            data_list (list): List of preprocessed data items
+            threshold (float): Jaccard similarity above which items are duplicates
+            mode (str): 'drop' or 'collapse'
+            
+        Returns:
+            list: List of data items without near-duplicates
+        """
+        dedup_filter = NearDuplicateFilter(threshold=threshold, mode=mode)
+        results = list(dedup_filter.filter(data_list))
         
-        return processed_data
+        self.logger.info(f"Removed {dedup_filter.duplicates} near-duplicate items")
+        return results
+    
+    def extract_stock_symbols(self, text):
+        """Extract cashtag stock symbols ($AAPL) from text.
+        
+        Args:
+            text (str): Original (uncleaned) text
+            
+        Returns:
+            list: Unique upper-case symbols in order of appearance
+        """
+        symbols = []
+        
+        for match in re.findall(r'\$([A-Za-z]{1,5})\b', text):
+            symbol = match.upper()
+            if symbol not in symbols:
+                symbols.append(symbol)
+        
+        return symbols
     
     def clean_text(self, text):
         """Clean text by removing URLs, mentions, special characters, etc.
@@ -173,9 +239,13 @@ class DataProcessor:
             list: List of data items
         """
         try:
-            # Load from JSON
-            with open(filename, 'r') as f:
-                data = json.load(f)
+            # JSON Lines files hold one item per line
+            if filename.endswith('.jsonl'):
+                data = list(storage.iter_jsonl(filename))
+            else:
+                # Load from JSON
+                with open(filename, 'r') as f:
+                    data = json.load(f)
             
             self.logger.info(f"Loaded {len(data)} items from {filename}")
             return data
@@ -184,6 +254,85 @@ class DataProcessor:
             self.logger.error(f"Error loading from JSON: {str(e)}")
             return []
     
+    def save_to_jsonl(self, data_list, filename, append=False):
+        """Save data to a JSON Lines file (one item per line).
+        
+        Args:
+            data_list (iterable): Data items
+            filename (str): Output filename
+            append (bool): Append to the file instead of replacing it
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            if append:
+                count = storage.append_jsonl(data_list, filename)
+            else:
+                count = storage.write_jsonl(data_list, filename)
+            
+            self.logger.info(f"Saved {count} items to {filename}")
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"Error saving to JSON Lines: {str(e)}")
+            return False
+    
+    def iter_from_file(self, filename):
+        """Stream data items from a JSON, JSON Lines or Parquet file.
+        
+        Args:
+            filename (str): Input filename
+            
+        Returns:
+            iterator: Data items
+        """
+        return storage.iter_records(filename)
+    
+    def save_to_parquet(self, data_list, filename):
+        """Save data to a Parquet file.
+        
+        Nested sentiment results are flattened into typed columns and tokens
+        are stored as list columns.
+        
+        Args:
+            data_list (list): List of data items
+            filename (str): Output filename
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            columnar.write_parquet(data_list, filename)
+            
+            self.logger.info(f"Saved {len(data_list)} items to {filename}")
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"Error saving to Parquet: {str(e)}")
+            return False
+    
+    def load_from_parquet(self, filename, columns=None):
+        """Load data from a Parquet file.
+        
+        Args:
+            filename (str): Input filename
+            columns (list): Columns to read (e.g. ['stock_symbols',
+                'sentiment.vader.compound']), or None for all columns
+            
+        Returns:
+            list: List of data items
+        """
+        try:
+            data = columnar.read_parquet(filename, columns)
+            
+            self.logger.info(f"Loaded {len(data)} items from {filename}")
+            return data
+            
+        except Exception as e:
+            self.logger.error(f"Error loading from Parquet: {str(e)}")
+            return []
+    
     def filter_by_keywords(self, data_list, keywords):
         """Filter data by keywords.
         
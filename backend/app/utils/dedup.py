@@ -0,0 +1,320 @@
+import hashlib
+import logging
+from collections import OrderedDict, deque
+import numpy as np
+
+class MinHasher:
+    """Class for computing MinHash signatures of token sets."""
+
+    # Hash values are kept in 32 bits and permuted modulo a Mersenne prime
+    MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+    MAX_HASH = np.uint64((1 << 32) - 1)
+
+    def __init__(self, num_perm=128, seed=1):
+        """Initialize the MinHasher.
+
+        Args:
+            num_perm (int): Number of permutations (signature length)
+            seed (int): Seed for the random permutation parameters
+        """
+        self.num_perm = num_perm
+        rng = np.random.RandomState(seed)
+        prime = int(self.MERSENNE_PRIME)
+        self.a = rng.randint(1, prime, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, prime, size=num_perm, dtype=np.uint64)
+
+    def signature(self, shingles):
+        """Compute the MinHash signature of a set of shingles.
+
+        Args:
+            shingles (iterable): Shingles (strings) to hash
+
+        Returns:
+            numpy.ndarray: Signature of length num_perm
+        """
+        hashes = np.array(
+            [self._hash(shingle) for shingle in set(shingles)],
+            dtype=np.uint64
+        )
+
+        if len(hashes) == 0:
+            return np.full(self.num_perm, self.MAX_HASH, dtype=np.uint64)
+
+        # Apply all permutations at once: (a * h + b) mod p, truncated to 32 bits
+        permuted = (np.outer(hashes, self.a) + self.b) % self.MERSENNE_PRIME
+        permuted &= self.MAX_HASH
+
+        return permuted.min(axis=0)
+
+    @staticmethod
+    def _hash(shingle):
+        """Hash a shingle to a 32-bit integer."""
+        digest = hashlib.sha1(shingle.encode('utf-8')).digest()
+        return int.from_bytes(digest[:4], 'little')
+
+    @staticmethod
+    def jaccard(sig1, sig2):
+        """Estimate the Jaccard similarity of two signatures.
+
+        Args:
+            sig1 (numpy.ndarray): First signature
+            sig2 (numpy.ndarray): Second signature
+
+        Returns:
+            float: Estimated Jaccard similarity
+        """
+        return float(np.count_nonzero(sig1 == sig2)) / len(sig1)
+
+
+class LSHIndex:
+    """Banded locality-sensitive hashing index over MinHash signatures.
+
+    The index holds at most ``max_entries`` signatures; the oldest entries are
+    evicted first, so memory stays bounded when it is used over a stream.
+    """
+
+    def __init__(self, threshold=0.8, num_perm=128, max_entries=100000):
+        """Initialize the LSH index.
+
+        Args:
+            threshold (float): Jaccard similarity threshold for candidates
+            num_perm (int): Signature length
+            max_entries (int): Maximum number of signatures kept in the index
+        """
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.max_entries = max_entries
+        self.bands, self.rows = self.optimal_params(threshold, num_perm)
+        self.buckets = [{} for _ in range(self.bands)]
+        self.entries = OrderedDict()
+
+    @staticmethod
+    def optimal_params(threshold, num_perm):
+        """Choose the band/row split whose S-curve midpoint is closest to the threshold.
+
+        Args:
+            threshold (float): Jaccard similarity threshold
+            num_perm (int): Signature length
+
+        Returns:
+            tuple: (bands, rows)
+        """
+        best = (num_perm, 1)
+        best_error = float('inf')
+
+        for rows in range(1, num_perm + 1):
+            bands = num_perm // rows
+            # Similarity at which a pair has a 50% chance of sharing a bucket
+            midpoint = (1.0 / bands) ** (1.0 / rows)
+            error = abs(midpoint - threshold)
+            if error < best_error:
+                best = (bands, rows)
+                best_error = error
+
+        return best
+
+    def _band_keys(self, signature):
+        """Yield the bucket key of each band of a signature."""
+        for band in range(self.bands):
+            start = band * self.rows
+            yield signature[start:start + self.rows].tobytes()
+
+    def query(self, signature):
+        """Find indexed entries that are near-duplicates of a signature.
+
+        Args:
+            signature (numpy.ndarray): Signature to look up
+
+        Returns:
+            list: Keys of entries whose estimated similarity meets the threshold
+        """
+        candidates = set()
+        for band, band_key in enumerate(self._band_keys(signature)):
+            candidates.update(self.buckets[band].get(band_key, ()))
+
+        return [
+            key for key in candidates
+            if MinHasher.jaccard(signature, self.entries[key][0]) >= self.threshold
+        ]
+
+    def insert(self, key, signature, value=None):
+        """Add a signature to the index.
+
+        Args:
+            key: Unique key of the entry
+            signature (numpy.ndarray): Signature of the entry
+            value: Optional value stored alongside the signature
+
+        Returns:
+            list: (key, value) of the oldest entries evicted to stay within max_entries
+        """
+        self.entries[key] = (signature, value)
+        for band, band_key in enumerate(self._band_keys(signature)):
+            self.buckets[band].setdefault(band_key, set()).add(key)
+
+        evicted = []
+        while len(self.entries) > self.max_entries:
+            oldest = next(iter(self.entries))
+            evicted.append((oldest, self.entries[oldest][1]))
+            self.remove(oldest)
+        return evicted
+
+    def get(self, key):
+        """Get the value stored for a key, or None if it was evicted."""
+        entry = self.entries.get(key)
+        return entry[1] if entry else None
+
+    def set(self, key, value):
+        """Replace the value stored for a key, if it is still indexed."""
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries[key] = (entry[0], value)
+
+    def remove(self, key):
+        """Remove an entry from the index.
+
+        Args:
+            key: Key of the entry to remove
+        """
+        signature, _ = self.entries.pop(key)
+        for band, band_key in enumerate(self._band_keys(signature)):
+            bucket = self.buckets[band].get(band_key)
+            if bucket is None:
+                continue
+            bucket.discard(key)
+            if not bucket:
+                del self.buckets[band][band_key]
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class NearDuplicateFilter:
+    """Class for filtering near-duplicate posts using MinHash and LSH."""
+
+    MODES = ('drop', 'collapse')
+
+    def __init__(self, threshold=0.8, num_perm=128, mode='drop', shingle_size=1,
+                 max_entries=100000):
+        """Initialize the near-duplicate filter.
+
+        Args:
+            threshold (float): Jaccard similarity above which posts are duplicates
+            num_perm (int): Number of MinHash permutations
+            mode (str): 'drop' to discard duplicates, or 'collapse' to count them
+                on the first record seen (``duplicate_count``); in collapse mode
+                a record is only yielded once its count is final, when it is
+                evicted from the index or the input ends
+            shingle_size (int): Number of consecutive tokens per shingle
+            max_entries (int): Maximum number of posts kept in the LSH index
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Invalid deduplication mode: {mode}")
+
+        self.logger = logging.getLogger(__name__)
+        self.mode = mode
+        self.shingle_size = shingle_size
+        self.hasher = MinHasher(num_perm=num_perm)
+        self.index = LSHIndex(threshold=threshold, num_perm=num_perm, max_entries=max_entries)
+        self.duplicates = 0
+        self._next_key = 0
+        self._held = OrderedDict()
+        self._released = deque()
+
+    def shingles(self, tokens):
+        """Build the shingle set for a list of tokens.
+
+        Args:
+            tokens (list): Tokens of a post
+
+        Returns:
+            set: Set of shingles
+        """
+        size = self.shingle_size
+        if len(tokens) <= size:
+            return {' '.join(tokens)} if tokens else set()
+
+        return {' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+    def check(self, item):
+        """Check an item against the index, adding it if it is new.
+
+        Args:
+            item (dict): Preprocessed data item with 'tokens'
+
+        Returns:
+            bool: True if the item is a near-duplicate of an indexed item
+        """
+        tokens = item.get('tokens') or item.get('text', '').split()
+        signature = self.hasher.signature(self.shingles(tokens))
+
+        matches = self.index.query(signature)
+        if matches:
+            self.duplicates += 1
+            if self.mode == 'collapse':
+                original = self.index.get(matches[0])
+                if original is not None:
+                    original['duplicate_count'] += 1
+            return True
+
+        if self.mode == 'collapse':
+            item['duplicate_count'] = 0
+
+        evicted = self.index.insert(self._next_key, signature, item if self.mode == 'collapse' else None)
+        if self.mode == 'collapse':
+            # Evicted records cannot collect more duplicates
+            self._held[self._next_key] = item
+            for key, _ in evicted:
+                held = self._held.pop(key, None)
+                if held is not None:
+                    self._released.append(held)
+        self._next_key += 1
+        return False
+
+    def filter(self, items):
+        """Filter near-duplicates from a stream of items.
+
+        Args:
+            items (iterable): Preprocessed data items
+
+        Yields:
+            dict: Items that are not near-duplicates of earlier items
+        """
+        if self.mode != 'collapse':
+            for item in items:
+                if not self.check(item):
+                    yield item
+            return
+
+        # Yielded items may be written right away, so each is held until no
+        # more duplicates can be counted on it: when the index evicts it (the
+        # index bounds the number held), or when the input ends
+        for item in items:
+            self.check(item)
+            while self._released:
+                yield self._released.popleft()
+
+        while self._held:
+            key, item = self._held.popitem(last=False)
+            self.index.set(key, None)
+            yield item
+
+
+def build_dedup_filter(config):
+    """Create a near-duplicate filter from application config.
+
+    Args:
+        config (dict): Application config
+
+    Returns:
+        NearDuplicateFilter: The filter, or None if deduplication is disabled
+    """
+    if not config.get('DEDUP_ENABLED', False):
+        return None
+
+    return NearDuplicateFilter(
+        threshold=float(config.get('DEDUP_THRESHOLD', 0.8)),
+        num_perm=int(config.get('DEDUP_NUM_PERM', 128)),
+        mode=config.get('DEDUP_MODE', 'drop'),
+        max_entries=int(config.get('DEDUP_MAX_ENTRIES', 100000))
+    )
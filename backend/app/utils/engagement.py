@@ -0,0 +1,169 @@
+"""Refreshing the engagement counts of recent posts.
+
+Likes, replies and reposts are captured when a post is fetched and keep
+changing afterwards, mostly while the post is young. The refresher reads
+the posts created within max_age from the stored files, asks Bluesky for
+their current counts (youngest posts first), and writes changed counts back
+to the data and sentiment files and to the database, whose rollups are
+adjusted in place.
+
+Files are replaced atomically, one at a time. Files written in the last
+settle_time seconds are left alone: they may still be being written, and
+the counts in them are fresh anyway. A file merged by a concurrent
+compaction keeps its old counts in the compacted copy until the next run.
+"""
+
+import os
+import time
+import logging
+
+from app.utils import storage
+from app.utils import partitions
+from app.models.rollups import item_timestamp
+
+ENGAGEMENT_FIELDS = ('likes', 'replies', 'reposts')
+
+
+async def _call(func, *args):
+    """Run a blocking function directly (when there is no thread pool)."""
+    return func(*args)
+
+
+class EngagementRefresher:
+    """Class for refreshing the engagement counts of recently created posts."""
+
+    def __init__(self, data_dir='data', database=None, max_age=48 * 3600, max_posts=2500,
+                 settle_time=300, max_lag=partitions.DEFAULT_MAX_LAG):
+        """Initialize the refresher.
+
+        Args:
+            data_dir (str): Data directory
+            database (Database): Database to update as well, or None
+            max_age (float): Only posts created this many seconds ago or later
+                are refreshed
+            max_posts (int): Maximum number of posts refreshed per run
+            settle_time (float): Seconds after its last write before a file
+                is refreshed
+            max_lag (float): Maximum age of a post when it was written, in seconds
+        """
+        self.logger = logging.getLogger(__name__)
+        self.data_dir = data_dir
+        self.database = database
+        self.max_age = max_age
+        self.max_posts = max_posts
+        self.settle_time = settle_time
+        self.max_lag = max_lag
+
+    def collect(self, now=None):
+        """Find the stored posts young enough to be refreshed.
+
+        Args:
+            now (float): Current Unix time (default: the system clock)
+
+        Returns:
+            tuple: (URIs youngest first, stored count tuples per URI, URIs per file)
+        """
+        now = time.time() if now is None else now
+        since = now - self.max_age
+
+        created = {}
+        stored = {}
+        files = {}
+        for name in partitions.list_files(self.data_dir, since=since, max_lag=self.max_lag):
+            path = os.path.join(self.data_dir, name)
+            try:
+                if os.path.getmtime(path) > now - self.settle_time:
+                    continue
+
+                columns = ['id', 'created_at', 'timestamp', *ENGAGEMENT_FIELDS]
+                for item in storage.iter_records(path, columns=columns):
+                    uri = item.get('id')
+                    timestamp = item_timestamp(item, None)
+                    if uri is None or timestamp is None or timestamp < since:
+                        continue
+
+                    created[uri] = timestamp
+                    stored.setdefault(uri, set()).add(tuple(item.get(field) or 0 for field in ENGAGEMENT_FIELDS))
+                    files.setdefault(path, set()).add(uri)
+            except Exception as e:
+                self.logger.error(f"Error reading {name}: {str(e)}")
+
+        uris = sorted(created, key=created.get, reverse=True)[:self.max_posts]
+        return uris, stored, files
+
+    def apply(self, changes, files):
+        """Write changed counts to the stored files and the database.
+
+        Args:
+            changes (dict): New likes, replies and reposts per URI
+            files (dict): URIs stored in each file, as returned by collect()
+
+        Returns:
+            int: Number of files rewritten
+        """
+        rewritten = 0
+        for path, uris in sorted(files.items()):
+            if uris.isdisjoint(changes) or not os.path.exists(path):
+                continue
+
+            records = storage.load_records(path)
+            for item in records:
+                update = changes.get(item.get('id'))
+                if update is not None:
+                    item.update(update)
+            storage.replace_records(records, path)
+            rewritten += 1
+
+        if self.database is not None and changes:
+            self.database.update_engagement(changes)
+
+        return rewritten
+
+    async def run(self, api, run_blocking=None, now=None, on_collected=None, on_batch=None):
+        """Refresh the engagement counts of recent posts.
+
+        Args:
+            api (AsyncBlueskyAPI): Client used to fetch the current counts
+            run_blocking (callable): Coroutine function running a blocking
+                function and its arguments off the event loop (default: run
+                it directly)
+            now (float): Current Unix time (default: the system clock)
+            on_collected (callable): Called with the number of posts to refresh
+            on_batch (callable): Called with each batch of URIs and its counts
+
+        Returns:
+            dict: Numbers of posts checked, found, updated and files rewritten
+        """
+        run_blocking = run_blocking or _call
+
+        uris, stored, files = await run_blocking(self.collect, now)
+        if on_collected is not None:
+            on_collected(len(uris))
+
+        counts = await api.fetch_engagement(uris, on_batch=on_batch) if uris else {}
+        changes = {
+            uri: update for uri, update in counts.items()
+            if uri in stored and stored[uri] != {tuple(update[field] for field in ENGAGEMENT_FIELDS)}
+        }
+
+        files_rewritten = await run_blocking(self.apply, changes, files)
+
+        self.logger.info(f"Refreshed engagement of {len(counts)} posts, {len(changes)} changed")
+        return {
+            'posts_checked': len(uris),
+            'posts_found': len(counts),
+            'posts_updated': len(changes),
+            'files_rewritten': files_rewritten
+        }
+
+
+def build_refresher(config, data_dir='data', database=None):
+    """Create an engagement refresher from the application config."""
+    return EngagementRefresher(
+        data_dir=data_dir,
+        database=database,
+        max_age=float(config.get('ENGAGEMENT_REFRESH_MAX_AGE_HOURS', 48)) * 3600,
+        max_posts=int(config.get('ENGAGEMENT_REFRESH_MAX_POSTS', 2500)),
+        settle_time=float(config.get('ENGAGEMENT_REFRESH_SETTLE_SECONDS', 300)),
+        max_lag=partitions.lag_seconds(config)
+    )
@@ -0,0 +1,258 @@
+import time
+import logging
+import threading
+from collections import deque
+
+from app.models.database import consensus_label
+from app.models.rollups import LABELS
+from app.utils import json_codec
+
+# Fields of a scored post sent to subscribers
+POST_FIELDS = ('id', 'text', 'author', 'keyword', 'created_at', 'stock_symbols', 'likes', 'replies', 'reposts')
+
+
+def post_event(item):
+    """Build the compact form of a scored post sent to subscribers.
+
+    Args:
+        item (dict): Data item with sentiment results
+
+    Returns:
+        dict: Post fields with the consensus label, confidence and compound score
+    """
+    sentiment = item.get('sentiment') or {}
+    consensus = sentiment.get('consensus')
+
+    event = {field: item.get(field) for field in POST_FIELDS if field in item}
+    event['label'] = consensus_label(sentiment)
+    event['confidence'] = consensus.get('confidence') if isinstance(consensus, dict) else None
+    event['compound'] = (sentiment.get('vader') or {}).get('compound')
+    return event
+
+
+def format_sse(event, data, event_id=None):
+    """Format one Server-Sent Event.
+
+    Args:
+        event (str): Event name
+        data: JSON-serializable payload
+        event_id (int): Event id, sent back by browsers when reconnecting
+
+    Returns:
+        bytes: Encoded event
+    """
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json_codec.dumps(data).decode('utf-8')}")
+    return ('\n'.join(lines) + '\n\n').encode('utf-8')
+
+
+class Subscriber:
+    """A live feed subscription with server-side filtering and coalescing.
+
+    Posts are buffered up to max_posts; when a slow client falls behind, the
+    oldest posts are dropped and counted. Per-symbol aggregates are merged
+    into one pending update per symbol, so a slow client gets a single
+    compacted update instead of a backlog.
+    """
+
+    def __init__(self, symbols=None, labels=None, max_posts=100):
+        """Initialize the subscription.
+
+        Args:
+            symbols (list): Only posts and aggregates for these symbols (all if empty)
+            labels (list): Only posts with these consensus labels (all if empty);
+                aggregates always count every label
+            max_posts (int): Maximum number of posts buffered for this client
+        """
+        self.symbols = set(symbols) if symbols else None
+        self.labels = set(labels) if labels else None
+        self.posts = deque(maxlen=max_posts)
+        self.dropped = 0
+        self.aggregates = {}
+        self.condition = threading.Condition()
+
+    def offer(self, events):
+        """Add published posts that pass the filters.
+
+        Args:
+            events (list): Compact posts from post_event
+        """
+        with self.condition:
+            for event in events:
+                symbols = event.get('stock_symbols') or []
+                if self.symbols is not None:
+                    symbols = [symbol for symbol in symbols if symbol in self.symbols]
+                    if not symbols:
+                        continue
+
+                for symbol in symbols:
+                    self._aggregate(symbol, event)
+
+                if self.labels is None or event['label'] in self.labels:
+                    if len(self.posts) == self.posts.maxlen:
+                        self.dropped += 1
+                    self.posts.append(event)
+
+            if self.posts or self.aggregates:
+                self.condition.notify_all()
+
+    def _aggregate(self, symbol, event):
+        """Merge a post into the pending aggregate update of a symbol."""
+        aggregate = self.aggregates.get(symbol)
+        if aggregate is None:
+            aggregate = {label: 0 for label in LABELS}
+            aggregate.update({'total': 0, 'compound_sum': 0.0, 'likes': 0, 'replies': 0, 'reposts': 0})
+            self.aggregates[symbol] = aggregate
+
+        if event['label'] in aggregate:
+            aggregate[event['label']] += 1
+        aggregate['total'] += 1
+        aggregate['compound_sum'] += event['compound'] or 0.0
+        for key in ('likes', 'replies', 'reposts'):
+            aggregate[key] += event.get(key) or 0
+
+    def get(self, timeout=None):
+        """Wait for pending updates and take them.
+
+        Args:
+            timeout (float): Maximum number of seconds to wait
+
+        Returns:
+            dict: 'posts', 'dropped' and 'aggregates' (changes per symbol since
+                the previous update), or None if nothing arrived in time
+        """
+        with self.condition:
+            if not self.posts and not self.aggregates:
+                self.condition.wait(timeout)
+                if not self.posts and not self.aggregates:
+                    return None
+
+            update = {
+                'posts': list(self.posts),
+                'dropped': self.dropped,
+                'aggregates': self.aggregates
+            }
+            self.posts.clear()
+            self.dropped = 0
+            self.aggregates = {}
+
+        for aggregate in update['aggregates'].values():
+            aggregate['avg_sentiment'] = aggregate['compound_sum'] / aggregate['total']
+        return update
+
+
+class SentimentBroker:
+    """Class for fanning out newly scored posts to live feed subscribers.
+
+    Subscribers only see results scored in the same process. Listeners
+    (e.g. the anomaly detector) are called with every published batch.
+    """
+
+    def __init__(self, max_posts=100):
+        """Initialize the broker.
+
+        Args:
+            max_posts (int): Posts buffered per subscriber
+        """
+        self.logger = logging.getLogger(__name__)
+        self.max_posts = max_posts
+        self.subscribers = set()
+        self.listeners = []
+        self.lock = threading.Lock()
+
+    def subscribe(self, symbols=None, labels=None):
+        """Create a subscription.
+
+        Args:
+            symbols (list): Symbol filter
+            labels (list): Label filter
+
+        Returns:
+            Subscriber: The new subscription
+        """
+        subscriber = Subscriber(symbols, labels, self.max_posts)
+        with self.lock:
+            self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        """Remove a subscription."""
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+    def add_listener(self, listener):
+        """Call a function with the compact posts of every published batch.
+
+        Args:
+            listener (callable): Called with a list of compact posts; it runs
+                on the publishing thread and should return quickly
+        """
+        with self.lock:
+            self.listeners.append(listener)
+
+    def publish(self, results):
+        """Send scored posts to all subscribers and listeners.
+
+        Args:
+            results (list): Data items with sentiment results
+        """
+        with self.lock:
+            subscribers = list(self.subscribers)
+            listeners = list(self.listeners)
+
+        if not (subscribers or listeners) or not results:
+            return
+
+        events = [post_event(item) for item in results]
+        for listener in listeners:
+            # A failing listener must not fail the job that scored the posts
+            try:
+                listener(events)
+            except Exception as e:
+                self.logger.error(f"Error in sentiment listener {listener!r}: {str(e)}")
+        for subscriber in subscribers:
+            subscriber.offer(events)
+
+    def tee(self, results, batch_size=50, max_delay=1.0):
+        """Publish scored posts while passing them through.
+
+        Posts are published in batches of batch_size, or sooner once max_delay
+        seconds have passed since the last batch.
+
+        Args:
+            results (iterable): Data items with sentiment results
+            batch_size (int): Maximum posts per batch
+            max_delay (float): Maximum seconds a post waits before it is published
+
+        Yields:
+            dict: The same data items
+        """
+        batch = []
+        published_at = time.monotonic()
+        for item in results:
+            batch.append(item)
+            if len(batch) >= batch_size or time.monotonic() - published_at >= max_delay:
+                self.publish(batch)
+                batch = []
+                published_at = time.monotonic()
+            yield item
+
+        if batch:
+            self.publish(batch)
+
+
+_broker_lock = threading.Lock()
+
+
+def get_broker(app):
+    """Get the live sentiment broker of an application, creating it on first use."""
+    with _broker_lock:
+        broker = app.extensions.get('sentiment_broker')
+        if broker is None:
+            broker = SentimentBroker(max_posts=int(app.config.get('SSE_MAX_BUFFERED_POSTS', 100)))
+            app.extensions['sentiment_broker'] = broker
+
+    return broker
@@ -0,0 +1,227 @@
+import os
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from app.utils import storage
+from app.models.rollups import LABELS, item_timestamp
+
+# Fields read from each sentiment file (columnar files skip all others)
+SUMMARY_COLUMNS = [
+    'stock_symbols', 'sentiment.consensus', 'sentiment.vader.compound',
+    'timestamp', 'created_at', 'likes', 'replies', 'reposts', 'author_followers'
+]
+
+# Number of files whose reduced rows are cached, least recently used first out
+MAX_CACHED_FILES = 4096
+
+
+def reduce_sentiment_file(filename):
+    """Load a sentiment file and keep only what the stock summary needs.
+
+    Runs in a worker thread or process, so it must stay a module-level function.
+
+    Args:
+        filename (str): Path of the sentiment file
+
+    Returns:
+        list: Tuples of (symbols, label, compound, timestamp, likes, replies,
+            reposts, followers); followers is None when unknown
+    """
+    rows = []
+
+    for item in storage.iter_records(filename, columns=SUMMARY_COLUMNS):
+        symbols = item.get('stock_symbols')
+        sentiment = item.get('sentiment')
+        if not symbols or not sentiment or 'consensus' not in sentiment:
+            continue
+
+        consensus = sentiment['consensus']
+        label = consensus.get('label') if isinstance(consensus, dict) else consensus
+
+        rows.append((
+            tuple(symbols),
+            label,
+            sentiment.get('vader', {}).get('compound'),
+            item_timestamp(item, None),
+            item.get('likes') or 0,
+            item.get('replies') or 0,
+            item.get('reposts') or 0,
+            item.get('author_followers')
+        ))
+
+    return rows
+
+
+class SentimentFileLoader:
+    """Class for loading sentiment files in parallel with a per-file cache.
+
+    Reduced file contents are cached by path and reused while the file's
+    modification time and size are unchanged, so repeated summaries only
+    parse new or modified files. Queries over different time ranges load
+    different subsets of the files, so the cache keeps the max_files most
+    recently loaded files rather than only those of the last call.
+    """
+
+    def __init__(self, max_workers=4, use_processes=False, max_files=MAX_CACHED_FILES):
+        """Initialize the loader.
+
+        Args:
+            max_workers (int): Number of parallel workers
+            use_processes (bool): Parse files in worker processes instead of threads
+            max_files (int): Maximum number of files kept in the cache
+        """
+        self.logger = logging.getLogger(__name__)
+        self.max_workers = max_workers
+        self.use_processes = use_processes
+        self.max_files = max_files
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+
+    def load(self, filenames):
+        """Load reduced rows for a set of sentiment files.
+
+        Args:
+            filenames (list): Paths of sentiment files
+
+        Returns:
+            list: Reduced rows of all files
+        """
+        versions = {}
+        missing = []
+        for filename in filenames:
+            try:
+                stat = os.stat(filename)
+                versions[filename] = (stat.st_mtime_ns, stat.st_size)
+            except OSError as e:
+                missing.append(filename)
+                self.logger.error(f"Error reading {filename}: {str(e)}")
+
+        with self.lock:
+            # Forget files that no longer exist
+            for filename in missing:
+                self.cache.pop(filename, None)
+
+            rows = {}
+            stale = []
+            for filename, version in versions.items():
+                cached = self.cache.get(filename)
+                if cached is not None and cached[0] == version:
+                    self.cache.move_to_end(filename)
+                    rows[filename] = cached[1]
+                else:
+                    stale.append(filename)
+
+        if stale:
+            self.logger.info(f"Parsing {len(stale)} of {len(versions)} sentiment files")
+            for filename, file_rows in zip(stale, self._parse(stale)):
+                rows[filename] = file_rows
+                with self.lock:
+                    self.cache[filename] = (versions[filename], file_rows)
+                    self.cache.move_to_end(filename)
+
+        with self.lock:
+            while len(self.cache) > self.max_files:
+                self.cache.popitem(last=False)
+
+        return [row for filename in versions if filename in rows for row in rows[filename]]
+
+    def _parse(self, filenames):
+        """Parse files in parallel, skipping those that fail to load."""
+        if len(filenames) == 1 or self.max_workers <= 1:
+            return [self._parse_one(filename) for filename in filenames]
+
+        executor_class = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+        with executor_class(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(reduce_sentiment_file, filename) for filename in filenames]
+
+        results = []
+        for filename, future in zip(filenames, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                self.logger.error(f"Error loading {filename}: {str(e)}")
+                results.append([])
+        return results
+
+    def _parse_one(self, filename):
+        """Parse a single file in the calling thread."""
+        try:
+            return reduce_sentiment_file(filename)
+        except Exception as e:
+            self.logger.error(f"Error loading {filename}: {str(e)}")
+            return []
+
+
+def summarize_rows(rows, symbols, since=None, until=None):
+    """Summarize reduced sentiment rows per symbol.
+
+    Args:
+        rows (list): Reduced rows from SentimentFileLoader
+        symbols (list): Stock symbols
+        since (float): Only posts from this Unix timestamp on
+        until (float): Only posts before this Unix timestamp
+
+    Returns:
+        dict: Summary per symbol, in the same shape as the database summary
+    """
+    stock_data = {}
+    moments = {}
+    for symbol in symbols:
+        stock_data[symbol] = {label: 0 for label in LABELS}
+        stock_data[symbol].update({
+            'total': 0, 'avg_sentiment': 0, 'compound_std': 0,
+            'likes': 0, 'replies': 0, 'reposts': 0
+        })
+        moments[symbol] = [0.0, 0.0, 0]
+
+    for post_symbols, label, compound, timestamp, likes, replies, reposts, *_ in rows:
+        if since is not None and (timestamp is None or timestamp < since):
+            continue
+        if until is not None and (timestamp is None or timestamp >= until):
+            continue
+
+        for symbol in post_symbols:
+            summary = stock_data.get(symbol)
+            if summary is None:
+                continue
+
+            if label in summary:
+                summary[label] += 1
+            summary['total'] += 1
+            summary['likes'] += likes
+            summary['replies'] += replies
+            summary['reposts'] += reposts
+
+            if compound is not None:
+                moments[symbol][0] += compound
+                moments[symbol][1] += compound * compound
+                moments[symbol][2] += 1
+
+    for symbol, summary in stock_data.items():
+        compound_sum, compound_sq_sum, count = moments[symbol]
+        if summary['total'] > 0:
+            summary['avg_sentiment'] = compound_sum / summary['total']
+        if count > 1:
+            mean = compound_sum / count
+            summary['compound_std'] = max(compound_sq_sum / count - mean * mean, 0.0) ** 0.5
+
+    return stock_data
+
+
+_loader_lock = threading.Lock()
+
+
+def get_sentiment_loader(app):
+    """Get the sentiment file loader of an application, creating it on first use."""
+    with _loader_lock:
+        loader = app.extensions.get('sentiment_loader')
+        if loader is None:
+            loader = SentimentFileLoader(
+                max_workers=int(app.config.get('SUMMARY_LOADER_WORKERS', 4)),
+                use_processes=bool(app.config.get('SUMMARY_LOADER_PROCESSES', False))
+            )
+            app.extensions['sentiment_loader'] = loader
+
+    return loader
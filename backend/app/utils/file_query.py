@@ -0,0 +1,209 @@
+import itertools
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from app.utils import storage
+from app.utils import columnar
+from app.models.database import consensus_label
+
+# Flattened columns used by the filters
+FILTER_COLUMNS = {
+    'keyword': 'keyword',
+    'symbol': 'stock_symbols',
+    'label': 'sentiment.consensus'
+}
+
+
+def parse_fields(value):
+    """Parse a comma-separated 'fields' parameter.
+
+    Args:
+        value (str): Comma-separated field names (nested fields use dots)
+
+    Returns:
+        list: Field names, or None to return whole records
+    """
+    if not value:
+        return None
+
+    return [field.strip() for field in value.split(',') if field.strip()]
+
+
+def project(item, fields):
+    """Keep only the requested (possibly nested) fields of a data item.
+
+    Args:
+        item (dict): Data item
+        fields (list): Field names such as 'id' or 'sentiment.vader.compound'
+
+    Returns:
+        dict: Projected data item
+    """
+    if fields is None:
+        return item
+
+    projected = {}
+    for field in fields:
+        parts = field.split('.')
+        value = item
+        for part in parts:
+            if not isinstance(value, dict) or part not in value:
+                break
+            value = value[part]
+        else:
+            target = projected
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+            target[parts[-1]] = value
+
+    return projected
+
+
+def matches(item, keyword=None, symbol=None, label=None):
+    """Check whether a data item passes the filters.
+
+    Args:
+        item (dict): Data item
+        keyword (str): Required fetch keyword
+        symbol (str): Required stock symbol
+        label (str): Required consensus sentiment label
+
+    Returns:
+        bool: True if the item passes all filters
+    """
+    if keyword is not None and item.get('keyword') != keyword:
+        return False
+    if symbol is not None and symbol not in (item.get('stock_symbols') or []):
+        return False
+    if label is not None:
+        sentiment = item.get('sentiment')
+        if not sentiment or consensus_label(sentiment) != label:
+            return False
+    return True
+
+
+def _read_columns(fields, filters):
+    """Columns needed to evaluate the filters and build the projection."""
+    if fields is None:
+        return None
+
+    columns = list(fields)
+    for name, value in filters.items():
+        if value is not None:
+            columns.append(FILTER_COLUMNS[name])
+    return columns
+
+
+def iter_matching(filename, fields=None, **filters):
+    """Stream the projected data items of a file that pass the filters.
+
+    Args:
+        filename (str): Input filename
+        fields (list): Fields to return, or None for whole records
+        **filters: keyword, symbol and/or label filters
+
+    Yields:
+        dict: Projected data items
+    """
+    if storage.get_extension(filename) == storage.FORMAT_EXTENSIONS['arrow']:
+        table = _filter_arrow_table(columnar.open_arrow_ipc(filename), **filters)
+        yield from _iter_table(table, fields)
+        return
+
+    for item in storage.iter_records(filename, columns=_read_columns(fields, filters)):
+        if matches(item, **filters):
+            yield project(item, fields)
+
+
+def query_file(filename, offset=0, limit=100, fields=None, **filters):
+    """Read one page of the filtered and projected data items of a file.
+
+    Args:
+        filename (str): Input filename
+        offset (int): Number of matching items to skip
+        limit (int): Maximum number of items to return
+        fields (list): Fields to return, or None for whole records
+        **filters: keyword, symbol and/or label filters
+
+    Returns:
+        dict: 'data' (items), 'next_cursor' (offset of the next page, or None)
+            and 'total' (number of matching items, or None when the file was
+            not scanned to the end)
+    """
+    if storage.get_extension(filename) == storage.FORMAT_EXTENSIONS['arrow']:
+        # Filter and slice the memory-mapped table; only the page is converted
+        table = _filter_arrow_table(columnar.open_arrow_ipc(filename), **filters)
+        data = list(_iter_table(table.slice(offset, limit), fields))
+        total = table.num_rows
+        next_cursor = offset + len(data) if offset + len(data) < total else None
+        return {'data': data, 'next_cursor': next_cursor, 'total': total}
+
+    # Read one item past the page to find out whether there is a next page
+    stream = iter_matching(filename, fields, **filters)
+    page = list(itertools.islice(stream, offset, offset + limit + 1))
+    has_more = len(page) > limit
+    data = page[:limit]
+
+    # The total is only known when the scan reached the end of the file.
+    # JSON array files are decoded in full anyway, so counting the rest is cheap.
+    total = None
+    if not has_more and (data or offset == 0):
+        total = offset + len(data)
+    elif has_more and storage.get_extension(filename) == storage.FORMAT_EXTENSIONS['json']:
+        total = offset + len(page) + sum(1 for _ in stream)
+
+    return {
+        'data': data,
+        'next_cursor': offset + limit if has_more else None,
+        'total': total
+    }
+
+
+def _filter_arrow_table(table, keyword=None, symbol=None, label=None):
+    """Filter an Arrow table with vectorized compute kernels."""
+    mask = np.ones(table.num_rows, dtype=bool)
+
+    if keyword is not None:
+        mask &= _column_equals(table, 'keyword', keyword)
+
+    if label is not None:
+        name = 'sentiment.consensus.label'
+        if name not in table.column_names:
+            name = 'sentiment.consensus'
+        mask &= _column_equals(table, name, label)
+
+    if symbol is not None:
+        symbol_mask = np.zeros(table.num_rows, dtype=bool)
+        if 'stock_symbols' in table.column_names:
+            # Parent indices are relative to each chunk of the column
+            start = 0
+            for chunk in table['stock_symbols'].chunks:
+                hits = pc.equal(pc.list_flatten(chunk), symbol)
+                rows = pc.filter(pc.list_parent_indices(chunk), hits)
+                symbol_mask[start + np.asarray(rows, dtype=np.int64)] = True
+                start += len(chunk)
+        mask &= symbol_mask
+
+    if mask.all():
+        return table
+    return table.filter(pa.array(mask))
+
+
+def _column_equals(table, name, value):
+    """Boolean mask of rows where a column equals a value (False if the column is missing)."""
+    if name not in table.column_names:
+        return np.zeros(table.num_rows, dtype=bool)
+
+    result = pc.equal(table[name], value)
+    return np.asarray(pc.fill_null(result, False), dtype=bool)
+
+
+def _iter_table(table, fields):
+    """Yield projected data items from an Arrow table."""
+    if fields is not None:
+        table = table.select(columnar.available_columns(fields, table.column_names))
+
+    for batch in table.to_batches(max_chunksize=storage.STREAM_BATCH_SIZE):
+        for row in batch.to_pylist():
+            yield columnar.unflatten_record(row)
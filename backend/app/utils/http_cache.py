@@ -0,0 +1,134 @@
+import gzip
+import hashlib
+import os
+from flask import request, current_app
+
+# brotli is optional; without it responses are only gzip-compressed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Mimetypes worth compressing
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/x-ndjson', 'text/html', 'text/plain')
+
+# Suffix appended to the ETag of each compressed representation
+ENCODING_SUFFIXES = {'br': '-br', 'gzip': '-gzip'}
+
+
+def file_version(filename):
+    """Get a version of a file that changes whenever the file is rewritten.
+
+    Args:
+        filename (str): Path of the file
+
+    Returns:
+        tuple: Modification time (ns) and size of the file
+    """
+    stat = os.stat(filename)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def make_etag(*parts):
+    """Build a strong ETag from the values a response depends on.
+
+    Args:
+        *parts: Values identifying the resource version (file versions,
+            query strings, data versions, ...)
+
+    Returns:
+        str: ETag value (without quotes)
+    """
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+
+def not_modified(etag, cache_control=None):
+    """Build a 304 response if the client already has this version.
+
+    Args:
+        etag (str): ETag of the current version
+        cache_control (str): Cache-Control header value
+
+    Returns:
+        Response: 304 response, or None if the full response must be sent
+    """
+    if_none_match = request.if_none_match
+    tags = [etag] + [etag + suffix for suffix in ENCODING_SUFFIXES.values()]
+    if not any(if_none_match.contains(tag) for tag in tags):
+        return None
+
+    response = current_app.response_class(status=304)
+    return cache_response(response, etag, cache_control)
+
+
+def cache_response(response, etag, cache_control=None):
+    """Add the ETag and Cache-Control headers to a response.
+
+    Args:
+        response (Response): Response to send
+        etag (str): ETag of the response body
+        cache_control (str): Cache-Control header value
+
+    Returns:
+        Response: The same response
+    """
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = (
+        cache_control or current_app.config.get('HTTP_CACHE_CONTROL', 'no-cache')
+    )
+    return response
+
+
+def choose_encoding():
+    """Pick the best compression supported by both client and server.
+
+    Returns:
+        str: 'br', 'gzip' or None
+    """
+    accept = request.accept_encodings
+    if brotli is not None and accept['br']:
+        return 'br'
+    if accept['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress_response(response):
+    """Compress a response body with the encoding negotiated for the request.
+
+    Meant to be registered as an after_request handler. Streamed, small and
+    already encoded responses are left alone.
+
+    Args:
+        response (Response): Outgoing response
+
+    Returns:
+        Response: The (possibly compressed) response
+    """
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or 'Content-Encoding' in response.headers):
+        return response
+
+    response.vary.add('Accept-Encoding')
+
+    data = response.get_data()
+    if len(data) < current_app.config.get('COMPRESS_MIN_SIZE', 500):
+        return response
+
+    encoding = choose_encoding()
+    if encoding is None:
+        return response
+
+    if encoding == 'br':
+        response.set_data(brotli.compress(data, quality=current_app.config.get('BROTLI_QUALITY', 5)))
+    else:
+        response.set_data(gzip.compress(data, compresslevel=current_app.config.get('GZIP_LEVEL', 6)))
+    response.headers['Content-Encoding'] = encoding
+
+    # Each encoding is a different representation with its own strong ETag
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(etag + ENCODING_SUFFIXES[encoding], weak)
+
+    return response
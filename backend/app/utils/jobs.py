@@ -0,0 +1,440 @@
+import os
+import time
+import uuid
+import inspect
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from app.utils import json_codec
+from app.utils.async_runner import AsyncRunner, get_async_runner
+from app.models.database import parse_database_uri
+
+CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    finished INTEGER NOT NULL,
+    data TEXT NOT NULL
+)
+"""
+
+# Minimum number of seconds between saves of a running job's progress
+SAVE_INTERVAL = 1.0
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is full."""
+
+
+class Job:
+    """A unit of background work with progress reporting.
+
+    Progress is kept as named counters (e.g. 'posts_fetched'); the counter
+    named by 'unit' is used to compute throughput and the ETA.
+    """
+
+    def __init__(self, job_type, unit, total=None, asynchronous=False):
+        """Initialize the job.
+
+        Args:
+            job_type (str): Kind of job, e.g. 'fetch' or 'analyze'
+            unit (str): Name of the counter measuring progress
+            total (int): Expected final value of that counter, if known
+            asynchronous (bool): Whether the job runs on the event loop
+        """
+        self.id = uuid.uuid4().hex
+        self.type = job_type
+        self.unit = unit
+        self.total = total
+        self.asynchronous = asynchronous
+        self.status = 'queued'
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.progress = {unit: 0}
+        self.result = None
+        self.error = None
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        self.on_progress = None
+        self.saved_at = 0.0
+
+    def advance(self, counter, count=1):
+        """Increase a progress counter.
+
+        Args:
+            counter (str): Counter name
+            count (int): Amount to add
+        """
+        with self.lock:
+            self.progress[counter] = self.progress.get(counter, 0) + count
+
+        if self.on_progress is not None:
+            self.on_progress(self)
+
+    def set_total(self, total):
+        """Set the expected final value of the progress counter."""
+        with self.lock:
+            self.total = total
+
+    def track(self, items, counter):
+        """Pass items through, counting them as they are consumed.
+
+        Args:
+            items (iterable): Items to pass through
+            counter (str): Counter to increase per item
+
+        Yields:
+            The same items
+        """
+        for item in items:
+            self.advance(counter)
+            yield item
+
+    def wait(self, timeout=None):
+        """Wait until the job has finished.
+
+        Args:
+            timeout (float): Maximum number of seconds to wait
+
+        Returns:
+            bool: True if the job finished
+        """
+        return self.done.wait(timeout)
+
+    @property
+    def finished(self):
+        """Whether the job has succeeded or failed."""
+        return self.status in ('succeeded', 'failed')
+
+    def to_dict(self):
+        """Describe the job, its progress, throughput and ETA.
+
+        Returns:
+            dict: Job status
+        """
+        with self.lock:
+            progress = dict(self.progress)
+            total = self.total
+
+        throughput = None
+        eta = None
+        if self.started_at is not None:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+            if elapsed > 0:
+                throughput = progress[self.unit] / elapsed
+            if not self.finished and total is not None and throughput:
+                eta = max(total - progress[self.unit], 0) / throughput
+
+        return {
+            'id': self.id,
+            'type': self.type,
+            'status': self.status,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'progress': progress,
+            'total': total,
+            'throughput': throughput,
+            'eta_seconds': eta,
+            'result': self.result,
+            'error': self.error
+        }
+
+
+class JobStore:
+    """Class for sharing the status of jobs between server processes.
+
+    Jobs run in the process that accepted them. Their status is saved in an
+    SQLite table when they are queued, start and finish, and at most every
+    SAVE_INTERVAL seconds while they make progress, so any process opening
+    the same file can report it.
+    """
+
+    def __init__(self, path='data/jobs.db'):
+        """Open (and if needed create) the store.
+
+        Args:
+            path (str): SQLite database file, or ':memory:'
+        """
+        self.path = path
+
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.lock:
+            if path != ':memory:':
+                self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute(CREATE_TABLE)
+            self.conn.commit()
+
+    def save(self, status):
+        """Save the status of a job.
+
+        Args:
+            status (dict): Job status (see Job.to_dict)
+        """
+        data = json_codec.dumps(status).decode('utf-8')
+        with self.lock:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO jobs (id, created_at, finished, data) VALUES (?, ?, ?, ?)",
+                    (status['id'], status['created_at'], int(status['status'] in ('succeeded', 'failed')), data)
+                )
+
+    def get(self, job_id):
+        """Get the saved status of a job, or None if it is unknown."""
+        with self.lock:
+            row = self.conn.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json_codec.loads(row[0]) if row else None
+
+    def list(self, limit=100):
+        """List the saved job statuses, newest first."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT data FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [json_codec.loads(row[0]) for row in rows]
+
+    def prune(self, max_history):
+        """Forget the oldest finished jobs beyond the history size."""
+        with self.lock:
+            with self.conn:
+                self.conn.execute(
+                    "DELETE FROM jobs WHERE finished = 1 AND id NOT IN "
+                    "(SELECT id FROM jobs WHERE finished = 1 ORDER BY created_at DESC LIMIT ?)",
+                    (max_history,)
+                )
+
+    def close(self):
+        """Close the database connection."""
+        with self.lock:
+            self.conn.close()
+
+
+class JobQueue:
+    """Class for running jobs in a bounded in-process worker pool.
+
+    No external broker is needed. Jobs are lost when the process exits;
+    with a JobStore, their status can be queried from other processes.
+
+    Coroutine functions run on an event loop instead of the worker pool, so
+    I/O-bound jobs only hold a thread while they do blocking work and many
+    of them can wait on the network at once.
+    """
+
+    def __init__(self, app=None, max_workers=2, max_queued=20, max_history=100,
+                 runner=None, max_async_queued=500, store=None):
+        """Initialize the queue.
+
+        Args:
+            app (Flask): Application whose context jobs run in
+            max_workers (int): Number of jobs run at the same time
+            max_queued (int): Maximum number of unfinished jobs
+            max_history (int): Number of finished jobs kept for status queries
+            runner (AsyncRunner): Event loop for coroutine jobs (created on
+                first use if not given)
+            max_async_queued (int): Maximum number of unfinished coroutine jobs
+            store (JobStore): Store the status of jobs is saved to, if any
+        """
+        self.logger = logging.getLogger(__name__)
+        self.app = app
+        self.max_queued = max_queued
+        self.max_history = max_history
+        self.runner = runner
+        self.max_async_queued = max_async_queued
+        self.store = store
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+
+    def submit(self, job_type, func, unit, total=None, **kwargs):
+        """Queue a job.
+
+        Args:
+            job_type (str): Kind of job
+            func (callable): Function called as func(job, **kwargs); its return
+                value becomes the job result. Coroutine functions are awaited
+                on the event loop.
+            unit (str): Name of the progress counter
+            total (int): Expected final value of the progress counter, if known
+            **kwargs: Arguments for func
+
+        Returns:
+            Job: The queued job
+
+        Raises:
+            QueueFullError: If too many jobs are unfinished
+        """
+        asynchronous = inspect.iscoroutinefunction(func)
+        job = Job(job_type, unit, total, asynchronous=asynchronous)
+        limit = self.max_async_queued if asynchronous else self.max_queued
+
+        with self.lock:
+            pending = sum(1 for queued in self.jobs.values()
+                          if not queued.finished and queued.asynchronous == asynchronous)
+            if pending >= limit:
+                raise QueueFullError(f"Too many unfinished jobs ({pending})")
+
+            self.jobs[job.id] = job
+            self._prune()
+
+            if asynchronous and self.runner is None:
+                self.runner = AsyncRunner()
+
+        if self.store is not None:
+            job.on_progress = self._save
+            self._save(job, force=True)
+
+        if asynchronous:
+            self.runner.submit(self._run_async(job, func, kwargs))
+        else:
+            self.executor.submit(self._run, job, func, kwargs)
+        return job
+
+    def get(self, job_id):
+        """Get a job by id, or None if it is unknown."""
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def list(self):
+        """List known jobs, newest first."""
+        with self.lock:
+            return list(reversed(self.jobs.values()))
+
+    def status(self, job_id):
+        """Get the status of a job of this or, through the store, another process.
+
+        Returns:
+            dict: Job status (see Job.to_dict), or None if the job is unknown
+        """
+        job = self.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        return self.store.get(job_id) if self.store is not None else None
+
+    def statuses(self):
+        """List the status of recent jobs of all processes sharing the store, newest first."""
+        local = [job.to_dict() for job in self.list()]
+        if self.store is None:
+            return local
+
+        # Jobs of this process are more up to date than their saved status
+        statuses = {status['id']: status for status in self.store.list(self.max_history)}
+        statuses.update((status['id'], status) for status in local)
+        return sorted(statuses.values(), key=lambda status: status['created_at'], reverse=True)
+
+    def shutdown(self, wait=True):
+        """Stop the worker pool and the event loop."""
+        self.executor.shutdown(wait=wait)
+        if self.runner is not None:
+            self.runner.shutdown(wait=wait)
+
+    def _run(self, job, func, kwargs):
+        """Run a job in a worker thread."""
+        job.status = 'running'
+        job.started_at = time.time()
+        self._save(job, force=True)
+
+        try:
+            if self.app is not None:
+                with self.app.app_context():
+                    job.result = func(job, **kwargs)
+            else:
+                job.result = func(job, **kwargs)
+            job.status = 'succeeded'
+        except Exception as e:
+            self._fail(job, e)
+        finally:
+            job.finished_at = time.time()
+            self._save(job, force=True)
+            job.done.set()
+
+    async def _run_async(self, job, func, kwargs):
+        """Run a coroutine job on the event loop."""
+        job.status = 'running'
+        job.started_at = time.time()
+        self._save(job, force=True)
+
+        try:
+            # Each task has its own context, so the app context stays local to the job
+            if self.app is not None:
+                with self.app.app_context():
+                    job.result = await func(job, **kwargs)
+            else:
+                job.result = await func(job, **kwargs)
+            job.status = 'succeeded'
+        except Exception as e:
+            self._fail(job, e)
+        finally:
+            job.finished_at = time.time()
+            self._save(job, force=True)
+            job.done.set()
+
+    def _save(self, job, force=False):
+        """Save the status of a job to the store, at most every SAVE_INTERVAL seconds unless forced."""
+        if self.store is None:
+            return
+
+        now = time.monotonic()
+        if not force and now - job.saved_at < SAVE_INTERVAL:
+            return
+        job.saved_at = now
+
+        try:
+            self.store.save(job.to_dict())
+            if force and job.finished:
+                self.store.prune(self.max_history)
+        except Exception as e:
+            # The job keeps running; only other processes miss its status
+            self.logger.error(f"Error saving the status of job {job.id}: {str(e)}")
+
+    def _fail(self, job, error):
+        """Record a job failure."""
+        self.logger.exception(f"Job {job.id} ({job.type}) failed")
+        job.error = str(error)
+        job.status = 'failed'
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond the history size."""
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[:max(len(finished) - self.max_history, 0)]:
+            del self.jobs[job_id]
+
+
+_queue_lock = threading.Lock()
+
+
+def get_job_queue(app):
+    """Get the job queue of an application, creating it on first use.
+
+    Job status is saved in the SQLite database when that backend is used,
+    and in JOB_STORE_PATH otherwise, so every server process can report it.
+    """
+    with _queue_lock:
+        queue = app.extensions.get('job_queue')
+        if queue is None:
+            path = app.config.get('JOB_STORE_PATH')
+            if not path:
+                if app.config.get('STORAGE_BACKEND', 'sqlite') == 'sqlite':
+                    path = parse_database_uri(app.config['DATABASE_URI'])
+                else:
+                    path = 'data/jobs.db'
+
+            queue = JobQueue(
+                app,
+                max_workers=int(app.config.get('JOB_WORKERS', 2)),
+                max_queued=int(app.config.get('JOB_QUEUE_SIZE', 20)),
+                max_history=int(app.config.get('JOB_HISTORY', 100)),
+                runner=get_async_runner(app),
+                max_async_queued=int(app.config.get('ASYNC_JOB_QUEUE_SIZE', 500)),
+                store=JobStore(path)
+            )
+            app.extensions['job_queue'] = queue
+
+    return queue
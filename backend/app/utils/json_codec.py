@@ -0,0 +1,60 @@
+import json
+from flask.json.provider import DefaultJSONProvider
+
+# orjson is optional; it is several times faster than the json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(obj):
+    """Serialize an object to compact JSON bytes.
+
+    Args:
+        obj: Object to serialize
+
+    Returns:
+        bytes: UTF-8 encoded JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+def loads(data):
+    """Deserialize JSON from bytes or str.
+
+    Args:
+        data (bytes or str): JSON document
+
+    Returns:
+        The decoded object
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+
+    return json.loads(data)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that uses orjson when it is installed."""
+
+    def dumps(self, obj, **kwargs):
+        """Serialize data as JSON, falling back to the json module for custom options."""
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+
+        return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        """Deserialize data as JSON."""
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+
+        return orjson.loads(s)
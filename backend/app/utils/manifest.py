@@ -0,0 +1,240 @@
+import os
+import time
+import logging
+import threading
+
+from app.utils import storage
+from app.utils import partitions
+from app.models.rollups import item_timestamp
+
+# Fields read from each file to build its metadata (columnar files skip all others)
+MANIFEST_COLUMNS = ['keyword', 'stock_symbols', 'timestamp', 'created_at']
+
+SORT_KEYS = ('name', 'mtime', 'size', 'records', 'start', 'end')
+
+
+def scan_file(filename):
+    """Read the metadata of a data or sentiment file.
+
+    Args:
+        filename (str): Path of the file
+
+    Returns:
+        dict: Record count, time range (Unix timestamps), keywords and symbols
+    """
+    records = 0
+    start = end = None
+    keywords = set()
+    symbols = set()
+
+    for item in storage.iter_records(filename, columns=MANIFEST_COLUMNS):
+        records += 1
+        if item.get('keyword'):
+            keywords.add(item['keyword'])
+        symbols.update(item.get('stock_symbols') or [])
+
+        timestamp = item_timestamp(item, None)
+        if timestamp is not None:
+            start = timestamp if start is None else min(start, timestamp)
+            end = timestamp if end is None else max(end, timestamp)
+
+    return {
+        'records': records,
+        'start': start,
+        'end': end,
+        'keywords': sorted(keywords),
+        'symbols': sorted(symbols)
+    }
+
+
+class FileManifest:
+    """Class for keeping an index of the files in the data directory.
+
+    The directory tree is listed again at most every refresh_interval
+    seconds, and files are only scanned again when their modification time
+    or size changes, so listing files does not open them on every request.
+    Entries are named by their path relative to the data directory.
+    """
+
+    def __init__(self, data_dir='data', refresh_interval=2.0):
+        """Initialize the manifest.
+
+        Args:
+            data_dir (str): Data directory
+            refresh_interval (float): Minimum number of seconds between checks
+                of the data directory for new, removed and rewritten files
+        """
+        self.logger = logging.getLogger(__name__)
+        self.data_dir = data_dir
+        self.refresh_interval = refresh_interval
+        self.entries = {}
+        self.sentiment_changes = 0
+        self.checked_at = None
+        self.lock = threading.Lock()
+        self.refresh_lock = threading.Lock()
+
+    def _is_fresh(self, now):
+        """Whether the data directory was checked less than refresh_interval ago."""
+        return self.checked_at is not None and now - self.checked_at < self.refresh_interval
+
+    def refresh(self, force=False):
+        """Bring the manifest up to date with the data directory.
+
+        The directory is listed and files are scanned without holding the lock
+        readers take, so they keep getting the current entries meanwhile.
+
+        Args:
+            force (bool): Check the directory even if the refresh interval has not passed
+        """
+        now = time.monotonic()
+        if not force and self._is_fresh(now):
+            return
+
+        # One refresh at a time; threads that waited for it use its entries
+        with self.refresh_lock:
+            if not force and self._is_fresh(now):
+                return
+
+            now = time.monotonic()
+            previous = self.entries
+            names = partitions.list_files(self.data_dir)
+            entries = {name: self._entry(name, previous.get(name)) for name in names}
+
+            # Unchanged files keep their entry objects
+            changed = any(
+                entries.get(name) is not previous.get(name)
+                for name in set(entries) | set(previous)
+                if storage.is_sentiment_file(name)
+            )
+
+            with self.lock:
+                self.entries = entries
+                if changed:
+                    self.sentiment_changes += 1
+                self.checked_at = now
+
+    def sentiment_version(self):
+        """Get a counter that changes when sentiment files are added, removed or rewritten.
+
+        The directory is checked at most every refresh_interval seconds, so
+        between checks this costs no file system access.
+
+        Returns:
+            int: Current version
+        """
+        self.refresh()
+        with self.lock:
+            return self.sentiment_changes
+
+    def _entry(self, name, entry):
+        """Get the up-to-date manifest entry of a file, rescanning it if it changed."""
+        path = os.path.join(self.data_dir, name)
+
+        try:
+            stat = os.stat(path)
+            if entry is not None and (entry['mtime'], entry['size']) == (stat.st_mtime, stat.st_size):
+                return entry
+
+            entry = {
+                'name': name,
+                'kind': 'sentiment' if storage.is_sentiment_file(name) else 'data',
+                'format': storage.get_extension(name).lstrip('.'),
+                'size': stat.st_size,
+                'mtime': stat.st_mtime
+            }
+            entry.update(scan_file(path))
+            return entry
+
+        except Exception as e:
+            # Keep listing files whose metadata cannot be read; retry next time
+            self.logger.error(f"Error reading metadata of {name}: {str(e)}")
+            return {
+                'name': name,
+                'kind': 'sentiment' if storage.is_sentiment_file(name) else 'data',
+                'format': storage.get_extension(name).lstrip('.'),
+                'size': None, 'mtime': None, 'records': None, 'start': None, 'end': None,
+                'keywords': [], 'symbols': [], 'error': str(e)
+            }
+
+    def get(self, filename):
+        """Get the manifest entry of a file in the data directory.
+
+        Args:
+            filename (str): Path of the file
+
+        Returns:
+            dict: Manifest entry, or None if the file is not in the data directory
+        """
+        name = os.path.relpath(os.path.abspath(filename), os.path.abspath(self.data_dir))
+        if name.split(os.sep)[0] == '..':
+            return None
+        name = name.replace(os.sep, '/')
+
+        self.refresh()
+
+        with self.lock:
+            return self.entries.get(name)
+
+    def query(self, kind=None, keyword=None, symbol=None, since=None, until=None,
+              sort='name', descending=False, offset=0, limit=None):
+        """List files with their metadata.
+
+        Args:
+            kind (str): 'data' or 'sentiment' to list only that kind of file
+            keyword (str): Only files containing posts fetched for this keyword
+            symbol (str): Only files mentioning this stock symbol
+            since (float): Only files with posts from this Unix timestamp on
+            until (float): Only files with posts before this Unix timestamp
+            sort (str): Sort key ('name', 'mtime', 'size', 'records', 'start' or 'end')
+            descending (bool): Sort in descending order
+            offset (int): Number of files to skip
+            limit (int): Maximum number of files, or None for all
+
+        Returns:
+            tuple: (list of manifest entries, total number of matching files)
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Unsupported sort key: {sort}")
+
+        self.refresh()
+
+        with self.lock:
+            entries = list(self.entries.values())
+
+        if kind is not None:
+            entries = [entry for entry in entries if entry['kind'] == kind]
+        if keyword is not None:
+            entries = [entry for entry in entries if keyword in entry['keywords']]
+        if symbol is not None:
+            entries = [entry for entry in entries if symbol in entry['symbols']]
+        if since is not None:
+            entries = [entry for entry in entries if entry['end'] is not None and entry['end'] >= since]
+        if until is not None:
+            entries = [entry for entry in entries if entry['start'] is not None and entry['start'] < until]
+
+        # Files without a value for the sort key go last
+        present = [entry for entry in entries if entry[sort] is not None]
+        missing = [entry for entry in entries if entry[sort] is None]
+        present.sort(key=lambda entry: (entry[sort], entry['name']), reverse=descending)
+        entries = present + missing
+
+        total = len(entries)
+        stop = offset + limit if limit is not None else None
+        return entries[offset:stop], total
+
+
+_manifest_lock = threading.Lock()
+
+
+def get_manifest(app):
+    """Get the data file manifest of an application, creating it on first use."""
+    with _manifest_lock:
+        manifest = app.extensions.get('manifest')
+        if manifest is None:
+            manifest = FileManifest(
+                data_dir='data',
+                refresh_interval=float(app.config.get('MANIFEST_REFRESH_INTERVAL', 2.0))
+            )
+            app.extensions['manifest'] = manifest
+
+    return manifest
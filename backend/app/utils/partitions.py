@@ -0,0 +1,244 @@
+"""Time-partitioned layout of the data directory.
+
+New files are written to data/date=YYYY-MM-DD/hour=HH/ by the UTC time they
+were started. A partition only holds posts created before its hour ended
+plus WRITE_SLACK (a streaming pipeline picks its partition when it starts
+and may still be writing after the hour ended), and at most max_lag seconds
+before it started (the fetch look-back), so a time-bounded query only needs
+the partitions overlapping its range widened by these margins. Files directly in the data directory (the flat layout) cannot
+be pruned and are always included.
+
+Compacted files (see app.utils.compaction) live in an hour partition or,
+when a whole day was compacted, directly in the date directory. Each date
+directory's compaction log decides which files are visible: compacted
+files only once the log lists them, and their inputs no longer after that.
+"""
+
+import os
+import json
+from datetime import datetime, timezone
+
+from app.utils import storage
+
+DATE_PREFIX = 'date='
+HOUR_PREFIX = 'hour='
+
+# Compaction log in each date directory and name prefix of compacted files
+COMPACTION_LOG = '_compaction.json'
+COMPACTED_PREFIX = 'bluesky_data_compacted_'
+
+# Default lag between a post's creation and the partition it is written to (7 days)
+DEFAULT_MAX_LAG = 7 * 86400
+
+# How long a file may keep receiving posts after its partition ended
+WRITE_SLACK = 3600
+
+
+def partition_dir(when=None):
+    """Build the relative directory of the partition for a point in time.
+
+    Args:
+        when (datetime): Write time (default now); naive times are taken as UTC
+
+    Returns:
+        str: Relative directory such as 'date=2024-01-01/hour=09'
+    """
+    when = when or datetime.now(timezone.utc)
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    when = when.astimezone(timezone.utc)
+    return f"{DATE_PREFIX}{when:%Y-%m-%d}/{HOUR_PREFIX}{when:%H}"
+
+
+def write_partition(config):
+    """Get the partition new files are written to, given the application config.
+
+    Returns:
+        str: Relative partition directory, or None for the flat layout
+    """
+    return partition_dir() if config.get('PARTITIONED_LAYOUT', True) else None
+
+
+def parse_date(name):
+    """Get the start of a date= partition as a Unix timestamp, or None."""
+    if not name.startswith(DATE_PREFIX):
+        return None
+    try:
+        day = datetime.strptime(name[len(DATE_PREFIX):], '%Y-%m-%d')
+    except ValueError:
+        return None
+    return day.replace(tzinfo=timezone.utc).timestamp()
+
+
+def parse_hour(name):
+    """Get the hour of an hour= partition, or None."""
+    if not name.startswith(HOUR_PREFIX):
+        return None
+    try:
+        hour = int(name[len(HOUR_PREFIX):])
+    except ValueError:
+        return None
+    return hour if 0 <= hour < 24 else None
+
+
+def partition_range(name):
+    """Get the time range of the partition a file belongs to.
+
+    Args:
+        name (str): File name relative to the data directory
+
+    Returns:
+        tuple: (start, end) Unix timestamps of the partition (an hour, or a
+            day for compacted day files), or None for files outside the
+            partitioned layout
+    """
+    parts = name.replace(os.sep, '/').split('/')
+    start = parse_date(parts[0]) if len(parts) in (2, 3) else None
+    if start is None:
+        return None
+
+    if len(parts) == 2:
+        return (start, start + 86400)
+
+    hour = parse_hour(parts[1])
+    if hour is None:
+        return None
+
+    start += hour * 3600
+    return (start, start + 3600)
+
+
+def _overlaps(start, end, since, until, max_lag):
+    """Whether a partition may hold posts created in [since, until)."""
+    if since is not None and end + WRITE_SLACK <= since:
+        return False
+    if until is not None and start - max_lag >= until:
+        return False
+    return True
+
+
+def read_compaction_log(day_dir):
+    """Read the compaction log of a date directory.
+
+    Returns:
+        dict: 'compacted' maps each committed compacted file (relative to the
+            date directory) to its inputs, originals, record count and time
+    """
+    try:
+        with open(os.path.join(day_dir, COMPACTION_LOG), 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'compacted': {}}
+
+
+def visibility(log):
+    """Build the rule deciding which files of a date directory readers see.
+
+    Args:
+        log (dict): Compaction log of the date directory
+
+    Returns:
+        callable: Takes a file name relative to the date directory and
+            returns whether it is visible
+    """
+    committed = log['compacted']
+    hidden = set()
+    for entry in committed.values():
+        hidden.update(entry['inputs'])
+
+    def visible(relative):
+        file_name = relative.rsplit('/', 1)[-1]
+        if file_name.startswith('_') or not storage.is_supported_file(file_name) or relative in hidden:
+            return False
+        # Compacted files are only visible once their compaction was committed
+        return not file_name.startswith(COMPACTED_PREFIX) or relative in committed
+
+    return visible
+
+
+def is_compacted(filename):
+    """Check whether a file was written by compaction.
+
+    Compacted data files come with their merged sentiment file, so they are
+    never analyzed again (that would replace the merged results).
+    """
+    return os.path.basename(filename).startswith(COMPACTED_PREFIX)
+
+
+def _listdir(path):
+    """List a directory, sorted by name (empty if it cannot be read)."""
+    try:
+        return sorted(os.listdir(path))
+    except OSError:
+        return []
+
+
+def list_files(data_dir='data', since=None, until=None, max_lag=DEFAULT_MAX_LAG):
+    """List the stored files that may hold posts created in a time range.
+
+    Whole days and hours outside the range are skipped without being
+    listed, so the cost grows with the requested window, not the history.
+
+    Args:
+        data_dir (str): Data directory
+        since (float): Start of the range (Unix timestamp), or None
+        until (float): End of the range (Unix timestamp), or None
+        max_lag (float): Maximum age of a post when it was written, in seconds
+
+    Returns:
+        list: File names relative to the data directory
+    """
+    names = []
+
+    for name in _listdir(data_dir):
+        day = parse_date(name)
+        day_dir = os.path.join(data_dir, name)
+        if day is None or not os.path.isdir(day_dir):
+            if storage.is_supported_file(name):
+                names.append(name)
+            continue
+
+        if not _overlaps(day, day + 86400, since, until, max_lag):
+            continue
+
+        visible = visibility(read_compaction_log(day_dir))
+
+        for hour_name in _listdir(day_dir):
+            hour = parse_hour(hour_name)
+            hour_dir = os.path.join(day_dir, hour_name)
+            if hour is None or not os.path.isdir(hour_dir):
+                # Files covering the whole day
+                if visible(hour_name):
+                    names.append(f"{name}/{hour_name}")
+                continue
+            if not _overlaps(day + hour * 3600, day + (hour + 1) * 3600, since, until, max_lag):
+                continue
+
+            for file_name in _listdir(hour_dir):
+                if visible(f"{hour_name}/{file_name}"):
+                    names.append(f"{name}/{hour_name}/{file_name}")
+
+    return names
+
+
+def resolve(name, data_dir='data'):
+    """Get the path of a file in the data directory from its relative name.
+
+    Args:
+        name (str): File name relative to the data directory
+
+    Returns:
+        str: Path of the file
+
+    Raises:
+        ValueError: If the name points outside the data directory
+    """
+    path = os.path.normpath(os.path.join(data_dir, name))
+    if os.path.isabs(name) or os.path.relpath(path, data_dir).split(os.sep)[0] == '..':
+        raise ValueError(f"Invalid file name: {name}")
+    return path
+
+
+def lag_seconds(config):
+    """Get the maximum post age at write time from the application config, in seconds."""
+    return float(config.get('PARTITION_MAX_LAG_HOURS', DEFAULT_MAX_LAG / 3600)) * 3600
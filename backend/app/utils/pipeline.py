@@ -0,0 +1,126 @@
+import queue
+import logging
+import threading
+
+# Marks the end of a stage's output
+_DONE = object()
+
+
+class PipelineError(Exception):
+    """Raised to the consumer when a stage failed."""
+
+    def __init__(self, stage, error):
+        super().__init__(f"Pipeline stage '{stage}' failed: {str(error)}")
+        self.stage = stage
+        self.error = error
+
+
+class PipelineCancelled(Exception):
+    """Raised inside stages when the pipeline was stopped."""
+
+
+class Pipeline:
+    """Class for streaming items through concurrent stages.
+
+    Each stage is a function taking an iterable and returning an iterable
+    (usually a generator). Every stage runs in its own thread and hands its
+    output to the next stage through a bounded queue, so slow stages apply
+    backpressure instead of letting items pile up in memory, and network
+    waits in one stage overlap with CPU work in another.
+
+    Iterating over the pipeline yields the output of the last stage.
+    """
+
+    def __init__(self, source, stages, queue_size=100):
+        """Initialize the pipeline.
+
+        Args:
+            source (iterable): Input items
+            stages (list): (name, function) pairs applied in order
+            queue_size (int): Capacity of the queue after each stage
+        """
+        self.logger = logging.getLogger(__name__)
+        self.source = source
+        self.stages = stages
+        self.queue_size = queue_size
+        self.counts = {name: 0 for name, _ in stages}
+        self.stopped = threading.Event()
+        self.error = None
+        self.lock = threading.Lock()
+        self.threads = []
+
+    def __iter__(self):
+        """Run the stages and yield the items leaving the last one."""
+        items = self.source
+        for name, func in self.stages:
+            output = queue.Queue(maxsize=self.queue_size)
+            thread = threading.Thread(
+                target=self._run_stage, args=(name, func, items, output),
+                name=f"pipeline-{name}", daemon=True
+            )
+            self.threads.append(thread)
+            items = self._drain(output)
+
+        for thread in self.threads:
+            thread.start()
+
+        try:
+            yield from items
+        except PipelineCancelled:
+            raise self.error from self.error.error
+        finally:
+            # Unblock and stop the stages if the consumer stops early
+            self.stopped.set()
+            for thread in self.threads:
+                thread.join()
+
+    def run(self):
+        """Run the pipeline to the end, discarding the output.
+
+        Returns:
+            dict: Number of items emitted by each stage
+        """
+        for _ in self:
+            pass
+        return dict(self.counts)
+
+    def _run_stage(self, name, func, items, output):
+        """Apply a stage function and push its output to the queue."""
+        try:
+            for item in func(items):
+                self.counts[name] += 1
+                self._put(output, item)
+            self._put(output, _DONE)
+        except PipelineCancelled:
+            pass
+        except Exception as e:
+            # Keep the first error and stop all stages; the consumer raises it
+            with self.lock:
+                if self.error is None:
+                    self.error = PipelineError(name, e)
+                    self.logger.error(str(self.error))
+            self.stopped.set()
+
+    def _put(self, output, item):
+        """Put an item on a queue, giving up if the pipeline was stopped."""
+        while not self.stopped.is_set():
+            try:
+                output.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+        raise PipelineCancelled()
+
+    def _drain(self, source):
+        """Read items from a queue until the stage feeding it is done."""
+        while True:
+            try:
+                item = source.get(timeout=0.1)
+            except queue.Empty:
+                if self.stopped.is_set():
+                    raise PipelineCancelled()
+                continue
+
+            if item is _DONE:
+                return
+            yield item
@@ -0,0 +1,83 @@
+import time
+import asyncio
+import threading
+
+
+class RateLimiter:
+    """Token bucket shared by the Bluesky requests of an application.
+
+    Every request takes one token; tokens are refilled at `rate` per second
+    up to `burst`. Coroutines on the job event loop (see
+    app.utils.async_runner) use acquire(); blocking clients in request and
+    worker threads use wait(). Both draw from the same tokens.
+    """
+
+    def __init__(self, rate=4.0, burst=4):
+        """Initialize the limiter.
+
+        Args:
+            rate (float): Requests per second
+            burst (int): Requests allowed back to back after an idle period
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.waited = 0.0
+        self.lock = threading.Lock()
+
+    def _take(self):
+        """Take a token if one is available.
+
+        Returns:
+            float: 0 if a token was taken, else the seconds until the next one
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+
+            delay = (1 - self.tokens) / self.rate
+            self.waited += delay
+            return delay
+
+    async def acquire(self):
+        """Wait until a request may be made, without blocking the event loop."""
+        while True:
+            delay = self._take()
+            if not delay:
+                return
+            await asyncio.sleep(delay)
+
+    def wait(self):
+        """Block the calling thread until a request may be made."""
+        while True:
+            delay = self._take()
+            if not delay:
+                return
+            time.sleep(delay)
+
+    def stats(self):
+        """Describe the rate, burst and total time spent waiting."""
+        return {'rate': self.rate, 'burst': self.burst, 'waited_seconds': self.waited}
+
+
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter(app):
+    """Get the Bluesky rate limiter of an application, creating it on first use."""
+    with _limiter_lock:
+        limiter = app.extensions.get('bluesky_rate_limiter')
+        if limiter is None:
+            limiter = RateLimiter(
+                rate=float(app.config.get('BLUESKY_RATE_LIMIT', 4.0)),
+                burst=int(app.config.get('BLUESKY_RATE_BURST', 4))
+            )
+            app.extensions['bluesky_rate_limiter'] = limiter
+
+    return limiter
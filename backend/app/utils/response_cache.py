@@ -0,0 +1,136 @@
+import threading
+from collections import OrderedDict
+from flask import current_app, jsonify
+
+
+class ResponseCache:
+    """Class for caching encoded JSON responses of aggregate queries.
+
+    Entries are keyed by the normalized query and tagged with the data
+    version they were computed from. An entry is only served while the data
+    version is unchanged, so results are invalidated exactly when new data is
+    written rather than after a guessed TTL. The least recently used entries
+    are evicted beyond the entry and byte limits.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=32 * 1024 * 1024):
+        """Initialize the cache.
+
+        Args:
+            max_entries (int): Maximum number of cached responses
+            max_bytes (int): Maximum total size of the cached bodies
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, version):
+        """Get a cached body.
+
+        Args:
+            key (tuple): Normalized query
+            version: Current data version
+
+        Returns:
+            bytes: Cached body, or None if it is missing or was computed from
+                another data version
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, version, body):
+        """Cache a body, evicting the least recently used entries if needed.
+
+        Args:
+            key (tuple): Normalized query
+            version: Data version the body was computed from
+            body (bytes): Encoded response body
+        """
+        if len(body) > self.max_bytes:
+            return
+
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous[1])
+
+            self.entries[key] = (version, body)
+            self.size += len(body)
+
+            while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        """Remove all entries."""
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self):
+        """Get the number of entries, their size and the hit and miss counts."""
+        with self.lock:
+            return {'entries': len(self.entries), 'bytes': self.size, 'hits': self.hits, 'misses': self.misses}
+
+
+_cache_lock = threading.Lock()
+_version_lock = threading.Lock()
+
+
+def bump_data_version(app):
+    """Count a write of sentiment results by this process, invalidating cached responses."""
+    with _version_lock:
+        app.extensions['data_version'] = app.extensions.get('data_version', 0) + 1
+
+
+def local_data_version(app):
+    """Get the number of sentiment result writes by this process."""
+    return app.extensions.get('data_version', 0)
+
+
+def get_response_cache(app):
+    """Get the response cache of an application, creating it on first use."""
+    with _cache_lock:
+        cache = app.extensions.get('response_cache')
+        if cache is None:
+            cache = ResponseCache(
+                max_entries=int(app.config.get('RESPONSE_CACHE_ENTRIES', 256)),
+                max_bytes=int(app.config.get('RESPONSE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+            )
+            app.extensions['response_cache'] = cache
+
+    return cache
+
+
+def cached_json(key, version, build):
+    """Serve a JSON response from the response cache, building it on a miss.
+
+    Args:
+        key (tuple): Normalized query
+        version: Current data version
+        build (callable): Returns the payload when the response is not cached;
+            exceptions are passed on and nothing is cached
+
+    Returns:
+        Response: JSON response
+    """
+    cache = get_response_cache(current_app._get_current_object())
+
+    body = cache.get(key, version)
+    if body is not None:
+        return current_app.response_class(body, mimetype='application/json')
+
+    response = jsonify(build())
+    cache.put(key, version, response.get_data())
+    return response
@@ -0,0 +1,276 @@
+"""Index of the posts that were already stored or scored.
+
+Each stage ('stored' at fetch time, 'scored' at analysis time) keeps the
+exact set of post URIs in an SQLite table, fronted by an in-memory Bloom
+filter. Most lookups of new posts are answered by the Bloom filter alone;
+only possible repeats are checked against the table.
+"""
+
+import os
+import math
+import hashlib
+import logging
+import sqlite3
+import threading
+
+from app.utils import storage
+from app.utils import partitions
+from app.models.database import parse_database_uri
+
+STAGES = ('stored', 'scored')
+
+CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS seen_posts (
+    stage TEXT NOT NULL,
+    uri TEXT NOT NULL,
+    PRIMARY KEY (stage, uri)
+) WITHOUT ROWID
+"""
+
+# Number of URIs looked up or written per statement
+BATCH_SIZE = 500
+
+
+class BloomFilter:
+    """Probabilistic set with no false negatives."""
+
+    def __init__(self, capacity=1000000, error_rate=0.01):
+        """Initialize the filter.
+
+        Args:
+            capacity (int): Number of keys the error rate is sized for
+            error_rate (float): False positive rate at capacity
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        """Get the bit positions of a key (double hashing)."""
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key):
+        """Add a key."""
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        """Whether the key may have been added (False means it was not)."""
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class SeenIndex:
+    """Class for tracking which posts were already stored or scored."""
+
+    def __init__(self, path='data/seen_posts.db', capacity=1000000, error_rate=0.01):
+        """Open (and if needed create) the index.
+
+        Args:
+            path (str): SQLite database file, or ':memory:'
+            capacity (int): Initial Bloom filter capacity per stage; the
+                filters are rebuilt twice as large when it is exceeded
+            error_rate (float): Bloom filter false positive rate at capacity
+        """
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self.error_rate = error_rate
+
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.lock:
+            if path != ':memory:':
+                self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute(CREATE_TABLE)
+            self.conn.commit()
+
+            self.filters = {}
+            for stage in STAGES:
+                self._load_filter(stage, capacity)
+
+    def _load_filter(self, stage, capacity):
+        """Build the Bloom filter of a stage from the table."""
+        count = self.conn.execute("SELECT COUNT(*) FROM seen_posts WHERE stage = ?", (stage,)).fetchone()[0]
+        bloom = BloomFilter(max(capacity, count * 2), self.error_rate)
+        for (uri,) in self.conn.execute("SELECT uri FROM seen_posts WHERE stage = ?", (stage,)):
+            bloom.add(uri)
+        self.filters[stage] = bloom
+
+    def seen(self, uris, stage):
+        """Get the URIs that were already seen at a stage.
+
+        Args:
+            uris (iterable): Post URIs
+            stage (str): 'stored' or 'scored'
+
+        Returns:
+            set: The seen URIs
+        """
+        with self.lock:
+            bloom = self.filters[stage]
+            candidates = [uri for uri in set(uris) if uri in bloom]
+
+            found = set()
+            for start in range(0, len(candidates), BATCH_SIZE):
+                batch = candidates[start:start + BATCH_SIZE]
+                rows = self.conn.execute(
+                    f"SELECT uri FROM seen_posts WHERE stage = ? AND uri IN ({','.join('?' * len(batch))})",
+                    [stage] + batch
+                )
+                found.update(uri for (uri,) in rows)
+
+        return found
+
+    def mark(self, uris, stage):
+        """Record URIs as seen at a stage.
+
+        Args:
+            uris (iterable): Post URIs
+            stage (str): 'stored' or 'scored'
+
+        Returns:
+            int: Number of URIs that were not seen before
+        """
+        uris = list(set(uris))
+
+        with self.lock:
+            before = self.conn.total_changes
+            for start in range(0, len(uris), BATCH_SIZE):
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO seen_posts (stage, uri) VALUES (?, ?)",
+                    [(stage, uri) for uri in uris[start:start + BATCH_SIZE]]
+                )
+            self.conn.commit()
+            added = self.conn.total_changes - before
+
+            bloom = self.filters[stage]
+            if bloom.count + added > bloom.capacity:
+                self._load_filter(stage, bloom.capacity * 2)
+            else:
+                for uri in uris:
+                    bloom.add(uri)
+
+        return added
+
+    def filter_new(self, items, stage, batch_size=BATCH_SIZE):
+        """Pass through only the items whose posts were not seen at a stage.
+
+        Items without an id are always passed through.
+
+        Args:
+            items (iterable): Data items
+            stage (str): 'stored' or 'scored'
+            batch_size (int): Items looked up together
+
+        Yields:
+            dict: New data items
+        """
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                yield from self._new_in_batch(batch, stage)
+                batch = []
+
+        if batch:
+            yield from self._new_in_batch(batch, stage)
+
+    def _new_in_batch(self, batch, stage):
+        """Get the items of a batch whose posts were not seen at a stage."""
+        seen = self.seen((item['id'] for item in batch if item.get('id') is not None), stage)
+        return [item for item in batch if item.get('id') is None or item['id'] not in seen]
+
+    def rebuild(self, data_dir='data'):
+        """Rebuild the index from the stored data and sentiment files.
+
+        Args:
+            data_dir (str): Data directory
+
+        Returns:
+            dict: Number of indexed URIs per stage
+        """
+        with self.lock:
+            self.conn.execute("DELETE FROM seen_posts")
+            self.conn.commit()
+            for stage in STAGES:
+                self.filters[stage] = BloomFilter(self.filters[stage].capacity, self.error_rate)
+
+        for name in partitions.list_files(data_dir):
+            stage = 'scored' if storage.is_sentiment_file(name) else 'stored'
+            try:
+                uris = [item['id'] for item in storage.iter_records(os.path.join(data_dir, name), columns=['id'])
+                        if item.get('id') is not None]
+            except Exception as e:
+                self.logger.error(f"Error reading {name}: {str(e)}")
+                continue
+            self.mark(uris, stage)
+
+        return {stage: self.count(stage) for stage in STAGES}
+
+    def count(self, stage):
+        """Get the number of URIs seen at a stage."""
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM seen_posts WHERE stage = ?", (stage,)).fetchone()[0]
+
+
+def collect_ids(items, ids):
+    """Collect the post ids of items while passing them through.
+
+    Most formats are only written once the stream ends, so posts are marked
+    from the collected ids after the write succeeded rather than as they pass.
+
+    Args:
+        items (iterable): Data items
+        ids (list): List the ids are appended to
+
+    Yields:
+        dict: The same data items
+    """
+    for item in items:
+        if item.get('id') is not None:
+            ids.append(item['id'])
+        yield item
+
+
+_index_lock = threading.Lock()
+
+
+def get_seen_index(app):
+    """Get the seen-post index of an application, opening it on first use.
+
+    The index lives in the SQLite database when that backend is used, and
+    in SEEN_INDEX_PATH otherwise.
+
+    Returns:
+        SeenIndex: The index, or None if it is disabled
+    """
+    if not app.config.get('SEEN_INDEX_ENABLED', True):
+        return None
+
+    with _index_lock:
+        index = app.extensions.get('seen_index')
+        if index is None:
+            path = app.config.get('SEEN_INDEX_PATH')
+            if not path:
+                if app.config.get('STORAGE_BACKEND', 'sqlite') == 'sqlite':
+                    path = parse_database_uri(app.config['DATABASE_URI'])
+                else:
+                    path = 'data/seen_posts.db'
+
+            index = SeenIndex(
+                path,
+                capacity=int(app.config.get('SEEN_INDEX_CAPACITY', 1000000)),
+                error_rate=float(app.config.get('SEEN_INDEX_ERROR_RATE', 0.01))
+            )
+            app.extensions['seen_index'] = index
+
+    return index
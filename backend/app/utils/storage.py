@@ -0,0 +1,290 @@
+import os
+import json
+import uuid
+
+from app.utils import columnar
+from app.utils import json_codec
+
+# File extensions for each supported storage format
+FORMAT_EXTENSIONS = {
+    'json': '.json',
+    'jsonl': '.jsonl',
+    'parquet': '.parquet',
+    'arrow': '.arrow'
+}
+
+# Number of records per Parquet batch when streaming
+STREAM_BATCH_SIZE = 1000
+
+SENTIMENT_SUFFIX = '_sentiment'
+
+
+def get_extension(filename):
+    """Get the storage extension of a file ('.json', '.parquet', ...)."""
+    return os.path.splitext(filename)[1]
+
+
+def is_supported_file(filename):
+    """Check whether a file is in one of the supported storage formats."""
+    return get_extension(filename) in FORMAT_EXTENSIONS.values()
+
+
+def is_sentiment_file(filename):
+    """Check whether a file holds sentiment results."""
+    root, ext = os.path.splitext(filename)
+    return is_supported_file(filename) and root.endswith(SENTIMENT_SUFFIX)
+
+
+def is_data_file(filename):
+    """Check whether a file holds fetched (unscored) data."""
+    return is_supported_file(filename) and not is_sentiment_file(filename)
+
+
+def data_filename(timestamp, storage_format='json', data_dir='data', partition=None):
+    """Build the path of a new data file.
+
+    Args:
+        timestamp (str): Timestamp used in the file name
+        storage_format (str): Storage format ('json', 'jsonl', 'parquet' or 'arrow')
+        data_dir (str): Data directory
+        partition (str): Partition directory relative to the data directory
+            (see app.utils.partitions), or None to write to the data directory
+
+    Returns:
+        str: Path of the data file
+    """
+    if storage_format not in FORMAT_EXTENSIONS:
+        raise ValueError(f"Unsupported storage format: {storage_format}")
+
+    if partition:
+        data_dir = f"{data_dir}/{partition}"
+    return f"{data_dir}/bluesky_data_{timestamp}{FORMAT_EXTENSIONS[storage_format]}"
+
+
+def sentiment_filename(data_file):
+    """Build the path of the sentiment file for a data file.
+
+    The sentiment file uses the same format as the data file.
+    """
+    root, ext = os.path.splitext(data_file)
+    return f"{root}{SENTIMENT_SUFFIX}{ext}"
+
+
+def save_records(records, filename):
+    """Save data items, choosing the format from the file extension.
+
+    Args:
+        records (list): List of data items
+        filename (str): Output filename
+    """
+    _save_as(records, filename, get_extension(filename))
+
+
+def _save_as(records, filename, ext):
+    """Save data items in the format of a storage extension."""
+    if ext == FORMAT_EXTENSIONS['parquet']:
+        columnar.write_parquet(records, filename)
+    elif ext == FORMAT_EXTENSIONS['arrow']:
+        columnar.write_arrow_ipc(records, filename)
+    elif ext == FORMAT_EXTENSIONS['jsonl']:
+        write_jsonl(records, filename)
+    else:
+        with open(filename, 'w') as f:
+            json.dump(records, f)
+
+
+def replace_records(records, filename):
+    """Atomically replace the data items of an existing file.
+
+    The items are written to a temporary file next to it first, so readers
+    see either the old or the new contents.
+
+    Args:
+        records (list): List of data items
+        filename (str): File to replace
+    """
+    tmp_filename = f"{filename}.{uuid.uuid4().hex}.tmp"
+    try:
+        _save_as(records, tmp_filename, get_extension(filename))
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+        raise
+
+
+def load_records(filename, columns=None):
+    """Load data items, choosing the format from the file extension.
+
+    Args:
+        filename (str): Input filename
+        columns (list): Fields to read. Only columnar formats skip decoding
+            the other fields; JSON files are always read in full.
+
+    Returns:
+        list: List of data items
+    """
+    ext = get_extension(filename)
+
+    if ext == FORMAT_EXTENSIONS['parquet']:
+        return columnar.read_parquet(filename, columns)
+
+    if ext == FORMAT_EXTENSIONS['arrow']:
+        return columnar.read_arrow_ipc(filename, columns)
+
+    if ext == FORMAT_EXTENSIONS['jsonl']:
+        return list(iter_jsonl(filename))
+
+    with open(filename, 'r') as f:
+        return json.load(f)
+
+
+def iter_records(filename, columns=None):
+    """Stream data items from a file without holding all of them in memory.
+
+    JSON Lines, Parquet and Arrow IPC files are read incrementally. JSON array files
+    cannot be parsed incrementally and are decoded in full first.
+
+    Args:
+        filename (str): Input filename
+        columns (list): Fields to read (honoured by columnar formats only)
+
+    Yields:
+        dict: Data items
+    """
+    ext = get_extension(filename)
+
+    if ext == FORMAT_EXTENSIONS['jsonl']:
+        yield from iter_jsonl(filename)
+    elif ext == FORMAT_EXTENSIONS['parquet']:
+        yield from columnar.iter_parquet(filename, columns, STREAM_BATCH_SIZE)
+    elif ext == FORMAT_EXTENSIONS['arrow']:
+        yield from columnar.iter_arrow_ipc(filename, columns, STREAM_BATCH_SIZE)
+    else:
+        yield from load_records(filename, columns)
+
+
+def write_records(records, filename):
+    """Write a stream of data items to a file.
+
+    JSON Lines files are written as the items arrive; other formats collect
+    the items first.
+
+    Args:
+        records (iterable): Data items
+        filename (str): Output filename
+
+    Returns:
+        int: Number of items written
+    """
+    if get_extension(filename) == FORMAT_EXTENSIONS['jsonl']:
+        return write_jsonl(records, filename)
+
+    records = list(records)
+    save_records(records, filename)
+    return len(records)
+
+
+def merge_records(records, filename):
+    """Add data items to an existing file, keeping the items already in it.
+
+    Stored items with the id of a new item are replaced. The file is
+    replaced atomically and left untouched when there are no new items.
+
+    Args:
+        records (iterable): New data items
+        filename (str): Existing file
+
+    Returns:
+        int: Number of new items
+    """
+    records = list(records)
+    if not records:
+        return 0
+
+    ids = {record.get('id') for record in records if record.get('id') is not None}
+    kept = [item for item in load_records(filename) if item.get('id') is None or item.get('id') not in ids]
+    replace_records(kept + records, filename)
+    return len(records)
+
+
+def tee_records(records, filename):
+    """Write a stream of data items to a file while passing them through.
+
+    JSON Lines files are written as the items pass; other formats are
+    written once the stream ends.
+
+    Args:
+        records (iterable): Data items
+        filename (str): Output filename
+
+    Yields:
+        dict: The same data items
+    """
+    if get_extension(filename) == FORMAT_EXTENSIONS['jsonl']:
+        with open(filename, 'wb') as f:
+            for record in records:
+                f.write(json_codec.dumps(record))
+                f.write(b'\n')
+                yield record
+        return
+
+    collected = []
+    for record in records:
+        collected.append(record)
+        yield record
+    save_records(collected, filename)
+
+
+def iter_jsonl(filename):
+    """Stream data items from a JSON Lines file.
+
+    Args:
+        filename (str): Input filename
+
+    Yields:
+        dict: Data items
+    """
+    with open(filename, 'rb') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json_codec.loads(line)
+
+
+def write_jsonl(records, filename):
+    """Write data items to a JSON Lines file, replacing its contents.
+
+    Args:
+        records (iterable): Data items
+        filename (str): Output filename
+
+    Returns:
+        int: Number of items written
+    """
+    with open(filename, 'wb') as f:
+        return _write_lines(f, records)
+
+
+def append_jsonl(records, filename):
+    """Append data items to a JSON Lines file.
+
+    Args:
+        records (iterable): Data items
+        filename (str): Output filename
+
+    Returns:
+        int: Number of items written
+    """
+    with open(filename, 'ab') as f:
+        return _write_lines(f, records)
+
+
+def _write_lines(f, records):
+    """Write one JSON document per line."""
+    count = 0
+    for record in records:
+        f.write(json_codec.dumps(record))
+        f.write(b'\n')
+        count += 1
+    return count
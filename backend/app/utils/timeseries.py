@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+
+from app.models.rollups import BUCKET_SECONDS, LABELS, VALUE_COLUMNS
+
+# Supported bucket widths in seconds (multiples of the hourly rollups)
+BUCKETS = {
+    '1h': 3600,
+    '3h': 3 * 3600,
+    '6h': 6 * 3600,
+    '12h': 12 * 3600,
+    '1d': 86400,
+    '1w': 7 * 86400
+}
+
+# Upper bound on the number of buckets per query
+MAX_BUCKETS = 20000
+
+
+def empty_frame():
+    """Build an empty frame of hourly per-symbol values."""
+    frame = pd.DataFrame({column: pd.Series(dtype='float64') for column in VALUE_COLUMNS})
+    frame.insert(0, 'bucket_start', pd.Series(dtype='int64'))
+    frame.insert(0, 'symbol', pd.Series(dtype='object'))
+    return frame
+
+
+def rows_to_frame(rows):
+    """Convert reduced sentiment rows into a frame of hourly per-symbol values.
+
+    Args:
+        rows (list): Tuples starting with (symbols, label, compound, timestamp,
+            likes, replies, reposts) as produced by the sentiment file loader
+
+    Returns:
+        DataFrame: One row per (post, symbol) with the rollup value columns
+    """
+    rows = [row for row in rows if row[0] and row[3] is not None]
+    if not rows:
+        return empty_frame()
+
+    symbols, labels, compounds, timestamps, likes, replies, reposts = list(zip(*rows))[:7]
+
+    # Repeat the per-post values once per mentioned symbol
+    counts = np.fromiter((len(s) for s in symbols), dtype=np.int64, count=len(rows))
+    labels = np.repeat(np.array(labels, dtype=object), counts)
+    compound = np.repeat(np.array([np.nan if c is None else c for c in compounds], dtype=float), counts)
+    has_compound = ~np.isnan(compound)
+    compound = np.nan_to_num(compound)
+
+    frame = pd.DataFrame({
+        'symbol': [symbol for post_symbols in symbols for symbol in post_symbols],
+        'bucket_start': np.repeat(
+            (np.asarray(timestamps, dtype=float) // BUCKET_SECONDS).astype(np.int64) * BUCKET_SECONDS, counts
+        )
+    })
+    for label in LABELS:
+        frame[label] = (labels == label).astype(np.int64)
+    frame['total'] = 1
+    frame['compound_sum'] = compound
+    frame['compound_sq_sum'] = compound * compound
+    frame['compound_count'] = has_compound.astype(np.int64)
+    frame['likes'] = np.repeat(np.asarray(likes, dtype=np.int64), counts)
+    frame['replies'] = np.repeat(np.asarray(replies, dtype=np.int64), counts)
+    frame['reposts'] = np.repeat(np.asarray(reposts, dtype=np.int64), counts)
+    return frame
+
+
+def _to_list(values):
+    """Convert an array to a JSON-friendly list (NaN becomes None)."""
+    values = np.asarray(values, dtype=float)
+    return np.where(np.isnan(values), None, values).tolist()
+
+
+def compute_timeseries(frame, symbols, bucket_seconds, window, since=None, until=None):
+    """Compute bucketed and smoothed sentiment series per symbol.
+
+    All symbols share one bucket axis; buckets without posts have zero
+    volume and no mean. The rolling mean is weighted by the number of scored
+    posts in each bucket, and the EWMA (span=window) skips empty buckets.
+
+    Args:
+        frame (DataFrame): Hourly per-symbol values (symbol, bucket_start and
+            the rollup value columns)
+        symbols (list): Stock symbols
+        bucket_seconds (int): Bucket width in seconds
+        window (int): Smoothing window in buckets
+        since (float): Start of the range (Unix timestamp), or None for the first post
+        until (float): End of the range (Unix timestamp), or None for the last post
+
+    Returns:
+        dict: 'timestamps' (bucket starts) and a dict of series per symbol
+
+    Raises:
+        ValueError: If the range holds more than MAX_BUCKETS buckets
+    """
+    frame = frame[frame['symbol'].isin(symbols)]
+    if since is not None:
+        frame = frame[frame['bucket_start'] >= since // BUCKET_SECONDS * BUCKET_SECONDS]
+    if until is not None:
+        frame = frame[frame['bucket_start'] < until]
+
+    first = since if since is not None else (frame['bucket_start'].min() if len(frame) else None)
+    last = until if until is not None else (frame['bucket_start'].max() + 1 if len(frame) else None)
+    if first is None or last is None or last <= first:
+        empty = ('volume', 'rolling_volume', 'mean_compound', 'rolling_mean_compound', 'ewma_compound') + LABELS
+        return {'timestamps': [], 'series': {symbol: {key: [] for key in empty} for symbol in symbols}}
+
+    start = int(first // bucket_seconds * bucket_seconds)
+    count = int(np.ceil((last - start) / bucket_seconds))
+    if count > MAX_BUCKETS:
+        raise ValueError(f"Too many buckets ({count}); use a wider bucket or a shorter range")
+    buckets = start + bucket_seconds * np.arange(count, dtype=np.int64)
+
+    # Sum the hourly values into (bucket, symbol) cells of a dense grid
+    frame = frame.assign(bucket=(frame['bucket_start'] - start) // bucket_seconds * bucket_seconds + start)
+    summed = frame.groupby(['bucket', 'symbol'])[list(VALUE_COLUMNS)].sum()
+
+    def grid(column):
+        return (summed[column].unstack('symbol')
+                .reindex(index=buckets, columns=symbols, fill_value=0)
+                .fillna(0).astype(float))
+
+    volume = grid('total')
+    compound_sum = grid('compound_sum')
+    compound_count = grid('compound_count')
+    labels = {label: grid(label) for label in LABELS}
+
+    mean = compound_sum / compound_count.where(compound_count > 0)
+    rolling_sum = compound_sum.rolling(window, min_periods=1).sum()
+    rolling_count = compound_count.rolling(window, min_periods=1).sum()
+    rolling_mean = rolling_sum / rolling_count.where(rolling_count > 0)
+    ewma = mean.ewm(span=window, ignore_na=True).mean()
+    rolling_volume = volume.rolling(window, min_periods=1).mean()
+
+    series = {}
+    for symbol in symbols:
+        series[symbol] = {
+            'volume': volume[symbol].astype(int).tolist(),
+            'rolling_volume': _to_list(rolling_volume[symbol]),
+            'mean_compound': _to_list(mean[symbol]),
+            'rolling_mean_compound': _to_list(rolling_mean[symbol]),
+            'ewma_compound': _to_list(ewma[symbol])
+        }
+        for label in LABELS:
+            series[symbol][label] = labels[label][symbol].astype(int).tolist()
+
+    return {'timestamps': buckets.tolist(), 'series': series}
@@ -0,0 +1,207 @@
+"""Engagement- and reach-weighted sentiment aggregates.
+
+Each scored post gets a weight from its likes, reposts, replies and (when
+known) its author's follower count:
+
+    raw = likes_weight * likes + reposts_weight * reposts
+          + replies_weight * replies + followers_weight * followers
+    weight = 1 + log1p(raw)   (transform 'log')
+    weight = 1 + raw          (transform 'linear')
+
+optionally capped at `cap`, so a post without engagement still counts once
+and a viral post counts more without drowning out everything else.
+
+Aggregates are computed with numpy over one array entry per (post, symbol)
+pair, so a summary costs a few vectorized passes regardless of how many
+symbols are requested.
+"""
+
+import numpy as np
+
+from app.models.rollups import LABELS
+
+TRANSFORMS = ('log', 'linear')
+
+DEFAULT_PARAMS = {
+    'likes_weight': 1.0,
+    'reposts_weight': 2.0,
+    'replies_weight': 1.0,
+    'followers_weight': 0.0,
+    'transform': 'log',
+    'cap': None
+}
+
+
+def weight_params(config):
+    """Get the weighting parameters from the application config.
+
+    Returns:
+        dict: Keyword arguments for post_weights()
+    """
+    cap = config.get('WEIGHT_CAP')
+    return {
+        'likes_weight': float(config.get('WEIGHT_LIKES', DEFAULT_PARAMS['likes_weight'])),
+        'reposts_weight': float(config.get('WEIGHT_REPOSTS', DEFAULT_PARAMS['reposts_weight'])),
+        'replies_weight': float(config.get('WEIGHT_REPLIES', DEFAULT_PARAMS['replies_weight'])),
+        'followers_weight': float(config.get('WEIGHT_FOLLOWERS', DEFAULT_PARAMS['followers_weight'])),
+        'transform': config.get('WEIGHT_TRANSFORM', DEFAULT_PARAMS['transform']),
+        'cap': float(cap) if cap else None
+    }
+
+
+def post_weights(likes, replies, reposts, followers=None, likes_weight=1.0, reposts_weight=2.0,
+                 replies_weight=1.0, followers_weight=0.0, transform='log', cap=None):
+    """Compute the weights of posts from their engagement.
+
+    Args:
+        likes, replies, reposts (array): Engagement counts per post
+        followers (array): Author follower counts per post (NaN when unknown), or None
+        likes_weight, reposts_weight, replies_weight, followers_weight (float):
+            Coefficients of the counts
+        transform (str): 'log' or 'linear'
+        cap (float): Maximum weight, or None
+
+    Returns:
+        ndarray: Weight per post (at least 1)
+
+    Raises:
+        ValueError: If the transform is not supported
+    """
+    if transform not in TRANSFORMS:
+        raise ValueError(f"Unsupported weight transform: {transform}")
+
+    raw = (likes_weight * np.asarray(likes, dtype=float)
+           + reposts_weight * np.asarray(reposts, dtype=float)
+           + replies_weight * np.asarray(replies, dtype=float))
+    if followers is not None and followers_weight:
+        raw = raw + followers_weight * np.nan_to_num(np.asarray(followers, dtype=float))
+
+    raw = np.maximum(raw, 0.0)
+    weights = 1.0 + (np.log1p(raw) if transform == 'log' else raw)
+    if cap is not None:
+        weights = np.minimum(weights, max(cap, 1.0))
+    return weights
+
+
+def rows_to_arrays(rows):
+    """Convert reduced sentiment rows into per-post arrays.
+
+    Args:
+        rows (list): Tuples of (symbols, label, compound, timestamp, likes,
+            replies, reposts, followers) as produced by the sentiment file loader
+
+    Returns:
+        dict: 'symbols' (tuple per post) and arrays 'label', 'compound'
+            (NaN when missing), 'timestamp' (NaN when missing), 'likes',
+            'replies', 'reposts' and 'followers' (NaN when unknown)
+    """
+    if not rows:
+        return {
+            'symbols': [], 'label': np.array([], dtype=object),
+            **{name: np.array([], dtype=float)
+               for name in ('compound', 'timestamp', 'likes', 'replies', 'reposts', 'followers')}
+        }
+
+    symbols, labels, compounds, timestamps, likes, replies, reposts, followers = zip(*rows)
+
+    def floats(values):
+        return np.array([np.nan if value is None else value for value in values], dtype=float)
+
+    return {
+        'symbols': list(symbols),
+        'label': np.array(labels, dtype=object),
+        'compound': floats(compounds),
+        'timestamp': floats(timestamps),
+        'likes': np.asarray(likes, dtype=float),
+        'replies': np.asarray(replies, dtype=float),
+        'reposts': np.asarray(reposts, dtype=float),
+        'followers': floats(followers)
+    }
+
+
+def weighted_summary(posts, symbols, params=None, since=None, until=None):
+    """Summarize sentiment per symbol with engagement-weighted posts.
+
+    Args:
+        posts (dict): Per-post arrays as returned by rows_to_arrays() (a
+            'symbol' array with one symbol per entry may be given instead of
+            'symbols', for data that already has one entry per pair)
+        symbols (list): Stock symbols
+        params (dict): Weighting parameters (see post_weights())
+        since (float): Only posts from this Unix timestamp on
+        until (float): Only posts before this Unix timestamp
+
+    Returns:
+        dict: Per symbol the total weight, the effective number of posts,
+            the weighted label shares, and the weighted mean and standard
+            deviation of the compound score
+    """
+    params = dict(DEFAULT_PARAMS, **(params or {}))
+    weights = post_weights(
+        posts['likes'], posts['replies'], posts['reposts'], posts.get('followers'), **params
+    )
+
+    # One entry per (post, symbol) pair; posts outside the range or without
+    # a requested symbol are dropped
+    codes = {symbol: index for index, symbol in enumerate(symbols)}
+    if 'symbols' in posts:
+        counts = np.fromiter((len(s) for s in posts['symbols']), dtype=np.int64, count=len(posts['symbols']))
+        pair_codes = np.fromiter(
+            (codes.get(symbol, -1) for post_symbols in posts['symbols'] for symbol in post_symbols),
+            dtype=np.int64, count=int(counts.sum())
+        )
+        post_index = np.repeat(np.arange(len(counts)), counts)
+    else:
+        pair_codes = np.fromiter((codes.get(symbol, -1) for symbol in posts['symbol']),
+                                 dtype=np.int64, count=len(posts['symbol']))
+        post_index = np.arange(len(pair_codes))
+
+    keep = pair_codes >= 0
+    timestamps = np.asarray(posts['timestamp'], dtype=float)[post_index]
+    if since is not None:
+        keep &= timestamps >= since
+    if until is not None:
+        keep &= timestamps < until
+
+    pair_codes = pair_codes[keep]
+    post_index = post_index[keep]
+    w = weights[post_index]
+    compound = np.asarray(posts['compound'], dtype=float)[post_index]
+    labels = np.asarray(posts['label'], dtype=object)[post_index]
+
+    size = len(symbols)
+
+    def by_symbol(mask, values):
+        return np.bincount(pair_codes[mask], weights=values[mask], minlength=size)
+
+    everything = np.ones(len(pair_codes), dtype=bool)
+    total_weight = by_symbol(everything, w)
+    squared_weight = by_symbol(everything, w * w)
+    label_weight = {label: by_symbol(labels == label, w) for label in LABELS}
+
+    scored = ~np.isnan(compound)
+    scored_weight = by_symbol(scored, w)
+    compound_sum = by_symbol(scored, w * np.nan_to_num(compound))
+    compound_sq_sum = by_symbol(scored, w * np.nan_to_num(compound) ** 2)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.where(scored_weight > 0, compound_sum / scored_weight, 0.0)
+        variance = np.where(scored_weight > 0, compound_sq_sum / scored_weight - mean * mean, 0.0)
+        effective = np.where(squared_weight > 0, total_weight ** 2 / squared_weight, 0.0)
+        shares = {
+            label: np.where(total_weight > 0, values / total_weight, 0.0)
+            for label, values in label_weight.items()
+        }
+
+    result = {}
+    for index, symbol in enumerate(symbols):
+        summary = {label: float(shares[label][index]) for label in LABELS}
+        summary.update({
+            'total_weight': float(total_weight[index]),
+            'effective_posts': float(effective[index]),
+            'avg_sentiment': float(mean[index]),
+            'compound_std': float(np.sqrt(max(variance[index], 0.0)))
+        })
+        result[symbol] = summary
+
+    return result
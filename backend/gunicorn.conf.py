@@ -0,0 +1,43 @@
+"""Gunicorn configuration for production serving.
+
+Settings can be overridden with environment variables:
+    PORT: Port to listen on (default 5000)
+    WEB_CONCURRENCY: Number of worker processes (default: one per core)
+    GUNICORN_THREADS: Request threads per worker (default 4)
+    MODEL_THREADS: torch/BLAS threads per worker (default: cores / workers)
+
+Jobs run in the worker that accepted them, but their status is saved in the
+shared SQLite store (see app.utils.jobs.JobStore), so a job's status URL
+answers on every worker. The live feed, /api/anomalies and the admission
+limits are kept per worker and cover the posts scored and requests served
+by that worker.
+"""
+
+import os
+import multiprocessing
+
+cpu_count = multiprocessing.cpu_count()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', cpu_count))
+
+# Threaded workers keep long requests (SSE feeds, file streams) from blocking a process
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = 120
+
+# Load the app and models in the master so workers share them copy-on-write
+preload_app = True
+
+# Split the cores between the workers instead of every worker using all of them.
+# BLAS/OpenMP pools read these variables when numpy/torch are imported, which
+# happens after this file is loaded.
+model_threads = int(os.environ.get('MODEL_THREADS', max(1, cpu_count // workers)))
+for variable in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'NUMEXPR_NUM_THREADS'):
+    os.environ.setdefault(variable, str(model_threads))
+
+
+def post_fork(server, worker):
+    """Apply the per-worker torch thread limit."""
+    from app.models.sentiment import set_thread_limits
+    set_thread_limits(model_threads)
@@ -0,0 +1,625 @@
+"""Functional tests for the JSON API routes."""
+
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+from app.utils import storage
+from app.utils.events import get_broker
+from app.utils.file_loader import get_sentiment_loader
+from app.utils.jobs import get_job_queue
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Run the test from a temporary directory with an empty data folder."""
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+    return tmp_path / "data"
+
+
+class TestApiRoutes:
+    """Tests for the /api routes."""
+
+    def test_health(self, client):
+        """Test the health check endpoint."""
+        response = client.get('/api/health')
+        assert response.status_code == 200
+        assert json.loads(response.data)['status'] == 'ok'
+
+    @pytest.mark.parametrize("extension", [".json", ".arrow"])
+    def test_file_data_slice(self, client, data_dir, extension):
+        """Test reading a range of records from a data file."""
+        filename = f"bluesky_data_20240101_120000{extension}"
+        storage.save_records([{"id": f"post{i}", "text": "test"} for i in range(5)],
+                             str(data_dir / filename))
+
+        response = client.get(f'/api/file-data/{filename}?offset=1&limit=2')
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert [item['id'] for item in data['data']] == ['post1', 'post2']
+        assert data['total'] == 5
+
+        response = client.get(f'/api/file-data/{filename}')
+        assert len(json.loads(response.data)['data']) == 5
+
+    def test_stock_summary_from_database(self, app, client):
+        """Test that the stock summary is aggregated from the database."""
+        from app.models.database import get_database
+
+        get_database().insert_sentiment([{
+            "id": "post1",
+            "text": "buy $AAPL",
+            "created_at": "2024-01-01T12:00:00Z",
+            "stock_symbols": ["AAPL"],
+            "sentiment": {"vader": {"compound": 0.6}, "consensus": {"label": "positive", "confidence": 1.0}}
+        }])
+
+        response = client.get('/api/stock-summary?stocks=AAPL,TSLA')
+
+        assert response.status_code == 200
+        stock_data = json.loads(response.data)['stock_data']
+        assert stock_data['AAPL']['positive'] == 1
+        assert stock_data['AAPL']['avg_sentiment'] == pytest.approx(0.6)
+        assert stock_data['TSLA']['total'] == 0
+
+        response = client.get('/api/posts?symbol=AAPL')
+        assert [post['id'] for post in json.loads(response.data)['posts']] == ['post1']
+
+    def test_empty_database_is_imported_in_background(self, app, client, data_dir):
+        """Test that the first request queues an import of the stored files instead of running it."""
+        from app.models.database import get_database
+
+        storage.save_records([{
+            "id": "post1",
+            "stock_symbols": ["AAPL"],
+            "sentiment": {"vader": {"compound": 0.6}, "consensus": {"label": "positive", "confidence": 1.0}}
+        }], "data/bluesky_data_20240101_120000_sentiment.json")
+        assert get_database().is_empty()
+
+        assert client.get('/api/health').status_code == 200
+
+        jobs = [job for job in get_job_queue(app).list() if job.type == 'import']
+        assert len(jobs) == 1
+        assert jobs[0].wait(10)
+        assert jobs[0].result['results'] == 1
+
+        response = client.get('/api/stock-summary?stocks=AAPL')
+        assert json.loads(response.data)['stock_data']['AAPL']['positive'] == 1
+
+        # The check runs once per process
+        client.get('/api/health')
+        assert len([job for job in get_job_queue(app).list() if job.type == 'import']) == 1
+
+    def test_weighted_stock_summary(self, data_dir):
+        """Test that the weighted summary matches for both storage backends."""
+        from app import create_app
+        from app.models.database import get_database
+
+        results = [
+            {"id": "viral", "text": "buy $AAPL", "timestamp": 1000.0, "likes": 1000, "replies": 50, "reposts": 200,
+             "stock_symbols": ["AAPL"],
+             "sentiment": {"vader": {"compound": 0.8}, "consensus": {"label": "positive", "confidence": 1.0}}},
+            {"id": "bot", "text": "sell $AAPL", "timestamp": 2000.0, "likes": 0, "replies": 0, "reposts": 0,
+             "stock_symbols": ["AAPL"],
+             "sentiment": {"vader": {"compound": -0.8}, "consensus": {"label": "negative", "confidence": 1.0}}}
+        ]
+        storage.save_records(results, str(data_dir / "bluesky_data_1_sentiment.json"))
+
+        summaries = []
+        for backend in ('sqlite', 'files'):
+            app = create_app({'TESTING': True, 'STORAGE_BACKEND': backend, 'DATABASE_URI': 'sqlite:///:memory:'})
+            with app.app_context():
+                if backend == 'sqlite':
+                    get_database().insert_sentiment(results)
+
+            response = app.test_client().get('/api/stock-summary?stocks=AAPL,TSLA&weighted=1')
+
+            assert response.status_code == 200
+            data = json.loads(response.data)
+            assert data['stock_data']['AAPL']['avg_sentiment'] == pytest.approx(0.0)
+            summaries.append(data['weighted_data'])
+
+        for symbol in ('AAPL', 'TSLA'):
+            assert summaries[0][symbol] == pytest.approx(summaries[1][symbol])
+        aapl = summaries[0]['AAPL']
+        assert aapl['avg_sentiment'] > 0.6
+        assert aapl['positive'] > 0.8
+        assert 1 < aapl['effective_posts'] < 2
+        assert summaries[0]['TSLA']['total_weight'] == 0
+
+    def test_sentiment_price_correlation(self, data_dir):
+        """Test correlating daily sentiment with the returns of local prices."""
+        import pandas as pd
+        from app import create_app
+        from app.models.database import get_database
+
+        day = 86400
+        compounds = [0.5, -0.5, 0.2, -0.3, 0.4, 0.1, -0.2, 0.3]
+        results = [
+            {"id": f"post{i}", "text": "$AAPL", "timestamp": i * day + 3600.0, "stock_symbols": ["AAPL"],
+             "sentiment": {"vader": {"compound": compound}, "consensus": {"label": "neutral", "confidence": 1.0}}}
+            for i, compound in enumerate(compounds)
+        ]
+        # The close of each day moves with the next day's sentiment
+        closes = [100.0]
+        for compound in compounds[1:]:
+            closes.append(closes[-1] * (1 + compound / 10))
+        os.makedirs("data/prices")
+        pd.DataFrame({"timestamp": [(i + 1) * day - 60 for i in range(len(closes))], "close": closes}).to_csv(
+            "data/prices/AAPL.csv", index=False)
+
+        app = create_app({'TESTING': True, 'DATABASE_URI': 'sqlite:///:memory:'})
+        with app.app_context():
+            get_database().insert_sentiment(results)
+
+        response = app.test_client().get(
+            f'/api/sentiment-price-correlation?symbols=aapl,tsla&max_lag=2&since=0&until={8 * day}'
+        )
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['lags'] == [-2, -1, 0, 1, 2]
+        assert data['symbols']['AAPL']['contemporaneous'] == pytest.approx(1.0)
+        assert data['symbols']['AAPL']['observations'][2] == 7
+        assert data['symbols']['TSLA']['best_lag'] is None
+
+        response = app.test_client().get('/api/sentiment-price-correlation?symbols=AAPL&max_lag=99')
+        assert response.status_code == 400
+
+    def test_stock_summary_requires_stocks(self, client):
+        """Test that the stock summary rejects requests without symbols."""
+        response = client.get('/api/stock-summary')
+        assert response.status_code == 400
+
+    def test_stock_summary_time_range(self, client):
+        """Test that invalid time ranges are rejected."""
+        response = client.get('/api/stock-summary?stocks=AAPL&since=2024-01-01T00:00:00Z')
+        assert response.status_code == 200
+
+        response = client.get('/api/stock-summary?stocks=AAPL&since=yesterday')
+        assert response.status_code == 400
+
+    def test_stock_summary_from_files(self, data_dir):
+        """Test the stock summary with the file-only storage backend."""
+        from app import create_app
+
+        app = create_app({'TESTING': True, 'STORAGE_BACKEND': 'files'})
+        storage.save_records([{
+            "id": "post1",
+            "stock_symbols": ["AAPL"],
+            "sentiment": {"vader": {"compound": -0.2}, "consensus": {"label": "negative", "confidence": 1.0}}
+        }], str(data_dir / "bluesky_data_1_sentiment.json"))
+
+        response = app.test_client().get('/api/stock-summary?stocks=AAPL')
+
+        stock_data = json.loads(response.data)['stock_data']
+        assert stock_data['AAPL']['negative'] == 1
+        assert stock_data['AAPL']['avg_sentiment'] == pytest.approx(-0.2)
+
+    def test_stock_summary_prunes_partitions(self, data_dir):
+        """Test that the file-backed summary only reads partitions in the time range."""
+        from app import create_app
+
+        app = create_app({'TESTING': True, 'STORAGE_BACKEND': 'files', 'PARTITION_MAX_LAG_HOURS': 0})
+        for partition, label in (("date=2024-01-01/hour=12", "negative"), ("date=2024-01-02/hour=12", "positive")):
+            (data_dir / partition).mkdir(parents=True)
+            storage.save_records([{
+                "id": partition,
+                "stock_symbols": ["AAPL"],
+                "created_at": partition[5:15] + "T12:30:00Z",
+                "sentiment": {"vader": {"compound": 0.1}, "consensus": {"label": label, "confidence": 1.0}}
+            }], str(data_dir / partition / "bluesky_data_1_sentiment.json"))
+
+        loaded = []
+        loader = get_sentiment_loader(app)
+        original = loader.load
+        loader.load = lambda files: loaded.extend(files) or original(files)
+
+        response = app.test_client().get('/api/stock-summary?stocks=AAPL&since=2024-01-02T00:00:00Z')
+
+        stock_data = json.loads(response.data)['stock_data']
+        assert (stock_data['AAPL']['positive'], stock_data['AAPL']['negative']) == (1, 0)
+        assert loaded == ["data/date=2024-01-02/hour=12/bluesky_data_1_sentiment.json"]
+
+        response = app.test_client().get('/api/file-data/date=2024-01-02/hour=12/bluesky_data_1_sentiment.json')
+        assert json.loads(response.data)['data'][0]['id'] == "date=2024-01-02/hour=12"
+        assert app.test_client().get('/api/file-data/..%2Fsecret.json').status_code in (400, 404)
+
+    def test_file_data_query(self, client, data_dir):
+        """Test filtering and projecting records with a cursor."""
+        filename = "bluesky_data_20240101_120000.arrow"
+        storage.save_records([
+            {"id": f"post{i}", "keyword": "stocks", "stock_symbols": ["AAPL" if i % 2 else "TSLA"]}
+            for i in range(5)
+        ], str(data_dir / filename))
+
+        response = client.get(f'/api/file-data/{filename}?symbol=AAPL&fields=id&limit=1')
+
+        data = json.loads(response.data)
+        assert data['data'] == [{'id': 'post1'}]
+        assert data['total'] == 2
+
+        response = client.get(f"/api/file-data/{filename}?symbol=AAPL&fields=id&cursor={data['next_cursor']}")
+
+        data = json.loads(response.data)
+        assert data['data'] == [{'id': 'post3'}]
+        assert data['next_cursor'] is None
+
+    def test_file_data_stream(self, client, data_dir):
+        """Test streaming records as JSON Lines."""
+        filename = "bluesky_data_20240101_120000.jsonl"
+        storage.save_records([{"id": f"post{i}", "text": "test"} for i in range(3)],
+                             str(data_dir / filename))
+
+        response = client.get(f'/api/file-data/{filename}?stream=1&fields=id')
+
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        lines = response.get_data(as_text=True).splitlines()
+        assert [json.loads(line) for line in lines] == [{"id": f"post{i}"} for i in range(3)]
+
+    def test_file_data_not_modified(self, client, data_dir):
+        """Test conditional requests and compression of file data."""
+        filename = "bluesky_data_20240101_120000.json"
+        storage.save_records([{"id": f"post{i}", "text": "test post"} for i in range(50)],
+                             str(data_dir / filename))
+
+        response = client.get(f'/api/file-data/{filename}', headers={'Accept-Encoding': 'gzip'})
+
+        assert response.status_code == 200
+        assert response.headers['Content-Encoding'] == 'gzip'
+        etag = response.headers['ETag']
+
+        response = client.get(f'/api/file-data/{filename}', headers={'If-None-Match': etag})
+
+        assert response.status_code == 304
+        assert response.data == b''
+
+    def test_stock_summary_not_modified(self, app, client):
+        """Test that the stock summary ETag changes when results are written."""
+        from app.models.database import get_database
+
+        response = client.get('/api/stock-summary?stocks=AAPL')
+        etag = response.headers['ETag']
+
+        response = client.get('/api/stock-summary?stocks=AAPL', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+
+        get_database().insert_sentiment([{
+            "id": "post1",
+            "stock_symbols": ["AAPL"],
+            "sentiment": {"vader": {"compound": 0.6}, "consensus": {"label": "positive", "confidence": 1.0}}
+        }])
+
+        response = client.get('/api/stock-summary?stocks=AAPL', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert json.loads(response.data)['stock_data']['AAPL']['positive'] == 1
+
+    def test_stock_summary_response_cache(self, app, client):
+        """Test that equivalent summary queries share a cached response until data changes."""
+        from app.models.database import get_database
+        from app.utils.response_cache import get_response_cache
+
+        cache = get_response_cache(app)
+
+        first = client.get('/api/stock-summary?stocks=AAPL,TSLA')
+        second = client.get('/api/stock-summary?stocks=TSLA, AAPL')
+
+        assert second.data == first.data
+        assert second.headers['ETag'] == first.headers['ETag']
+        assert cache.stats()['hits'] == 1
+
+        get_database().insert_sentiment([{
+            "id": "post1",
+            "stock_symbols": ["AAPL"],
+            "sentiment": {"vader": {"compound": 0.6}, "consensus": {"label": "positive", "confidence": 1.0}}
+        }])
+
+        response = client.get('/api/stock-summary?stocks=AAPL,TSLA')
+        assert json.loads(response.data)['stock_data']['AAPL']['positive'] == 1
+        assert cache.stats()['hits'] == 1
+
+    def test_data_files_manifest(self, client, data_dir):
+        """Test listing data files with metadata, sorted and paginated."""
+        for i in range(3):
+            storage.save_records([{"id": f"post{j}", "keyword": "stocks"} for j in range(i + 1)],
+                                 str(data_dir / f"bluesky_data_{i}.json"))
+
+        response = client.get('/api/data-files?sort=records&order=desc&limit=2')
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['data_files'] == ['bluesky_data_2.json', 'bluesky_data_1.json']
+        assert data['files'][0]['records'] == 3
+        assert data['total'] == 3
+
+        response = client.get('/api/data-files?sort=color')
+        assert response.status_code == 400
+
+    def test_analyze_sentiment_job(self, app, client, data_dir):
+        """Test analyzing sentiment in a background job."""
+        filename = "data/bluesky_data_20240101_120000.json"
+        storage.save_records([{"id": f"post{i}", "text": "test"} for i in range(3)], filename)
+
+        with patch('app.api.tasks.SentimentAnalyzer') as mock_analyzer:
+            mock_analyzer.return_value.iter_analyze.side_effect = lambda posts: (
+                dict(post, sentiment={"consensus": {"label": "neutral", "confidence": 1.0}})
+                for post in posts
+            )
+
+            response = client.post('/api/analyze-sentiment', json={'data_file': filename})
+
+            assert response.status_code == 202
+            job_id = json.loads(response.data)['job_id']
+            assert response.headers['Location'].endswith(f'/api/jobs/{job_id}')
+
+            assert get_job_queue(app).get(job_id).wait(10)
+            mock_analyzer.assert_called_once_with(use_transformers=app.config['USE_TRANSFORMERS'])
+
+        job = json.loads(client.get(f'/api/jobs/{job_id}').data)['job']
+        assert job['status'] == 'succeeded'
+        assert job['progress']['posts_scored'] == 3
+        assert job['total'] == 3
+        assert job['result']['sentiment_file'] == "data/bluesky_data_20240101_120000_sentiment.json"
+
+    def test_analyze_sentiment_again_keeps_results(self, app, client, data_dir):
+        """Test that analyzing a file again without rescore keeps its results."""
+        filename = "data/bluesky_data_20240101_120000.json"
+        storage.save_records([{"id": f"post{i}", "text": "test"} for i in range(2)], filename)
+
+        with patch('app.api.tasks.SentimentAnalyzer') as mock_analyzer:
+            mock_analyzer.return_value.iter_analyze.side_effect = lambda posts: (
+                dict(post, sentiment={"consensus": {"label": "neutral", "confidence": 1.0}})
+                for post in posts
+            )
+
+            for expected in (2, 0):
+                response = client.post('/api/analyze-sentiment', json={'data_file': filename})
+                job = get_job_queue(app).get(json.loads(response.data)['job_id'])
+                assert job.wait(10)
+                assert job.result['result_count'] == expected
+
+        results = storage.load_records("data/bluesky_data_20240101_120000_sentiment.json")
+        assert [item["id"] for item in results] == ["post0", "post1"]
+
+    def test_failed_write_leaves_posts_unscored(self, app, client, data_dir):
+        """Test that posts are only marked as scored once their results were written."""
+        from app.utils.seen_index import get_seen_index
+
+        filename = "data/bluesky_data_20240101_120000.json"
+        storage.save_records([{"id": f"post{i}", "text": "test"} for i in range(2)], filename)
+
+        with patch('app.api.tasks.SentimentAnalyzer') as mock_analyzer, \
+                patch('app.utils.storage.save_records', side_effect=OSError("disk full")):
+            mock_analyzer.return_value.iter_analyze.side_effect = lambda posts: (
+                dict(post, sentiment={"consensus": {"label": "neutral", "confidence": 1.0}})
+                for post in posts
+            )
+
+            response = client.post('/api/analyze-sentiment', json={'data_file': filename})
+            job = get_job_queue(app).get(json.loads(response.data)['job_id'])
+            assert job.wait(10)
+
+        assert job.status == 'failed'
+        assert get_seen_index(app).seen(['post0', 'post1'], 'scored') == set()
+
+    def test_analyze_sentiment_missing_file(self, client, data_dir):
+        """Test that unknown data files are rejected before queueing."""
+        response = client.post('/api/analyze-sentiment', json={'data_file': 'data/missing.json'})
+        assert response.status_code == 400
+
+        assert client.get('/api/jobs/unknown').status_code == 404
+
+    def test_analyze_sentiment_rejects_compacted_file(self, client, data_dir):
+        """Test that compacted data files, whose results are merged already, are not analyzed."""
+        filename = "data/bluesky_data_compacted_20240101_120000_abcd1234.json"
+        storage.save_records([{"id": "post1", "text": "test"}], filename)
+
+        response = client.post('/api/analyze-sentiment', json={'data_file': filename})
+
+        assert response.status_code == 400
+        assert not os.path.exists("data/bluesky_data_compacted_20240101_120000_abcd1234_sentiment.json")
+
+    def test_admission_control(self, app, client):
+        """Test that job submissions are shed while cheap endpoints stay available."""
+        from app.utils.admission import get_limiters
+
+        limiter = get_limiters(app)['jobs']
+        for _ in range(limiter.max_concurrent):
+            assert limiter.acquire()
+        limiter.wait_timeout = 0.01
+
+        response = client.post('/api/fetch-data', json={'keywords': 'AAPL'})
+
+        assert response.status_code == 429
+        assert int(response.headers['Retry-After']) >= 1
+        assert client.get('/api/health').status_code == 200
+
+        limits = json.loads(client.get('/api/admission').data)['limits']
+        assert limits['jobs']['active'] == limiter.max_concurrent
+        assert limits['jobs']['rejected'] == 1
+
+    def test_fetch_data_job(self, app, client, data_dir):
+        """Test fetching posts in a job running on the event loop."""
+        posts = [
+            {"id": f"post{i}", "text": f"buying $AAPL today {i}", "author": "user", "keyword": "AAPL",
+             "created_at": "2024-01-01T12:00:00Z", "likes": 0, "replies": 0, "reposts": 0}
+            for i in range(3)
+        ]
+
+        async def fetch_posts(keywords, limit, on_posts=None):
+            on_posts(posts)
+            return posts
+
+        with patch('app.api.tasks.AsyncBlueskyAPI') as mock_api, \
+                patch('app.api.tasks.DataProcessor') as mock_processor:
+            mock_api.return_value.fetch_posts.side_effect = fetch_posts
+            mock_processor.return_value.iter_preprocess.side_effect = lambda items: (
+                dict(item, stock_symbols=["AAPL"]) for item in items
+            )
+
+            response = client.post('/api/fetch-data', json={'keywords': 'AAPL'})
+
+            assert response.status_code == 202
+            job = get_job_queue(app).get(json.loads(response.data)['job_id'])
+            assert job.wait(10)
+
+        assert job.status == 'succeeded', job.error
+        assert job.result['post_count'] == 3
+        assert job.to_dict()['progress'] == {'posts_fetched': 3, 'posts_processed': 3}
+        assert len(storage.load_records(job.result['data_file'])) == 3
+
+    def test_fetch_data_skips_stored_posts(self, app, client, data_dir):
+        """Test that posts stored by an earlier fetch are not stored again."""
+        batches = [
+            [{"id": f"post{i}", "text": f"buying $AAPL today {i}", "author": "user", "keyword": "AAPL",
+              "created_at": "2024-01-01T12:00:00Z", "likes": 0, "replies": 0, "reposts": 0}
+             for i in ids]
+            for ids in (range(3), range(1, 5))
+        ]
+
+        jobs = []
+        with patch('app.api.tasks.AsyncBlueskyAPI') as mock_api, \
+                patch('app.api.tasks.DataProcessor') as mock_processor:
+            mock_processor.return_value.iter_preprocess.side_effect = lambda items: iter(list(items))
+
+            for posts in batches:
+                async def fetch_posts(keywords, limit, on_posts=None, posts=posts):
+                    on_posts(posts)
+                    return posts
+
+                mock_api.return_value.fetch_posts.side_effect = fetch_posts
+                response = client.post('/api/fetch-data', json={'keywords': 'AAPL'})
+                job = get_job_queue(app).get(json.loads(response.data)['job_id'])
+                assert job.wait(10)
+                jobs.append(job)
+
+        assert jobs[1].status == 'succeeded', jobs[1].error
+        assert jobs[1].result['post_count'] == 4
+        assert jobs[1].result['new_post_count'] == 2
+        assert [item['id'] for item in storage.load_records(jobs[1].result['data_file'])] == ['post3', 'post4']
+
+    def test_fetch_and_analyze_pipeline(self, app, client, data_dir):
+        """Test fetching and analyzing posts in one pipelined job."""
+        posts = [
+            {"id": f"post{i}", "text": f"buying $AAPL today {i}", "author": "user", "keyword": "AAPL",
+             "created_at": "2024-01-01T12:00:00Z", "likes": 0, "replies": 0, "reposts": 0}
+            for i in range(3)
+        ]
+
+        with patch('app.api.tasks.BlueskyAPI') as mock_api, \
+                patch('app.api.tasks.SentimentAnalyzer') as mock_analyzer, \
+                patch('app.api.tasks.DataProcessor') as mock_processor:
+            mock_api.return_value.iter_posts.return_value = iter(posts)
+            mock_processor.return_value.iter_preprocess.side_effect = lambda items: (
+                dict(item, stock_symbols=["AAPL"]) for item in items
+            )
+            mock_analyzer.return_value.iter_analyze.side_effect = lambda items: (
+                dict(item, sentiment={"vader": {"compound": 0.5},
+                                      "consensus": {"label": "positive", "confidence": 1.0}})
+                for item in items
+            )
+
+            response = client.post('/api/fetch-data', json={'keywords': 'AAPL', 'analyze': True})
+
+            assert response.status_code == 202
+            job = get_job_queue(app).get(json.loads(response.data)['job_id'])
+            assert job.wait(10)
+
+        assert job.status == 'succeeded', job.error
+        assert job.result['result_count'] == 3
+        assert len(storage.load_records(job.result['data_file'])) == 3
+        assert len(storage.load_records(job.result['sentiment_file'])) == 3
+
+        stock_data = json.loads(client.get('/api/stock-summary?stocks=AAPL').data)['stock_data']
+        assert stock_data['AAPL']['positive'] == 3
+
+    def test_stream_sentiment(self, app, client):
+        """Test receiving scored posts over Server-Sent Events."""
+        response = client.get('/api/stream/sentiment?symbols=aapl', buffered=False)
+
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+
+        get_broker(app).publish([
+            {"id": "post1", "stock_symbols": ["AAPL"],
+             "sentiment": {"vader": {"compound": 0.4}, "consensus": {"label": "positive", "confidence": 1.0}}},
+            {"id": "post2", "stock_symbols": ["TSLA"],
+             "sentiment": {"vader": {"compound": 0.1}, "consensus": {"label": "neutral", "confidence": 1.0}}}
+        ])
+
+        chunks = iter(response.response)
+        assert next(chunks) == b'retry: 5000\n\n'
+        posts_event = next(chunks).decode('utf-8')
+        aggregates_event = next(chunks).decode('utf-8')
+        response.close()
+
+        assert 'event: posts' in posts_event
+        data = json.loads(posts_event.split('data: ', 1)[1])
+        assert [post['id'] for post in data['posts']] == ['post1']
+        assert 'event: aggregates' in aggregates_event
+        assert get_broker(app).subscribers == set()
+
+    def test_stream_subscribers_are_capped(self, app, client):
+        """Test that subscribers beyond the 'streams' limit are refused until one disconnects."""
+        from app.utils.admission import get_limiters
+
+        limiter = get_limiters(app)['streams']
+        streams = [client.get('/api/stream/sentiment', buffered=False) for _ in range(limiter.max_concurrent)]
+        assert all(response.status_code == 200 for response in streams)
+
+        response = client.get('/api/stream/sentiment', buffered=False)
+        assert response.status_code == 503
+        assert int(response.headers['Retry-After']) >= 1
+
+        streams[0].close()
+        response = client.get('/api/stream/sentiment', buffered=False)
+        assert response.status_code == 200
+
+        for response in [response] + streams[1:]:
+            response.close()
+        assert limiter.active == 0
+
+    def test_anomalies(self, app, client):
+        """Test polling the volume spikes found in newly scored posts."""
+        detector = app.extensions['anomaly_detector']
+        post = {"id": "post", "stock_symbols": ["AAPL"], "compound": 0.1}
+        for bucket in range(10):
+            detector.observe([post] * 2, now=bucket * 3600)
+        detector.observe([post] * 40, now=10 * 3600)
+
+        response = client.get('/api/anomalies?symbols=aapl')
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert [event['kind'] for event in data['anomalies']] == ['volume_spike']
+        assert data['last_id'] == data['anomalies'][0]['id']
+
+        data = json.loads(client.get(f"/api/anomalies?since_id={data['last_id']}").data)
+        assert data['anomalies'] == []
+
+    def test_sentiment_timeseries(self, app, client):
+        """Test the sentiment time series endpoint."""
+        from app.models.database import get_database
+
+        get_database().insert_sentiment([{
+            "id": f"post{i}",
+            "created_at": f"2024-01-0{i + 1}T12:00:00Z",
+            "stock_symbols": ["AAPL"],
+            "sentiment": {"vader": {"compound": 0.5}, "consensus": {"label": "positive", "confidence": 1.0}}
+        } for i in range(3)])
+
+        response = client.get('/api/sentiment-timeseries?symbols=aapl&bucket=1d&window=2')
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert len(data['timestamps']) == 3
+        assert data['series']['AAPL']['volume'] == [1, 1, 1]
+        assert data['series']['AAPL']['ewma_compound'][-1] == pytest.approx(0.5)
+
+        assert client.get('/api/sentiment-timeseries?symbols=AAPL&bucket=5m').status_code == 400
+        assert client.get('/api/sentiment-timeseries').status_code == 400
@@ -108,4 +108,39 @@ class TestApp:
         assert app.config['SECRET_KEY'] == 'env_secret'
         assert app.config['DATABASE_URI'] == 'sqlite:///env_db.db'
         assert app.config['BLUESKY_USERNAME'] == 'env_user'
-        assert app.config['BLUESKY_PASSWORD'] == 'env_pass' 
\ No newline at end of file
+        assert app.config['BLUESKY_PASSWORD'] == 'env_pass'
+
+    def test_tuning_environment_variables(self, monkeypatch):
+        """Test that tuning settings are read from the environment."""
+        from app import create_app
+
+        monkeypatch.setenv('SUMMARY_LOADER_WORKERS', '8')
+        monkeypatch.setenv('SUMMARY_LOADER_PROCESSES', 'true')
+        monkeypatch.setenv('ADMISSION_LIMITS', '{"jobs": {"max_concurrent": 5}}')
+
+        app = create_app({'DATABASE_URI': 'sqlite:///:memory:'})
+
+        assert app.config['SUMMARY_LOADER_WORKERS'] == 8
+        assert app.config['SUMMARY_LOADER_PROCESSES'] is True
+
+        from app.utils.admission import get_limiters
+        limiters = get_limiters(app)
+        assert limiters['jobs'].max_concurrent == 5
+        assert limiters['jobs'].max_waiting == 4
+        assert 'aggregates' in limiters
+
+    def test_compact_command(self, app, tmp_path):
+        """Test the compact command line command."""
+        from app.utils import storage
+
+        partition = tmp_path / "date=2024-01-02" / "hour=01"
+        partition.mkdir(parents=True)
+        for i in range(3):
+            storage.save_records([{"id": f"post{i}"}], str(partition / f"bluesky_data_{i}.json"))
+            storage.save_records([{"id": f"post{i}"}], str(partition / f"bluesky_data_{i}_sentiment.json"))
+
+        result = app.test_cli_runner().invoke(args=['compact', '--data-dir', str(tmp_path)])
+
+        assert result.exit_code == 0, result.output
+        assert "merged 6 files into 2" in result.output
+
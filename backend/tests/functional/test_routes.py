@@ -20,6 +20,7 @@ class TestRoutes:
         response = client.get('/dashboard')
         assert response.status_code == 200
         assert b'<!DOCTYPE html>' in response.data
+        assert b'subscribeSentimentFeed(' in response.data
 
     @patch('app.routes.BlueskyAPI')
     @patch('app.routes.DataProcessor')
@@ -0,0 +1,59 @@
+"""Unit tests for admission control."""
+
+import threading
+
+from app.utils.admission import AdmissionLimiter
+
+
+class TestAdmissionLimiter:
+    """Tests for the AdmissionLimiter class."""
+
+    def test_reject_when_queue_full(self):
+        """Test that requests beyond the slots and wait queue are rejected at once."""
+        limiter = AdmissionLimiter('jobs', max_concurrent=1, max_waiting=0)
+
+        assert limiter.acquire()
+        assert not limiter.acquire()
+
+        stats = limiter.stats()
+        assert (stats['active'], stats['admitted'], stats['rejected']) == (1, 1, 1)
+
+        limiter.release(2.0)
+        assert limiter.acquire()
+
+    def test_wait_for_slot(self):
+        """Test that a waiting request is admitted when a slot is freed."""
+        limiter = AdmissionLimiter('jobs', max_concurrent=1, max_waiting=1, wait_timeout=5)
+        assert limiter.acquire()
+
+        admitted = []
+        waiter = threading.Thread(target=lambda: admitted.append(limiter.acquire()))
+        waiter.start()
+        while limiter.stats()['waiting'] == 0:
+            pass
+
+        limiter.release()
+        waiter.join(5)
+
+        assert admitted == [True]
+        assert limiter.stats()['waiting'] == 0
+
+    def test_wait_timeout(self):
+        """Test that waiting requests give up after the timeout."""
+        limiter = AdmissionLimiter('jobs', max_concurrent=1, max_waiting=1, wait_timeout=0.05)
+
+        assert limiter.acquire()
+        assert not limiter.acquire()
+        assert limiter.stats()['rejected'] == 1
+
+    def test_retry_after(self):
+        """Test that Retry-After grows with the backlog and service time."""
+        limiter = AdmissionLimiter('jobs', max_concurrent=2, max_waiting=0)
+        assert limiter.retry_after() == 1
+
+        limiter.acquire()
+        limiter.release(3.0)
+        limiter.acquire()
+        limiter.acquire()
+
+        assert limiter.retry_after() == 3
@@ -0,0 +1,160 @@
+"""Unit tests for online anomaly detection."""
+
+from datetime import datetime, timezone
+
+from app.utils.anomalies import AnomalyDetector
+from app.utils.events import SentimentBroker
+
+NOW = 1000000.0
+
+
+def make_event(symbol, created, compound=0.1):
+    """Build a compact scored post created at a Unix time."""
+    return {
+        "id": "post",
+        "created_at": datetime.fromtimestamp(created, timezone.utc).isoformat(),
+        "stock_symbols": [symbol],
+        "label": "neutral",
+        "compound": compound
+    }
+
+
+def make_detector(**kwargs):
+    """Detector with one-minute buckets, closed one minute after they end."""
+    return AnomalyDetector(bucket_seconds=60, lateness=60, min_buckets=5, min_posts=5, **kwargs)
+
+
+def warm_up(detector, symbols, buckets=10, posts=4, compound=0.1):
+    """Feed a steady number of posts per bucket and symbol, in creation order from bucket 0."""
+    for bucket in range(buckets):
+        events = [
+            make_event(symbol, bucket * 60 + i, compound + 0.05 * (i % 2))
+            for i in range(posts) for symbol in symbols.split(",")
+        ]
+        assert detector.observe(events, now=NOW) == []
+
+
+class TestAnomalyDetector:
+    """Tests for the AnomalyDetector class."""
+
+    def test_volume_spike(self):
+        """Test that a burst of posts is reported once per bucket."""
+        detector = make_detector()
+        warm_up(detector, "AAPL")
+
+        # Ordinary volume in a new bucket
+        assert detector.observe([make_event("AAPL", 600 + i) for i in range(4)], now=NOW) == []
+
+        emitted = []
+        for i in range(30):
+            emitted += detector.observe([make_event("AAPL", 660 + i)], now=NOW)
+
+        assert [event["kind"] for event in emitted] == ["volume_spike"]
+        assert emitted[0]["symbol"] == "AAPL"
+        assert emitted[0]["bucket_start"] == 660
+        assert emitted[0]["z_score"] >= 3.0
+        assert abs(emitted[0]["baseline"] - 4) < 0.5
+
+    def test_one_batch_of_history_is_not_a_spike(self):
+        """Test that publishing many buckets of posts at once does not count as volume."""
+        detector = make_detector()
+        posts = [make_event("AAPL", bucket * 60 + i) for bucket in range(100) for i in range(4)]
+
+        # Oldest first: the history becomes the baseline
+        assert detector.observe(posts, now=NOW) == []
+        assert detector.states["AAPL"].volume_mean == 4
+
+        # Newest first: older buckets are closed before their posts arrive
+        detector = make_detector()
+        assert detector.observe(posts[::-1], now=NOW) == []
+        assert detector.stats()["posts_late"] > 0
+
+    def test_late_posts_within_lateness(self):
+        """Test that posts arriving out of order still count while their bucket is open."""
+        detector = make_detector()
+        warm_up(detector, "AAPL")
+
+        detector.observe([make_event("AAPL", 660)], now=NOW)
+        emitted = detector.observe([make_event("AAPL", 600 + i % 60) for i in range(30)], now=NOW)
+
+        assert [event["bucket_start"] for event in emitted] == [600]
+
+        # Bucket 600 closes once a post from after 720 arrives
+        detector.observe([make_event("AAPL", 721)], now=NOW)
+        detector.observe([make_event("AAPL", 610)], now=NOW)
+        assert detector.stats()["posts_late"] == 1
+
+    def test_sentiment_drop(self):
+        """Test that a shift of the compound score is reported with its direction."""
+        detector = make_detector()
+        warm_up(detector, "TSLA", posts=6)
+
+        emitted = detector.observe([make_event("TSLA", 600 + i, -0.8) for i in range(6)], now=NOW)
+
+        assert [event["kind"] for event in emitted] == ["sentiment_drop"]
+        assert emitted[0]["z_score"] < -3.0
+        assert emitted[0]["value"] == -0.8
+
+    def test_warm_up(self):
+        """Test that symbols are not checked before they have a baseline."""
+        detector = make_detector()
+        warm_up(detector, "AAPL", buckets=3, posts=1)
+
+        assert detector.observe([make_event("AAPL", 180 + i, -0.9) for i in range(50)], now=NOW) == []
+
+    def test_gap_buckets_lower_baseline(self):
+        """Test that buckets without posts count as zero volume."""
+        detector = make_detector()
+        warm_up(detector, "AAPL", posts=20)
+
+        detector.observe([make_event("AAPL", 60 * 40)], now=NOW)
+
+        state = detector.states["AAPL"]
+        assert state.buckets == 39
+        assert state.volume_mean < 1.0
+
+    def test_future_posts_count_as_now(self):
+        """Test that a bad creation time cannot move the watermark past the clock."""
+        detector = make_detector()
+        detector.observe([make_event("AAPL", NOW + 86400)], now=NOW)
+
+        assert detector.stats()["watermark"] == NOW - 60
+
+    def test_recent(self):
+        """Test polling events by id and symbol."""
+        detector = make_detector(max_events=2)
+        warm_up(detector, "AAPL,TSLA,MSFT")
+
+        for symbol in ("AAPL", "TSLA", "MSFT"):
+            detector.observe([make_event(symbol, 600 + i) for i in range(30)], now=NOW)
+
+        assert [event["symbol"] for event in detector.recent()] == ["TSLA", "MSFT"]
+        assert [event["symbol"] for event in detector.recent(after_id=2)] == ["MSFT"]
+        assert [event["symbol"] for event in detector.recent(symbols=["TSLA"])] == ["TSLA"]
+        assert detector.stats()["symbols"] == 3
+
+    def test_broker_listener(self):
+        """Test that published results reach the detector."""
+        detector = AnomalyDetector(bucket_seconds=3600)
+        broker = SentimentBroker()
+        broker.add_listener(detector.observe)
+
+        broker.publish([{"id": "post1", "stock_symbols": ["AAPL", "TSLA"],
+                         "sentiment": {"vader": {"compound": 0.4}}}])
+
+        assert detector.stats()["posts_observed"] == 1
+        assert sum(bucket.count for bucket in detector.states["AAPL"].open.values()) == 1
+
+    def test_failing_listener(self):
+        """Test that a failing listener does not stop publishing."""
+        def fail(events):
+            raise RuntimeError("listener failed")
+
+        received = []
+        broker = SentimentBroker()
+        broker.add_listener(fail)
+        broker.add_listener(received.extend)
+
+        broker.publish([{"id": "post1", "stock_symbols": ["AAPL"], "sentiment": {}}])
+
+        assert [event["id"] for event in received] == ["post1"]
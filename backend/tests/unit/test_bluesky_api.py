@@ -1,11 +1,15 @@
 """Unit tests for the BlueskyAPI class."""
 
+import asyncio
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from datetime import datetime, timedelta
 import os
 
-from app.api.bluesky import BlueskyAPI
+from app.api.bluesky import BlueskyAPI, AsyncBlueskyAPI
+
+# Kept before the rate-limit sleep is patched, to yield to other searches
+_yield = asyncio.sleep
 
 
 class TestBlueskyAPI:
@@ -187,4 +191,196 @@ class TestBlueskyAPI:
         assert result["AAPL"] == 2  # Should count AAPL twice
         assert "MSFT" in result
         assert "GOOGL" in result
-        api.client.get_timeline.assert_called_once() 
\ No newline at end of file
+        api.client.get_timeline.assert_called_once()
+
+
+class TestAsyncBlueskyAPI:
+    """Tests for the AsyncBlueskyAPI class."""
+
+    @staticmethod
+    def _search_results(keyword, count):
+        """Build a searchPosts response with recent posts."""
+        posts = []
+        for i in range(count):
+            post = MagicMock()
+            post.uri = f"at://{keyword}/{i}"
+            post.record.text = f"{keyword} post {i}"
+            post.author.handle = "user.bsky.social"
+            post.indexedAt = datetime.now().isoformat() + "Z"
+            post.likeCount = i
+            post.replyCount = 0
+            post.repostCount = 0
+            posts.append(post)
+        return MagicMock(posts=posts)
+
+    @patch("app.api.bluesky.asyncio.sleep", new_callable=AsyncMock)
+    @patch("app.api.bluesky.AsyncClient")
+    def test_fetch_posts_concurrently(self, mock_client_class, mock_sleep):
+        """Test that keyword searches overlap and results keep keyword order."""
+        in_flight = 0
+        peak = 0
+
+        async def search_posts(params):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await _yield(0.01)
+            in_flight -= 1
+            return self._search_results(params['q'], 2)
+
+        mock_client = mock_client_class.return_value
+        mock_client.login = AsyncMock()
+        mock_client.app.bsky.feed.searchPosts = search_posts
+
+        api = AsyncBlueskyAPI(username="test_user", password="test_pass", concurrency=2)
+        arrived = []
+        posts = asyncio.run(api.fetch_posts(["AAPL", "TSLA", "MSFT"], limit=2, on_posts=arrived.append))
+
+        mock_client.login.assert_awaited_once_with("test_user", "test_pass")
+        assert [post['keyword'] for post in posts] == ["AAPL", "AAPL", "TSLA", "TSLA", "MSFT", "MSFT"]
+        assert posts[1]['likes'] == 1
+        assert sum(len(batch) for batch in arrived) == 6
+        assert peak == 2
+
+    @patch("app.api.bluesky.asyncio.sleep", new_callable=AsyncMock)
+    @patch("app.api.bluesky.AsyncClient")
+    def test_failed_search_is_skipped(self, mock_client_class, mock_sleep):
+        """Test that one failing search does not fail the others."""
+        async def search_posts(params):
+            if params['q'] == "TSLA":
+                raise Exception("Rate limited")
+            return self._search_results(params['q'], 1)
+
+        mock_client = mock_client_class.return_value
+        mock_client.login = AsyncMock()
+        mock_client.app.bsky.feed.searchPosts = search_posts
+
+        api = AsyncBlueskyAPI(username="test_user", password="test_pass")
+        posts = asyncio.run(api.fetch_posts(["AAPL", "TSLA"]))
+
+        assert [post['keyword'] for post in posts] == ["AAPL"]
+
+    @patch("app.api.bluesky.asyncio.sleep", new_callable=AsyncMock)
+    @patch("app.api.bluesky.AsyncClient")
+    def test_fetch_engagement_in_batches(self, mock_client_class, mock_sleep):
+        """Test that engagement is requested 25 URIs at a time, in order."""
+        requested = []
+
+        async def get_posts(params):
+            requested.append(params['uris'])
+            posts = []
+            for uri in params['uris']:
+                if uri.endswith("/deleted"):
+                    continue
+                post = MagicMock(uri=uri, likeCount=7, replyCount=1, repostCount=None)
+                posts.append(post)
+            return MagicMock(posts=posts)
+
+        mock_client = mock_client_class.return_value
+        mock_client.login = AsyncMock()
+        mock_client.app.bsky.feed.getPosts = get_posts
+
+        uris = [f"at://user/{i}" for i in range(60)] + ["at://user/deleted"]
+        api = AsyncBlueskyAPI(username="test_user", password="test_pass", concurrency=1)
+        batches = []
+        counts = asyncio.run(api.fetch_engagement(uris, on_batch=lambda batch, found: batches.append(len(batch))))
+
+        assert [len(batch) for batch in requested] == [25, 25, 11]
+        assert requested[0][0] == "at://user/0"
+        assert batches == [25, 25, 11]
+        assert len(counts) == 60
+        assert counts["at://user/0"] == {"likes": 7, "replies": 1, "reposts": 0}
+
+    @patch("app.api.bluesky.BlueskyAPI.connect", return_value=True)
+    def test_blocking_searches_use_shared_rate_limiter(self, mock_connect):
+        """Test that the blocking client waits on the rate limiter instead of pausing."""
+        limiter = MagicMock()
+        api = BlueskyAPI(username="test_user", password="test_pass", rate_limiter=limiter)
+        api.client = MagicMock()
+        api.client.app.bsky.feed.searchPosts.return_value = self._search_results("AAPL", 1)
+
+        with patch("app.api.bluesky.time.sleep") as mock_sleep:
+            api.fetch_posts(["AAPL", "TSLA"])
+
+        assert limiter.wait.call_count == 2
+        mock_sleep.assert_not_called()
+
+    @patch("app.api.bluesky.BlueskyAPI.connect", return_value=True)
+    def test_blocking_fetch_followers(self, mock_connect):
+        """Test that follower counts are looked up once per author, in batches."""
+        def get_profiles(params):
+            return MagicMock(profiles=[
+                MagicMock(handle=handle, followersCount=len(handle)) for handle in params['actors']
+            ])
+
+        api = BlueskyAPI(username="test_user", password="test_pass",
+                         rate_limiter=MagicMock(), fetch_followers=True)
+        api.client = MagicMock()
+        api.client.app.bsky.feed.searchPosts.return_value = self._search_results("AAPL", 2)
+        api.client.app.bsky.actor.getProfiles.side_effect = get_profiles
+
+        posts = api.fetch_posts(["AAPL", "TSLA"])
+
+        assert [post['author_followers'] for post in posts] == [16] * 4
+        api.client.app.bsky.actor.getProfiles.assert_called_once_with({'actors': ["user.bsky.social"]})
+
+    @patch("app.api.bluesky.asyncio.sleep", new_callable=AsyncMock)
+    @patch("app.api.bluesky.AsyncClient")
+    def test_fetch_followers(self, mock_client_class, mock_sleep):
+        """Test that follower counts are only requested when enabled, 25 authors at a time."""
+        requested = []
+
+        async def search_posts(params):
+            results = self._search_results(params['q'], 30)
+            for i, post in enumerate(results.posts):
+                post.author.handle = f"user{i}"
+            return results
+
+        async def get_profiles(params):
+            requested.append(params['actors'])
+            return MagicMock(profiles=[
+                MagicMock(handle=handle, followersCount=100) for handle in params['actors']
+                if handle != "user0"
+            ])
+
+        mock_client = mock_client_class.return_value
+        mock_client.login = AsyncMock()
+        mock_client.app.bsky.feed.searchPosts = search_posts
+        mock_client.app.bsky.actor.getProfiles = get_profiles
+
+        posts = asyncio.run(AsyncBlueskyAPI(username="test_user", password="test_pass").fetch_posts(["AAPL"]))
+        assert requested == []
+        assert 'author_followers' not in posts[0]
+
+        api = AsyncBlueskyAPI(username="test_user", password="test_pass", fetch_followers=True)
+        posts = asyncio.run(api.fetch_posts(["AAPL", "TSLA"]))
+
+        assert sorted(len(batch) for batch in requested) == [5, 25]
+        assert posts[0]['author_followers'] is None
+        assert posts[1]['author_followers'] == 100
+
+    @patch("app.api.bluesky.AsyncClient")
+    def test_requests_use_shared_rate_limiter(self, mock_client_class):
+        """Test that a rate limiter replaces the fixed pause after each request."""
+        mock_client = mock_client_class.return_value
+        mock_client.login = AsyncMock()
+        mock_client.app.bsky.feed.searchPosts = AsyncMock(return_value=self._search_results("AAPL", 1))
+        limiter = MagicMock()
+        limiter.acquire = AsyncMock()
+
+        api = AsyncBlueskyAPI(username="test_user", password="test_pass", rate_limiter=limiter)
+        with patch("app.api.bluesky.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+            asyncio.run(api.fetch_posts(["AAPL", "TSLA"]))
+
+        assert limiter.acquire.await_count == 2
+        mock_sleep.assert_not_awaited()
+
+    @patch("app.api.bluesky.AsyncClient")
+    def test_fetch_posts_connection_failure(self, mock_client_class):
+        """Test fetching posts when the login fails."""
+        mock_client_class.return_value.login = AsyncMock(side_effect=Exception("Connection failed"))
+
+        api = AsyncBlueskyAPI(username="test_user", password="test_pass")
+        with pytest.raises(Exception, match="Failed to connect to Bluesky API"):
+            asyncio.run(api.fetch_posts(["AAPL"]))
+
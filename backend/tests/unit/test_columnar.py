@@ -0,0 +1,125 @@
+"""Unit tests for the columnar storage helpers."""
+
+import json
+import os
+
+from app.utils import columnar
+
+
+def make_result(post_id, symbol, compound):
+    """Build a scored post."""
+    return {
+        "id": post_id,
+        "text": f"post about {symbol}",
+        "tokens": ["post", symbol.lower()],
+        "stock_symbols": [symbol],
+        "likes": 3,
+        "timestamp": 1700000000.0,
+        "sentiment": {
+            "vader": {"compound": compound, "label": "positive"},
+            "textblob": {"polarity": 0.2, "subjectivity": 0.4, "label": "positive"},
+            "consensus": {"label": "positive", "confidence": 1.0}
+        }
+    }
+
+
+class TestColumnar:
+    """Tests for the columnar module."""
+
+    def test_flatten_and_unflatten(self):
+        """Test that nested sentiment fields round-trip through flat rows."""
+        item = make_result("post1", "AAPL", 0.5)
+        flat = columnar.flatten_record(item)
+
+        assert flat["sentiment.vader.compound"] == 0.5
+        assert flat["sentiment.consensus.label"] == "positive"
+        assert flat["tokens"] == ["post", "aapl"]
+        assert columnar.unflatten_record(flat) == item
+
+    def test_table_types(self):
+        """Test that columns are typed and list fields are list columns."""
+        table = columnar.records_to_table([
+            make_result("post1", "AAPL", 0.5),
+            {"id": "post2", "text": "no sentiment yet"}
+        ])
+
+        assert str(table.schema.field("tokens").type) == "list<item: string>"
+        assert str(table.schema.field("sentiment.vader.compound").type) == "double"
+        assert table.column("sentiment.vader.compound").null_count == 1
+
+    def test_parquet_round_trip(self, tmp_path):
+        """Test writing and reading a Parquet file."""
+        records = [make_result(f"post{i}", "AAPL", i / 10) for i in range(5)]
+        filename = str(tmp_path / "results.parquet")
+
+        columnar.write_parquet(records, filename)
+
+        assert columnar.read_parquet(filename) == records
+
+    def test_parquet_projection(self, tmp_path):
+        """Test that only requested columns are read."""
+        records = [make_result("post1", "AAPL", 0.5)]
+        filename = str(tmp_path / "results.parquet")
+        columnar.write_parquet(records, filename)
+
+        table = columnar.read_parquet_table(
+            filename, ["stock_symbols", "sentiment.consensus", "missing_column"]
+        )
+
+        assert table.column_names == [
+            "stock_symbols", "sentiment.consensus.label", "sentiment.consensus.confidence"
+        ]
+        assert columnar.read_parquet(filename, ["id"]) == [{"id": "post1"}]
+
+    def test_parquet_smaller_than_json(self, tmp_path):
+        """Test that Parquet files are smaller than pretty-printed JSON."""
+        records = [make_result(f"post{i}", "AAPL", 0.5) for i in range(500)]
+        parquet_file = str(tmp_path / "results.parquet")
+        json_file = str(tmp_path / "results.json")
+
+        columnar.write_parquet(records, parquet_file)
+        with open(json_file, "w") as f:
+            json.dump(records, f, indent=2)
+
+        assert os.path.getsize(parquet_file) * 4 < os.path.getsize(json_file)
+
+    def test_arrow_ipc_memory_mapped_slice(self, tmp_path):
+        """Test slicing records from a memory-mapped Arrow IPC file."""
+        records = [make_result(f"post{i}", "AAPL", i / 10) for i in range(10)]
+        filename = str(tmp_path / "results.arrow")
+        columnar.write_arrow_ipc(records, filename)
+
+        assert columnar.read_arrow_ipc(filename, offset=3, limit=2) == records[3:5]
+        assert columnar.read_arrow_ipc(filename, columns=["id"], offset=9) == [{"id": "post9"}]
+        assert list(columnar.iter_arrow_ipc(filename, batch_size=4)) == records
+
+    def test_arrow_ipc_table_reused_until_file_changes(self, tmp_path):
+        """Test that the mapped table is cached per file version."""
+        filename = str(tmp_path / "results.arrow")
+        columnar.write_arrow_ipc([make_result("post1", "AAPL", 0.1)], filename)
+
+        table = columnar.open_arrow_ipc(filename)
+        assert columnar.open_arrow_ipc(filename) is table
+
+        columnar.write_arrow_ipc([make_result("post1", "AAPL", 0.1)] * 2, filename)
+        assert columnar.open_arrow_ipc(filename).num_rows == 2
+
+    def test_arrow_ipc_cache_evicts(self, tmp_path, monkeypatch):
+        """Test that tables of deleted files and beyond the limit are dropped."""
+        monkeypatch.setattr(columnar, "MAX_MAPPED_TABLES", 2)
+        monkeypatch.setattr(columnar, "_mapped_tables", columnar.OrderedDict())
+        filenames = [str(tmp_path / f"results{i}.arrow") for i in range(3)]
+        for filename in filenames:
+            columnar.write_arrow_ipc([make_result("post1", "AAPL", 0.1)], filename)
+
+        columnar.open_arrow_ipc(filenames[0])
+        columnar.open_arrow_ipc(filenames[1])
+        columnar.open_arrow_ipc(filenames[0])
+        columnar.open_arrow_ipc(filenames[2])
+        cached = {os.path.basename(path) for path in columnar._mapped_tables}
+        assert cached == {"results0.arrow", "results2.arrow"}
+
+        os.remove(filenames[0])
+        columnar.open_arrow_ipc(filenames[1])
+        cached = {os.path.basename(path) for path in columnar._mapped_tables}
+        assert cached == {"results1.arrow", "results2.arrow"}
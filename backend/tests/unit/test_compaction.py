@@ -0,0 +1,116 @@
+"""Unit tests for compaction of small partitioned files."""
+
+import json
+
+import pytest
+
+from app.utils import storage
+from app.utils import partitions
+from app.utils.compaction import Compactor, merge_files
+
+# 2024-01-02 00:00:00 UTC
+DAY = 1704153600.0
+
+
+def make_post(post_id, timestamp, likes=0):
+    """Build a preprocessed post."""
+    return {"id": post_id, "timestamp": timestamp, "likes": likes}
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """Data directory with three analyzed fetches in each of two hours of 2024-01-02."""
+    for hour in (1, 2):
+        partition = tmp_path / f"date=2024-01-02/hour={hour:02d}"
+        partition.mkdir(parents=True)
+        for fetch in range(3):
+            # Every fetch returns the previous fetch's post again, with more likes
+            posts = [make_post(f"post{hour}-{fetch}", DAY + hour * 3600 + fetch),
+                     make_post(f"post{hour}-{max(fetch - 1, 0)}", DAY + hour * 3600 + max(fetch - 1, 0), fetch)]
+            storage.save_records(posts, str(partition / f"bluesky_data_{hour}{fetch}.json"))
+            storage.save_records(posts, str(partition / f"bluesky_data_{hour}{fetch}_sentiment.json"))
+    return tmp_path
+
+
+class TestCompaction:
+    """Tests for merge_files and the Compactor class."""
+
+    def test_merge_files(self, tmp_path):
+        """Test that merged records are deduplicated, newest copy first, and sorted."""
+        storage.save_records([make_post("b", 2.0), make_post("a", 1.0)], str(tmp_path / "1.json"))
+        storage.save_records([make_post("a", 1.0, likes=5)], str(tmp_path / "2.jsonl"))
+
+        count = merge_files([str(tmp_path / "1.json"), str(tmp_path / "2.jsonl")], str(tmp_path / "out.parquet"))
+
+        assert count == 2
+        assert storage.load_records(str(tmp_path / "out.parquet")) == [make_post("a", 1.0, 5), make_post("b", 2.0)]
+
+    def test_compact_finished_hours(self, data_dir):
+        """Test that each finished hour of the current day is merged separately."""
+        now = DAY + 4 * 3600
+        compactor = Compactor(str(data_dir), min_age=3600, grace_period=0)
+
+        result = compactor.run(now=now)
+
+        assert result['files_merged'] == 12 and result['files_written'] == 4
+        names = partitions.list_files(str(data_dir))
+        assert len(names) == 4
+        assert all(name.split('/')[-1].startswith(partitions.COMPACTED_PREFIX) for name in names)
+
+        hour_file = [name for name in names if name.startswith("date=2024-01-02/hour=01/") and 'sentiment' not in name][0]
+        records = storage.load_records(str(data_dir / hour_file))
+        assert [r["id"] for r in records] == ["post1-0", "post1-1", "post1-2"]
+        assert records[1]["likes"] == 2
+
+        # The inputs stay on disk until the next run deletes them
+        assert (data_dir / "date=2024-01-02/hour=01/bluesky_data_10.json").exists()
+        assert compactor.run(now=now)['files_deleted'] == 12
+        assert not (data_dir / "date=2024-01-02/hour=01/bluesky_data_10.json").exists()
+
+    def test_compact_finished_day(self, data_dir):
+        """Test that a finished day is merged into day files, tracking the originals."""
+        compactor = Compactor(str(data_dir), min_age=3600, grace_period=0)
+        compactor.run(now=DAY + 4 * 3600)
+        compactor.run(now=DAY + 2 * 86400)
+
+        names = partitions.list_files(str(data_dir))
+        assert len(names) == 2
+        assert all(name.count('/') == 1 for name in names)
+
+        log = json.loads((data_dir / "date=2024-01-02" / partitions.COMPACTION_LOG).read_text())
+        data_entry = [entry for name, entry in log['compacted'].items() if 'sentiment' not in name][0]
+        assert len(data_entry['originals']) == 6
+        assert data_entry['records'] == 6
+
+        # Day files cover the whole day when pruning
+        assert partitions.list_files(str(data_dir), since=DAY + 20 * 3600, max_lag=0) == names
+
+    def test_uncommitted_output_is_invisible(self, data_dir):
+        """Test that readers ignore compacted files until the log lists them."""
+        partition = data_dir / "date=2024-01-02/hour=01"
+        storage.save_records([make_post("partial", DAY)], str(partition / f"{partitions.COMPACTED_PREFIX}x.json"))
+
+        names = partitions.list_files(str(data_dir))
+
+        assert "date=2024-01-02/hour=01/bluesky_data_10.json" in names
+        assert not any(partitions.COMPACTED_PREFIX in name for name in names)
+
+    def test_recent_partitions_are_left_alone(self, data_dir):
+        """Test that partitions still being written are not compacted."""
+        result = Compactor(str(data_dir), min_age=3600).run(now=DAY + 3.5 * 3600)
+
+        assert result['files_merged'] == 6
+        assert "date=2024-01-02/hour=02/bluesky_data_20.json" in partitions.list_files(str(data_dir))
+
+    def test_unscored_data_files_are_left_alone(self, data_dir):
+        """Test that data files without a sentiment file are not compacted."""
+        partition = data_dir / "date=2024-01-02/hour=01"
+        for fetch in (3, 4):
+            storage.save_records([make_post(f"new{fetch}", DAY + 3600)], str(partition / f"bluesky_data_1{fetch}.json"))
+
+        Compactor(str(data_dir), min_age=3600, grace_period=0).run(now=DAY + 4 * 3600)
+
+        names = partitions.list_files(str(data_dir))
+        assert "date=2024-01-02/hour=01/bluesky_data_13.json" in names
+        assert "date=2024-01-02/hour=01/bluesky_data_14.json" in names
+        assert "date=2024-01-02/hour=01/bluesky_data_10.json" not in names
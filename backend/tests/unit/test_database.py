@@ -0,0 +1,158 @@
+"""Unit tests for the SQLite storage backend."""
+
+import pytest
+
+from app.models.database import Database, parse_database_uri
+
+
+def make_post(post_id, symbols, keyword="stocks", created_at="2024-01-01T12:00:00Z", likes=1):
+    """Build a preprocessed post."""
+    return {
+        "id": post_id,
+        "text": f"post about {' '.join(symbols)}",
+        "author": "user.bsky.social",
+        "keyword": keyword,
+        "created_at": created_at,
+        "likes": likes,
+        "replies": 0,
+        "reposts": 0,
+        "stock_symbols": symbols
+    }
+
+
+def make_result(post_id, symbols, label, compound, **kwargs):
+    """Build a scored post."""
+    result = make_post(post_id, symbols, **kwargs)
+    result["sentiment"] = {
+        "vader": {"compound": compound},
+        "consensus": {"label": label, "confidence": 1.0}
+    }
+    return result
+
+
+@pytest.fixture
+def database():
+    """In-memory database."""
+    database = Database("sqlite:///:memory:")
+    yield database
+    database.close()
+
+
+class TestDatabase:
+    """Tests for the Database class."""
+
+    def test_parse_database_uri(self):
+        """Test extracting the database path from the URI."""
+        assert parse_database_uri("sqlite:///data/bluesky_data.db") == "data/bluesky_data.db"
+        assert parse_database_uri("sqlite:////tmp/test.db") == "/tmp/test.db"
+        assert parse_database_uri("sqlite:///:memory:") == ":memory:"
+        with pytest.raises(ValueError):
+            parse_database_uri("postgresql://localhost/db")
+
+    def test_file_database_uses_wal(self, tmp_path):
+        """Test that file databases are opened in WAL mode."""
+        database = Database(f"sqlite:///{tmp_path}/nested/test.db")
+        mode = database.conn.execute("PRAGMA journal_mode").fetchone()[0]
+        database.close()
+        assert mode == "wal"
+
+    def test_insert_posts_upserts(self, database):
+        """Test that re-inserting a post updates it instead of duplicating it."""
+        assert database.insert_posts([make_post("post1", ["AAPL"])], "data/a.json") == 1
+        database.insert_posts([make_post("post1", ["AAPL"], likes=7), {"text": "no uri"}], "data/b.json")
+
+        posts = database.query_posts()
+        assert len(posts) == 1
+        assert posts[0]["likes"] == 7
+
+    def test_batched_inserts(self, database, monkeypatch):
+        """Test writing more rows than one batch."""
+        monkeypatch.setattr(Database, "BATCH_SIZE", 3)
+        posts = (make_post(f"post{i}", ["AAPL"]) for i in range(10))
+
+        assert database.insert_posts(posts) == 10
+        assert len(database.query_posts(symbol="AAPL")) == 10
+
+    def test_tee_posts(self, database):
+        """Test inserting posts from a stream while passing them through."""
+        posts = [make_post("post1", ["AAPL"]), make_post("post2", ["TSLA"])]
+
+        assert list(database.tee_posts(iter(posts), "data/a.jsonl")) == posts
+        assert len(database.query_posts()) == 2
+
+    def test_data_version(self, database):
+        """Test that writing results, but not posts alone, changes the data version."""
+        version = database.data_version()
+
+        database.insert_posts([make_post("post1", ["AAPL"])])
+        assert database.data_version() == version
+
+        database.insert_sentiment([make_result("post1", ["AAPL"], "positive", 0.5)])
+        assert database.data_version() == version + 1
+
+        database.update_engagement({"post1": {"likes": 3, "replies": 0, "reposts": 0}})
+        assert database.data_version() == version + 2
+
+    def test_stock_summary(self, database):
+        """Test aggregating sentiment per symbol."""
+        database.insert_sentiment([
+            make_result("post1", ["AAPL"], "positive", 0.8),
+            make_result("post2", ["AAPL", "MSFT"], "negative", -0.4),
+            make_result("post3", ["MSFT"], "neutral", 0.0)
+        ], "data/a_sentiment.json")
+
+        summary = database.stock_summary(["AAPL", "MSFT", "TSLA"])
+
+        assert summary["AAPL"]["positive"] == 1
+        assert summary["AAPL"]["negative"] == 1
+        assert summary["AAPL"]["total"] == 2
+        assert summary["AAPL"]["avg_sentiment"] == pytest.approx(0.2)
+        assert summary["MSFT"]["total"] == 2
+        assert summary["TSLA"]["total"] == 0
+
+    def test_tee_sentiment(self, database):
+        """Test that results are stored while being passed through."""
+        results = [make_result("post1", ["AAPL"], "positive", 0.5)]
+
+        assert list(database.tee_sentiment(iter(results))) == results
+        assert database.stock_summary(["AAPL"])["AAPL"]["total"] == 1
+
+    def test_import_files(self, database, tmp_path):
+        """Test backfilling the database from stored files."""
+        from app.utils import storage
+
+        data_dir = tmp_path / "data"
+        (data_dir / "date=2024-01-01" / "hour=12").mkdir(parents=True)
+        storage.save_records([make_post("post1", ["AAPL"]), make_post("post2", ["MSFT"])],
+                             str(data_dir / "bluesky_data_1.json"))
+        storage.save_records([make_result("post1", ["AAPL"], "positive", 0.6)],
+                             str(data_dir / "bluesky_data_1_sentiment.json"))
+        storage.save_records([make_result("post3", ["AAPL"], "negative", -0.2)],
+                             str(data_dir / "date=2024-01-01" / "hour=12" / "bluesky_data_2_sentiment.jsonl"))
+
+        assert database.is_empty()
+        counts = database.import_files(str(data_dir))
+
+        assert counts == {"files": 3, "posts": 2, "results": 2}
+        assert not database.is_empty()
+        assert database.stock_summary(["AAPL"])["AAPL"]["total"] == 2
+
+        # Importing again does not double count
+        database.import_files(str(data_dir))
+        assert database.stock_summary(["AAPL"])["AAPL"]["total"] == 2
+
+    def test_query_posts_filters(self, database):
+        """Test filtering posts by symbol, keyword and time."""
+        database.insert_posts([
+            make_post("post1", ["AAPL"], keyword="apple", created_at="2024-01-01T10:00:00Z"),
+            make_post("post2", ["MSFT"], keyword="microsoft", created_at="2024-01-02T10:00:00Z"),
+            make_post("post3", ["AAPL"], keyword="apple", created_at="2024-01-03T10:00:00Z")
+        ])
+        database.insert_sentiment([make_result("post3", ["AAPL"], "positive", 0.5,
+                                               keyword="apple", created_at="2024-01-03T10:00:00Z")])
+
+        assert [p["id"] for p in database.query_posts(symbol="AAPL")] == ["post3", "post1"]
+        assert [p["id"] for p in database.query_posts(keyword="microsoft")] == ["post2"]
+        assert [p["id"] for p in database.query_posts(since="2024-01-02", until="2024-01-03")] == ["post2"]
+        assert database.query_posts(symbol="AAPL")[0]["sentiment"]["consensus"]["label"] == "positive"
+        assert [p["id"] for p in database.query_posts(limit=1, offset=1)] == ["post2"]
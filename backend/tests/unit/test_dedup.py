@@ -0,0 +1,148 @@
+"""Unit tests for the near-duplicate filter."""
+
+import pytest
+
+from app.utils.dedup import MinHasher, LSHIndex, NearDuplicateFilter, build_dedup_filter
+
+
+def make_item(post_id, text):
+    """Build a preprocessed item from whitespace-separated text."""
+    return {"id": post_id, "text": text, "tokens": text.split()}
+
+
+class TestMinHasher:
+    """Tests for the MinHasher class."""
+
+    def test_identical_sets_have_identical_signatures(self):
+        """Test that equal shingle sets produce equal signatures."""
+        hasher = MinHasher(num_perm=64)
+        sig1 = hasher.signature(["apple", "stock", "rally"])
+        sig2 = hasher.signature(["rally", "apple", "stock"])
+        assert len(sig1) == 64
+        assert MinHasher.jaccard(sig1, sig2) == 1.0
+
+    def test_jaccard_estimate(self):
+        """Test that the signature similarity approximates Jaccard similarity."""
+        hasher = MinHasher(num_perm=256)
+        set1 = [f"token{i}" for i in range(100)]
+        set2 = [f"token{i}" for i in range(50, 150)]  # Jaccard = 50 / 150
+        estimate = MinHasher.jaccard(hasher.signature(set1), hasher.signature(set2))
+        assert abs(estimate - 1 / 3) < 0.1
+
+
+class TestLSHIndex:
+    """Tests for the LSHIndex class."""
+
+    def test_optimal_params(self):
+        """Test that band/row split fits the signature length."""
+        bands, rows = LSHIndex.optimal_params(0.8, 128)
+        assert bands * rows <= 128
+        assert abs((1 / bands) ** (1 / rows) - 0.8) < 0.05
+
+    def test_eviction_bounds_memory(self):
+        """Test that the index never holds more than max_entries signatures."""
+        hasher = MinHasher(num_perm=32)
+        index = LSHIndex(threshold=0.8, num_perm=32, max_entries=5)
+        for i in range(20):
+            index.insert(i, hasher.signature([f"word{i}", f"other{i}"]))
+
+        assert len(index) == 5
+        assert sorted(index.entries) == [15, 16, 17, 18, 19]
+        assert sum(len(bucket) for bucket in index.buckets) <= 5 * index.bands
+
+
+class TestNearDuplicateFilter:
+    """Tests for the NearDuplicateFilter class."""
+
+    def test_invalid_mode(self):
+        """Test that an unknown mode is rejected."""
+        with pytest.raises(ValueError):
+            NearDuplicateFilter(mode="merge")
+
+    def test_drop_mode(self):
+        """Test that near-duplicates are dropped."""
+        dedup_filter = NearDuplicateFilter(threshold=0.7, mode="drop")
+        items = [
+            make_item("post1", "buy aapl now before earnings huge upside coming soon"),
+            make_item("post2", "buy aapl now before earnings huge upside coming today"),
+            make_item("post3", "tsla deliveries missed estimates stock falling"),
+        ]
+
+        result = list(dedup_filter.filter(items))
+
+        assert [item["id"] for item in result] == ["post1", "post3"]
+        assert dedup_filter.duplicates == 1
+
+    def test_collapse_mode(self):
+        """Test that near-duplicates are counted on the first record."""
+        dedup_filter = NearDuplicateFilter(threshold=0.7, mode="collapse")
+        items = [
+            make_item("post1", "buy aapl now before earnings huge upside coming soon"),
+            make_item("post2", "buy aapl now before earnings huge upside coming today"),
+            make_item("post3", "buy aapl now before earnings huge upside coming soon"),
+            make_item("post4", "tsla deliveries missed estimates stock falling"),
+        ]
+
+        result = list(dedup_filter.filter(items))
+
+        assert [item["id"] for item in result] == ["post1", "post4"]
+        assert result[0]["duplicate_count"] == 2
+        assert result[1]["duplicate_count"] == 0
+
+    def test_collapse_mode_counts_are_final(self):
+        """Test that collapsed records are not changed after they are yielded."""
+        dedup_filter = NearDuplicateFilter(threshold=0.7, mode="collapse")
+        items = [
+            make_item("post1", "buy aapl now before earnings huge upside coming soon"),
+            make_item("post2", "buy aapl now before earnings huge upside coming today"),
+        ]
+
+        stream = dedup_filter.filter(iter(items))
+        first = next(stream)
+        assert first["duplicate_count"] == 1
+        assert list(stream) == []
+
+        # A later stream does not count its duplicates on records already yielded
+        later = list(dedup_filter.filter([make_item("post3", "buy aapl now before earnings huge upside coming soon")]))
+        assert later == []
+        assert first["duplicate_count"] == 1
+
+    def test_collapse_mode_streams_evicted_records(self):
+        """Test that collapsed records are yielded as soon as the index evicts them."""
+        dedup_filter = NearDuplicateFilter(threshold=0.7, mode="collapse", max_entries=2)
+
+        def generate():
+            yield make_item("post1", "buy aapl now before earnings huge upside coming soon")
+            yield make_item("post2", "buy aapl now before earnings huge upside coming today")
+            yield make_item("post3", "tsla deliveries missed estimates stock falling")
+            yield make_item("post4", "nvda chips sold out through next year")
+            raise AssertionError("Stream consumed too eagerly")
+
+        stream = dedup_filter.filter(generate())
+        first = next(stream)
+        assert first["id"] == "post1"
+        assert first["duplicate_count"] == 1
+        assert len(dedup_filter._held) == 2
+
+    def test_filter_is_lazy(self):
+        """Test that the filter consumes its input as a stream."""
+        dedup_filter = NearDuplicateFilter()
+
+        def generate():
+            yield make_item("post1", "first post about markets today")
+            raise AssertionError("Stream consumed too eagerly")
+
+        stream = dedup_filter.filter(generate())
+        assert next(stream)["id"] == "post1"
+
+    def test_build_dedup_filter(self):
+        """Test building the filter from config."""
+        assert build_dedup_filter({"DEDUP_ENABLED": False}) is None
+
+        dedup_filter = build_dedup_filter({
+            "DEDUP_ENABLED": True,
+            "DEDUP_THRESHOLD": 0.9,
+            "DEDUP_MODE": "collapse"
+        })
+        assert dedup_filter.mode == "collapse"
+        assert dedup_filter.index.threshold == 0.9
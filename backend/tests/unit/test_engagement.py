@@ -0,0 +1,126 @@
+"""Unit tests for the engagement refresher and the shared rate limiter."""
+
+import os
+import time
+import json
+import asyncio
+import pytest
+from unittest.mock import MagicMock, AsyncMock
+
+from app.utils import storage
+from app.utils.engagement import EngagementRefresher
+from app.utils.rate_limit import RateLimiter
+
+NOW = 1704110400.0  # 2024-01-01 12:00 UTC
+
+
+def write_file(path, posts):
+    """Write a JSON data file that was last modified an hour ago."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(posts, f)
+    os.utime(path, (NOW - 3600, NOW - 3600))
+
+
+def post(post_id, age_hours, likes=0):
+    """Build a stored post created some hours before NOW."""
+    return {"id": post_id, "timestamp": NOW - age_hours * 3600, "likes": likes, "replies": 0, "reposts": 0}
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """Data directory with a data file and its sentiment file."""
+    hour_dir = tmp_path / "date=2024-01-01" / "hour=10"
+    write_file(str(hour_dir / "bluesky_data_20240101_100000.json"),
+               [post("old", 72), post("young", 1, likes=1), post("older", 10, likes=2)])
+    write_file(str(hour_dir / "bluesky_data_20240101_100000_sentiment.json"),
+               [dict(post("young", 1, likes=1), sentiment={})])
+    return str(tmp_path)
+
+
+class TestEngagementRefresher:
+    """Tests for the EngagementRefresher class."""
+
+    def test_collect_youngest_first(self, data_dir):
+        """Test that only recent posts are collected, youngest first."""
+        refresher = EngagementRefresher(data_dir, max_age=48 * 3600)
+
+        uris, stored, files = refresher.collect(NOW)
+
+        assert uris == ["young", "older"]
+        assert stored["young"] == {(1, 0, 0)}
+        assert sum(len(file_uris) for file_uris in files.values()) == 3
+
+    def test_collect_skips_files_being_written(self, data_dir):
+        """Test that recently written files are left alone."""
+        path = os.path.join(data_dir, "date=2024-01-01", "hour=11", "bluesky_data_20240101_115900.json")
+        write_file(path, [post("new", 0.1)])
+        os.utime(path, (NOW - 10, NOW - 10))
+
+        uris, _, _ = EngagementRefresher(data_dir, settle_time=300).collect(NOW)
+
+        assert "new" not in uris
+
+    def test_run_updates_changed_posts(self, data_dir):
+        """Test that changed counts are written to every file and the database."""
+        api = MagicMock()
+        api.fetch_engagement = AsyncMock(return_value={
+            "young": {"likes": 9, "replies": 1, "reposts": 0},
+            "older": {"likes": 2, "replies": 0, "reposts": 0}
+        })
+        database = MagicMock()
+        refresher = EngagementRefresher(data_dir, database=database, max_posts=1)
+
+        result = asyncio.run(refresher.run(api, now=NOW))
+
+        api.fetch_engagement.assert_awaited_once()
+        assert api.fetch_engagement.await_args.args[0] == ["young"]
+        assert result["posts_updated"] == 1
+        assert result["files_rewritten"] == 2
+        database.update_engagement.assert_called_once_with({"young": {"likes": 9, "replies": 1, "reposts": 0}})
+
+        hour_dir = os.path.join(data_dir, "date=2024-01-01", "hour=10")
+        data = storage.load_records(os.path.join(hour_dir, "bluesky_data_20240101_100000.json"))
+        sentiment = storage.load_records(os.path.join(hour_dir, "bluesky_data_20240101_100000_sentiment.json"))
+        assert [item["likes"] for item in data] == [0, 9, 2]
+        assert sentiment[0]["likes"] == 9 and sentiment[0]["replies"] == 1
+        assert not [name for name in os.listdir(hour_dir) if name.endswith(".tmp")]
+
+    def test_run_without_changes(self, data_dir):
+        """Test that no file is rewritten when the counts did not change."""
+        api = MagicMock()
+        api.fetch_engagement = AsyncMock(return_value={"young": {"likes": 1, "replies": 0, "reposts": 0}})
+
+        result = asyncio.run(EngagementRefresher(data_dir).run(api, now=NOW))
+
+        assert result == {"posts_checked": 2, "posts_found": 1, "posts_updated": 0, "files_rewritten": 0}
+
+
+class TestRateLimiter:
+    """Tests for the RateLimiter class."""
+
+    def test_burst_then_rate(self):
+        """Test that requests beyond the burst wait for new tokens."""
+        limiter = RateLimiter(rate=50.0, burst=2)
+
+        async def acquire_all():
+            started = time.monotonic()
+            for _ in range(4):
+                await limiter.acquire()
+            return time.monotonic() - started
+
+        elapsed = asyncio.run(acquire_all())
+
+        assert elapsed >= 0.03
+        assert limiter.stats()["waited_seconds"] > 0
+
+    def test_blocking_wait_shares_tokens(self):
+        """Test that blocking clients draw from the same tokens as coroutines."""
+        limiter = RateLimiter(rate=50.0, burst=2)
+        asyncio.run(limiter.acquire())
+
+        started = time.monotonic()
+        for _ in range(3):
+            limiter.wait()
+
+        assert time.monotonic() - started >= 0.03
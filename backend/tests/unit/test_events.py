@@ -0,0 +1,78 @@
+"""Unit tests for the live sentiment feed."""
+
+from app.utils.events import SentimentBroker, format_sse, post_event
+
+
+def make_result(post_id, symbols, label, compound=0.5):
+    """Build a scored post."""
+    return {
+        "id": post_id,
+        "text": "test",
+        "stock_symbols": symbols,
+        "likes": 1,
+        "tokens": ["test"],
+        "sentiment": {"vader": {"compound": compound}, "consensus": {"label": label, "confidence": 0.9}}
+    }
+
+
+class TestSentimentBroker:
+    """Tests for the SentimentBroker and Subscriber classes."""
+
+    def test_post_event(self):
+        """Test the compact post sent to subscribers."""
+        event = post_event(make_result("post1", ["AAPL"], "positive"))
+
+        assert event["label"] == "positive"
+        assert event["compound"] == 0.5
+        assert "tokens" not in event
+
+    def test_filters(self):
+        """Test per-subscriber symbol and label filters."""
+        broker = SentimentBroker()
+        subscriber = broker.subscribe(symbols=["AAPL"], labels=["positive"])
+
+        broker.publish([
+            make_result("post1", ["AAPL"], "positive"),
+            make_result("post2", ["AAPL", "TSLA"], "negative", -0.5),
+            make_result("post3", ["TSLA"], "positive")
+        ])
+
+        update = subscriber.get(timeout=1)
+        assert [post["id"] for post in update["posts"]] == ["post1"]
+        assert set(update["aggregates"]) == {"AAPL"}
+        assert update["aggregates"]["AAPL"]["total"] == 2
+        assert update["aggregates"]["AAPL"]["negative"] == 1
+        assert update["aggregates"]["AAPL"]["avg_sentiment"] == 0.0
+
+    def test_coalescing(self):
+        """Test that slow subscribers get compacted updates."""
+        broker = SentimentBroker(max_posts=2)
+        subscriber = broker.subscribe()
+
+        for i in range(5):
+            broker.publish([make_result(f"post{i}", ["AAPL"], "positive")])
+
+        update = subscriber.get(timeout=1)
+        assert [post["id"] for post in update["posts"]] == ["post3", "post4"]
+        assert update["dropped"] == 3
+        assert update["aggregates"]["AAPL"]["total"] == 5
+        assert update["aggregates"]["AAPL"]["likes"] == 5
+
+        assert subscriber.get(timeout=0.01) is None
+
+    def test_tee_and_unsubscribe(self):
+        """Test publishing from a stream and unsubscribing."""
+        broker = SentimentBroker()
+        subscriber = broker.subscribe()
+        results = [make_result(f"post{i}", ["AAPL"], "neutral", 0.0) for i in range(3)]
+
+        assert list(broker.tee(iter(results), batch_size=2)) == results
+        assert len(subscriber.get(timeout=1)["posts"]) == 3
+
+        broker.unsubscribe(subscriber)
+        broker.publish(results)
+        assert subscriber.get(timeout=0.01) is None
+
+    def test_format_sse(self):
+        """Test encoding an event."""
+        assert format_sse("posts", {"a": 1}, 7) == b'id: 7\nevent: posts\ndata: {"a":1}\n\n'
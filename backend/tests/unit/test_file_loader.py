@@ -0,0 +1,114 @@
+"""Unit tests for the parallel, cached sentiment file loader."""
+
+import os
+
+import pytest
+
+from app.utils import file_loader, storage
+from app.utils.file_loader import SentimentFileLoader, summarize_rows
+
+
+def make_result(post_id, symbols, label, compound, timestamp=1000.0):
+    """Build a scored post."""
+    return {
+        "id": post_id,
+        "text": "a long text that the summary does not need",
+        "tokens": ["long", "text"],
+        "timestamp": timestamp,
+        "likes": 2,
+        "stock_symbols": symbols,
+        "sentiment": {
+            "vader": {"compound": compound, "positive": 0.5},
+            "consensus": {"label": label, "confidence": 1.0}
+        }
+    }
+
+
+@pytest.fixture
+def sentiment_files(tmp_path):
+    """Write a few sentiment files in different formats."""
+    filenames = []
+    for i, extension in enumerate([".json", ".jsonl", ".parquet"]):
+        filename = str(tmp_path / f"bluesky_data_{i}_sentiment{extension}")
+        storage.save_records([
+            make_result(f"post{i}a", ["AAPL"], "positive", 0.5, timestamp=1000.0 * i),
+            make_result(f"post{i}b", ["MSFT"], "negative", -0.5, timestamp=1000.0 * i)
+        ], filename)
+        filenames.append(filename)
+    return filenames
+
+
+class TestSentimentFileLoader:
+    """Tests for the SentimentFileLoader class."""
+
+    def test_reduce_sentiment_file(self, sentiment_files):
+        """Test that files are reduced to the fields the summary needs."""
+        rows = file_loader.reduce_sentiment_file(sentiment_files[2])
+        assert rows[0] == (("AAPL",), "positive", 0.5, 2000.0, 2, 0, 0, None)
+
+    def test_load_in_parallel(self, sentiment_files):
+        """Test loading several files with a thread pool."""
+        loader = SentimentFileLoader(max_workers=3)
+        assert len(loader.load(sentiment_files)) == 6
+
+    def test_unchanged_files_are_not_reparsed(self, sentiment_files, monkeypatch):
+        """Test that only new or modified files are parsed again."""
+        loader = SentimentFileLoader(max_workers=2)
+        loader.load(sentiment_files)
+
+        parsed = []
+        original = file_loader.reduce_sentiment_file
+
+        def tracking_reduce(filename):
+            parsed.append(filename)
+            return original(filename)
+
+        monkeypatch.setattr(file_loader, "reduce_sentiment_file", tracking_reduce)
+
+        assert len(loader.load(sentiment_files)) == 6
+        assert parsed == []
+
+        storage.save_records([make_result("post9", ["AAPL"], "neutral", 0.0)], sentiment_files[0])
+        os.utime(sentiment_files[0], ns=(1, 1))
+
+        assert len(loader.load(sentiment_files)) == 5
+        assert parsed == [sentiment_files[0]]
+
+    def test_removed_files_are_forgotten(self, sentiment_files):
+        """Test that deleted files drop out of the cache."""
+        loader = SentimentFileLoader()
+        loader.load(sentiment_files)
+        os.remove(sentiment_files[1])
+
+        assert len(loader.load(sentiment_files)) == 4
+        assert sentiment_files[1] not in loader.cache
+
+    def test_cache_is_kept_across_subsets(self, sentiment_files, monkeypatch):
+        """Test that loading a subset of the files keeps the others cached, up to max_files."""
+        loader = SentimentFileLoader(max_files=2)
+        loader.load(sentiment_files[:1])
+        loader.load(sentiment_files[1:2])
+
+        parsed = []
+        original = file_loader.reduce_sentiment_file
+        monkeypatch.setattr(file_loader, "reduce_sentiment_file",
+                            lambda filename: parsed.append(filename) or original(filename))
+
+        assert len(loader.load(sentiment_files[:1])) == 2
+        assert parsed == []
+
+        # The least recently loaded file makes room for a new one
+        loader.load(sentiment_files[2:])
+        assert list(loader.cache) == [sentiment_files[0], sentiment_files[2]]
+
+    def test_summarize_rows(self, sentiment_files):
+        """Test summarizing reduced rows with a time range."""
+        rows = SentimentFileLoader().load(sentiment_files)
+
+        summary = summarize_rows(rows, ["AAPL", "MSFT"])
+        assert summary["AAPL"]["positive"] == 3
+        assert summary["AAPL"]["avg_sentiment"] == pytest.approx(0.5)
+        assert summary["MSFT"]["likes"] == 6
+
+        summary = summarize_rows(rows, ["AAPL"], since=500, until=1500)
+        assert summary["AAPL"]["total"] == 1
@@ -0,0 +1,79 @@
+"""Unit tests for querying data files."""
+
+import pytest
+
+from app.utils import file_query
+from app.utils import storage
+
+
+def make_records():
+    """Build scored test records."""
+    labels = ['positive', 'negative', 'positive', 'neutral', 'positive']
+    return [
+        {
+            "id": f"post{i}",
+            "text": "test",
+            "keyword": "stocks" if i % 2 == 0 else "crypto",
+            "stock_symbols": ["AAPL"] if i < 3 else ["TSLA"],
+            "sentiment": {
+                "vader": {"compound": 0.1 * i},
+                "consensus": {"label": label, "confidence": 1.0}
+            }
+        }
+        for i, label in enumerate(labels)
+    ]
+
+
+class TestFileQuery:
+    """Tests for the file_query module."""
+
+    def test_parse_fields(self):
+        """Test parsing the fields parameter."""
+        assert file_query.parse_fields(None) is None
+        assert file_query.parse_fields("id, sentiment.vader.compound,") == ["id", "sentiment.vader.compound"]
+
+    def test_project(self):
+        """Test projecting nested fields."""
+        item = make_records()[1]
+
+        projected = file_query.project(item, ["id", "sentiment.vader.compound", "missing"])
+
+        assert projected == {"id": "post1", "sentiment": {"vader": {"compound": 0.1}}}
+
+    @pytest.mark.parametrize("extension", [".json", ".jsonl", ".parquet", ".arrow"])
+    def test_query_file(self, tmp_path, extension):
+        """Test filtering, projecting and paginating in each format."""
+        filename = str(tmp_path / f"data{extension}")
+        storage.save_records(make_records(), filename)
+
+        page = file_query.query_file(filename, 0, 1, ["id"], symbol="AAPL", label="positive")
+
+        assert page["data"] == [{"id": "post0"}]
+        assert page["next_cursor"] == 1
+
+        page = file_query.query_file(filename, page["next_cursor"], 1, ["id"], symbol="AAPL", label="positive")
+
+        assert page["data"] == [{"id": "post2"}]
+        assert page["next_cursor"] is None
+        assert page["total"] == 2
+
+    @pytest.mark.parametrize("extension", [".jsonl", ".arrow"])
+    def test_iter_matching(self, tmp_path, extension):
+        """Test streaming the matching records of a file."""
+        filename = str(tmp_path / f"data{extension}")
+        storage.save_records(make_records(), filename)
+
+        items = list(file_query.iter_matching(filename, None, keyword="stocks"))
+
+        assert [item["id"] for item in items] == ["post0", "post2", "post4"]
+        assert items[0]["sentiment"]["consensus"]["label"] == "positive"
+
+    def test_total_unknown_before_end(self, tmp_path):
+        """Test that streamed formats only report a total once fully scanned."""
+        filename = str(tmp_path / "data.jsonl")
+        storage.save_records(make_records(), filename)
+
+        page = file_query.query_file(filename, 0, 2)
+
+        assert page["next_cursor"] == 2
+        assert page["total"] is None
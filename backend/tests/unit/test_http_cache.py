@@ -0,0 +1,53 @@
+"""Unit tests for the HTTP caching and compression helpers."""
+
+import gzip
+
+from flask import jsonify
+
+from app.utils import http_cache
+
+
+class TestHttpCache:
+    """Tests for the http_cache module."""
+
+    def test_make_etag(self):
+        """Test that ETags depend on every part."""
+        assert http_cache.make_etag('a', 1) == http_cache.make_etag('a', 1)
+        assert http_cache.make_etag('a', 1) != http_cache.make_etag('a', 2)
+
+    def test_not_modified(self, app):
+        """Test answering matching If-None-Match headers with 304."""
+        etag = http_cache.make_etag('test')
+
+        with app.test_request_context(headers={'If-None-Match': f'"{etag}"'}):
+            response = http_cache.not_modified(etag)
+            assert response.status_code == 304
+            assert response.get_etag() == (etag, False)
+            assert response.headers['Cache-Control'] == 'no-cache'
+
+        with app.test_request_context(headers={'If-None-Match': f'"{etag}-gzip"'}):
+            assert http_cache.not_modified(etag).status_code == 304
+
+        with app.test_request_context(headers={'If-None-Match': '"other"'}):
+            assert http_cache.not_modified(etag) is None
+
+    def test_compress_response(self, app):
+        """Test gzip compression of large responses."""
+        payload = {'data': ['test'] * 500}
+
+        with app.test_request_context(headers={'Accept-Encoding': 'gzip'}):
+            response = http_cache.cache_response(jsonify(payload), 'abc')
+            response = http_cache.compress_response(response)
+
+            assert response.headers['Content-Encoding'] == 'gzip'
+            assert 'Accept-Encoding' in response.vary
+            assert response.get_etag() == ('abc-gzip', False)
+            assert app.json.loads(gzip.decompress(response.get_data())) == payload
+
+        with app.test_request_context():
+            response = http_cache.compress_response(jsonify(payload))
+            assert 'Content-Encoding' not in response.headers
+
+        with app.test_request_context(headers={'Accept-Encoding': 'gzip'}):
+            response = http_cache.compress_response(jsonify({'data': 'small'}))
+            assert 'Content-Encoding' not in response.headers
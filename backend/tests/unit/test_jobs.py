@@ -0,0 +1,130 @@
+"""Unit tests for the background job queue."""
+
+import asyncio
+import threading
+
+import pytest
+
+from app.utils.jobs import Job, JobQueue, JobStore, QueueFullError
+
+
+class TestJobQueue:
+    """Tests for the Job and JobQueue classes."""
+
+    def test_job_progress(self):
+        """Test progress counters, throughput and ETA."""
+        job = Job('analyze', 'posts_scored', total=10)
+
+        assert list(job.track(range(4), 'posts_scored')) == [0, 1, 2, 3]
+
+        job.started_at = job.created_at - 2
+        status = job.to_dict()
+        assert status['progress'] == {'posts_scored': 4}
+        assert status['throughput'] == pytest.approx(2.0, rel=0.1)
+        assert status['eta_seconds'] == pytest.approx(3.0, rel=0.1)
+
+    def test_run_job(self):
+        """Test running a job to completion."""
+        queue = JobQueue(max_workers=1)
+
+        def task(job, items):
+            for _ in job.track(items, 'items'):
+                pass
+            return {'count': len(items)}
+
+        job = queue.submit('count', task, 'items', items=[1, 2, 3])
+
+        assert job.wait(5)
+        assert job.status == 'succeeded'
+        assert job.result == {'count': 3}
+        assert job.to_dict()['progress'] == {'items': 3}
+        assert queue.get(job.id) is job
+        queue.shutdown()
+
+    def test_failed_job(self):
+        """Test that exceptions mark the job as failed."""
+        queue = JobQueue(max_workers=1)
+
+        def task(job):
+            raise RuntimeError("boom")
+
+        job = queue.submit('fail', task, 'items')
+
+        assert job.wait(5)
+        assert job.status == 'failed'
+        assert job.error == 'boom'
+        queue.shutdown()
+
+    def test_queue_full(self):
+        """Test that the number of unfinished jobs is bounded."""
+        queue = JobQueue(max_workers=1, max_queued=1)
+        release = threading.Event()
+
+        queue.submit('block', lambda job: release.wait(5), 'items')
+        with pytest.raises(QueueFullError):
+            queue.submit('block', lambda job: None, 'items')
+
+        release.set()
+        queue.shutdown()
+
+    def test_run_coroutine_jobs(self):
+        """Test that coroutine jobs wait on the event loop, not in worker threads."""
+        queue = JobQueue(max_workers=1, max_queued=1)
+
+        async def task(job, delay):
+            await asyncio.sleep(delay)
+            job.advance('items')
+            return threading.current_thread().name
+
+        # Far more concurrent jobs than worker threads or the thread job limit
+        jobs = [queue.submit('sleep', task, 'items', delay=0.2) for _ in range(50)]
+
+        assert all(job.wait(5) for job in jobs)
+        assert {job.status for job in jobs} == {'succeeded'}
+        assert {job.result for job in jobs} == {'async-loop'}
+        assert all(job.to_dict()['progress'] == {'items': 1} for job in jobs)
+        queue.shutdown()
+
+    def test_async_queue_full(self):
+        """Test that the number of unfinished coroutine jobs is bounded."""
+        queue = JobQueue(max_workers=1, max_async_queued=1)
+        release = threading.Event()
+
+        async def task(job):
+            while not release.is_set():
+                await asyncio.sleep(0.01)
+
+        job = queue.submit('block', task, 'items')
+        with pytest.raises(QueueFullError):
+            queue.submit('block', task, 'items')
+
+        release.set()
+        assert job.wait(5)
+        queue.shutdown()
+
+    def test_status_shared_through_store(self, tmp_path):
+        """Test that another process sharing the store can report a job."""
+        path = str(tmp_path / "jobs.db")
+        queue = JobQueue(max_workers=1, max_history=1, store=JobStore(path))
+        other = JobQueue(store=JobStore(path))
+
+        def task(job, items):
+            for _ in job.track(items, 'items'):
+                pass
+            return {'count': len(items)}
+
+        first = queue.submit('count', task, 'items', items=[1, 2])
+        assert first.wait(5)
+        second = queue.submit('count', task, 'items', items=[1, 2, 3])
+        assert second.wait(5)
+
+        status = other.status(second.id)
+        assert status['status'] == 'succeeded'
+        assert status['progress'] == {'items': 3}
+        assert status['result'] == {'count': 3}
+
+        # Finished jobs beyond the history size are forgotten
+        assert other.status(first.id) is None
+        assert [job['id'] for job in other.statuses()] == [second.id]
+        assert other.status('unknown') is None
+        queue.shutdown()
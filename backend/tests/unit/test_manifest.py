@@ -0,0 +1,140 @@
+"""Unit tests for the data file manifest."""
+
+import os
+
+import pytest
+
+from app.utils import storage
+from app.utils.manifest import FileManifest, scan_file
+
+
+def make_post(post_id, symbol, keyword, timestamp):
+    """Build a preprocessed post."""
+    return {"id": post_id, "keyword": keyword, "stock_symbols": [symbol], "timestamp": timestamp}
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """Data directory with two data files and one sentiment file."""
+    storage.save_records([
+        make_post("post1", "AAPL", "stocks", 100.0),
+        make_post("post2", "TSLA", "stocks", 300.0)
+    ], str(tmp_path / "bluesky_data_1.json"))
+    storage.save_records([
+        make_post("post3", "NVDA", "crypto", 500.0)
+    ], str(tmp_path / "bluesky_data_2.parquet"))
+    storage.save_records([
+        make_post("post1", "AAPL", "stocks", 100.0)
+    ], str(tmp_path / "bluesky_data_1_sentiment.json"))
+    (tmp_path / "notes.txt").write_text("not a data file")
+    return tmp_path
+
+
+class TestFileManifest:
+    """Tests for the FileManifest class."""
+
+    def test_scan_file(self, data_dir):
+        """Test reading the metadata of a file."""
+        meta = scan_file(str(data_dir / "bluesky_data_1.json"))
+
+        assert meta == {
+            "records": 2, "start": 100.0, "end": 300.0,
+            "keywords": ["stocks"], "symbols": ["AAPL", "TSLA"]
+        }
+
+    def test_query(self, data_dir):
+        """Test filtering, sorting and paginating files."""
+        manifest = FileManifest(str(data_dir))
+
+        files, total = manifest.query(kind="data")
+        assert [f["name"] for f in files] == ["bluesky_data_1.json", "bluesky_data_2.parquet"]
+        assert total == 2
+        assert files[1]["format"] == "parquet"
+
+        files, total = manifest.query(kind="data", sort="records", descending=True, limit=1)
+        assert [f["name"] for f in files] == ["bluesky_data_1.json"]
+        assert total == 2
+
+        files, _ = manifest.query(symbol="AAPL")
+        assert {f["name"] for f in files} == {"bluesky_data_1.json", "bluesky_data_1_sentiment.json"}
+
+        files, _ = manifest.query(kind="data", since=400.0)
+        assert [f["name"] for f in files] == ["bluesky_data_2.parquet"]
+
+        with pytest.raises(ValueError):
+            manifest.query(sort="color")
+
+    def test_rescans_only_changed_files(self, data_dir, monkeypatch):
+        """Test that unchanged files are not opened again."""
+        manifest = FileManifest(str(data_dir), refresh_interval=0)
+        manifest.refresh()
+
+        scanned = []
+        monkeypatch.setattr("app.utils.manifest.scan_file",
+                            lambda filename: scanned.append(os.path.basename(filename)) or
+                            {"records": 0, "start": None, "end": None, "keywords": [], "symbols": []})
+
+        storage.save_records([make_post("post4", "AMD", "stocks", 700.0)],
+                             str(data_dir / "bluesky_data_3.json"))
+        manifest.refresh()
+
+        assert scanned == ["bluesky_data_3.json"]
+
+    def test_unreadable_file_is_listed(self, data_dir):
+        """Test that files with unreadable metadata are still listed."""
+        (data_dir / "bluesky_data_4.json").write_text("{not json")
+        manifest = FileManifest(str(data_dir))
+
+        files, _ = manifest.query(kind="data")
+
+        broken = [f for f in files if f["name"] == "bluesky_data_4.json"][0]
+        assert broken["records"] is None
+        assert "error" in broken
+
+    def test_partitioned_files(self, data_dir):
+        """Test that files in partitions are listed by their relative path."""
+        manifest = FileManifest(str(data_dir), refresh_interval=0)
+        manifest.refresh()
+
+        partition = data_dir / "date=2024-01-02" / "hour=05"
+        partition.mkdir(parents=True)
+        storage.save_records([make_post("post5", "AMD", "stocks", 900.0)], str(partition / "bluesky_data_5.json"))
+
+        files, _ = manifest.query(symbol="AMD")
+        assert [f["name"] for f in files] == ["date=2024-01-02/hour=05/bluesky_data_5.json"]
+        assert manifest.get(str(partition / "bluesky_data_5.json"))["records"] == 1
+        assert manifest.get(str(data_dir.parent / "bluesky_data_5.json")) is None
+
+    def test_refresh_interval(self, data_dir, monkeypatch):
+        """Test that the directory is not listed again before the refresh interval passes."""
+        manifest = FileManifest(str(data_dir), refresh_interval=60)
+        manifest.refresh()
+
+        listed = []
+        monkeypatch.setattr("app.utils.manifest.partitions.list_files",
+                            lambda path: listed.append(path) or [])
+        storage.save_records([make_post("post4", "AMD", "stocks", 700.0)],
+                             str(data_dir / "bluesky_data_3.json"))
+
+        files, total = manifest.query(kind="data")
+        assert listed == []
+        assert total == 2
+
+        manifest.refresh(force=True)
+        assert listed == [str(data_dir)]
+
+    def test_sentiment_version(self, data_dir):
+        """Test that only sentiment file changes bump the sentiment version."""
+        manifest = FileManifest(str(data_dir), refresh_interval=0)
+        version = manifest.sentiment_version()
+
+        storage.save_records([make_post("post4", "AMD", "stocks", 700.0)],
+                             str(data_dir / "bluesky_data_3.json"))
+        assert manifest.sentiment_version() == version
+
+        storage.save_records([make_post("post4", "AMD", "stocks", 700.0)],
+                             str(data_dir / "bluesky_data_3_sentiment.json"))
+        assert manifest.sentiment_version() == version + 1
+
+        os.remove(data_dir / "bluesky_data_3_sentiment.json")
+        assert manifest.sentiment_version() == version + 2
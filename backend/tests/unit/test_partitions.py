@@ -0,0 +1,73 @@
+"""Unit tests for the time-partitioned data layout."""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from app.utils import storage
+from app.utils import partitions
+
+# 2024-01-02 00:00:00 UTC
+DAY = 1704153600.0
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """Data directory with one flat file and files in three hourly partitions."""
+    storage.save_records([{"id": "old"}], str(tmp_path / "bluesky_data_0.json"))
+    for partition in ("date=2024-01-01/hour=23", "date=2024-01-02/hour=00", "date=2024-01-02/hour=05"):
+        (tmp_path / partition).mkdir(parents=True)
+        storage.save_records([{"id": partition}], str(tmp_path / partition / "bluesky_data_1_sentiment.json"))
+    (tmp_path / "date=2024-01-02" / "hour=05" / "notes.txt").write_text("not a data file")
+    return tmp_path
+
+
+class TestPartitions:
+    """Tests for partition naming and pruning."""
+
+    def test_partition_dir(self):
+        """Test that partitions are named by the UTC write time."""
+        when = datetime(2024, 1, 2, 5, 30, tzinfo=timezone.utc)
+
+        assert partitions.partition_dir(when) == "date=2024-01-02/hour=05"
+        assert partitions.partition_range("date=2024-01-02/hour=05/bluesky_data_1.json") == (
+            DAY + 5 * 3600, DAY + 6 * 3600
+        )
+        assert partitions.partition_range("bluesky_data_1.json") is None
+        assert storage.data_filename("1", "jsonl", partition="date=2024-01-02/hour=05") == (
+            "data/date=2024-01-02/hour=05/bluesky_data_1.jsonl"
+        )
+
+    def test_list_all_files(self, data_dir):
+        """Test listing flat and partitioned files."""
+        assert partitions.list_files(str(data_dir)) == [
+            "bluesky_data_0.json",
+            "date=2024-01-01/hour=23/bluesky_data_1_sentiment.json",
+            "date=2024-01-02/hour=00/bluesky_data_1_sentiment.json",
+            "date=2024-01-02/hour=05/bluesky_data_1_sentiment.json"
+        ]
+
+    def test_prune_by_time_range(self, data_dir):
+        """Test that partitions outside the range are skipped; flat files are kept."""
+        names = partitions.list_files(str(data_dir), since=DAY + 7200, until=DAY + 86400, max_lag=0)
+        assert names == ["bluesky_data_0.json", "date=2024-01-02/hour=05/bluesky_data_1_sentiment.json"]
+
+        # A pipeline started at 00:xx may still write posts created after 01:00
+        names = partitions.list_files(str(data_dir), since=DAY + 3600, until=DAY + 86400, max_lag=0)
+        assert "date=2024-01-02/hour=00/bluesky_data_1_sentiment.json" in names
+
+        # Posts written at 05:00 may be up to max_lag older than their partition
+        names = partitions.list_files(str(data_dir), until=DAY, max_lag=6 * 3600)
+        assert len(names) == 4
+
+        names = partitions.list_files(str(data_dir), until=DAY, max_lag=0)
+        assert names == ["bluesky_data_0.json", "date=2024-01-01/hour=23/bluesky_data_1_sentiment.json"]
+
+    def test_resolve(self):
+        """Test that names cannot point outside the data directory."""
+        assert partitions.resolve("date=2024-01-02/hour=05/x.json") == "data/date=2024-01-02/hour=05/x.json"
+
+        with pytest.raises(ValueError):
+            partitions.resolve("../secret.json")
+        with pytest.raises(ValueError):
+            partitions.resolve("/etc/passwd")
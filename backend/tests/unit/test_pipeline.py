@@ -0,0 +1,72 @@
+"""Unit tests for the streaming pipeline."""
+
+import itertools
+import threading
+
+import pytest
+
+from app.utils.pipeline import Pipeline, PipelineError
+
+
+def double(items):
+    """Double each item."""
+    for item in items:
+        yield item * 2
+
+
+class TestPipeline:
+    """Tests for the Pipeline class."""
+
+    def test_stages_in_order(self):
+        """Test that items pass through every stage in order."""
+        pipeline = Pipeline(range(100), [
+            ('double', double),
+            ('increment', lambda items: (item + 1 for item in items))
+        ], queue_size=5)
+
+        assert list(pipeline) == [item * 2 + 1 for item in range(100)]
+        assert pipeline.counts == {'double': 100, 'increment': 100}
+
+    def test_stages_run_in_separate_threads(self):
+        """Test that each stage runs in its own thread."""
+        threads = {}
+
+        def record(name):
+            def stage(items):
+                for item in items:
+                    threads[name] = threading.current_thread().name
+                    yield item
+            return stage
+
+        Pipeline(range(3), [('a', record('a')), ('b', record('b'))]).run()
+
+        assert threads == {'a': 'pipeline-a', 'b': 'pipeline-b'}
+
+    def test_backpressure(self):
+        """Test that bounded queues stop the source from running far ahead."""
+        produced = []
+
+        def source():
+            for item in itertools.count():
+                produced.append(item)
+                yield item
+
+        stream = iter(Pipeline(source(), [('double', double)], queue_size=2))
+        assert next(stream) == 0
+        stream.close()
+
+        assert len(produced) < 10
+
+    def test_stage_error(self):
+        """Test that a failing stage stops the pipeline and reaches the consumer."""
+        def fail(items):
+            for item in items:
+                if item == 3:
+                    raise ValueError("bad item")
+                yield item
+
+        with pytest.raises(PipelineError) as excinfo:
+            list(Pipeline(range(10), [('fail', fail), ('double', double)]))
+
+        assert excinfo.value.stage == 'fail'
+        assert isinstance(excinfo.value.error, ValueError)
@@ -0,0 +1,89 @@
+"""Unit tests for the price store and the sentiment/price correlation engine."""
+
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.models.prices import LocalPriceProvider, PriceStore, normalize_bars
+from app.utils import correlation
+
+DAY = 86400
+
+
+class TestPriceStore:
+    """Tests for the local price provider and the price store."""
+
+    def test_normalize_daily_bars(self):
+        """Test column matching and end-of-day stamps for date-only bars."""
+        frame = pd.DataFrame({"Date": ["2024-01-01", "bad"], "Close": [10.0, 11.0], "Adj Close": [9.5, 10.5]})
+
+        bars = normalize_bars(frame, symbol="aapl")
+
+        assert list(bars["symbol"]) == ["AAPL"]
+        assert list(bars["timestamp"]) == [1704067200 + DAY]
+        assert list(bars["close"]) == [9.5]
+
+    def test_files_per_symbol_and_combined(self, tmp_path):
+        """Test reading per-symbol CSV files and combined Parquet files."""
+        pd.DataFrame({"timestamp": [200, 100, 200], "close": [2.0, 1.0, 3.0]}).to_csv(tmp_path / "AAPL.csv", index=False)
+        pd.DataFrame({"symbol": ["TSLA", "MSFT"], "timestamp": [100, 100], "close": [5.0, 6.0]}).to_parquet(
+            tmp_path / "prices.parquet")
+
+        store = PriceStore(LocalPriceProvider(str(tmp_path)))
+        closes = store.closes(["AAPL", "TSLA", "NVDA"])
+
+        assert closes["AAPL"][0].tolist() == [100, 200]
+        assert closes["AAPL"][1].tolist() == [1.0, 3.0]
+        assert closes["TSLA"][1].tolist() == [5.0]
+        assert len(closes["NVDA"][0]) == 0
+
+    def test_reload_on_change(self, tmp_path):
+        """Test that changed files are picked up."""
+        path = tmp_path / "AAPL.csv"
+        pd.DataFrame({"timestamp": [100], "close": [1.0]}).to_csv(path, index=False)
+        store = PriceStore(LocalPriceProvider(str(tmp_path)))
+        assert store.closes(["AAPL"])["AAPL"][1].tolist() == [1.0]
+
+        pd.DataFrame({"timestamp": [100, 200], "close": [1.0, 2.0]}).to_csv(path, index=False)
+        os.utime(path, ns=(1, 1))
+
+        assert store.closes(["AAPL"])["AAPL"][1].tolist() == [1.0, 2.0]
+
+
+class TestCorrelation:
+    """Tests for the as-of join and the lagged correlations."""
+
+    def test_asof_join_and_returns(self):
+        """Test that returns only use past prices and skip buckets without bars."""
+        timestamps = np.array([DAY, 2 * DAY, 4 * DAY], dtype=float)
+        closes = np.array([100.0, 110.0, 99.0])
+        buckets = np.arange(5, dtype=float) * DAY
+
+        returns = correlation.bucket_returns([(timestamps, closes)], buckets, DAY)[:, 0]
+
+        # Bucket ends: 1d (100), 2d (110), 3d (110, no new bar), 4d (99), 5d (99)
+        assert np.isnan(returns[0])
+        assert returns[1] == pytest.approx(0.1)
+        assert np.isnan(returns[2])
+        assert returns[3] == pytest.approx(-0.1)
+        assert np.isnan(returns[4])
+
+    def test_leading_sentiment(self):
+        """Test that sentiment leading returns by two buckets shows at lag 2."""
+        rng = np.random.default_rng(0)
+        sentiment = rng.normal(size=(60, 3))
+        returns = np.full((60, 3), np.nan)
+        returns[2:, 0] = sentiment[:-2, 0] * 0.01
+        returns[:, 1] = rng.normal(size=60)
+        sentiment[::5, 1] = np.nan
+
+        result = correlation.lagged_correlations(sentiment, returns, max_lag=3)
+        summary = correlation.lead_lag_summary(result, ["AAPL", "TSLA", "NVDA"])
+
+        assert result["lags"].tolist() == [-3, -2, -1, 0, 1, 2, 3]
+        assert summary["AAPL"]["best_lag"] == 2
+        assert summary["AAPL"]["best_correlation"] == pytest.approx(1.0)
+        assert summary["TSLA"]["observations"][3] == 48
+        assert abs(summary["TSLA"]["contemporaneous"]) < 0.5
+        assert summary["NVDA"]["best_lag"] is None
@@ -0,0 +1,51 @@
+"""Unit tests for the versioned response cache."""
+
+from app.utils.response_cache import ResponseCache
+
+
+class TestResponseCache:
+    """Tests for the ResponseCache class."""
+
+    def test_hit_and_version_invalidation(self):
+        """Test that entries are only served for the version they were built from."""
+        cache = ResponseCache()
+        key = ('stock-summary', ('AAPL', 'TSLA'), None, None)
+
+        assert cache.get(key, 1) is None
+        cache.put(key, 1, b'{"a": 1}')
+
+        assert cache.get(key, 1) == b'{"a": 1}'
+        assert cache.get(key, 2) is None
+        assert cache.stats() == {'entries': 1, 'bytes': 8, 'hits': 1, 'misses': 2}
+
+        cache.put(key, 2, b'{"a": 2}')
+        assert cache.get(key, 2) == b'{"a": 2}'
+        assert cache.stats()['bytes'] == 8
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entries are evicted first."""
+        cache = ResponseCache(max_entries=2)
+        cache.put('a', 1, b'a')
+        cache.put('b', 1, b'b')
+
+        # Touch 'a' so that 'b' is the least recently used entry
+        assert cache.get('a', 1) == b'a'
+        cache.put('c', 1, b'c')
+
+        assert cache.get('b', 1) is None
+        assert cache.get('a', 1) == b'a'
+        assert cache.get('c', 1) == b'c'
+
+    def test_size_limit(self):
+        """Test that the total size of the bodies is bounded."""
+        cache = ResponseCache(max_bytes=10)
+        cache.put('a', 1, b'x' * 6)
+        cache.put('b', 1, b'x' * 6)
+
+        assert cache.get('a', 1) is None
+        assert cache.stats()['bytes'] == 6
+
+        # Bodies larger than the whole cache are not stored
+        cache.put('c', 1, b'x' * 11)
+        assert cache.get('c', 1) is None
+        assert cache.get('b', 1) is not None
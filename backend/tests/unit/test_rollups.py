@@ -0,0 +1,117 @@
+"""Unit tests for the incrementally maintained sentiment rollups."""
+
+import pytest
+
+from app.models.database import Database
+from app.models import rollups
+
+
+def make_result(post_id, symbols, label, compound, timestamp, likes=0):
+    """Build a scored post."""
+    return {
+        "id": post_id,
+        "text": "test post",
+        "timestamp": timestamp,
+        "likes": likes,
+        "stock_symbols": symbols,
+        "sentiment": {
+            "vader": {"compound": compound},
+            "consensus": {"label": label, "confidence": 1.0}
+        }
+    }
+
+
+@pytest.fixture
+def database():
+    """In-memory database."""
+    database = Database("sqlite:///:memory:")
+    yield database
+    database.close()
+
+
+class TestRollups:
+    """Tests for the rollups module."""
+
+    def test_bucket_start(self):
+        """Test that timestamps are truncated to the hour."""
+        assert rollups.bucket_start(7199.5) == 3600
+        assert rollups.bucket_start(7200) == 7200
+
+    def test_summary_statistics(self, database):
+        """Test label counts, mean, standard deviation and engagement."""
+        database.insert_sentiment([
+            make_result("post1", ["AAPL"], "positive", 0.5, 1000, likes=3),
+            make_result("post2", ["AAPL"], "negative", -0.5, 2000, likes=4),
+            make_result("post3", ["AAPL", "MSFT"], "neutral", 0.0, 5000)
+        ])
+
+        summary = database.stock_summary(["AAPL", "MSFT"])
+
+        assert summary["AAPL"]["positive"] == 1
+        assert summary["AAPL"]["negative"] == 1
+        assert summary["AAPL"]["neutral"] == 1
+        assert summary["AAPL"]["total"] == 3
+        assert summary["AAPL"]["avg_sentiment"] == pytest.approx(0.0)
+        assert summary["AAPL"]["compound_std"] == pytest.approx((0.5 / 3) ** 0.5)
+        assert summary["AAPL"]["likes"] == 7
+        assert summary["MSFT"]["total"] == 1
+
+    def test_rescoring_replaces_contribution(self, database):
+        """Test that scoring a post again does not double count it."""
+        database.insert_sentiment([make_result("post1", ["AAPL"], "positive", 0.5, 1000, likes=1)])
+        database.insert_sentiment([make_result("post1", ["AAPL"], "negative", -0.3, 1000, likes=5)])
+
+        summary = database.stock_summary(["AAPL"])["AAPL"]
+
+        assert summary["total"] == 1
+        assert summary["positive"] == 0
+        assert summary["negative"] == 1
+        assert summary["avg_sentiment"] == pytest.approx(-0.3)
+        assert summary["likes"] == 5
+
+    def test_engagement_update_replaces_contribution(self, database):
+        """Test that refreshed engagement counts replace the old ones in the rollups."""
+        database.insert_sentiment([
+            make_result("post1", ["AAPL"], "positive", 0.5, 1000, likes=1),
+            make_result("post2", ["AAPL"], "negative", -0.5, 2000, likes=2)
+        ])
+
+        database.update_engagement({
+            "post1": {"likes": 10, "replies": 2, "reposts": 1},
+            "missing": {"likes": 5, "replies": 0, "reposts": 0}
+        })
+
+        summary = database.stock_summary(["AAPL"])["AAPL"]
+        assert summary["total"] == 2
+        assert summary["likes"] == 12
+        assert summary["replies"] == 2
+        assert summary["reposts"] == 1
+        posts = {item["id"]: item for item in database.query_posts(symbol="AAPL")}
+        assert posts["post1"]["likes"] == 10
+
+        before = database.stock_summary(["AAPL"])
+        database.rebuild_rollups()
+        assert database.stock_summary(["AAPL"]) == before
+
+    def test_time_range(self, database):
+        """Test restricting the summary to a time range."""
+        database.insert_sentiment([
+            make_result("post1", ["AAPL"], "positive", 0.5, 1000),
+            make_result("post2", ["AAPL"], "negative", -0.5, 10000),
+            make_result("post3", ["AAPL"], "neutral", 0.0, 20000)
+        ])
+
+        assert database.stock_summary(["AAPL"], since=7200)["AAPL"]["total"] == 2
+        assert database.stock_summary(["AAPL"], since=7200, until=14400)["AAPL"]["total"] == 1
+        assert database.stock_summary(["AAPL"], until=3600)["AAPL"]["total"] == 1
+
+    def test_rebuild_matches_incremental(self, database):
+        """Test that rebuilding from stored results gives the same rollups."""
+        database.insert_sentiment([
+            make_result(f"post{i}", ["AAPL"], "positive", i / 10, i * 1000) for i in range(10)
+        ])
+        before = database.stock_summary(["AAPL"])
+
+        database.rebuild_rollups()
+
+        assert database.stock_summary(["AAPL"]) == before
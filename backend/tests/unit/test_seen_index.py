@@ -0,0 +1,87 @@
+import os
+import json
+import pytest
+from app.utils.seen_index import BloomFilter, SeenIndex, collect_ids
+
+
+class TestBloomFilter:
+    """Test cases for the Bloom filter."""
+
+    def test_no_false_negatives(self):
+        """Test that every added key is reported as present."""
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        keys = [f"at://did:plc:user/app.bsky.feed.post/{i}" for i in range(1000)]
+        for key in keys:
+            bloom.add(key)
+
+        assert all(key in bloom for key in keys)
+        assert bloom.count == 1000
+
+    def test_false_positive_rate(self):
+        """Test that the false positive rate stays near the configured rate."""
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"seen{i}")
+
+        false_positives = sum(1 for i in range(10000) if f"unseen{i}" in bloom)
+        assert false_positives < 300
+
+
+class TestSeenIndex:
+    """Test cases for the seen-post index."""
+
+    @pytest.fixture
+    def index(self):
+        """Create an in-memory index."""
+        return SeenIndex(':memory:', capacity=100)
+
+    def test_mark_and_seen(self, index):
+        """Test that marked URIs are seen at their stage only."""
+        assert index.mark(['a', 'b', 'b'], 'stored') == 2
+        assert index.mark(['b', 'c'], 'stored') == 1
+
+        assert index.seen(['a', 'c', 'd'], 'stored') == {'a', 'c'}
+        assert index.seen(['a'], 'scored') == set()
+        assert index.count('stored') == 3
+
+    def test_filter_new(self, index):
+        """Test that only unseen items and items without an id pass."""
+        index.mark(['post1'], 'scored')
+        items = [{'id': 'post1'}, {'id': 'post2'}, {'text': 'no id'}]
+
+        assert list(index.filter_new(items, 'scored', batch_size=2)) == [{'id': 'post2'}, {'text': 'no id'}]
+
+    def test_collect_ids(self):
+        """Test collecting post ids while passing items through."""
+        ids = []
+        items = [{'id': 'post1'}, {'text': 'no id'}, {'id': 'post2'}]
+
+        assert list(collect_ids(iter(items), ids)) == items
+        assert ids == ['post1', 'post2']
+
+    def test_filter_grows(self, index):
+        """Test that the Bloom filter is rebuilt larger past its capacity."""
+        index.mark([f"post{i}" for i in range(250)], 'stored')
+
+        assert index.filters['stored'].capacity >= 250
+        assert index.seen([f"post{i}" for i in range(250)], 'stored') == {f"post{i}" for i in range(250)}
+
+    def test_persistence(self, tmp_path):
+        """Test that a reopened index knows the marked URIs."""
+        path = str(tmp_path / 'seen.db')
+        SeenIndex(path, capacity=100).mark(['post1'], 'stored')
+
+        assert SeenIndex(path, capacity=100).seen(['post1', 'post2'], 'stored') == {'post1'}
+
+    def test_rebuild(self, index, tmp_path):
+        """Test rebuilding the index from data and sentiment files."""
+        hour_dir = tmp_path / 'date=2024-01-01' / 'hour=12'
+        os.makedirs(hour_dir)
+        with open(hour_dir / 'bluesky_data_20240101_120000.json', 'w') as f:
+            json.dump([{'id': 'post1'}, {'id': 'post2'}], f)
+        with open(hour_dir / 'bluesky_data_20240101_120000_sentiment.json', 'w') as f:
+            json.dump([{'id': 'post1'}], f)
+        index.mark(['stale'], 'stored')
+
+        assert index.rebuild(str(tmp_path)) == {'stored': 2, 'scored': 1}
+        assert index.seen(['post1', 'stale'], 'stored') == {'post1'}
@@ -4,6 +4,7 @@ import pytest
 from unittest.mock import patch, MagicMock
 import numpy as np
 
+from app.models import sentiment
 from app.models.sentiment import SentimentAnalyzer
 
 
@@ -216,4 +217,21 @@ class TestSentimentAnalyzer:
             result = analyzer.analyze_text("Test text")
             assert 'vader' in result
             assert 'textblob' not in result
-            assert 'consensus' in result 
\ No newline at end of file
+            assert 'consensus' in result 
+
+    @patch("app.models.sentiment.nltk.data.find")
+    @patch("app.models.sentiment.SentimentIntensityAnalyzer")
+    @patch("app.models.sentiment.pipeline")
+    def test_preloaded_models_are_shared(self, mock_pipeline, mock_vader, mock_find, monkeypatch):
+        """Test that analyzers reuse preloaded models instead of loading their own."""
+        monkeypatch.setattr(sentiment, "_shared_models", {})
+
+        sentiment.preload_models(use_transformers=True)
+        first = SentimentAnalyzer(use_transformers=True)
+        second = SentimentAnalyzer(use_transformers=True)
+
+        mock_pipeline.assert_called_once()
+        mock_vader.assert_called_once()
+        assert first.transformer is second.transformer is mock_pipeline.return_value
+        assert first.vader is second.vader
+
@@ -0,0 +1,84 @@
+"""Unit tests for the storage helpers."""
+
+import pytest
+
+from app.utils import storage
+
+
+class TestStorage:
+    """Tests for the storage module."""
+
+    def test_file_classification(self):
+        """Test recognising data and sentiment files."""
+        assert storage.is_data_file("bluesky_data_20240101_120000.json")
+        assert storage.is_data_file("bluesky_data_20240101_120000.parquet")
+        assert not storage.is_data_file("bluesky_data_20240101_120000_sentiment.json")
+        assert storage.is_sentiment_file("bluesky_data_20240101_120000_sentiment.parquet")
+        assert not storage.is_sentiment_file("notes.txt")
+
+    def test_filenames(self):
+        """Test building data and sentiment file names."""
+        data_file = storage.data_filename("20240101_120000", "parquet")
+        assert data_file == "data/bluesky_data_20240101_120000.parquet"
+        assert storage.sentiment_filename(data_file) == "data/bluesky_data_20240101_120000_sentiment.parquet"
+
+        with pytest.raises(ValueError):
+            storage.data_filename("20240101_120000", "xml")
+
+    @pytest.mark.parametrize("extension", [".json", ".jsonl", ".parquet", ".arrow"])
+    def test_save_and_load(self, tmp_path, extension):
+        """Test saving and loading records in each format."""
+        records = [{"id": "post1", "text": "test post", "tokens": ["test", "post"]}]
+        filename = str(tmp_path / f"data{extension}")
+
+        storage.save_records(records, filename)
+
+        assert storage.load_records(filename) == records
+
+    def test_jsonl_append_and_stream(self, tmp_path):
+        """Test appending to and streaming from a JSON Lines file."""
+        filename = str(tmp_path / "data.jsonl")
+
+        assert storage.write_jsonl([{"id": "post1"}], filename) == 1
+        assert storage.append_jsonl(iter([{"id": "post2"}, {"id": "post3"}]), filename) == 2
+
+        stream = storage.iter_records(filename)
+        assert next(stream) == {"id": "post1"}
+        assert [item["id"] for item in stream] == ["post2", "post3"]
+
+    def test_iter_records_json_array(self, tmp_path):
+        """Test that existing JSON array files can still be streamed."""
+        filename = str(tmp_path / "data.json")
+        with open(filename, "w") as f:
+            f.write('[{"id": "post1"}, {"id": "post2"}]')
+
+        assert [item["id"] for item in storage.iter_records(filename)] == ["post1", "post2"]
+
+    def test_write_records_from_generator(self, tmp_path):
+        """Test writing a stream of records in each format."""
+        for extension in (".json", ".jsonl", ".parquet"):
+            filename = str(tmp_path / f"results{extension}")
+            records = ({"id": f"post{i}"} for i in range(3))
+
+            assert storage.write_records(records, filename) == 3
+            assert len(storage.load_records(filename)) == 3
+
+    def test_merge_records(self, tmp_path):
+        """Test adding records to a file without losing the stored ones."""
+        filename = str(tmp_path / "results.jsonl")
+        storage.save_records([{"id": "post1", "score": 1}, {"id": "post2", "score": 1}], filename)
+
+        assert storage.merge_records(iter([]), filename) == 0
+        assert storage.merge_records([{"id": "post2", "score": 2}, {"id": "post3", "score": 2}], filename) == 2
+        assert storage.load_records(filename) == [
+            {"id": "post1", "score": 1}, {"id": "post2", "score": 2}, {"id": "post3", "score": 2}
+        ]
+
+    @pytest.mark.parametrize("extension", [".jsonl", ".json"])
+    def test_tee_records(self, tmp_path, extension):
+        """Test writing records while passing them through."""
+        filename = str(tmp_path / f"data{extension}")
+        records = [{"id": "post1"}, {"id": "post2"}]
+
+        assert list(storage.tee_records(iter(records), filename)) == records
+        assert storage.load_records(filename) == records
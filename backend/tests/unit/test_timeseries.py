@@ -0,0 +1,73 @@
+"""Unit tests for the sentiment time series."""
+
+import pytest
+
+from app.models.database import Database
+from app.utils import timeseries
+
+DAY = 86400
+
+
+def make_row(symbols, label, compound, timestamp):
+    """Build a reduced sentiment row."""
+    return (tuple(symbols), label, compound, timestamp, 1, 0, 0)
+
+
+class TestTimeseries:
+    """Tests for the timeseries module."""
+
+    def test_rows_to_frame(self):
+        """Test exploding reduced rows into per-symbol hourly rows."""
+        frame = timeseries.rows_to_frame([
+            make_row(["AAPL", "TSLA"], "positive", 0.5, 3700.0),
+            make_row(["AAPL"], "negative", None, 10.0),
+            make_row(["AAPL"], "neutral", 0.0, None)
+        ])
+
+        assert list(frame['symbol']) == ["AAPL", "TSLA", "AAPL"]
+        assert list(frame['bucket_start']) == [3600, 3600, 0]
+        assert list(frame['positive']) == [1, 1, 0]
+        assert list(frame['compound_count']) == [1, 1, 0]
+
+    def test_daily_buckets_and_smoothing(self):
+        """Test bucket sums, the weighted rolling mean and the EWMA."""
+        frame = timeseries.rows_to_frame([
+            make_row(["AAPL"], "positive", 0.6, 0 * DAY + 100),
+            make_row(["AAPL"], "positive", 0.2, 0 * DAY + 200),
+            make_row(["AAPL"], "negative", -0.4, 2 * DAY + 100)
+        ])
+
+        result = timeseries.compute_timeseries(frame, ["AAPL", "TSLA"], DAY, 2)
+
+        assert result['timestamps'] == [0, DAY, 2 * DAY]
+        aapl = result['series']['AAPL']
+        assert aapl['volume'] == [2, 0, 1]
+        assert aapl['positive'] == [2, 0, 0]
+        assert aapl['mean_compound'][0] == pytest.approx(0.4)
+        assert aapl['mean_compound'][1] is None
+        assert aapl['rolling_mean_compound'][1] == pytest.approx(0.4)
+        assert aapl['rolling_mean_compound'][2] == pytest.approx(-0.4)
+        assert aapl['ewma_compound'][1] == pytest.approx(0.4)
+        assert result['series']['TSLA']['volume'] == [0, 0, 0]
+
+    def test_database_rollups(self):
+        """Test computing the series from the database rollups."""
+        database = Database("sqlite:///:memory:")
+        database.insert_sentiment([{
+            "id": f"post{i}",
+            "timestamp": i * 3600.0,
+            "stock_symbols": ["AAPL"],
+            "sentiment": {"vader": {"compound": 0.5}, "consensus": {"label": "positive", "confidence": 1.0}}
+        } for i in range(48)])
+
+        frame = database.rollup_frame(["AAPL"], since=0, until=2 * DAY)
+        result = timeseries.compute_timeseries(frame, ["AAPL"], DAY, 1, since=0, until=2 * DAY)
+
+        assert result['series']['AAPL']['volume'] == [24, 24]
+        database.close()
+
+    def test_too_many_buckets(self):
+        """Test that unbounded queries are rejected."""
+        with pytest.raises(ValueError):
+            timeseries.compute_timeseries(timeseries.empty_frame(), ["AAPL"], 3600, 1,
+                                          since=0, until=3600 * (timeseries.MAX_BUCKETS + 1))
@@ -0,0 +1,95 @@
+"""Unit tests for the engagement-weighted sentiment aggregates."""
+
+import numpy as np
+import pytest
+
+from app.utils import weighting
+
+
+def make_row(symbols, label, compound, timestamp, likes=0, replies=0, reposts=0, followers=None):
+    """Build a reduced sentiment row."""
+    return (tuple(symbols), label, compound, timestamp, likes, replies, reposts, followers)
+
+
+class TestPostWeights:
+    """Tests for the post weight transforms."""
+
+    def test_log_transform(self):
+        """Test that weights grow with the log of the engagement."""
+        weights = weighting.post_weights([0, 9, 0], [0, 0, 0], [0, 0, 5])
+
+        assert weights == pytest.approx([1.0, 1 + np.log(10), 1 + np.log(11)])
+
+    def test_linear_transform_with_cap(self):
+        """Test the linear transform and the cap."""
+        weights = weighting.post_weights([1, 100], [0, 0], [0, 0], transform='linear', cap=10)
+
+        assert weights == pytest.approx([2.0, 10.0])
+
+    def test_followers(self):
+        """Test that follower counts are used when known."""
+        weights = weighting.post_weights([0, 0], [0, 0], [0, 0], followers=[np.nan, 99],
+                                         followers_weight=1.0)
+
+        assert weights == pytest.approx([1.0, 1 + np.log(100)])
+
+    def test_unsupported_transform(self):
+        """Test that unknown transforms are rejected."""
+        with pytest.raises(ValueError):
+            weighting.post_weights([0], [0], [0], transform='sqrt')
+
+    def test_weight_params_from_config(self):
+        """Test reading the parameters from the application config."""
+        params = weighting.weight_params({'WEIGHT_TRANSFORM': 'linear', 'WEIGHT_CAP': '50'})
+
+        assert params['transform'] == 'linear'
+        assert params['cap'] == 50.0
+        assert params['reposts_weight'] == 2.0
+
+
+class TestWeightedSummary:
+    """Tests for the weighted per-symbol summary."""
+
+    def test_engagement_shifts_the_mean(self):
+        """Test that a post with engagement outweighs one without."""
+        rows = [
+            make_row(["AAPL"], "positive", 0.5, 1000.0, likes=99),
+            make_row(["AAPL", "TSLA"], "negative", -0.5, 2000.0),
+            make_row(["TSLA"], "neutral", None, 3000.0)
+        ]
+
+        summary = weighting.weighted_summary(weighting.rows_to_arrays(rows), ["AAPL", "TSLA", "MSFT"])
+
+        heavy = 1 + np.log(100)
+        aapl = summary["AAPL"]
+        assert aapl["total_weight"] == pytest.approx(heavy + 1)
+        assert aapl["avg_sentiment"] == pytest.approx((0.5 * heavy - 0.5) / (heavy + 1))
+        assert aapl["positive"] == pytest.approx(heavy / (heavy + 1))
+        assert aapl["effective_posts"] == pytest.approx((heavy + 1) ** 2 / (heavy ** 2 + 1))
+
+        # Posts without a compound score count for the shares but not the mean
+        assert summary["TSLA"]["avg_sentiment"] == pytest.approx(-0.5)
+        assert summary["TSLA"]["neutral"] == pytest.approx(0.5)
+        assert summary["MSFT"] == {
+            "positive": 0.0, "neutral": 0.0, "negative": 0.0,
+            "total_weight": 0.0, "effective_posts": 0.0, "avg_sentiment": 0.0, "compound_std": 0.0
+        }
+
+    def test_time_range(self):
+        """Test that posts outside the range or without a time are skipped."""
+        rows = [
+            make_row(["AAPL"], "positive", 0.5, 1000.0),
+            make_row(["AAPL"], "negative", -0.5, 2000.0),
+            make_row(["AAPL"], "negative", -0.5, None)
+        ]
+
+        summary = weighting.weighted_summary(weighting.rows_to_arrays(rows), ["AAPL"], since=500, until=1500)
+
+        assert summary["AAPL"]["total_weight"] == pytest.approx(1.0)
+        assert summary["AAPL"]["avg_sentiment"] == pytest.approx(0.5)
+
+    def test_empty(self):
+        """Test summarizing no posts."""
+        summary = weighting.weighted_summary(weighting.rows_to_arrays([]), ["AAPL"])
+
+        assert summary["AAPL"]["total_weight"] == 0.0
@@ -0,0 +1,34 @@
+"""WSGI entry point for production.
+
+Run with a pre-fork server, e.g.:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+The application and the sentiment models are loaded here, in the master
+process, before the workers are forked.
+"""
+
+import os
+import gc
+import logging
+from app import create_app
+from app.models.sentiment import preload_models
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+# Ensure the data directory exists
+os.makedirs('data', exist_ok=True)
+
+# Create the Flask application
+app = create_app()
+
+if app.config['PRELOAD_MODELS']:
+    preload_models(use_transformers=app.config['USE_TRANSFORMERS'])
+
+# Keep the garbage collector from touching (and so copying) the preloaded
+# objects in every worker
+gc.freeze()